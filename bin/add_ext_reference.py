@@ -15,17 +15,20 @@
 # limitations under the License.
 
 import argparse
+import json
 import logging
+import os
 import sys
 
 import requests
 from ebi_eva_common_pyutils.config import cfg
 from ebi_eva_common_pyutils.logger import logging_config as log_cfg
-from ebi_eva_internal_pyutils.metadata_utils import get_metadata_connection_handle
 from ebi_eva_internal_pyutils.pg_utils import get_all_results_for_query, execute_query
 from retry import retry
 
+from eva_submission.biosample_submission.biosamples_submitters import SampleReferenceSubmitter
 from eva_submission.eload_utils import check_project_exists_in_evapro, check_existing_project_in_ena
+from eva_submission.metadata_connection import get_metadata_connection_handle
 from eva_submission.submission_config import load_config
 
 logger = log_cfg.get_logger(__name__)
@@ -87,17 +90,77 @@ def _curie_exist(curie):
     return False
 
 
+def get_biosamples_per_project(project_accessions):
+    """Retrieve the BioSamples accessions of the samples in the files of each project from EVAPRO."""
+    query = (
+        "select distinct pa.project_accession, s.biosample_accession "
+        "from project_analysis pa "
+        "join analysis_file af on af.analysis_accession=pa.analysis_accession "
+        "join file_sample fs on fs.file_id=af.file_id "
+        "join sample s on s.sample_id=fs.sample_id "
+        "where pa.project_accession = any(%s) "
+        "order by pa.project_accession, s.biosample_accession"
+    )
+    samples_per_project = {}
+    with get_metadata_connection_handle(cfg['maven']['environment'], cfg['maven']['settings_file']) as conn:
+        with conn.cursor() as cursor:
+            # The project accessions are bound as a list parameter rather than formatted in the query
+            cursor.execute(query, (list(project_accessions),))
+            for project_accession, biosample_accession in cursor.fetchall():
+                samples_per_project.setdefault(project_accession, []).append(biosample_accession)
+    return samples_per_project
+
+
+def add_project_reference_to_biosamples(project_accessions, checkpoint_file=None):
+    """
+    Add the EVA study external reference to the BioSamples of each project. The samples linked are saved in the
+    checkpoint file so that a backfill that is interrupted can be resumed.
+    """
+    linked_samples_per_project = {}
+    if checkpoint_file and os.path.isfile(checkpoint_file):
+        with open(checkpoint_file) as open_file:
+            linked_samples_per_project = json.load(open_file)
+
+    def checkpoint(project_accession, accessions):
+        linked_samples_per_project[project_accession] = list(accessions)
+        if checkpoint_file:
+            with open(checkpoint_file, 'w') as open_file:
+                json.dump(linked_samples_per_project, open_file)
+
+    samples_per_project = get_biosamples_per_project(project_accessions)
+    for project_accession in project_accessions:
+        sample_accessions = samples_per_project.get(project_accession)
+        if not sample_accessions:
+            logger.warning(f'No BioSamples found in EVAPRO for {project_accession}')
+            continue
+        sample_reference_submitter = SampleReferenceSubmitter(sample_accessions, project_accession)
+        sample_reference_submitter.add_reference_to_samples(
+            linked_samples_per_project.get(project_accession),
+            lambda accessions: checkpoint(project_accession, accessions)
+        )
+
+
 def main():
-    arg_parser = argparse.ArgumentParser(description='Add an external reference to the project specified')
-    arg_parser.add_argument('--project_accession', type=str, required=True,
-                            help='The project associated with the external reference.')
-    arg_parser.add_argument('--source_database', required=True, default='PubMed',
+    arg_parser = argparse.ArgumentParser(description='Add an external reference to the project specified or add the '
+                                                     'EVA study as external reference of the BioSamples of projects')
+    arg_group = arg_parser.add_mutually_exclusive_group(required=True)
+    arg_group.add_argument('--project_accession', type=str,
+                           help='The project associated with the external reference.')
+    arg_group.add_argument('--biosamples_projects', type=str, nargs='+',
+                           help='Projects whose BioSamples should reference the EVA study page. Used to backfill '
+                                'the links from BioSamples to EVA.')
+    arg_parser.add_argument('--source_database', default='PubMed',
                             help='The database the external reference relates to')
 
-    arg_parser.add_argument('--identifier', required=True, help='The identifier of the external reference')
+    arg_parser.add_argument('--identifier', help='The identifier of the external reference')
+    arg_parser.add_argument('--checkpoint_file',
+                            help='Json file recording the BioSamples already linked to each project, used to resume '
+                                 'an interrupted backfill')
     arg_parser.add_argument('--debug', action='store_true', default=False,
                             help='Set the script to output logging information at debug level')
     args = arg_parser.parse_args()
+    if args.project_accession and not args.identifier:
+        arg_parser.error('--identifier is required with --project_accession')
 
     log_cfg.add_stdout_handler()
 
@@ -107,6 +170,10 @@ def main():
     # Load the config_file from default location
     load_config()
 
+    if args.biosamples_projects:
+        add_project_reference_to_biosamples(args.biosamples_projects, args.checkpoint_file)
+        return 0
+
     if not check_project_exists_in_evapro(args.project_accession):
         logger.error(f'{args.project_accession} does not exist in EVAPRO')
         return 1
@@ -16,10 +16,11 @@
 
 import logging
 from argparse import ArgumentParser
+from contextlib import ExitStack
 
 from ebi_eva_common_pyutils.logger import logging_config as log_cfg
 
-from eva_submission.eload_brokering import EloadBrokering
+from eva_submission.eload_brokering import EloadBrokering, broker_eloads
 from eva_submission.eload_utils import check_existing_project_in_ena
 from eva_submission.submission_config import load_config
 
@@ -36,7 +37,9 @@ def ENA_Project(project):
 
 def main():
     argparse = ArgumentParser(description='Broker validated ELOAD to BioSamples and ENA')
-    argparse.add_argument('--eload', required=True, type=int, help='The ELOAD number for this submission')
+    argparse.add_argument('--eload', required=True, type=int, nargs='+',
+                          help='The ELOAD number for this submission. Several ELOADs can be brokered together, in '
+                               'which case their ENA receipts are waited for concurrently')
     argparse.add_argument('--debug', action='store_true', default=False,
                           help='Set the script to output logging information at debug level')
     argparse.add_argument('--project_accession', required=False, type=ENA_Project,
@@ -68,13 +71,21 @@ def main():
 
     # Load the config_file from default location
     load_config()
-    with EloadBrokering(args.eload, nextflow_config=args.nextflow_config) as brokering:
-        brokering.upgrade_to_new_version_if_needed()
+    if args.project_accession and len(args.eload) > 1:
+        argparse.error('--project_accession can only be used with a single ELOAD')
+    with ExitStack() as stack:
+        brokerings = [
+            stack.enter_context(EloadBrokering(eload, nextflow_config=args.nextflow_config))
+            for eload in args.eload
+        ]
+        for brokering in brokerings:
+            brokering.upgrade_to_new_version_if_needed()
         if not args.report:
-            brokering.broker(brokering_tasks_to_force=args.force, existing_project=args.project_accession,
-                             async_upload=not args.use_legacy_upload, dry_ena_upload=args.dry_ena_upload,
-                             output_format=args.output_format, resume=args.resume)
-        brokering.report()
+            broker_eloads(brokerings, brokering_tasks_to_force=args.force, existing_project=args.project_accession,
+                          async_upload=not args.use_legacy_upload, dry_ena_upload=args.dry_ena_upload,
+                          output_format=args.output_format, resume=args.resume)
+        for brokering in brokerings:
+            brokering.report()
 
 
 if __name__ == "__main__":
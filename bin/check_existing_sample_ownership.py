@@ -17,10 +17,9 @@
 import argparse
 import csv
 
-from ebi_eva_common_pyutils.biosamples_communicators import WebinHALCommunicator
-from ebi_eva_common_pyutils.config import cfg
 from ebi_eva_common_pyutils.logger import logging_config as log_cfg
 
+from eva_submission.biosample_submission.sample_cache import get_sample_cache
 from eva_submission.submission_config import load_config
 from eva_submission.xlsx.xlsx_parser_eva import EvaXlsxReader
 
@@ -34,6 +33,9 @@ def main():
     arg_parser.add_argument('--output', required=True,
                             help='CSV file containing the ownership information for all existing samples in the '
                                  'metadata spreadsheet')
+    arg_parser.add_argument('--cache_file',
+                            help='Json file where the samples retrieved from BioSamples are cached, for example the '
+                                 'sample cache of the ELOAD (18_brokering/biosamples/biosamples_sample_cache.json)')
     args = arg_parser.parse_args()
 
     log_cfg.add_stdout_handler()
@@ -41,10 +43,11 @@ def main():
     # Load the config_file from default location
     load_config()
     metadata_reader = EvaXlsxReader(args.metadata_file)
-    communicator = WebinHALCommunicator(
-        cfg.query('biosamples', 'webin_url'), cfg.query('biosamples', 'bsd_url'),
-        cfg.query('biosamples', 'webin_username'), cfg.query('biosamples', 'webin_password')
-    )
+    sample_cache = get_sample_cache(args.cache_file)
+    sample_cache.prefetch([
+        sample_row.get('Sample Accession').strip()
+        for sample_row in metadata_reader.samples if sample_row.get('Sample Accession')
+    ])
     with open(args.output, 'w') as open_ouptut:
         sample_attrs = ['accession', 'name', 'domain', 'webinSubmissionAccountId', 'status']
         writer = csv.DictWriter(open_ouptut, fieldnames=sample_attrs + ['owner'])
@@ -55,7 +58,7 @@ def main():
                 sample_accession = sample_row.get('Sample Accession').strip()
                 res = {}
                 try:
-                    json_response = communicator.follows_link('samples', join_url=sample_accession)
+                    json_response = sample_cache.get_sample(sample_accession)
                     if json_response:
                         for attr in sample_attrs:
                             res[attr] = json_response.get(attr)
@@ -42,6 +42,9 @@ def main():
     argparse.add_argument('--nextflow_config', type=str, required=False,
                           help='Path to the configuration file that will be applied to the Nextflow process. '
                                'This will override other nextflow configuration files on the filesystem')
+    argparse.add_argument('--no_refresh_ena_metadata', action='store_false', dest='refresh_ena_metadata',
+                          help='Read the metadata of the project from the snapshots of the ELOAD that are more recent '
+                               'than ena.snapshot_max_age rather than fetching it from ENA again.')
     argparse.add_argument('--debug', action='store_true', default=False,
                           help='Set the script to output logging information at debug level.')
 
@@ -54,7 +57,8 @@ def main():
     # Load the config_file from default location
     load_config()
 
-    with EloadIngestion(args.eload, nextflow_config=args.nextflow_config) as ingestion:
+    with EloadIngestion(args.eload, nextflow_config=args.nextflow_config,
+                        refresh_ena_metadata=args.refresh_ena_metadata) as ingestion:
         ingestion.upgrade_to_new_version_if_needed()
         ingestion.run_ingestion_and_qc_result(
             tasks=args.tasks,
@@ -18,6 +18,8 @@ from argparse import ArgumentParser
 
 from ebi_eva_common_pyutils.logger import logging_config as log_cfg
 
+from eva_submission.metadata_connection import checkout_statistics
+from eva_submission.qc_utils import DEFAULT_QC_MAX_WORKERS, DEFAULT_QC_CHECK_TIMEOUT
 from eva_submission.submission_qc_checks import EloadQC
 from eva_submission.submission_config import load_config
 
@@ -27,6 +29,12 @@ logger = log_cfg.get_logger(__name__)
 def main():
     argparse = ArgumentParser(description='Run QC checks on the submitted eload')
     argparse.add_argument('--eload', required=True, type=int, help='The ELOAD number of the submission.')
+    argparse.add_argument('--max_workers', type=int, default=None,
+                          help='Number of QC checks run concurrently. Default to qc_max_workers in the config or '
+                               f'{DEFAULT_QC_MAX_WORKERS}')
+    argparse.add_argument('--check_timeout', type=int, default=None,
+                          help='Number of seconds after which a QC check fails. Default to qc_check_timeout in the '
+                               f'config or {DEFAULT_QC_CHECK_TIMEOUT}')
 
     args = argparse.parse_args()
 
@@ -36,7 +44,8 @@ def main():
     load_config()
 
     with EloadQC(args.eload) as eload_qc:
-        eload_qc.run_qc_checks_for_submission()
+        eload_qc.run_qc_checks_for_submission(max_workers=args.max_workers, check_timeout=args.check_timeout)
+    logger.debug(checkout_statistics.summary())
 
 
 if __name__ == "__main__":
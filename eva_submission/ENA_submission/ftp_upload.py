@@ -0,0 +1,295 @@
+# Copyright 2026 EMBL - European Bioinformatics Institute
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import ftplib
+import hashlib
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from ebi_eva_common_pyutils.logger import AppLogger
+
+from eva_submission.eload_utils import read_md5
+
+DEFAULT_FTP_SESSIONS = 4
+DEFAULT_FTP_TRIES = 3
+DEFAULT_FTP_RETRY_DELAY = 2
+FTP_BLOCK_SIZE = 1024 * 1024
+
+
+class HackFTP_TLS(ftplib.FTP_TLS):
+    """
+    Hack from https://stackoverflow.com/questions/14659154/ftpes-session-reuse-required
+    to work around bug in Python standard library: https://bugs.python.org/issue19500
+    Explicit FTPS, with shared TLS session
+    """
+    def ntransfercmd(self, cmd, rest=None):
+        conn, size = ftplib.FTP.ntransfercmd(self, cmd, rest)
+        if self._prot_p:
+            conn = self.context.wrap_socket(conn,
+                                            server_hostname=self.host,
+                                            session=self.sock.session)  # this is the fix
+        return conn, size
+
+
+class FtpUploadError(Exception):
+    """Raised when an uploaded file cannot be verified on the FTP server."""
+
+
+class ChecksumMismatchError(Exception):
+    """Raised when a local file does not match the checksum of its .md5 file."""
+
+
+class UploadJournal:
+    """
+    Progress of the uploads saved in a json file after each change. A file is complete, or its upload in progress, as
+    long as it has not changed locally since it was recorded.
+    """
+
+    def __init__(self, journal_file=None):
+        self.journal_file = journal_file
+        self.lock = threading.Lock()
+        self.entries = {}
+        if journal_file and os.path.isfile(journal_file):
+            with open(journal_file) as open_file:
+                self.entries = json.load(open_file)
+
+    @staticmethod
+    def _local_state(file_path):
+        stat = os.stat(file_path)
+        return {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+
+    def _has_status(self, file_path, statuses):
+        with self.lock:
+            entry = self.entries.get(os.path.abspath(file_path))
+        return bool(entry) and entry.get('status') in statuses and \
+            all(entry.get(key) == value for key, value in self._local_state(file_path).items())
+
+    def is_complete(self, file_path):
+        return self._has_status(file_path, ('complete',))
+
+    def is_in_progress(self, file_path):
+        """The upload of this version of the file was started, or failed, and did not complete."""
+        return self._has_status(file_path, ('started', 'failed'))
+
+    def record(self, file_path, status, **values):
+        with self.lock:
+            self.entries[os.path.abspath(file_path)] = {'status': status, **self._local_state(file_path), **values}
+            self._save()
+
+    def _save(self):
+        if not self.journal_file:
+            return
+        tmp_file = f'{self.journal_file}.{os.getpid()}.tmp'
+        with open(tmp_file, 'w') as open_file:
+            json.dump(self.entries, open_file, indent=2)
+        os.replace(tmp_file, self.journal_file)
+
+
+class FtpUploader(AppLogger):
+    """
+    Uploads files to a directory of an FTP server using several concurrent sessions.
+    Each file is uploaded by a single session and is retried with a new connection when the transfer fails. A partial
+    file left on the server by an interrupted upload of the same local file, according to the journal, is completed
+    from where it stopped with REST. Any other file already on the server with a different size is replaced. The size
+    of the uploaded file is checked on the server and its MD5, computed while it is sent, is checked against its .md5
+    file when there is one and against the checksum reported by the server when it supports XMD5.
+    Completed files are recorded in the journal so that they are skipped when the upload is run again, as long as the
+    server still has them with the same size. Files whose upload started or failed are sent again even when the server
+    has them with the same size.
+    """
+
+    def __init__(self, host, port, username, password, remote_dir, nb_sessions=DEFAULT_FTP_SESSIONS, timeout=30,
+                 journal_file=None, use_tls=True, tries=DEFAULT_FTP_TRIES, retry_delay=DEFAULT_FTP_RETRY_DELAY):
+        self.host = host
+        self.port = port
+        self.username = username
+        self.password = password
+        self.remote_dir = remote_dir
+        self.nb_sessions = nb_sessions
+        self.timeout = timeout
+        self.use_tls = use_tls
+        self.tries = tries
+        self.retry_delay = retry_delay
+        self.journal = UploadJournal(journal_file)
+        self._local = threading.local()
+        self._sessions = []
+        self._sessions_lock = threading.Lock()
+        self._remote_dir_lock = threading.Lock()
+        self._remote_dir_exists = False
+
+    def _connect(self):
+        if self.use_tls:
+            ftp = HackFTP_TLS()
+            # Set a weak cipher to enable connection
+            # https://stackoverflow.com/questions/38015537/python-requests-exceptions-sslerror-dh-key-too-small
+            ftp.context.set_ciphers('DEFAULT:@SECLEVEL=1')
+        else:
+            ftp = ftplib.FTP()
+        ftp.connect(self.host, port=self.port, timeout=self.timeout)
+        ftp.login(self.username, self.password)
+        if self.use_tls:
+            ftp.prot_p()
+        with self._remote_dir_lock:
+            if not self._remote_dir_exists:
+                if self.remote_dir not in ftp.nlst():
+                    self.info(f'Create {self.remote_dir} directory')
+                    ftp.mkd(self.remote_dir)
+                self._remote_dir_exists = True
+        ftp.cwd(self.remote_dir)
+        ftp.voidcmd('TYPE I')
+        try:
+            ftp.supports_xmd5 = 'XMD5' in ftp.sendcmd('FEAT')
+        except ftplib.error_perm:
+            ftp.supports_xmd5 = False
+        return ftp
+
+    def _session(self):
+        """FTP session of the current thread, connected when first needed."""
+        ftp = getattr(self._local, 'ftp', None)
+        if ftp is None:
+            ftp = self._connect()
+            self._local.ftp = ftp
+            with self._sessions_lock:
+                self._sessions.append(ftp)
+        return ftp
+
+    def _close_session(self, ftp):
+        self._local.ftp = None
+        with self._sessions_lock:
+            if ftp in self._sessions:
+                self._sessions.remove(ftp)
+        try:
+            ftp.quit()
+        except ftplib.all_errors:
+            ftp.close()
+
+    def _close_all_sessions(self):
+        with self._sessions_lock:
+            sessions = list(self._sessions)
+        for ftp in sessions:
+            self._close_session(ftp)
+
+    @staticmethod
+    def _remote_size(ftp, file_name):
+        try:
+            return ftp.size(file_name)
+        except ftplib.error_perm:
+            return None
+
+    @staticmethod
+    def _remote_md5(ftp, file_name):
+        if not ftp.supports_xmd5:
+            return None
+        try:
+            return ftp.sendcmd(f'XMD5 {file_name}').split()[-1].lower()
+        except ftplib.error_perm:
+            return None
+
+    def upload_files(self, files_to_upload):
+        """Uploads all the files and raises the first error once all the uploads are finished."""
+        if not files_to_upload:
+            return
+        self.info(f'Upload {len(files_to_upload)} files to {self.host} with {self.nb_sessions} sessions')
+        try:
+            with ThreadPoolExecutor(max_workers=self.nb_sessions) as executor:
+                futures = [executor.submit(self.upload_file, file_to_upload) for file_to_upload in files_to_upload]
+            errors = [future.exception() for future in futures if future.exception()]
+        finally:
+            self._close_all_sessions()
+        if errors:
+            raise errors[0]
+
+    def upload_file(self, file_to_upload):
+        """Uploads one file in the session of the current thread, reconnecting between attempts."""
+        for attempt in range(1, self.tries + 1):
+            try:
+                return self._upload_file(self._session(), file_to_upload)
+            except ftplib.all_errors + (FtpUploadError,) as e:
+                self.warning(f'Upload of {os.path.basename(file_to_upload)} failed (attempt {attempt}/{self.tries}): '
+                             f'{e}')
+                ftp = getattr(self._local, 'ftp', None)
+                if ftp:
+                    self._close_session(ftp)
+                if attempt == self.tries:
+                    self.journal.record(file_to_upload, 'failed', error=str(e))
+                    raise
+                time.sleep(self.retry_delay * attempt)
+
+    def _upload_file(self, ftp, file_to_upload):
+        file_name = os.path.basename(file_to_upload)
+        local_size = os.path.getsize(file_to_upload)
+        remote_size = self._remote_size(ftp, file_name)
+        if self.journal.is_complete(file_to_upload):
+            if remote_size == local_size:
+                self.info(f'{file_name} was already uploaded and has the same size on the FTP. Skip upload.')
+                return
+            self.warning(f'{file_name} was already uploaded but has {remote_size} bytes on the FTP instead of '
+                         f'{local_size}. Upload it again.')
+        elif remote_size == local_size and self.journal.is_in_progress(file_to_upload):
+            # The file was not verified after it was sent, it might not match its checksum
+            self.warning(f'{file_name} has the same size on the FTP but its upload did not complete. Upload it again.')
+        elif remote_size == local_size:
+            self.warning(f'{file_name} Already exist and has the same size on the FTP. Skip upload.')
+            self.journal.record(file_to_upload, 'complete', bytes_sent=0)
+            return
+        offset = 0
+        if remote_size and remote_size < local_size and self.journal.is_in_progress(file_to_upload):
+            offset = remote_size
+        elif remote_size is not None:
+            # The file on the server does not come from an interrupted upload of this version of the local file
+            self.info(f'Remove {file_name} from the FTP before uploading it from the start')
+            ftp.delete(file_name)
+        self.journal.record(file_to_upload, 'started', offset=offset)
+
+        md5 = hashlib.md5()
+        with open(file_to_upload, 'rb') as open_file:
+            # The part already on the server is read to compute the checksum of the whole file
+            remaining = offset
+            while remaining:
+                block = open_file.read(min(remaining, FTP_BLOCK_SIZE))
+                if not block:
+                    break
+                md5.update(block)
+                remaining -= len(block)
+            if offset:
+                self.info(f'Resume upload of {file_name} from byte {offset}')
+            else:
+                self.info(f'Upload {file_name} to FTP')
+            start = time.perf_counter()
+            ftp.storbinary(f'STOR {file_name}', open_file, blocksize=FTP_BLOCK_SIZE, callback=md5.update,
+                           rest=offset or None)
+            duration = time.perf_counter() - start
+        checksum = md5.hexdigest()
+
+        remote_size = self._remote_size(ftp, file_name)
+        if remote_size != local_size:
+            raise FtpUploadError(f'{file_name} has {remote_size} bytes on the FTP instead of {local_size}')
+        remote_md5 = self._remote_md5(ftp, file_name)
+        if remote_md5 and remote_md5 != checksum:
+            # Removed so that the next attempt sends the whole file again
+            ftp.delete(file_name)
+            raise FtpUploadError(f'{file_name} has MD5 {remote_md5} on the FTP instead of {checksum}')
+        md5_file = file_to_upload + '.md5'
+        if os.path.isfile(md5_file) and read_md5(md5_file) != checksum:
+            self.journal.record(file_to_upload, 'failed', md5=checksum)
+            raise ChecksumMismatchError(f'{file_to_upload} has MD5 {checksum} but {md5_file} contains '
+                                        f'{read_md5(md5_file)}')
+
+        bytes_sent = local_size - offset
+        throughput = bytes_sent / duration / 1000000 if duration else 0
+        self.info(f'Uploaded {file_name}: {bytes_sent} bytes in {duration:.1f}s ({throughput:.2f} MB/s)')
+        self.journal.record(file_to_upload, 'complete', offset=offset, bytes_sent=bytes_sent, md5=checksum,
+                            duration=round(duration, 3), throughput_mb_per_s=round(throughput, 3))
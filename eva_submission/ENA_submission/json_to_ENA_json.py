@@ -8,6 +8,7 @@ from functools import cached_property
 from ebi_eva_common_pyutils.logger import AppLogger
 from ebi_eva_common_pyutils.taxonomy.taxonomy import get_scientific_name_from_ensembl
 
+from eva_submission.ENA_submission.streaming_writer import write_json_object
 from eva_submission.eload_utils import check_project_format, check_existing_project_in_ena, is_single_insdc_sequence, \
     is_vcf_file
 
@@ -42,25 +43,18 @@ class EnaJsonConverter(AppLogger):
         return project_accession
 
     def create_single_submission_file(self):
-        ena_json_data = {}
-
-        ena_projects_json_obj = (
-            [self._create_ena_project_json_obj(self.eva_json_data['project'])]
-            if not self.is_existing_project else []
-        )
-
-        ena_analysis_json_obj = self._create_ena_analysis_json_obj()
         ena_submission_json_obj = self._create_ena_submission_json_obj(
             self.eva_json_data['project'], self.submission_id
         )
-
-        ena_json_data.update({
-            'submission': ena_submission_json_obj,
-            'analyses': ena_analysis_json_obj
-        })
-        if ena_projects_json_obj:
-            ena_json_data['projects'] = ena_projects_json_obj
-        self.write_to_json(ena_json_data, self.output_ena_json_file)
+        ena_json_fields = [
+            ('submission', ena_submission_json_obj),
+            # Analyses are created while they are written to avoid holding them all in memory
+            ('analyses', self._iter_ena_analysis_json_objs())
+        ]
+        if not self.is_existing_project:
+            ena_json_fields.append(('projects', [self._create_ena_project_json_obj(self.eva_json_data['project'])]))
+        with open(self.output_ena_json_file, 'w') as open_file:
+            write_json_object(open_file, ena_json_fields)
 
         return self.output_ena_json_file
 
@@ -155,15 +149,16 @@ class EnaJsonConverter(AppLogger):
         return ena_project_obj
 
     def _create_ena_analysis_json_obj(self, ):
+        return list(self._iter_ena_analysis_json_objs())
+
+    def _iter_ena_analysis_json_objs(self):
         samples_per_analysis = self._samples_per_analysis(self.eva_json_data.get('sample', []))
         files_per_analysis = self._files_per_analysis(self.eva_json_data.get('files', []))
-        analyses_json = []
         for analysis in self.eva_json_data['analysis']:
             samples = samples_per_analysis[analysis.get('analysisAlias')]
             files = files_per_analysis[analysis.get('analysisAlias')]
 
-            analyses_json.append(self._add_analysis(analysis, samples, files, self.eva_json_data['project']))
-        return analyses_json
+            yield self._add_analysis(analysis, samples, files, self.eva_json_data['project'])
 
     def _add_analysis(self, analysis, samples, files, project):
         def get_centre(analysis, project):
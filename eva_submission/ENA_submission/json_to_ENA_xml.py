@@ -10,7 +10,9 @@ from ebi_eva_common_pyutils.logger import AppLogger
 from ebi_eva_common_pyutils.taxonomy.taxonomy import get_scientific_name_from_ensembl
 
 from eva_submission.ENA_submission.json_to_ENA_json import EnaJsonConverter
-from eva_submission.ENA_submission.xlsx_to_ENA_xml import add_element, add_links, add_attribute_elements, prettify
+from eva_submission.ENA_submission.streaming_writer import PrettyXmlWriter
+from eva_submission.ENA_submission.xlsx_to_ENA_xml import add_element, add_links, add_attribute_elements, prettify, \
+    XSI_NAMESPACE
 from eva_submission.eload_utils import check_project_format, check_existing_project_in_ena, is_single_insdc_sequence, \
     is_vcf_file
 
@@ -117,14 +119,19 @@ class EnaJson2XmlConverter(EnaJsonConverter):
         :return: The top XML element
         """
         root = Element('ANALYSIS_SET')
+        root.extend(self._iter_analysis_elements())
+        return root
+
+    def _iter_analysis_elements(self):
+        """Create the ANALYSIS elements one at a time so they can be written and discarded."""
         samples_per_analysis = self._samples_per_analysis(self.eva_json_data.get('sample', []))
         files_per_analysis = self._files_per_analysis(self.eva_json_data.get('files', []))
-        analyses_json = []
         for analysis_data in self.eva_json_data['analysis']:
             samples_data = samples_per_analysis[analysis_data.get('analysisAlias')]
             files_data = files_per_analysis[analysis_data.get('analysisAlias')]
-            self._add_analysis(root, analysis_data, samples_data, files_data, self.eva_json_data['project'])
-        return root
+            analysis_set = Element('ANALYSIS_SET')
+            self._add_analysis(analysis_set, analysis_data, samples_data, files_data, self.eva_json_data['project'])
+            yield from analysis_set
 
     def _add_analysis(self, root, analysis_data, samples_data, files_data, project_data):
         """
@@ -247,27 +254,29 @@ class EnaJson2XmlConverter(EnaJsonConverter):
 
     @staticmethod
     def write_xml_to_file(xml_element, output_file):
-        xml_element.attrib['xmlns:xsi'] = 'http://www.w3.org/2001/XMLSchema-instance'
+        xml_element.attrib['xmlns:xsi'] = XSI_NAMESPACE
         etree = ElementTree(xml_element)
         with open(output_file, 'bw') as open_file:
             open_file.write(prettify(etree))
 
     def create_single_submission_file(self):
-        root = Element('WEBIN')
-        # Submission ELEMENT
-        action = 'ADD'
-        submissions_elemt = self._create_submission_single_xml(action, self.eva_json_data.get('project', {}))
-        root.append(submissions_elemt)
-
-        # Project ELEMENT
-        if not self.is_existing_project:
-            projects_elemt = self._create_project_xml()
-            root.append(projects_elemt)
-
-        # Analysis ELEMENT
-        analysis_elemt = self._create_analysis_xml()
-        root.append(analysis_elemt)
-
-        self.write_xml_to_file(root, self.single_submission_file)
+        # Written one element at a time to avoid holding all the analyses in memory
+        with open(self.single_submission_file, 'bw') as open_file:
+            writer = PrettyXmlWriter(open_file)
+            writer.start('WEBIN', {'xmlns:xsi': XSI_NAMESPACE})
+            # Submission ELEMENT
+            action = 'ADD'
+            writer.write_element(self._create_submission_single_xml(action, self.eva_json_data.get('project', {})))
+
+            # Project ELEMENT
+            if not self.is_existing_project:
+                writer.write_element(self._create_project_xml())
+
+            # Analysis ELEMENT
+            writer.start('ANALYSIS_SET')
+            for analysis_elemt in self._iter_analysis_elements():
+                writer.write_element(analysis_elemt)
+            writer.end()
+            writer.end()
 
         return self.single_submission_file
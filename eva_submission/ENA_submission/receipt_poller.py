@@ -0,0 +1,101 @@
+# Copyright 2026 EMBL - European Bioinformatics Institute
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import asyncio
+import random
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+
+from ebi_eva_common_pyutils.logger import AppLogger
+
+DEFAULT_POLL_TIMEOUT = 3600
+DEFAULT_POLL_INITIAL_WAIT = 5
+DEFAULT_POLL_MAX_WAIT = 300
+DEFAULT_POLL_BACKOFF_FACTOR = 2
+DEFAULT_POLL_JITTER = 0.2
+
+
+def parse_retry_after(retry_after):
+    """Number of seconds to wait from a Retry-After header given in seconds or as an HTTP date, None if invalid."""
+    if not isinstance(retry_after, str):
+        return None
+    retry_after = retry_after.strip()
+    if retry_after.isdigit():
+        return int(retry_after)
+    try:
+        retry_date = parsedate_to_datetime(retry_after)
+    except (TypeError, ValueError):
+        return None
+    if retry_date.tzinfo is None:
+        retry_date = retry_date.replace(tzinfo=timezone.utc)
+    return max((retry_date - datetime.now(timezone.utc)).total_seconds(), 0)
+
+
+class EnaReceiptPoller(AppLogger):
+    """
+    Polls the ENA asynchronous submission links until the receipt is available. The wait between two polls grows
+    exponentially with some random jitter, or follows the Retry-After header of the response when it is longer than the
+    initial wait.
+    Several links can be polled concurrently from one process so that their waits overlap.
+    """
+
+    def __init__(self, timeout=DEFAULT_POLL_TIMEOUT, initial_wait=DEFAULT_POLL_INITIAL_WAIT,
+                 max_wait=DEFAULT_POLL_MAX_WAIT, backoff_factor=DEFAULT_POLL_BACKOFF_FACTOR, jitter=DEFAULT_POLL_JITTER):
+        self.timeout = timeout
+        self.initial_wait = initial_wait
+        self.max_wait = max_wait
+        self.backoff_factor = backoff_factor
+        self.jitter = jitter
+
+    def next_wait(self, nb_polls, response):
+        retry_after = parse_retry_after(response.headers.get('Retry-After'))
+        if retry_after is not None:
+            # A Retry-After of 0 or in the past does not make the polls more frequent than the initial wait
+            return max(retry_after, self.initial_wait)
+        wait = min(self.initial_wait * self.backoff_factor ** nb_polls, self.max_wait)
+        return wait * random.uniform(1 - self.jitter, 1 + self.jitter)
+
+    async def wait_for_receipt(self, poll_link, get_poll_response):
+        """
+        Calls get_poll_response, which requests poll_link, in a thread until the response is not 202 (Accepted) and
+        returns this response. Raises a TimeoutError when the receipt is not available after the timeout.
+        """
+        start = time.monotonic()
+        nb_polls = 0
+        loop = asyncio.get_running_loop()
+        response = await loop.run_in_executor(None, get_poll_response)
+        while response.status_code == 202:
+            elapsed = time.monotonic() - start
+            if elapsed >= self.timeout:
+                self.error(f'Timed out waiting for {poll_link}')
+                raise TimeoutError(f'Waiting for ENA receipt from {poll_link} for more than {self.timeout} seconds')
+            wait = min(self.next_wait(nb_polls, response), self.timeout - elapsed)
+            self.info(f'Waiting {wait:.0f}s for submission to ENA to be processed ({poll_link})')
+            await asyncio.sleep(wait)
+            nb_polls += 1
+            response = await loop.run_in_executor(None, get_poll_response)
+        return response
+
+    def wait_for_receipts(self, poll_links_and_functions):
+        """
+        Waits concurrently for the receipts of several submissions provided as (poll link, get_poll_response) and
+        returns for each the response or the exception raised while waiting, in the same order.
+        """
+        async def wait_for_all():
+            return await asyncio.gather(
+                *[self.wait_for_receipt(poll_link, get_poll_response)
+                  for poll_link, get_poll_response in poll_links_and_functions],
+                return_exceptions=True
+            )
+        return asyncio.run(wait_for_all())
@@ -0,0 +1,119 @@
+# Copyright 2026 EMBL - European Bioinformatics Institute
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""
+Writers producing the ENA submission documents incrementally so that only one project or analysis is held in memory
+at a time. Their output is identical to the documents written in one go with prettify or json.dump(indent=4).
+"""
+import json
+from collections.abc import Iterator
+
+XML_DECLARATION = '<?xml version="1.0" encoding="utf-8"?>\n'
+XML_INDENT = '    '
+JSON_INDENT = 4
+
+
+def _escape(data):
+    """Escape text and attribute values like minidom does when pretty printing."""
+    return data.replace('&', '&amp;').replace('<', '&lt;').replace('"', '&quot;').replace('>', '&gt;')
+
+
+def _normalise_text(text):
+    """Text goes through an XML parser in prettify, which converts the line endings."""
+    return text.replace('\r\n', '\n').replace('\r', '\n')
+
+
+class PrettyXmlWriter:
+    """
+    Writes an XML document to a binary file as its elements are provided. Containers are opened with start and closed
+    with end, complete ElementTree elements are written with write_element and can be discarded afterwards.
+    The indentation is the one of prettify.
+    """
+
+    def __init__(self, open_file):
+        self.open_file = open_file
+        # Elements opened and not closed yet with whether they have children
+        self.open_elements = []
+        self._write(XML_DECLARATION)
+
+    def _write(self, data):
+        self.open_file.write(data.encode('utf-8'))
+
+    def _open_tag(self, tag, attributes, depth):
+        attributes_str = ''.join(f' {name}="{_escape(value)}"' for name, value in attributes.items())
+        return f'{XML_INDENT * depth}<{tag}{attributes_str}'
+
+    def _add_child(self):
+        if self.open_elements and not self.open_elements[-1][1]:
+            self._write('>\n')
+            self.open_elements[-1][1] = True
+
+    def start(self, tag, attributes=None):
+        self._add_child()
+        self._write(self._open_tag(tag, attributes or {}, len(self.open_elements)))
+        self.open_elements.append([tag, False])
+
+    def end(self):
+        tag, has_children = self.open_elements.pop()
+        if has_children:
+            self._write(f'{XML_INDENT * len(self.open_elements)}</{tag}>\n')
+        else:
+            self._write('/>\n')
+
+    def write_element(self, element):
+        self._add_child()
+        self._write(''.join(self._serialise(element, len(self.open_elements))))
+
+    def _serialise(self, element, depth):
+        yield self._open_tag(element.tag, element.attrib, depth)
+        text = _normalise_text(element.text) if element.text else None
+        children = list(element)
+        if not text and not children:
+            yield '/>\n'
+        elif not children:
+            yield f'>{_escape(text)}</{element.tag}>\n'
+        else:
+            yield '>\n'
+            if text:
+                yield _escape(f'{XML_INDENT * (depth + 1)}{text}\n')
+            for child in children:
+                yield from self._serialise(child, depth + 1)
+            yield f'{XML_INDENT * depth}</{element.tag}>\n'
+
+
+def _indented_json(value, level):
+    # The strings are escaped by json so all the new lines are between values
+    return json.dumps(value, indent=JSON_INDENT).replace('\n', '\n' + ' ' * JSON_INDENT * level)
+
+
+def write_json_object(open_file, fields):
+    """
+    Writes a json object from a list of (key, value) like json.dump(indent=4). Values that are iterators are written
+    as lists, one item at a time.
+    """
+    if not fields:
+        open_file.write('{}')
+        return
+    padding = ' ' * JSON_INDENT
+    open_file.write('{')
+    for position, (key, value) in enumerate(fields):
+        open_file.write(f'{"," if position else ""}\n{padding}{json.dumps(key)}: ')
+        if isinstance(value, Iterator):
+            nb_items = 0
+            for item in value:
+                open_file.write(f'{"," if nb_items else "["}\n{padding * 2}{_indented_json(item, 2)}')
+                nb_items += 1
+            open_file.write(f'\n{padding}]' if nb_items else '[]')
+        else:
+            open_file.write(_indented_json(value, 1))
+    open_file.write('\n}')
@@ -1,7 +1,6 @@
-import ftplib
+import asyncio
 import json
 import os
-import time
 from xml.etree import ElementTree as ET
 
 import requests
@@ -10,30 +9,20 @@ from ebi_eva_common_pyutils.config import cfg
 from requests.auth import HTTPBasicAuth
 from retry import retry
 
+from eva_submission.ENA_submission.ftp_upload import FtpUploader, DEFAULT_FTP_SESSIONS
+# HackFTP_TLS moved to ftp_upload but is still imported from this module by existing code
+from eva_submission.ENA_submission.ftp_upload import HackFTP_TLS  # noqa: F401
 from eva_submission.ENA_submission.json_to_ENA_json import EnaJsonConverter
 from eva_submission.ENA_submission.json_to_ENA_xml import EnaJson2XmlConverter
+from eva_submission.ENA_submission.receipt_poller import EnaReceiptPoller, DEFAULT_POLL_TIMEOUT
 from eva_submission.ENA_submission.xlsx_to_ENA_xml import EnaXlsxConverter
 from eva_submission.eload_utils import get_file_content
 
 
-class HackFTP_TLS(ftplib.FTP_TLS):
-    """
-    Hack from https://stackoverflow.com/questions/14659154/ftpes-session-reuse-required
-    to work around bug in Python standard library: https://bugs.python.org/issue19500
-    Explicit FTPS, with shared TLS session
-    """
-    def ntransfercmd(self, cmd, rest=None):
-        conn, size = ftplib.FTP.ntransfercmd(self, cmd, rest)
-        if self._prot_p:
-            conn = self.context.wrap_socket(conn,
-                                            server_hostname=self.host,
-                                            session=self.sock.session)  # this is the fix
-        return conn, size
-
-
 class ENAUploader(AppLogger):
     def __init__(self, submission_id, metadata_file, output_dir, output_format='json'):
         self.submission_id = submission_id
+        self.output_dir = output_dir
         self.results = {}
         if metadata_file.endswith('.xlsx'):
             self.converter = EnaXlsxConverter(self.submission_id, metadata_file, output_dir, self.submission_id)
@@ -44,7 +33,10 @@ class ENAUploader(AppLogger):
                 self.converter = EnaJson2XmlConverter(submission_id, metadata_file, output_dir, 'ENA_submission')
         self.ena_auth = HTTPBasicAuth(cfg.query('ena', 'username'), cfg.query('ena', 'password'))
 
-    @retry(exceptions=ftplib.all_errors, tries=3, delay=2, backoff=1.2, jitter=(1, 3))
+    @property
+    def is_waiting_for_receipt(self):
+        return False
+
     def upload_vcf_files_to_ena_ftp(self, files_to_upload):
         host = cfg.query('ena', 'ftphost')
         # Heuristic to set the expected timeout assuming 10Mb/s upload speed but no less than 30 sec
@@ -52,26 +44,15 @@ class ENAUploader(AppLogger):
         max_file_size = max([os.path.getsize(f) for f in files_to_upload])
         timeout = min(max(int(max_file_size / 10000000), 30), 3600)
         self.info(f'Connect to {host} with timeout: {timeout}')
-        with HackFTP_TLS() as ftps:
-            # Set a weak cipher to enable connection
-            # https://stackoverflow.com/questions/38015537/python-requests-exceptions-sslerror-dh-key-too-small
-            ftps.context.set_ciphers('DEFAULT:@SECLEVEL=1')
-            ftps.connect(host, port=int(cfg.query('ena', 'ftpport', ret_default=21)), timeout=timeout)
-            ftps.login(cfg.query('ena', 'username'), cfg.query('ena', 'password'))
-            ftps.prot_p()
-            if self.submission_id not in ftps.nlst():
-                self.info(f'Create {self.submission_id} directory')
-                ftps.mkd(self.submission_id)
-            ftps.cwd(self.submission_id)
-            previous_content = ftps.nlst()
-            for file_to_upload in files_to_upload:
-                file_name = os.path.basename(file_to_upload)
-                if file_name in previous_content and ftps.size(file_name) == os.path.getsize(file_to_upload):
-                    self.warning(f'{file_name} Already exist and has the same size on the FTP. Skip upload.')
-                    continue
-                self.info(f'Upload {file_name} to FTP')
-                with open(file_to_upload, 'rb') as open_file:
-                    ftps.storbinary('STOR %s' % file_name, open_file)
+        uploader = FtpUploader(
+            host, int(cfg.query('ena', 'ftpport', ret_default=21)),
+            cfg.query('ena', 'username'), cfg.query('ena', 'password'),
+            remote_dir=self.submission_id,
+            nb_sessions=int(cfg.query('ena', 'ftp_sessions', ret_default=DEFAULT_FTP_SESSIONS)),
+            timeout=timeout,
+            journal_file=os.path.join(self.output_dir, f'{self.submission_id}_ftp_upload_journal.json')
+        )
+        uploader.upload_files(files_to_upload)
 
     @retry(requests.exceptions.ConnectionError, tries=3, delay=2, backoff=1.2, jitter=(1, 3))
     def _post_metadata_file_to_ena(self, url, file_dict, mime_type='application/json'):
@@ -145,8 +126,12 @@ class ENAUploader(AppLogger):
 
 class ENAUploaderAsync(ENAUploader):
 
-    def upload_metadata_file_to_ena(self, dry_ena_upload=False):
-        """Upload the xml file to the asynchronous endpoint and monitor the results from the poll endpoint."""
+    def upload_metadata_file_to_ena(self, dry_ena_upload=False, wait_for_receipt=True):
+        """
+        Upload the xml file to the asynchronous endpoint and monitor the results from the poll endpoint.
+        When wait_for_receipt is False, only the submission id and the poll link are stored in the results and the
+        receipt has to be retrieved with monitor_results or monitor_results_async.
+        """
 
         webin_file = self.converter.create_single_submission_file()
         mime_type = 'application/xml'
@@ -166,28 +151,32 @@ class ENAUploaderAsync(ENAUploader):
             self.results['submissionId'] = json_data.get('submissionId')
             self.results['poll-links'] = json_data.get('_links').get('poll').get('href')
             if self.results['submissionId'] and self.results['poll-links']:
-                self.monitor_results()
+                if wait_for_receipt:
+                    self.monitor_results()
             else:
                 self.results['errors'] = [f'No links present in json document: {json_data}']
         else:
             self.results['receipt'] = response.text
             self.results['errors'] = [f'{response.status_code}']
 
-    def monitor_results(self, timeout=3600, wait_time=30):
+    @property
+    def is_waiting_for_receipt(self):
+        return bool(self.results.get('poll-links')) and 'errors' not in self.results
+
+    def _get_poll_response(self):
         poll_link = self.results['poll-links']
         response = requests.get(poll_link, auth=self.ena_auth, headers={"Accept": "application/json"})
         self.debug(f'{poll_link} -> {response.status_code} : {response.text}')
-        time_lapsed = 0
-        while response.status_code == 202:
-            if time_lapsed > timeout:
-                self.error(f'Timed out waiting for {poll_link}')
-                raise TimeoutError(f'Waiting for ENA receipt from {poll_link} for more than {timeout} seconds')
-            self.info(f'Waiting {wait_time} for submission to ENA to be processed')
-            time.sleep(wait_time)
-            time_lapsed += wait_time
-            response = requests.get(poll_link, auth=self.ena_auth, headers={"Accept": "application/json"})
-            self.debug(f'{poll_link} -> {response.status_code} : {response.text}')
+        return response
+
+    def monitor_results(self, timeout=DEFAULT_POLL_TIMEOUT, poller=None):
+        asyncio.run(self.monitor_results_async(poller or EnaReceiptPoller(timeout=timeout)))
+
+    async def monitor_results_async(self, poller):
+        response = await poller.wait_for_receipt(self.results['poll-links'], self._get_poll_response)
+        self.parse_receipt_response(response)
+
+    def parse_receipt_response(self, response):
         self.results.update(self.parse_ena_json_receipt(response.text))
         if self.results['errors']:
             self.error('\n'.join(self.results['errors']))
-
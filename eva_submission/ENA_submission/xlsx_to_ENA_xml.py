@@ -9,9 +9,12 @@ from xml.etree.ElementTree import Element, ElementTree
 from ebi_eva_common_pyutils.logger import AppLogger
 from ebi_eva_common_pyutils.taxonomy.taxonomy import get_scientific_name_from_ensembl
 
+from eva_submission.ENA_submission.streaming_writer import PrettyXmlWriter
 from eva_submission.eload_utils import check_existing_project_in_ena, check_project_format, is_single_insdc_sequence
 from eva_submission.xlsx.xlsx_parser_eva import EvaXlsxReader
 
+XSI_NAMESPACE = 'http://www.w3.org/2001/XMLSchema-instance'
+
 
 def today():
     return datetime.today()
@@ -202,11 +205,17 @@ class EnaXlsxConverter(AppLogger):
         :return: The top XML element
         """
         root = Element('ANALYSIS_SET')
+        root.extend(self._iter_analysis_elements())
+        return root
+
+    def _iter_analysis_elements(self):
+        """Create the ANALYSIS elements one at a time so they can be written and discarded."""
         for analysis_row in self.reader.analysis:
             sample_rows = self.reader.samples_per_analysis[analysis_row.get('Analysis Alias')]
             file_rows = self.reader.files_per_analysis[analysis_row.get('Analysis Alias')]
-            self._add_analysis(root, analysis_row, self.reader.project, sample_rows, file_rows)
-        return root
+            analysis_set = Element('ANALYSIS_SET')
+            self._add_analysis(analysis_set, analysis_row, self.reader.project, sample_rows, file_rows)
+            yield from analysis_set
 
     def _add_analysis(self, root, analysis_row, project_row, sample_rows, file_rows):
         """
@@ -347,27 +356,29 @@ class EnaXlsxConverter(AppLogger):
 
     @staticmethod
     def write_xml_to_file(xml_element, output_file):
-        xml_element.attrib['xmlns:xsi'] = 'http://www.w3.org/2001/XMLSchema-instance'
+        xml_element.attrib['xmlns:xsi'] = XSI_NAMESPACE
         etree = ElementTree(xml_element)
         with open(output_file, 'bw') as open_file:
             open_file.write(prettify(etree))
 
     def create_single_submission_file(self):
-        root = Element('WEBIN')
-        # Submission ELEMENT
-        action = 'ADD'
-        submissions_elemt = self._create_submission_single_xml(action, self.reader.project)
-        root.append(submissions_elemt)
-
-        # Project ELEMENT
-        if not self.is_existing_project:
-            projects_elemt = self._create_project_xml()
-            root.append(projects_elemt)
-
-        # Analysis ELEMENT
-        analysis_elemt = self._create_analysis_xml()
-        root.append(analysis_elemt)
-
-        self.write_xml_to_file(root, self.single_submission_file)
+        # Written one element at a time to avoid holding all the analyses in memory
+        with open(self.single_submission_file, 'bw') as open_file:
+            writer = PrettyXmlWriter(open_file)
+            writer.start('WEBIN', {'xmlns:xsi': XSI_NAMESPACE})
+            # Submission ELEMENT
+            action = 'ADD'
+            writer.write_element(self._create_submission_single_xml(action, self.reader.project))
+
+            # Project ELEMENT
+            if not self.is_existing_project:
+                writer.write_element(self._create_project_xml())
+
+            # Analysis ELEMENT
+            writer.start('ANALYSIS_SET')
+            for analysis_elemt in self._iter_analysis_elements():
+                writer.write_element(analysis_elemt)
+            writer.end()
+            writer.end()
 
         return self.single_submission_file
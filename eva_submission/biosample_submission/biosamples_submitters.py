@@ -13,15 +13,17 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from copy import deepcopy
 from datetime import datetime, date
-from functools import lru_cache
 
 from ebi_eva_common_pyutils.biosamples_communicators import WebinHALCommunicator
 from ebi_eva_common_pyutils.config import cfg
 from ebi_eva_common_pyutils.logger import AppLogger
 
 from eva_submission.biosample_submission.biosample_converter_utils import update_sample_to_post_4_13
+from eva_submission.biosample_submission.concurrent_submission import RateLimitedCommunicator, \
+    SampleSubmissionJournal, sample_key, get_biosamples_rate_limiter, DEFAULT_BIOSAMPLES_WORKERS
 from eva_submission.xlsx.xlsx_parser_eva import EvaXlsxReader
 
 _now = datetime.now().isoformat()
@@ -54,22 +56,30 @@ class BioSamplesSubmitter(AppLogger):
     characteristics_allowed_to_override = ('collection_date', 'geographic location (country and/or sea)',
                                            LAST_UPDATED_BY_PROP)
 
-    def __init__(self, communicators, submit_type=('create',), allow_removal=False):
+    def __init__(self, communicators, submit_type=('create',), allow_removal=False, sample_cache=None):
         assert len(communicators) > 0, 'Specify at least one communicator object to BioSamplesSubmitter'
         assert set(submit_type) <= set(self.valid_actions), f'all actions must be in {self.valid_actions}'
         self.default_communicator = communicators[0]
         self.communicators = communicators
         self.submit_type = submit_type
         self.allow_removal = allow_removal
+        # Without a cache, the samples are always retrieved from BioSamples
+        self.sample_cache = sample_cache
 
-    @lru_cache(maxsize=0)
     def _get_existing_sample(self, accession, include_curation=False):
+        if self.sample_cache:
+            return self.sample_cache.get_sample(accession, include_curation=include_curation)
         if include_curation:
             append_to_url = accession
         else:
             append_to_url = accession + '?curationdomain='
         return self.default_communicator.follows_link('samples', method='GET', join_url=append_to_url)
 
+    def invalidate_cached_sample(self, accession):
+        """Removes a sample that was modified from the cache, if there is one."""
+        if self.sample_cache:
+            self.sample_cache.invalidate(accession)
+
     def can_create(self, sample):
         return 'create' in self.submit_type and ACCESSION_PROP not in sample
 
@@ -116,9 +126,13 @@ class BioSamplesSubmitter(AppLogger):
                 sample.update(self.default_communicator.communicator_attributes)
             self.default_communicator.follows_link('samples', join_url='validate', method='POST', json=sample)
 
-    def convert_sample_data_to_curation_object(self, future_sample):
-        """Curation object can only change 3 attributes characteristics, externalReferences and relationships"""
-        current_sample = self._get_existing_sample(future_sample.get(ACCESSION_PROP), include_curation=True)
+    def convert_sample_data_to_curation_object(self, future_sample, current_sample=None):
+        """
+        Curation object can only change 3 attributes characteristics, externalReferences and relationships
+        The current sample with its curations is retrieved from BioSamples when not provided.
+        """
+        if current_sample is None:
+            current_sample = self._get_existing_sample(future_sample.get(ACCESSION_PROP), include_curation=True)
         #FIXME: Remove this hack when this is fixed on BioSample's side
         # remove null values in externalReferences that causes crash when POSTing the curation object
         if 'externalReferences' in current_sample:
@@ -254,6 +268,7 @@ class BioSamplesSubmitter(AppLogger):
             communicator = self._get_communicator_for_sample(sample)
             sample_json = communicator.follows_link('samples', method='PUT', join_url=sample.get(ACCESSION_PROP),
                                                     json=sample_to_overwrite)
+            self.invalidate_cached_sample(sample.get(ACCESSION_PROP))
         elif self.can_curate(sample):
             action_taken = 'curate'
             self.debug('Update sample ' + sample.get('name', '') + ' with accession ' + sample.get(ACCESSION_PROP))
@@ -261,6 +276,7 @@ class BioSamplesSubmitter(AppLogger):
             curation_json = self.default_communicator.follows_link(
                 'samples', method='POST', join_url=sample.get(ACCESSION_PROP) + '/curationlinks', json=curation_object
             )
+            self.invalidate_cached_sample(sample.get(ACCESSION_PROP))
             sample_json = sample
         elif self.can_derive(sample):
             action_taken = 'derive'
@@ -290,14 +306,17 @@ class SampleSubmitter(AppLogger):
 
     project_mapping = {}
 
-    def __init__(self, submit_type):
+    def __init__(self, submit_type, sample_cache=None):
+        self.nb_workers = int(cfg.query('biosamples', 'nb_workers', ret_default=DEFAULT_BIOSAMPLES_WORKERS))
+        # The limit is shared by all the workers and the sample cache
+        self.rate_limiter = get_biosamples_rate_limiter()
         communicators = []
         # If the config has the credential for using webin with BioSamples use webin
-        communicators.append(WebinHALCommunicator(
+        communicators.append(RateLimitedCommunicator(WebinHALCommunicator(
             cfg.query('biosamples', 'webin_url'), cfg.query('biosamples', 'bsd_url'),
             cfg.query('biosamples', 'webin_username'), cfg.query('biosamples', 'webin_password')
-        ))
-        self.submitter = BioSamplesSubmitter(communicators, submit_type)
+        ), self.rate_limiter))
+        self.submitter = BioSamplesSubmitter(communicators, submit_type, sample_cache=sample_cache)
 
     @staticmethod
     def map_key(key, mapping):
@@ -356,14 +375,88 @@ class SampleSubmitter(AppLogger):
         """
         raise NotImplementedError()
 
-    def submit_to_bioSamples(self):
+    def _submit_sample(self, source_sample_json, key, journal):
+        self.submitter.validate_in_bsd(source_sample_json)
+        sample_json, action_taken = self.submitter.submit_biosample_to_bsd(source_sample_json)
+        journal.record(key, sample_json.get('name'), sample_json.get(ACCESSION_PROP), action_taken)
+        return sample_json, action_taken
+
+    def _run_concurrently(self, function, arguments_per_task, on_result=None):
+        """
+        Calls function with each tuple of arguments using the pool of workers and returns the results by task index.
+        on_result is called in the calling thread with the index and result of each task as they finish. After the
+        first error no other task is started and the error is raised once the tasks in progress are finished.
+        """
+        results = {}
+        errors = []
+        with ThreadPoolExecutor(max_workers=self.nb_workers) as executor:
+            futures = dict(
+                (executor.submit(function, *arguments), index)
+                for index, arguments in enumerate(arguments_per_task)
+            )
+            for future in as_completed(futures):
+                if future.cancelled():
+                    continue
+                if future.exception():
+                    if not errors:
+                        for pending_future in futures:
+                            pending_future.cancel()
+                    errors.append(future.exception())
+                    continue
+                results[futures[future]] = future.result()
+                if on_result:
+                    on_result(futures[future], future.result())
+        if errors:
+            self.error(f'{len(errors)} task(s) failed, {len(results)} task(s) completed')
+            raise errors[0]
+        return results
+
+    def _submit_samples(self, samples_to_submit, journal):
+        """
+        Submits the samples provided as (position, sample json, journal key) with a pool of workers and returns the
+        resulting sample json and action taken for each position. Samples submitted before an error are recorded in
+        the journal.
+        """
+        self.info(f'Submit {len(samples_to_submit)} sample(s) to BioSamples with {self.nb_workers} workers')
+        results = self._run_concurrently(
+            self._submit_sample,
+            [(source_sample_json, key, journal) for _, source_sample_json, key in samples_to_submit]
+        )
+        return dict((samples_to_submit[index][0], result) for index, result in results.items())
+
+    def submit_to_bioSamples(self, journal_file=None, force=False):
+        """
+        Submits the samples and returns the dict of sample name to BioSamples accession.
+        The samples are submitted concurrently. When a journal file is provided the outcome of each sample is appended
+        to it and the samples it already contains are not submitted again, unless force is set.
+        """
+        journal = SampleSubmissionJournal(journal_file)
+        if force and journal.entries:
+            self.info(f'Ignore the {len(journal.entries)} sample(s) already submitted according to {journal_file}')
+            journal.clear()
+        converted_samples = list(self._convert_metadata())
+        submitted_samples = {}
+        samples_to_submit = []
+        for position, (source_sample_json, sample_name_from_metadata, sample_accession) in enumerate(converted_samples):
+            if source_sample_json:
+                key = sample_key(source_sample_json, sample_name_from_metadata, sample_accession)
+                entry = journal.get(key)
+                if entry:
+                    submitted_samples[position] = ({'name': entry['name'], ACCESSION_PROP: entry['accession']},
+                                                   entry['action'])
+                else:
+                    samples_to_submit.append((position, source_sample_json, key))
+        if submitted_samples:
+            self.info(f'Skip {len(submitted_samples)} sample(s) already submitted')
+        if samples_to_submit:
+            submitted_samples.update(self._submit_samples(samples_to_submit, journal))
+
         sample_name_to_accession = {}
         action_to_sample_name = defaultdict(list)
-        nb_sample_uploaded = 0
-        for source_sample_json, sample_name_from_metadata, sample_accession in self._convert_metadata():
+        # Results are gathered in the order of the metadata so that the first of two samples with the same name is kept
+        for position, (source_sample_json, sample_name_from_metadata, sample_accession) in enumerate(converted_samples):
             if source_sample_json:
-                self.submitter.validate_in_bsd(source_sample_json)
-                sample_json, action_taken = self.submitter.submit_biosample_to_bsd(source_sample_json)
+                sample_json, action_taken = submitted_samples[position]
                 # When a name is provided in the metadata, we use it to keep track of which samples have been accessioned.
                 # When not provided, use the BioSample name
                 if sample_name_from_metadata:
@@ -376,7 +469,6 @@ class SampleSubmitter(AppLogger):
                     action_to_sample_name[action_taken].append(sample_name)
                 else:
                     self.error(f'Sample {sample_name} is not a unique name. Sample {sample_accession} will not be stored')
-                nb_sample_uploaded += 1
             elif sample_accession and sample_name_from_metadata:
                 sample_name_to_accession[sample_name_from_metadata] = sample_accession
                 action_to_sample_name['None'].append(sample_name_from_metadata)
@@ -408,8 +500,8 @@ class SampleJSONSubmitter(SampleSubmitter):
         'geographic location (country and/or sea)': 'not provided'
     }
 
-    def __init__(self, metadata_json, submit_type=('create',)):
-        super().__init__(submit_type=submit_type)
+    def __init__(self, metadata_json, submit_type=('create',), sample_cache=None):
+        super().__init__(submit_type=submit_type, sample_cache=sample_cache)
         self.metadata_json = metadata_json
 
     def _convert_metadata(self):
@@ -533,10 +625,10 @@ class SampleMetadataSubmitter(SampleSubmitter):
         'Address': 'Address',
     }
 
-    def __init__(self, metadata_spreadsheet, submit_type=('create',)):
-        super().__init__(submit_type=submit_type)
+    def __init__(self, metadata_spreadsheet, submit_type=('create',), sample_cache=None, cache_parsed_sheets=False):
+        super().__init__(submit_type=submit_type, sample_cache=sample_cache)
         self.metadata_spreadsheet = metadata_spreadsheet
-        self.reader = EvaXlsxReader(self.metadata_spreadsheet)
+        self.reader = EvaXlsxReader(self.metadata_spreadsheet, cache_parsed_sheets=cache_parsed_sheets)
 
     @staticmethod
     def serialize(value):
@@ -630,13 +722,19 @@ class SampleMetadataSubmitter(SampleSubmitter):
 
 class SampleReferenceSubmitter(SampleSubmitter):
 
-    def __init__(self, biosample_accession_list, project_accession):
-        super().__init__(submit_type=('curate',))
+    def __init__(self, biosample_accession_list, project_accession, sample_cache=None):
+        super().__init__(submit_type=('curate',), sample_cache=sample_cache)
         self.biosample_accession_list = biosample_accession_list
         self.project_accession = project_accession
 
+    @property
+    def eva_study_url(self):
+        return f'https://www.ebi.ac.uk/eva/?eva-study={self.project_accession}'
+
     def _convert_metadata(self):
-        eva_study_url = f'https://www.ebi.ac.uk/eva/?eva-study={self.project_accession}'
+        eva_study_url = self.eva_study_url
+        if self.submitter.sample_cache:
+            self.submitter.sample_cache.prefetch(self.biosample_accession_list, include_curation=False)
         for sample_accession in self.biosample_accession_list:
             sample_json = self.submitter._get_existing_sample(sample_accession)
             # remove any property that should not be uploaded again (the ones that starts with underscore)
@@ -656,3 +754,56 @@ class SampleReferenceSubmitter(SampleSubmitter):
                 ]
             yield sample_json, sample_json.get('name'), sample_accession
 
+    def _add_reference_to_sample(self, sample_accession):
+        """
+        Adds the EVA study external reference to the sample with a curation link unless the sample, with its
+        curations, already has it. Returns True when the curation was created.
+        """
+        current_sample = self.submitter._get_existing_sample(sample_accession, include_curation=True)
+        # FIXME: Remove this hack when this is fixed on BioSample's side
+        # remove null values in externalReferences that causes crash when POSTing the curation object
+        current_sample['externalReferences'] = [
+            dict([(k, v) for k, v in external_ref.items() if v is not None])
+            for external_ref in current_sample.get('externalReferences', [])
+        ]
+        if any(ref.get('url') == self.eva_study_url for ref in current_sample['externalReferences']):
+            return False
+        future_sample = deepcopy(current_sample)
+        future_sample['externalReferences'].append({'url': self.eva_study_url})
+        curation_object = self.submitter.convert_sample_data_to_curation_object(future_sample, current_sample)
+        self.submitter.default_communicator.follows_link(
+            'samples', method='POST', join_url=sample_accession + '/curationlinks', json=curation_object
+        )
+        self.submitter.invalidate_cached_sample(sample_accession)
+        return True
+
+    def add_reference_to_samples(self, linked_accessions=None, checkpoint=None, checkpoint_interval=500):
+        """
+        Adds the EVA study external reference to all the samples concurrently, each sample being retrieved then curated
+        by the same worker. Samples in linked_accessions are known to have the reference and are not retrieved.
+        checkpoint is called with the list of samples linked so far every checkpoint_interval samples and at the end,
+        including when an error stops the back-linking. Returns the list of linked samples.
+        """
+        linked_accessions = list(linked_accessions or [])
+        already_linked = set(linked_accessions)
+        sample_accessions = [accession for accession in self.biosample_accession_list
+                             if accession not in already_linked]
+        self.info(f'Add external reference {self.eva_study_url} to {len(sample_accessions)} BioSamples '
+                  f'with {self.nb_workers} workers, {len(already_linked)} already done')
+        action_counts = defaultdict(int)
+
+        def on_result(index, added):
+            linked_accessions.append(sample_accessions[index])
+            action_counts['curate' if added else 'None'] += 1
+            if checkpoint and len(linked_accessions) % checkpoint_interval == 0:
+                checkpoint(linked_accessions)
+
+        try:
+            self._run_concurrently(self._add_reference_to_sample,
+                                   [(accession,) for accession in sample_accessions], on_result)
+        finally:
+            if checkpoint:
+                checkpoint(linked_accessions)
+        for action in action_counts:
+            self.info(f'Action: {action} -> {action_counts[action]} sample(s)')
+        return linked_accessions
@@ -0,0 +1,143 @@
+# Copyright 2026 EMBL - European Bioinformatics Institute
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import hashlib
+import json
+import os
+import threading
+import time
+
+from ebi_eva_common_pyutils.config import cfg
+from ebi_eva_common_pyutils.logger import AppLogger
+
+DEFAULT_BIOSAMPLES_WORKERS = 4
+DEFAULT_BIOSAMPLES_REQUESTS_PER_SECOND = 10
+
+# Properties that change every time the samples are converted and should not be used to recognise a sample
+_VOLATILE_PROPERTIES = ('release',)
+
+_rate_limiters = {}
+_rate_limiters_lock = threading.Lock()
+
+
+class RateLimiter:
+    """
+    Token bucket shared by several threads, allowing on average requests_per_second calls to acquire and bursts of up
+    to burst calls. A rate of 0 or less disables the limit.
+    """
+
+    def __init__(self, requests_per_second=DEFAULT_BIOSAMPLES_REQUESTS_PER_SECOND, burst=None):
+        self.requests_per_second = requests_per_second
+        self.burst = burst or max(1, int(requests_per_second))
+        self.tokens = self.burst
+        self.last_refill = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        if self.requests_per_second <= 0:
+            return
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.burst, self.tokens + (now - self.last_refill) * self.requests_per_second)
+                self.last_refill = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.requests_per_second
+            time.sleep(wait)
+
+
+def get_biosamples_rate_limiter():
+    """
+    Returns the rate limiter shared by all the requests made to BioSamples in the process, by the submitters and the
+    sample cache, so that together they stay under biosamples.requests_per_second.
+    """
+    requests_per_second = float(cfg.query('biosamples', 'requests_per_second',
+                                          ret_default=DEFAULT_BIOSAMPLES_REQUESTS_PER_SECOND))
+    with _rate_limiters_lock:
+        if requests_per_second not in _rate_limiters:
+            _rate_limiters[requests_per_second] = RateLimiter(requests_per_second)
+        return _rate_limiters[requests_per_second]
+
+
+class RateLimitedCommunicator:
+    """
+    Wraps a HAL communicator so that each request made through follows or follows_link waits for the rate limiter.
+    All other attributes are those of the wrapped communicator.
+    """
+
+    def __init__(self, communicator, rate_limiter):
+        self._communicator = communicator
+        self._rate_limiter = rate_limiter
+
+    def follows(self, *args, **kwargs):
+        self._rate_limiter.acquire()
+        return self._communicator.follows(*args, **kwargs)
+
+    def follows_link(self, *args, **kwargs):
+        self._rate_limiter.acquire()
+        return self._communicator.follows_link(*args, **kwargs)
+
+    def __getattr__(self, item):
+        return getattr(self._communicator, item)
+
+
+def sample_key(sample_json, sample_name, sample_accession):
+    """Identifier of a sample to submit that does not change between two conversions of the same metadata."""
+    stable_json = dict((key, value) for key, value in sample_json.items() if key not in _VOLATILE_PROPERTIES)
+    serialised = json.dumps([sample_name, sample_accession, stable_json], sort_keys=True, default=str)
+    return hashlib.sha1(serialised.encode()).hexdigest()
+
+
+class SampleSubmissionJournal(AppLogger):
+    """
+    Outcome of each sample submitted to BioSamples appended as one json line as soon as it is known so that the
+    samples already submitted are not submitted again when the submission is resumed after a failure.
+    """
+
+    def __init__(self, journal_file=None):
+        self.journal_file = journal_file
+        self.lock = threading.Lock()
+        self.entries = {}
+        if journal_file and os.path.isfile(journal_file):
+            with open(journal_file) as open_file:
+                for line in open_file:
+                    try:
+                        entry = json.loads(line)
+                    except json.JSONDecodeError:
+                        # Last line truncated by a crash
+                        self.warning(f'Ignore incomplete line in {journal_file}')
+                        continue
+                    self.entries[entry['key']] = entry
+            self.info(f'{len(self.entries)} sample(s) already submitted according to {journal_file}')
+
+    def get(self, key):
+        with self.lock:
+            return self.entries.get(key)
+
+    def clear(self):
+        """Forgets all the samples submitted and removes the journal file."""
+        with self.lock:
+            self.entries = {}
+            if self.journal_file and os.path.isfile(self.journal_file):
+                os.remove(self.journal_file)
+
+    def record(self, key, name, accession, action):
+        entry = {'key': key, 'name': name, 'accession': accession, 'action': action}
+        with self.lock:
+            self.entries[key] = entry
+            if self.journal_file:
+                with open(self.journal_file, 'a') as open_file:
+                    open_file.write(json.dumps(entry) + '\n')
+        return entry
@@ -0,0 +1,177 @@
+# Copyright 2026 EMBL - European Bioinformatics Institute
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from copy import deepcopy
+
+import requests
+from ebi_eva_common_pyutils.biosamples_communicators import WebinHALCommunicator
+from ebi_eva_common_pyutils.config import cfg
+from ebi_eva_common_pyutils.logger import AppLogger
+from retry import retry
+
+from eva_submission.biosample_submission.concurrent_submission import RateLimiter, get_biosamples_rate_limiter, \
+    DEFAULT_BIOSAMPLES_WORKERS
+
+DEFAULT_SAMPLE_CACHE_TTL = 86400
+# Number of samples retrieved between two saves of the cache file
+SAVE_INTERVAL = 500
+
+_sample_caches = {}
+_sample_caches_lock = threading.Lock()
+
+
+class SampleServerError(Exception):
+    """Raised when BioSamples answers with a server error that is worth retrying."""
+
+
+class BioSamplesSampleCache(AppLogger):
+    """
+    Cache of the samples retrieved from BioSamples, optionally persisted in a json file.
+    A sample retrieved less than ttl seconds ago is served from the cache. An older sample is requested again with
+    its ETag so that BioSamples only sends it when it changed. A ttl of 0 disables the cache: every sample is
+    requested again, like without a cache. Samples that do not exist, are private or cannot be requested raise a
+    ValueError like the HAL communicator and are only remembered for the lifetime of the cache object.
+    """
+
+    def __init__(self, communicator, cache_file=None, ttl=DEFAULT_SAMPLE_CACHE_TTL, nb_workers=DEFAULT_BIOSAMPLES_WORKERS,
+                 rate_limiter=None):
+        self.communicator = communicator
+        self.cache_file = cache_file
+        self.ttl = ttl
+        self.nb_workers = nb_workers
+        self.rate_limiter = rate_limiter or RateLimiter(requests_per_second=0)
+        self.lock = threading.Lock()
+        self.entries = {}
+        self.missing = set()
+        self.nb_unsaved = 0
+        if cache_file and os.path.isfile(cache_file):
+            with open(cache_file) as open_file:
+                self.entries = json.load(open_file)
+            self.info(f'Loaded {len(self.entries)} sample(s) from {cache_file}')
+
+    @staticmethod
+    def _key(accession, include_curation):
+        return accession if include_curation else accession + '?curationdomain='
+
+    @retry(exceptions=(SampleServerError, requests.ConnectionError, requests.Timeout), tries=3, delay=2, backoff=1.2,
+           jitter=(1, 3))
+    def _request_sample(self, key, etag=None):
+        """Returns the sample json, None when it was not modified, and the ETag of the response."""
+        self.rate_limiter.acquire()
+        headers = {'Accept': 'application/hal+json', 'Authorization': 'Bearer ' + self.communicator.token}
+        if etag:
+            headers['If-None-Match'] = etag
+        response = requests.get(f'{self.communicator.bsd_url}/samples/{key}', headers=headers)
+        if response.status_code == 304:
+            return None, etag
+        if response.status_code in (403, 404):
+            raise ValueError(f'BioSamples accession {key} does not exist or is private ({response.status_code})')
+        if response.status_code >= 500:
+            raise SampleServerError(f'BioSamples returned {response.status_code} for {key}')
+        if response.status_code != 200:
+            raise ValueError(f'BioSamples returned {response.status_code} for {key}')
+        return response.json(), response.headers.get('ETag')
+
+    def get_sample(self, accession, include_curation=True):
+        """Returns a copy of the sample json with or without curations."""
+        key = self._key(accession, include_curation)
+        with self.lock:
+            if key in self.missing:
+                raise ValueError(f'BioSamples accession {key} does not exist or is private')
+            entry = self.entries.get(key)
+        if entry and time.time() - entry['retrieved'] < self.ttl:
+            return deepcopy(entry['sample'])
+        try:
+            sample, etag = self._request_sample(key, entry.get('etag') if entry else None)
+        except ValueError:
+            with self.lock:
+                self.missing.add(key)
+                self.entries.pop(key, None)
+            raise
+        if sample is None:
+            self.debug(f'{key} has not changed since it was cached')
+            sample = entry['sample']
+        with self.lock:
+            self.entries[key] = {'sample': sample, 'etag': etag, 'retrieved': time.time()}
+            self.nb_unsaved += 1
+            save = self.nb_unsaved >= SAVE_INTERVAL
+        if save:
+            self.save()
+        return deepcopy(sample)
+
+    def prefetch(self, accessions, include_curation=True):
+        """
+        Retrieves concurrently the samples that are not in the cache or need to be revalidated. Samples that cannot be
+        retrieved are skipped and raise their error when they are requested with get_sample.
+        """
+        if self.ttl <= 0:
+            # The samples would be requested again when they are used
+            return
+        accessions = list(dict.fromkeys(accessions))
+        self.info(f'Prefetch {len(accessions)} sample(s) from BioSamples with {self.nb_workers} workers')
+
+        def get_sample_or_none(accession):
+            try:
+                self.get_sample(accession, include_curation)
+            except Exception as e:
+                self.warning(f'Could not retrieve {accession} from BioSamples: {e}')
+
+        with ThreadPoolExecutor(max_workers=self.nb_workers) as executor:
+            list(executor.map(get_sample_or_none, accessions))
+        self.save()
+
+    def invalidate(self, accession):
+        """Removes both versions of a sample that is modified so that it is retrieved again."""
+        with self.lock:
+            for include_curation in (True, False):
+                self.entries.pop(self._key(accession, include_curation), None)
+            self.nb_unsaved += 1
+
+    def save(self):
+        if not self.cache_file:
+            return
+        with self.lock:
+            tmp_file = f'{self.cache_file}.{os.getpid()}.tmp'
+            with open(tmp_file, 'w') as open_file:
+                json.dump(self.entries, open_file)
+            os.replace(tmp_file, self.cache_file)
+            self.nb_unsaved = 0
+
+
+def get_sample_cache(cache_file=None):
+    """
+    Returns the sample cache shared by all the code of the process that uses the same cache file. The cache without
+    file is kept in memory only. Setting biosamples.sample_cache_ttl to 0 in the configuration disables the cache.
+    """
+    # The credentials are part of the key so that a cache is not reused after loading another configuration
+    cache_key = (os.path.abspath(cache_file) if cache_file else None, cfg.query('biosamples', 'bsd_url'),
+                 cfg.query('biosamples', 'webin_username'))
+    with _sample_caches_lock:
+        if cache_key not in _sample_caches:
+            communicator = WebinHALCommunicator(
+                cfg.query('biosamples', 'webin_url'), cfg.query('biosamples', 'bsd_url'),
+                cfg.query('biosamples', 'webin_username'), cfg.query('biosamples', 'webin_password')
+            )
+            # cfg.query cannot be used for the ttl because it returns the default for 0
+            ttl = cfg.query('biosamples', ret_default={}).get('sample_cache_ttl', DEFAULT_SAMPLE_CACHE_TTL)
+            _sample_caches[cache_key] = BioSamplesSampleCache(
+                communicator, cache_file, ttl=int(ttl),
+                nb_workers=int(cfg.query('biosamples', 'nb_workers', ret_default=DEFAULT_BIOSAMPLES_WORKERS)),
+                rate_limiter=get_biosamples_rate_limiter()
+            )
+        return _sample_caches[cache_key]
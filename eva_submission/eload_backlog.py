@@ -9,6 +9,7 @@ from ebi_eva_internal_pyutils.pg_utils import get_all_results_for_query
 from eva_submission.eload_ingestion import EloadIngestion
 from eva_submission.eload_submission import Eload
 from eva_submission.eload_utils import get_reference_fasta_and_report, get_project_alias, download_file
+from eva_submission.evapro.ena_snapshot import get_from_snapshot
 from eva_submission.submission_config import EloadConfig
 
 
@@ -123,7 +124,12 @@ class EloadBacklog(Eload):
         return full_path
 
     def _get_files_from_ena_analysis(self, analysis_accession):
-        """Find the location of the file submitted with an analysis"""
+        """Find the location of the file submitted with an analysis, read from the snapshot of the project first"""
+        return get_from_snapshot(self.ena_snapshot_store, self.project_accession,
+                                 ('portal_submitted_ftp', analysis_accession),
+                                 lambda: self._query_files_from_ena_analysis(analysis_accession))
+
+    def _query_files_from_ena_analysis(self, analysis_accession):
         analyses_url = (
             f"https://www.ebi.ac.uk/ena/portal/api/filereport?result=analysis&accession={analysis_accession}"
             f"&format=json&fields=submitted_ftp"
@@ -1,3 +1,4 @@
+import asyncio
 import csv
 import json
 import os
@@ -11,11 +12,13 @@ from ebi_eva_common_pyutils.config import cfg
 
 from eva_sub_cli_processing import sub_cli_utils
 from eva_submission import NEXTFLOW_DIR
+from eva_submission.ENA_submission.receipt_poller import EnaReceiptPoller
 from eva_submission.ENA_submission.upload_to_ENA import ENAUploader, ENAUploaderAsync
 from eva_submission.biosample_submission.biosamples_submitters import SampleMetadataSubmitter, SampleReferenceSubmitter, \
     SampleJSONSubmitter
 from eva_submission.eload_submission import Eload
 from eva_submission.eload_utils import read_md5, get_nextflow_config_flag
+from eva_submission.steps.contig_alias_cache import get_contig_alias_cache_params
 from eva_submission.submission_config import EloadConfig
 
 
@@ -34,11 +37,32 @@ class EloadBrokering(Eload):
     def broker(self, brokering_tasks_to_force=None, existing_project=None, async_upload=False, dry_ena_upload=False,
                output_format='json', resume=False):
         """Run the brokering process"""
+        ena_uploader = self.start_brokering(
+            brokering_tasks_to_force=brokering_tasks_to_force, existing_project=existing_project,
+            async_upload=async_upload, dry_ena_upload=dry_ena_upload, output_format=output_format, resume=resume
+        )
+        if ena_uploader and ena_uploader.is_waiting_for_receipt:
+            ena_uploader.monitor_results()
+        self.finish_brokering(ena_uploader, brokering_tasks_to_force=brokering_tasks_to_force,
+                              dry_ena_upload=dry_ena_upload)
+
+    def start_brokering(self, brokering_tasks_to_force=None, existing_project=None, async_upload=False,
+                        dry_ena_upload=False, output_format='json', resume=False):
+        """
+        Run the brokering process up to the submission to ENA and return the ENA uploader, which may still be waiting
+        for the ENA receipt.
+        """
         self.eload_cfg.set('brokering', 'brokering_date', value=self.now)
         self.prepare_brokering(force=('preparation' in brokering_tasks_to_force), resume=resume)
         self.upload_to_bioSamples(force=('biosamples' in brokering_tasks_to_force))
-        self.broker_to_ena(force=('ena' in brokering_tasks_to_force), existing_project=existing_project,
-                           async_upload=async_upload, dry_ena_upload=dry_ena_upload, output_format=output_format)
+        return self.submit_to_ena(force=('ena' in brokering_tasks_to_force), existing_project=existing_project,
+                                  async_upload=async_upload, dry_ena_upload=dry_ena_upload,
+                                  output_format=output_format)
+
+    def finish_brokering(self, ena_uploader, brokering_tasks_to_force=None, dry_ena_upload=False):
+        """Run the brokering process after the ENA receipt has been received."""
+        if ena_uploader:
+            self.record_ena_results(ena_uploader, dry_ena_upload)
         self.update_biosamples_with_study(force=('update_biosamples' in brokering_tasks_to_force))
         self.update_submission_brokering_status()
 
@@ -57,6 +81,20 @@ class EloadBrokering(Eload):
             self.info('Preparation has already been run, Skip!')
 
     def broker_to_ena(self, force=False, existing_project=None, async_upload=False, dry_ena_upload=False, output_format='json'):
+        ena_uploader = self.submit_to_ena(force=force, existing_project=existing_project, async_upload=async_upload,
+                                          dry_ena_upload=dry_ena_upload, output_format=output_format)
+        if ena_uploader:
+            if ena_uploader.is_waiting_for_receipt:
+                ena_uploader.monitor_results()
+            self.record_ena_results(ena_uploader, dry_ena_upload)
+
+    def submit_to_ena(self, force=False, existing_project=None, async_upload=False, dry_ena_upload=False,
+                      output_format='json'):
+        """
+        Upload the files and the metadata to ENA and return the ENA uploader, or None if the brokering to ENA was
+        already done. With the asynchronous upload, the uploader is returned without waiting for the receipt and the
+        poll link is saved in the config so that a later run resumes waiting for it instead of submitting again.
+        """
         if not self.eload_cfg.query('brokering', 'ena', 'pass') or force:
             ena_spreadsheet = os.path.join(self._get_dir('ena'), 'metadata_spreadsheet.xlsx')
             brokering_json = os.path.join(self._get_dir('ena'), 'metadata_json.json')
@@ -78,6 +116,14 @@ class EloadBrokering(Eload):
                 self.eload_cfg.set('brokering', 'ena', 'PROJECT', value=ena_uploader.converter.existing_project)
                 self.eload_cfg.set('brokering', 'ena', 'existing_project', value=True)
 
+            pending_receipt = self.eload_cfg.query('brokering', 'ena', 'pending_receipt')
+            if async_upload and pending_receipt and not force and not dry_ena_upload:
+                self.info(f'Resume waiting for the ENA receipt of submission {pending_receipt["submissionId"]}')
+                ena_uploader.results['submissionId'] = pending_receipt['submissionId']
+                ena_uploader.results['poll-links'] = pending_receipt['poll-links']
+                ena_uploader.converter.hold_date = pending_receipt['hold_date']
+                return ena_uploader
+
             # Upload the VCF to ENA FTP
             files_to_upload = []
             analyses = self.eload_cfg['brokering']['analyses']
@@ -91,29 +137,43 @@ class EloadBrokering(Eload):
             else:
                 ena_uploader.upload_vcf_files_to_ena_ftp(files_to_upload)
             # Upload metadata to ENA
-            ena_uploader.upload_metadata_file_to_ena(dry_ena_upload)
-            if not dry_ena_upload:
-                # Update the project accession in case we're working with existing project
-                # We should not be uploading additional analysis in th same ELOAD so no need to update
-                pre_existing_project = self.eload_cfg.query('brokering', 'ena', 'PROJECT')
-                if pre_existing_project and 'PROJECT' not in ena_uploader.results:
-                    ena_uploader.results['PROJECT'] = pre_existing_project
-                self.eload_cfg.set('brokering', 'ena', value=ena_uploader.results)
-                self.eload_cfg.set('brokering', 'ena', 'date', value=self.now)
-                self.eload_cfg.set('brokering', 'ena', 'hold_date', value=ena_uploader.converter.hold_date)
-                self.eload_cfg.set('brokering', 'ena', 'pass', value=not bool(ena_uploader.results['errors']))
+            if async_upload:
+                ena_uploader.upload_metadata_file_to_ena(dry_ena_upload, wait_for_receipt=False)
+            else:
+                ena_uploader.upload_metadata_file_to_ena(dry_ena_upload)
+            if ena_uploader.is_waiting_for_receipt:
+                self.eload_cfg.set('brokering', 'ena', 'pending_receipt', value={
+                    'submissionId': ena_uploader.results['submissionId'],
+                    'poll-links': ena_uploader.results['poll-links'],
+                    'hold_date': ena_uploader.converter.hold_date
+                })
+                self.eload_cfg.write()
+            return ena_uploader
         else:
             self.info('Brokering to ENA has already been run, Skip!')
 
+    def record_ena_results(self, ena_uploader, dry_ena_upload=False):
+        if not dry_ena_upload:
+            # Update the project accession in case we're working with existing project
+            # We should not be uploading additional analysis in th same ELOAD so no need to update
+            pre_existing_project = self.eload_cfg.query('brokering', 'ena', 'PROJECT')
+            if pre_existing_project and 'PROJECT' not in ena_uploader.results:
+                ena_uploader.results['PROJECT'] = pre_existing_project
+            self.eload_cfg.set('brokering', 'ena', value=ena_uploader.results)
+            self.eload_cfg.set('brokering', 'ena', 'date', value=self.now)
+            self.eload_cfg.set('brokering', 'ena', 'hold_date', value=ena_uploader.converter.hold_date)
+            self.eload_cfg.set('brokering', 'ena', 'pass', value=not bool(ena_uploader.results['errors']))
+
     def upload_to_bioSamples(self, force=False):
         metadata_spreadsheet = self.eload_cfg.query('validation', 'valid', 'metadata_spreadsheet')
         metadata_json_file = self.eload_cfg.query('validation', 'valid', 'metadata_json')
         if metadata_json_file and os.path.exists(metadata_json_file):
             with open(metadata_json_file, 'r') as open_file:
                 metadata_json = json.load(open_file)
-                sample_submitter = SampleJSONSubmitter(metadata_json)
+                sample_submitter = SampleJSONSubmitter(metadata_json, sample_cache=self._get_sample_cache())
         elif metadata_spreadsheet and os.path.exists(metadata_spreadsheet):
-            sample_submitter = SampleMetadataSubmitter(metadata_spreadsheet)
+            sample_submitter = SampleMetadataSubmitter(metadata_spreadsheet, sample_cache=self._get_sample_cache(),
+                                                       cache_parsed_sheets=True)
         else:
             self.error('No metadata spreadsheet or metadata json file present in the config')
             return
@@ -130,7 +190,11 @@ class EloadBrokering(Eload):
         ):
             self.info('BioSamples brokering is already done, Skip!')
         else:
-            sample_name_to_accession = sample_submitter.submit_to_bioSamples()
+            journal_file = os.path.join(self._get_dir('biosamples'), 'biosamples_submission_journal.jsonl')
+            try:
+                sample_name_to_accession = sample_submitter.submit_to_bioSamples(journal_file=journal_file, force=force)
+            finally:
+                self._get_sample_cache().save()
             # Check whether all samples have been accessioned
             passed = (
                 bool(sample_name_to_accession)
@@ -139,6 +203,9 @@ class EloadBrokering(Eload):
             self.eload_cfg.set('brokering', 'Biosamples', 'date', value=self.now)
             self.eload_cfg.set('brokering', 'Biosamples', 'Samples', value=sample_name_to_accession)
             self.eload_cfg.set('brokering', 'Biosamples', 'pass', value=passed)
+            # The journal is only needed to resume an incomplete submission
+            if passed and os.path.exists(journal_file):
+                os.remove(journal_file)
             # Make sure we crash if we haven't brokered everything
             if not passed:
                 raise ValueError(f'Not all samples were successfully brokered to BioSamples! '
@@ -153,8 +220,24 @@ class EloadBrokering(Eload):
             project_accession = self.eload_cfg.query('brokering', 'ena', 'PROJECT')
             if project_accession:
                 self.info(f'Add external reference to {len(biosample_accession_list)} BioSamples.')
-                sample_reference_submitter = SampleReferenceSubmitter(biosample_accession_list, project_accession)
-                sample_reference_submitter.submit_to_bioSamples()
+                sample_reference_submitter = SampleReferenceSubmitter(biosample_accession_list, project_accession,
+                                                                      sample_cache=self._get_sample_cache())
+                # Samples linked by a previous interrupted run are checkpointed per project
+                linked_accessions = None
+                if not force:
+                    linked_accessions = self.eload_cfg.query('brokering', 'Biosamples', 'backlinks_checkpoint',
+                                                             project_accession)
+
+                def checkpoint(accessions):
+                    self.eload_cfg.set('brokering', 'Biosamples', 'backlinks_checkpoint', project_accession,
+                                       value=list(accessions))
+                    self.eload_cfg.write()
+
+                try:
+                    sample_reference_submitter.add_reference_to_samples(linked_accessions, checkpoint)
+                finally:
+                    self._get_sample_cache().save()
+                self.eload_cfg.pop('brokering', 'Biosamples', 'backlinks_checkpoint')
                 self.eload_cfg.set('brokering', 'Biosamples', 'backlinks', value=project_accession)
         else:
             self.info('Adding external reference to BioSamples has already been done, Skip!')
@@ -198,7 +281,10 @@ class EloadBrokering(Eload):
         brokering_config = {
             'vcf_files_mapping': self._generate_csv_mappings(),
             'output_dir': work_dir,
-            'executable': cfg['executable']
+            'executable': cfg['executable'],
+            'custom_genome_cache_dir': cfg.get('custom_genome_cache_dir'),
+            'normalisation_shards': cfg.get('normalisation_shards', 1),
+            **get_contig_alias_cache_params()
         }
         brokering_config_file = os.path.join(self.eload_dir, 'brokering_config_file.yaml')
         with open(brokering_config_file, 'w') as open_file:
@@ -406,3 +492,43 @@ Archival Confirmation Text:
             self.update_submission_status(sub_cli_utils.BROKERING, sub_cli_utils.SUCCESS)
         else:
             self.update_submission_status(sub_cli_utils.BROKERING, sub_cli_utils.FAILURE)
+
+
+def broker_eloads(brokerings, brokering_tasks_to_force=None, existing_project=None, async_upload=False,
+                  dry_ena_upload=False, output_format='json', resume=False):
+    """
+    Run the brokering process of several ELOADs, waiting concurrently for their ENA receipts so that the waits
+    overlap. The brokering of the ELOADs for which the receipt could not be retrieved is left to be resumed and the
+    first error is raised once the others are complete.
+    """
+    ena_uploaders = [
+        brokering.start_brokering(
+            brokering_tasks_to_force=brokering_tasks_to_force, existing_project=existing_project,
+            async_upload=async_upload, dry_ena_upload=dry_ena_upload, output_format=output_format, resume=resume
+        )
+        for brokering in brokerings
+    ]
+    waiting = [
+        (brokering, ena_uploader) for brokering, ena_uploader in zip(brokerings, ena_uploaders)
+        if ena_uploader and ena_uploader.is_waiting_for_receipt
+    ]
+
+    async def wait_for_receipts():
+        poller = EnaReceiptPoller()
+        return await asyncio.gather(
+            *[ena_uploader.monitor_results_async(poller) for _, ena_uploader in waiting],
+            return_exceptions=True
+        )
+
+    errors = {}
+    if waiting:
+        for (brokering, _), result in zip(waiting, asyncio.run(wait_for_receipts())):
+            if isinstance(result, Exception):
+                brokering.error(f'Could not retrieve the ENA receipt of {brokering.eload}: {result}')
+                errors[brokering.eload] = result
+    for brokering, ena_uploader in zip(brokerings, ena_uploaders):
+        if brokering.eload not in errors:
+            brokering.finish_brokering(ena_uploader, brokering_tasks_to_force=brokering_tasks_to_force,
+                                       dry_ena_upload=dry_ena_upload)
+    if errors:
+        raise next(iter(errors.values()))
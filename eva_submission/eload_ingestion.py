@@ -27,6 +27,7 @@ from eva_submission.eload_submission import Eload
 from eva_submission.eload_utils import provision_new_database_for_variant_warehouse, check_project_exists_in_evapro, \
     get_nextflow_config_flag, get_nextflow_config
 from eva_submission.evapro.populate_evapro import EvaProjectLoader
+from eva_submission.steps.contig_alias_cache import get_contig_alias_cache_params
 from eva_submission.submission_config import EloadConfig
 from eva_submission.submission_qc_checks import EloadQC
 from eva_submission.vep_utils import get_vep_and_vep_cache_version
@@ -51,7 +52,8 @@ class EloadIngestion(Eload):
     all_tasks = ['archive_only', 'metadata_load', 'accession', 'variant_load', 'optional_remap_and_cluster']
     nextflow_complete_value = '<complete>'
 
-    def __init__(self, eload_number, config_object: EloadConfig = None, nextflow_config=None):
+    def __init__(self, eload_number, config_object: EloadConfig = None, nextflow_config=None,
+                 refresh_ena_metadata=True):
         super().__init__(eload_number, config_object)
         self.project_accession = self.eload_cfg.query('brokering', 'ena', 'PROJECT')
         self.taxonomy = self.eload_cfg.query('submission', 'taxonomy_id')
@@ -61,6 +63,8 @@ class EloadIngestion(Eload):
         self.properties_generator = SpringPropertiesGenerator(self.maven_profile, self.private_settings_file)
         self.loader = EvaProjectLoader(self.eload_num)
         self.nextflow_config = nextflow_config
+        # Whether the metadata of the project is read from ENA again rather than from the snapshots of the ELOAD
+        self.refresh_ena_metadata = refresh_ena_metadata
 
     def run_ingestion_and_qc_result(self, tasks=None, vep_cache_assembly_name=None, resume=False):
         self.ingest(tasks, vep_cache_assembly_name, resume)
@@ -264,8 +268,11 @@ class EloadIngestion(Eload):
     def load_from_ena(self, archive_only=False):
         """
         Loads Project and Analysis metadata from ENA into EVAPRO to the project associated with this ELOAD.
+        The snapshots of the project are discarded first unless refresh_ena_metadata was disabled.
         """
         sample_name_2_accession = self.eload_cfg.query('brokering', 'Biosamples', 'Samples', ret_default={})
+        if self.refresh_ena_metadata:
+            self.ena_snapshot_store.invalidate(self.project_accession)
         try:
             # Load entire project, or only analyses associated with this submission
             if check_project_exists_in_evapro(self.project_accession):
@@ -396,6 +403,9 @@ class EloadIngestion(Eload):
             'accession_job_props': accession_properties_file,
             'load_job_props': variant_load_properties_file,
             'acc_import_job_props': accession_import_properties_file,
+            'custom_genome_cache_dir': cfg.get('custom_genome_cache_dir'),
+            'normalisation_shards': cfg.get('normalisation_shards', 1),
+            **get_contig_alias_cache_params()
         }
         tasks = [task for task in tasks if task in ['accession', 'variant_load']]
         self.run_nextflow('accession_and_load', accession_config, resume, tasks)
@@ -461,8 +471,9 @@ class EloadIngestion(Eload):
         if not target_assembly:
             target_assembly = get_supported_asm_from_ensembl_rapid_release(tax_id)
         if target_assembly:
-            add_to_supported_assemblies(self.metadata_connection_handle, source_of_assembly='Ensembl',
-                                        target_assembly=target_assembly, taxonomy_id=tax_id)
+            with self.metadata_connection_handle as conn:
+                add_to_supported_assemblies(conn, source_of_assembly='Ensembl',
+                                            target_assembly=target_assembly, taxonomy_id=tax_id)
         return target_assembly
 
     def _get_target_assembly(self):
@@ -492,8 +503,9 @@ class EloadIngestion(Eload):
         if target_assembly is None:
             if len(self.assembly_accessions) == 1:
                 target_assembly = list(self.assembly_accessions)[0]
-                add_to_supported_assemblies(self.metadata_connection_handle, source_of_assembly='EVA',
-                                            target_assembly=target_assembly, taxonomy_id=self.taxonomy)
+                with self.metadata_connection_handle as conn:
+                    add_to_supported_assemblies(conn, source_of_assembly='EVA',
+                                                target_assembly=target_assembly, taxonomy_id=self.taxonomy)
             else:
                 self.warning(f'Could not determine target assembly from EVAPRO, Ensembl, or submitted assemblies: '
                              f'{", ".join(self.assembly_accessions)}')
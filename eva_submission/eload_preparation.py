@@ -122,7 +122,7 @@ class EloadPreparation(Eload):
 
         else:
             eva_files_sheet = self.eload_cfg.query('submission', 'metadata_spreadsheet')
-            eva_xls_reader = EvaXlsxReader(eva_files_sheet)
+            eva_xls_reader = EvaXlsxReader(eva_files_sheet, cache_parsed_sheets=True)
             metadata_vcfs = [
                 os.path.basename(row['File Name']) for row in eva_xls_reader.files
                 if is_vcf_file(row['File Name'])
@@ -169,7 +169,8 @@ class EloadPreparation(Eload):
             self.detect_metadata_attributes_from_spreadsheet()
 
     def detect_metadata_attributes_from_spreadsheet(self):
-        eva_metadata = EvaXlsxReader(self.eload_cfg.query('submission', 'metadata_spreadsheet'))
+        eva_metadata = EvaXlsxReader(self.eload_cfg.query('submission', 'metadata_spreadsheet'),
+                                     cache_parsed_sheets=True)
         analysis_reference = {}
         for analysis in eva_metadata.analysis:
             reference_txt = analysis.get('Reference')
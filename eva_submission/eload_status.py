@@ -5,17 +5,29 @@ import os
 import subprocess
 import sys
 import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from functools import cached_property
 
 from ebi_eva_common_pyutils.config import cfg
 from ebi_eva_common_pyutils.logger import AppLogger
-from ebi_eva_internal_pyutils.metadata_utils import resolve_variant_warehouse_db_name, get_metadata_connection_handle
+from ebi_eva_internal_pyutils.metadata_utils import resolve_variant_warehouse_db_name
 from ebi_eva_internal_pyutils.mongo_utils import get_mongo_connection_handle
 from ebi_eva_internal_pyutils.pg_utils import get_all_results_for_query
 
+from eva_submission.metadata_connection import get_metadata_connection_handle
 from eva_submission.retrieve_eload_and_project_from_lts import ELOADRetrieval
 from eva_submission.submission_config import EloadConfig
 
+STATUS_HEADER = [
+    "eload", "project", "analysis", "taxonomy", "source_assembly", "target_assembly", "metadata_load_status",
+    "accessioning_status", "remapping_status", "clustering_status", "variant_load_status",
+    "statistics_status", "annotation_status"
+]
+# Maximum number of values in the IN lists of the batch queries
+BATCH_QUERY_SIZE = 1000
+DEFAULT_NB_THREADS = 8
+
 
 # noinspection SqlDialectInspection,SqlNoDataSourceInspection
 class EloadStatus(AppLogger):
@@ -96,12 +108,7 @@ class EloadStatus(AppLogger):
         if analysis_dict:
             return analysis_dict.values()
 
-    def status(self):
-        header = [
-            "eload", "project", "analysis", "taxonomy", "source_assembly", "target_assembly", "metadata_load_status",
-            "accessioning_status", "remapping_status", "clustering_status", "variant_load_status",
-            "statistics_status", "annotation_status"
-        ]
+    def status_rows(self):
         all_status = []
         if self.analyses:
             for analysis in self.analyses:
@@ -117,9 +124,12 @@ class EloadStatus(AppLogger):
                     all_status.extend(status)
         else:
             all_status = self.status_per_analysis()
-        writer = csv.DictWriter(sys.stdout, fieldnames=header, delimiter='\t')
+        return all_status
+
+    def status(self):
+        writer = csv.DictWriter(sys.stdout, fieldnames=STATUS_HEADER, delimiter='\t')
         writer.writeheader()
-        for st in all_status:
+        for st in self.status_rows():
             writer.writerow(st)
 
     @property
@@ -332,9 +342,12 @@ class EloadStatus(AppLogger):
             variants.append(variant)
         return variants
 
-    def find_loaded_study_in_variant_warehouse(self, assembly, taxonomy, analysis):
+    def get_variant_warehouse_db_name(self, assembly, taxonomy):
         with self.metadata_connection_handle as conn:
-            db_name = resolve_variant_warehouse_db_name(conn, assembly, taxonomy)
+            return resolve_variant_warehouse_db_name(conn, assembly, taxonomy)
+
+    def find_loaded_study_in_variant_warehouse(self, assembly, taxonomy, analysis):
+        db_name = self.get_variant_warehouse_db_name(assembly, taxonomy)
         filters = {'sid': self.project, 'fid': analysis}
         cursor = self.mongo_conn[db_name]['files_2_0'].find(filters)
         studies = list(cursor)
@@ -363,3 +376,196 @@ class EloadStatus(AppLogger):
         assert len(assemblies) < 2, f'Multiple target assemblies found for taxonomy {taxonomy}'
         if assemblies:
             return assemblies[0]
+
+
+def _in_list(values):
+    return ', '.join(f"'{value}'" if isinstance(value, str) else str(value) for value in values)
+
+
+def _chunks(values, size=BATCH_QUERY_SIZE):
+    values = list(values)
+    for i in range(0, len(values), size):
+        yield values[i:i + size]
+
+
+class BatchedEloadStatus(EloadStatus):
+    """Status of one ELOAD using the metadata prefetched for the whole batch by EloadStatusBatch."""
+
+    def __init__(self, eload_number: int, batch):
+        super().__init__(eload_number)
+        self.batch = batch
+
+    @property
+    def mongo_conn(self):
+        return self.batch.mongo_conn
+
+    def retrieve_project_from_metadata(self):
+        project_accession = self.batch.project_per_eload.get(self.eload_num)
+        if not project_accession:
+            self.info(f'No project accession for {self.eload} found in metadata DB.')
+        return project_accession
+
+    def project_information(self, analysis):
+        for analysis_info in self.batch.project_information.get(self.project, []):
+            if not analysis or analysis_info[0] == analysis:
+                yield analysis_info
+
+    def get_taxonomy_for_project(self):
+        taxonomies = self.batch.taxonomies_per_project.get(self.project, [])
+        if len(taxonomies) == 1:
+            return taxonomies[0]
+        else:
+            self.error(f'Cannot retrieve a single taxonomy for project {self.project}. Found {len(taxonomies)}.')
+
+    def find_current_target_assembly_for_taxonomy(self, taxonomy):
+        assemblies = self.batch.target_assemblies_per_taxonomy.get(taxonomy, [])
+        assert len(assemblies) < 2, f'Multiple target assemblies found for taxonomy {taxonomy}'
+        if assemblies:
+            return assemblies[0]
+
+    @cached_property
+    def _accession_reports_for_study(self):
+        return super().get_accession_reports_for_study()
+
+    def get_accession_reports_for_study(self):
+        return self._accession_reports_for_study
+
+    def get_accessioning_info_from_file(self, path):
+        return self.batch.get_accessioning_info(path, super().get_accessioning_info_from_file)
+
+    def get_variant_warehouse_db_name(self, assembly, taxonomy):
+        return self.batch.get_variant_warehouse_db_name(assembly, taxonomy, super().get_variant_warehouse_db_name)
+
+
+class EloadStatusBatch(AppLogger):
+    """
+    Status of many ELOADs. The metadata required by all the ELOADs is retrieved with one query of each kind for the
+    whole batch, then the ELOADs are checked concurrently in a pool of threads and their rows are written as soon as
+    they are available, in the order of completion.
+    """
+
+    def __init__(self, eload_numbers, nb_threads=DEFAULT_NB_THREADS):
+        self.eload_statuses = [BatchedEloadStatus(eload_number, self) for eload_number in eload_numbers]
+        self.nb_threads = nb_threads
+        self.project_per_eload = {}
+        self.project_information = {}
+        self.taxonomies_per_project = {}
+        self.target_assemblies_per_taxonomy = {}
+        self._accessioning_info = {}
+        self._db_names = {}
+        self._lock = threading.Lock()
+
+    @property
+    def metadata_connection_handle(self):
+        return get_metadata_connection_handle(cfg['maven']['environment'], cfg['maven']['settings_file'])
+
+    @cached_property
+    def mongo_conn(self):
+        return get_mongo_connection_handle(cfg['maven']['environment'], cfg['maven']['settings_file'])
+
+    def _get_results_for_chunked_query(self, query_template, values):
+        results = []
+        with self.metadata_connection_handle as conn:
+            for chunk in _chunks(values):
+                results.extend(get_all_results_for_query(conn, query_template.format(in_list=_in_list(chunk))))
+        return results
+
+    def _retrieve_projects_for_eloads(self, eload_numbers):
+        query = "select eload_id, project_accession from evapro.project_eva_submission where eload_id in ({in_list});"
+        projects = {}
+        for eload_id, project_accession in self._get_results_for_chunked_query(query, eload_numbers):
+            projects.setdefault(eload_id, []).append(project_accession)
+        # Only keep the ELOADs associated with a single project like EloadStatus.retrieve_project_from_metadata
+        return {eload_id: accessions[0] for eload_id, accessions in projects.items() if len(accessions) == 1}
+
+    def _retrieve_project_information(self, projects):
+        query = (
+            "select distinct pa.project_accession, pa.analysis_accession, a.vcf_reference_accession, at.taxonomy_id, f.filename "
+            "from project_analysis pa "
+            "join analysis a on pa.analysis_accession=a.analysis_accession "
+            "left join assembly_set at on at.assembly_set_id=a.assembly_set_id "
+            "left join analysis_file af on af.analysis_accession=a.analysis_accession "
+            "join file f on f.file_id=af.file_id "
+            "where f.file_type='VCF' and pa.project_accession in ({in_list}) "
+            "order by pa.project_accession, pa.analysis_accession"
+        )
+        analyses_per_project = {}
+        for project, analysis, assembly, tax_id, filename in self._get_results_for_chunked_query(query, projects):
+            analyses = analyses_per_project.setdefault(project, {})
+            if analysis not in analyses:
+                analyses[analysis] = (analysis, assembly, tax_id, [])
+            analyses[analysis][3].append(filename)
+        return {project: list(analyses.values()) for project, analyses in analyses_per_project.items()}
+
+    def _retrieve_taxonomies_for_projects(self, projects):
+        query = ("select distinct project_accession, taxonomy_id from evapro.project_taxonomy "
+                 "where project_accession in ({in_list})")
+        taxonomies = {}
+        for project, tax_id in self._get_results_for_chunked_query(query, projects):
+            taxonomies.setdefault(project, []).append(tax_id)
+        return taxonomies
+
+    def _retrieve_target_assemblies(self, taxonomies):
+        query = ("select taxonomy_id, assembly_id from evapro.supported_assembly_tracker "
+                 "where current=true and taxonomy_id in ({in_list})")
+        assemblies = {}
+        for tax_id, assembly in self._get_results_for_chunked_query(query, taxonomies):
+            assemblies.setdefault(tax_id, []).append(assembly)
+        return assemblies
+
+    def prefetch_metadata(self):
+        """Retrieve the metadata of all the ELOADs in the batch."""
+        # Reading the ELOAD configs can require to retrieve them from the long term storage
+        with ThreadPoolExecutor(max_workers=self.nb_threads) as executor:
+            list(executor.map(lambda eload_status: eload_status.project_from_config, self.eload_statuses))
+        eloads_without_project = [eload_status.eload_num for eload_status in self.eload_statuses
+                                  if not eload_status.project_from_config]
+        if eloads_without_project:
+            self.project_per_eload = self._retrieve_projects_for_eloads(eloads_without_project)
+        projects = sorted({eload_status.project for eload_status in self.eload_statuses if eload_status.project})
+        if projects:
+            self.project_information = self._retrieve_project_information(projects)
+            self.taxonomies_per_project = self._retrieve_taxonomies_for_projects(projects)
+        taxonomies = {eload_status.taxonomy_from_config for eload_status in self.eload_statuses}
+        for analyses in self.project_information.values():
+            taxonomies.update(tax_id for _, _, tax_id, _ in analyses)
+        for project_taxonomies in self.taxonomies_per_project.values():
+            taxonomies.update(project_taxonomies)
+        taxonomies = sorted(tax_id for tax_id in taxonomies if tax_id)
+        if taxonomies:
+            self.target_assemblies_per_taxonomy = self._retrieve_target_assemblies(taxonomies)
+
+    def get_accessioning_info(self, path, read_function):
+        """Read each accessioning report only once even if it is used by several analyses."""
+        with self._lock:
+            if path in self._accessioning_info:
+                return self._accessioning_info[path]
+        accessioning_info = read_function(path)
+        with self._lock:
+            return self._accessioning_info.setdefault(path, accessioning_info)
+
+    def get_variant_warehouse_db_name(self, assembly, taxonomy, resolve_function):
+        key = (assembly, taxonomy)
+        with self._lock:
+            if key in self._db_names:
+                return self._db_names[key]
+        db_name = resolve_function(assembly, taxonomy)
+        with self._lock:
+            return self._db_names.setdefault(key, db_name)
+
+    def _status_rows(self, eload_status):
+        try:
+            return eload_status.status_rows()
+        except Exception as e:
+            self.error(f'Could not retrieve the status of {eload_status.eload}: {e}')
+            return [eload_status.build_status(metadata_load_status='Error')]
+
+    def status(self, output=sys.stdout):
+        self.prefetch_metadata()
+        writer = csv.DictWriter(output, fieldnames=STATUS_HEADER, delimiter='\t')
+        writer.writeheader()
+        with ThreadPoolExecutor(max_workers=self.nb_threads) as executor:
+            futures = [executor.submit(self._status_rows, eload_status) for eload_status in self.eload_statuses]
+            for future in as_completed(futures):
+                writer.writerows(future.result())
+                output.flush()
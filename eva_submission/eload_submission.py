@@ -8,14 +8,16 @@ from cached_property import cached_property
 from ebi_eva_common_pyutils.config import cfg
 from ebi_eva_common_pyutils.logger import AppLogger
 from ebi_eva_common_pyutils.logger import logging_config as log_cfg
-from ebi_eva_internal_pyutils.metadata_utils import get_metadata_connection_handle
 from packaging import version
 
 from eva_sub_cli_processing.sub_cli_utils import put_to_sub_ws, sub_ws_url_build
 from eva_submission import __version__
+from eva_submission.biosample_submission.sample_cache import get_sample_cache
 from eva_submission.config_migration import upgrade_version_0_1, upgrade_version_1_14_to_1_15, \
     upgrade_version_1_15_to_1_16
 from eva_submission.eload_utils import get_hold_date_from_ena
+from eva_submission.evapro.ena_snapshot import get_ena_snapshot_store
+from eva_submission.metadata_connection import get_metadata_connection_handle
 from eva_submission.submission_config import EloadConfig
 from eva_submission.xlsx.xlsx_parser_eva import EvaXlsxReader, EvaXlsxWriter
 
@@ -29,6 +31,7 @@ directory_structure = {
     'eva_sub_cli': '13_validation/eva_sub_cli',
     'biosamples': '18_brokering/biosamples',
     'ena': '18_brokering/ena',
+    'ena_snapshot': '18_brokering/ena/snapshots',
     'scratch': '20_scratch'
 }
 eload_logging_files = set()
@@ -72,6 +75,15 @@ class Eload(AppLogger):
     def _get_dir(self, key):
         return os.path.join(self.eload_dir, directory_structure[key])
 
+    def _get_sample_cache(self):
+        """BioSamples sample cache of this ELOAD saved in the biosamples directory."""
+        return get_sample_cache(os.path.join(self._get_dir('biosamples'), 'biosamples_sample_cache.json'))
+
+    @cached_property
+    def ena_snapshot_store(self):
+        """Snapshots of the ERA and ENA portal metadata of the projects loaded for this ELOAD."""
+        return get_ena_snapshot_store(self._get_dir('ena_snapshot'))
+
     @cached_property
     def now(self):
         return datetime.now()
@@ -184,7 +196,7 @@ class Eload(AppLogger):
             json.dump(metadata_json, open_file, indent=4)
 
     def update_metadata_spreadsheet(self, input_spreadsheet, output_spreadsheet=None, existing_project=None):
-        reader = EvaXlsxReader(input_spreadsheet)
+        reader = EvaXlsxReader(input_spreadsheet, cache_parsed_sheets=True)
         single_analysis_alias = None
         if len(reader.analysis) == 1:
             single_analysis_alias = self._unique_alias(reader.analysis[0].get('Analysis Alias'))
@@ -15,7 +15,6 @@ from ebi_eva_common_pyutils.ena_utils import download_xml_from_ena
 from ebi_eva_common_pyutils.logger import logging_config as log_cfg
 from ebi_eva_common_pyutils.reference import NCBIAssembly, NCBISequence
 from ebi_eva_common_pyutils.spreadsheet.metadata_xlsx_utils import metadata_xlsx_version
-from ebi_eva_internal_pyutils.metadata_utils import get_metadata_connection_handle
 from ebi_eva_internal_pyutils.mongodb import MongoDatabase
 from ebi_eva_internal_pyutils.pg_utils import get_all_results_for_query
 from eva_sub_cli.executables.xlsx2json import XlsxParser
@@ -23,6 +22,11 @@ from packaging.version import Version
 from requests.auth import HTTPBasicAuth
 from retry import retry
 
+from eva_submission.metadata_connection import get_metadata_connection_handle
+from eva_submission.steps.vcf_scanner import load_scan_summary
+from eva_submission.xlsx.xlsx_cache import spreadsheet_json_cache_key, copy_cached_spreadsheet_json, \
+    cache_spreadsheet_json
+
 logger = log_cfg.get_logger(__name__)
 
 
@@ -245,17 +249,23 @@ def detect_vcf_aggregation(vcf_file):
     all the samples. It is determined to be "basic" if it is not "none" and an AF field or AN and AC fields are found
     in every line checked.
     Otherwise it returns None meaning that the aggregation type could not be determined.
+    The sidecar summary written by the VCF scanner is used instead of reading the file when it is available.
     """
-
-    try:
-        samples, af_in_info, gt_in_format = _assess_vcf_aggregation_with_pysam(vcf_file)
-    except Exception:
-        logger.error(f"Pysam Failed to open and read {vcf_file}")
+    vcf_summary = load_scan_summary(vcf_file)
+    if vcf_summary:
+        samples = vcf_summary['samples']
+        af_in_info = vcf_summary['aggregation']['af_in_info']
+        gt_in_format = vcf_summary['aggregation']['gt_in_format']
+    else:
         try:
-            samples, af_in_info, gt_in_format = _assess_vcf_aggregation_manual(vcf_file)
+            samples, af_in_info, gt_in_format = _assess_vcf_aggregation_with_pysam(vcf_file)
         except Exception:
-            logger.error(f"Manual parsing Failed to open or read {vcf_file}")
-            return None
+            logger.error(f"Pysam Failed to open and read {vcf_file}")
+            try:
+                samples, af_in_info, gt_in_format = _assess_vcf_aggregation_manual(vcf_file)
+            except Exception:
+                logger.error(f"Manual parsing Failed to open or read {vcf_file}")
+                return None
     if len(samples) > 0 and gt_in_format:
         return 'none'
     elif len(samples) == 0 and af_in_info:
@@ -363,9 +373,18 @@ def get_nextflow_config_flag(nextflow_config=None):
         return f'-c {env_val}'
     return ''
 
-def convert_spreadsheet_to_json(metadata_xlsx, metadata_json_file_path, xls_parser=XlsxParser):
+def convert_spreadsheet_to_json(metadata_xlsx, metadata_json_file_path, xls_parser=XlsxParser, use_cache=True):
+    """
+    Convert the metadata spreadsheet to the eva-sub-cli JSON. The JSON is cached next to the spreadsheet and reused
+    while the spreadsheet, the conversion configuration and the parser are unchanged.
+    """
     if not metadata_xlsx:
         raise FileNotFoundError('Could not locate the metadata xls file')
+    if use_cache:
+        cache_key = spreadsheet_json_cache_key(metadata_xlsx, xls_parser)
+        if copy_cached_spreadsheet_json(metadata_xlsx, cache_key, metadata_json_file_path):
+            logger.info(f'Use the eva-sub-cli JSON already converted from {metadata_xlsx}')
+            return
     version = metadata_xlsx_version(metadata_xlsx)
     if Version(version) >= Version("1.1.6"):
         logger.info(f'Convert spreadsheet version {version} to eva-sub-cli JSON')
@@ -381,6 +400,8 @@ def convert_spreadsheet_to_json(metadata_xlsx, metadata_json_file_path, xls_pars
         except IndexError as e:
             logger.error(f'Could not convert metadata version {version} to JSON file: {metadata_xlsx}')
             raise e
+        if use_cache:
+            cache_spreadsheet_json(metadata_xlsx, cache_key, metadata_json_file_path)
 
 def open_gzip_if_required(input_file, mode='r'):
     """Open a file in read mode using gzip if the file extension says .gz"""
@@ -12,6 +12,7 @@ from eva_sub_cli_processing import sub_cli_utils
 from eva_submission import NEXTFLOW_DIR
 from eva_submission.eload_submission import Eload
 from eva_submission.eload_utils import resolve_single_file_path, get_nextflow_config_flag, get_nextflow_config
+from eva_submission.steps.contig_alias_cache import get_contig_alias_cache_params
 from eva_submission.submission_config import EloadConfig
 
 
@@ -145,7 +146,8 @@ class EloadValidation(Eload):
             'executable': cfg['executable'],
             'validation_tasks': validation_tasks,
             'nextflow_config': get_nextflow_config(self.nextflow_config),
-            'shallow_validation': shallow_validation
+            'shallow_validation': shallow_validation,
+            **get_contig_alias_cache_params()
         }
         # run the validation
         validation_config_file = os.path.join(self.eload_dir, 'validation_config_file.yaml')
@@ -0,0 +1,192 @@
+# Copyright 2026 EMBL - European Bioinformatics Institute
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import datetime
+import hashlib
+import json
+import os
+import threading
+import time
+
+from ebi_eva_common_pyutils.config import cfg
+from ebi_eva_common_pyutils.logger import AppLogger
+
+# Increment when the content of the snapshots changes so that older snapshots are ignored
+SNAPSHOT_FORMAT_VERSION = 2
+DEFAULT_SNAPSHOT_MAX_AGE = 7 * 86400
+
+_snapshot_stores = {}
+_snapshot_stores_lock = threading.Lock()
+
+
+def _json_default(value):
+    if isinstance(value, (datetime.datetime, datetime.date)):
+        return value.isoformat()
+    if isinstance(value, (set, frozenset)):
+        return sorted(value, key=str)
+    return str(value)
+
+
+# Types of the ERA rows that JSON does not have, stored as an object with a single tag
+_VALUE_TYPES = {
+    '__datetime__': (datetime.datetime, datetime.datetime.fromisoformat),
+    '__date__': (datetime.date, datetime.date.fromisoformat),
+}
+
+
+def _encode_value(value):
+    """Convert the data of an entry to JSON types, keeping the tuples, sets and dates as tagged objects."""
+    if value is None or isinstance(value, (str, bool, int, float)):
+        return value
+    if isinstance(value, list):
+        return [_encode_value(item) for item in value]
+    if isinstance(value, tuple):
+        return {'__tuple__': [_encode_value(item) for item in value]}
+    if isinstance(value, (set, frozenset)):
+        return {'__set__': [_encode_value(item) for item in sorted(value, key=str)]}
+    if isinstance(value, dict) and all(isinstance(key, str) for key in value):
+        return dict((key, _encode_value(item)) for key, item in value.items())
+    for type_tag, (value_type, _) in _VALUE_TYPES.items():
+        # datetime is checked before date which it extends
+        if isinstance(value, value_type):
+            return {type_tag: value.isoformat()}
+    raise TypeError(f'Cannot store a value of type {type(value).__name__} in an ENA snapshot')
+
+
+def _decode_value(json_object):
+    if len(json_object) == 1:
+        type_tag, value = next(iter(json_object.items()))
+        if type_tag in _VALUE_TYPES:
+            return _VALUE_TYPES[type_tag][1](value)
+        if type_tag == '__tuple__':
+            return tuple(value)
+        if type_tag == '__set__':
+            return set(value)
+    return json_object
+
+
+def snapshot_hash(data):
+    """Hash of the content of an entry that does not depend on the order of the sets or of the dictionary keys."""
+    return hashlib.sha256(json.dumps(data, sort_keys=True, default=_json_default).encode()).hexdigest()
+
+
+class EnaMetadataSnapshotStore(AppLogger):
+    """
+    Snapshots of the ERA rows and ENA portal responses retrieved for projects, stored in one file per project in
+    snapshot_dir. Each entry is identified by a key and stored with the time it was fetched and the hash of its content.
+    An entry fetched less than max_age seconds ago is returned without querying ENA, an older one is fetched again.
+    """
+
+    def __init__(self, snapshot_dir, max_age=None):
+        self.snapshot_dir = snapshot_dir
+        if max_age is None:
+            # cfg.query cannot be used for the max age because it returns the default for 0
+            max_age = int(cfg.query('ena', ret_default={}).get('snapshot_max_age', DEFAULT_SNAPSHOT_MAX_AGE))
+        self.max_age = max_age
+        # Reentrant because fetching an entry can read other entries of the same project
+        self.lock = threading.RLock()
+        self.snapshots = {}
+
+    def snapshot_file(self, project_accession):
+        return os.path.join(self.snapshot_dir, f'{project_accession}.snapshot.json')
+
+    def _load(self, project_accession):
+        if project_accession not in self.snapshots:
+            entries = {}
+            snapshot_file = self.snapshot_file(project_accession)
+            if os.path.isfile(snapshot_file):
+                try:
+                    with open(snapshot_file) as open_file:
+                        snapshot = json.load(open_file, object_hook=_decode_value)
+                    if isinstance(snapshot, dict) and snapshot.get('version') == SNAPSHOT_FORMAT_VERSION:
+                        entries = dict((key, entry) for key, entry in snapshot.get('entries', []))
+                except (ValueError, TypeError) as e:
+                    self.warning(f'Could not load the ENA snapshot {snapshot_file}: {e}')
+            self.snapshots[project_accession] = entries
+        return self.snapshots[project_accession]
+
+    def _save(self, project_accession):
+        snapshot_file = self.snapshot_file(project_accession)
+        tmp_file = f'{snapshot_file}.{os.getpid()}.tmp'
+        try:
+            os.makedirs(self.snapshot_dir, exist_ok=True)
+            # The keys are tuples so the entries are stored as a list of key and entry pairs
+            snapshot = {'version': SNAPSHOT_FORMAT_VERSION,
+                        'entries': [(key, entry) for key, entry in self.snapshots[project_accession].items()]}
+            with open(tmp_file, 'w') as open_file:
+                json.dump(_encode_value(snapshot), open_file)
+            os.replace(tmp_file, snapshot_file)
+        except (OSError, TypeError) as e:
+            self.warning(f'Could not write the ENA snapshot {snapshot_file}: {e}')
+            if os.path.exists(tmp_file):
+                os.remove(tmp_file)
+
+    def get_entry(self, project_accession, key):
+        """Entry stored for the key with its data, fetch time and hash or None if there is none."""
+        with self.lock:
+            return self._load(project_accession).get(key)
+
+    def get_fresh_data(self, project_accession, key, max_age=None):
+        """Data stored for the key if it was fetched less than max_age seconds ago, otherwise None."""
+        max_age = self.max_age if max_age is None else max_age
+        with self.lock:
+            entry = self._load(project_accession).get(key)
+            if entry and time.time() - entry['fetched'] < max_age:
+                return entry['data']
+            return None
+
+    def get(self, project_accession, key, fetch_function, max_age=None):
+        """
+        Returns the data stored for the key if it was fetched less than max_age seconds ago (the max_age of the store
+        by default), otherwise calls fetch_function and stores what it returns.
+        """
+        max_age = self.max_age if max_age is None else max_age
+        with self.lock:
+            entry = self._load(project_accession).get(key)
+            if entry and time.time() - entry['fetched'] < max_age:
+                return entry['data']
+            data = fetch_function()
+            data_hash = snapshot_hash(data)
+            if entry and entry['hash'] == data_hash:
+                self.debug(f'{key} of {project_accession} has not changed in ENA since it was last fetched')
+            else:
+                self.debug(f'{key} of {project_accession} fetched from ENA')
+            self.snapshots[project_accession][key] = {'data': data, 'fetched': time.time(), 'hash': data_hash}
+            self._save(project_accession)
+            return data
+
+    def invalidate(self, project_accession, key=None):
+        """Remove one entry or all the entries of a project so they are fetched again."""
+        with self.lock:
+            entries = self._load(project_accession)
+            if key is None:
+                entries.clear()
+            else:
+                entries.pop(key, None)
+            if os.path.isfile(self.snapshot_file(project_accession)):
+                self._save(project_accession)
+
+
+def get_from_snapshot(snapshot_store, project_accession, key, fetch_function):
+    """Read through the snapshot store of the project when there is one, otherwise call fetch_function."""
+    if snapshot_store is None or project_accession is None:
+        return fetch_function()
+    return snapshot_store.get(project_accession, key, fetch_function)
+
+
+def get_ena_snapshot_store(snapshot_dir, max_age=None):
+    """Returns the snapshot store of snapshot_dir shared by all the tools running in this process."""
+    with _snapshot_stores_lock:
+        if snapshot_dir not in _snapshot_stores:
+            _snapshot_stores[snapshot_dir] = EnaMetadataSnapshotStore(snapshot_dir, max_age=max_age)
+        return _snapshot_stores[snapshot_dir]
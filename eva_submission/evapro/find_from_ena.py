@@ -1,4 +1,5 @@
 import urllib
+from contextlib import closing
 
 import requests
 from functools import cached_property
@@ -8,11 +9,22 @@ import oracledb
 from ebi_eva_common_pyutils.config import cfg
 from ebi_eva_common_pyutils.ena_utils import download_xml_from_ena
 
+from eva_submission.evapro.ena_snapshot import get_from_snapshot
+
+# Oracle accepts at most 1000 values in an IN list
+ERA_BULK_QUERY_SIZE = 1000
+# Number of rows fetched from ERA in each round trip
+ERA_ARRAYSIZE = 1000
+
 
 class ApiEnaProjectFinder:
     file_report_base_url = 'https://www.ebi.ac.uk/ena/portal/api/filereport'
     portal_search_base_url = 'https://www.ebi.ac.uk/ena/portal/api/search'
 
+    def __init__(self, snapshot_store=None):
+        # Responses of the portal are read from the snapshot of the project when one is provided
+        self.snapshot_store = snapshot_store
+
     def find_sample_aliases_per_accessions(self, accession_list):
         # Chunk the list in case it is too long
         results = []
@@ -39,14 +51,19 @@ class ApiEnaProjectFinder:
             samples.append((sample_data['sample_accession'], sample_data['sample_alias']))
         return samples
 
-    def find_samples_from_analysis(self, accession):
+    def find_samples_from_analysis(self, accession, project_accession=None):
         """
         This function leverage the filereport endpoint to retrieve the samples name to sample accession  dictionary
         organised by analysis.
         This function can be provided with an analysis or a project accession.
         returns a dictionary with key is tha analysis accession and value is another dictionary with key is sample
         accession and value the biosample name
+        The response is kept in the snapshot of project_accession when provided.
         """
+        return get_from_snapshot(self.snapshot_store, project_accession, ('portal_samples_from_analysis', accession),
+                                 lambda: self._find_samples_from_analysis(accession))
+
+    def _find_samples_from_analysis(self, accession):
         url = self.file_report_base_url + f'?result=analysis&accession={accession}&format=json&fields=sample_accession,sample_alias'
         response = requests.get(url)
         response.raise_for_status()
@@ -59,7 +76,13 @@ class ApiEnaProjectFinder:
             results_per_analysis[analysis_data.get('analysis_accession')] = self.find_sample_aliases_per_accessions(sample_accessions)
         return results_per_analysis
 
-    def find_samples_from_analysis_xml(self, analysis_accession):
+    def find_samples_from_analysis_xml(self, analysis_accession, project_accession=None):
+        """The response is kept in the snapshot of project_accession when provided."""
+        return get_from_snapshot(self.snapshot_store, project_accession,
+                                 ('portal_samples_from_analysis_xml', analysis_accession),
+                                 lambda: self._find_samples_from_analysis_xml(analysis_accession))
+
+    def _find_samples_from_analysis_xml(self, analysis_accession):
         xml_root = download_xml_from_ena(f'https://www.ebi.ac.uk/ena/browser/api/xml/{analysis_accession}')
         xml_samples = xml_root.xpath('/ANALYSIS_SET/ANALYSIS/SAMPLE_REF')
         samples = []
@@ -85,8 +108,21 @@ class ApiEnaProjectFinder:
 
 
 class OracleEnaProjectFinder:
+    """
+    Queries ERA for the metadata of a project. When a snapshot store is provided, the results of the queries made for
+    a project are read from the snapshot of that project first.
+    """
+
+    def __init__(self, snapshot_store=None):
+        self.snapshot_store = snapshot_store
+        # Files, samples and submissions per analysis fetched in bulk by prefetch_analyses_data
+        self.prefetched_analyses_data = {}
 
     def find_project_from_ena_database(self, project_accession):
+        return get_from_snapshot(self.snapshot_store, project_accession, ('project',),
+                                 lambda: self._find_project_from_ena_database(project_accession))
+
+    def _find_project_from_ena_database(self, project_accession):
         era_project_query = (
             'select s.study_id, project_id, s.submission_id, p.center_name, p.project_alias, s.study_type, '
             'p.first_created, p.project_title, p.tax_id, p.scientific_name, p.common_name, '
@@ -113,6 +149,10 @@ class OracleEnaProjectFinder:
         )
 
     def find_parent_projects(self, project_accession):
+        return get_from_snapshot(self.snapshot_store, project_accession, ('parent_projects',),
+                                 lambda: self._find_parent_projects(project_accession))
+
+    def _find_parent_projects(self, project_accession):
         # link_type=2 == project
         # link_role=1 == hierarchical
         era_linked_project_query = (f"select to_id from era.ena_link "
@@ -122,6 +162,10 @@ class OracleEnaProjectFinder:
             return parent_projects
 
     def find_ena_submission_for_project(self, project_accession):
+        return get_from_snapshot(self.snapshot_store, project_accession, ('submissions_for_project',),
+                                 lambda: list(self._find_ena_submission_for_project(project_accession)))
+
+    def _find_ena_submission_for_project(self, project_accession):
         era_submission_query = (
             "select submission.submission_id, xmltype.getclobval(SUBMISSION_XML) submission_xml, "
             "submission.last_updated UPDATED "
@@ -136,6 +180,9 @@ class OracleEnaProjectFinder:
                 yield submission_id, alias, last_updated, hold_date, action
 
     def find_ena_submission_for_analysis(self, analysis_accession):
+        if analysis_accession in self.prefetched_analyses_data.get('submissions', {}):
+            yield from self.prefetched_analyses_data['submissions'][analysis_accession]
+            return
         era_submission_query = (
             "select sub.submission_id, sub.submission_xml, "
             "sub.last_updated UPDATED "
@@ -150,6 +197,10 @@ class OracleEnaProjectFinder:
                 yield submission_id, alias, last_updated, hold_date, action
 
     def find_analysis_in_ena(self, project_accession):
+        return get_from_snapshot(self.snapshot_store, project_accession, ('analyses',),
+                                 lambda: list(self._find_analysis_in_ena(project_accession)))
+
+    def _find_analysis_in_ena(self, project_accession):
         era_analysis_query = (
             'select t.analysis_id, t.analysis_title, t.analysis_alias, t.analysis_type, t.center_name, t.first_created, '
             ' xmltype.getclobval(t.ANALYSIS_XML) analysis_xml '
@@ -172,6 +223,9 @@ class OracleEnaProjectFinder:
                 )
 
     def find_samples_in_ena(self, analysis_accession):
+        if analysis_accession in self.prefetched_analyses_data.get('samples', {}):
+            yield from self.prefetched_analyses_data['samples'][analysis_accession]
+            return
         query = ("select s.sample_id, s.biosample_id from era.analysis_sample asa "
                  f"join era.sample s on asa.sample_id = s.sample_id where analysis_id='{analysis_accession}'")
         with self.era_cursor() as cursor:
@@ -179,6 +233,9 @@ class OracleEnaProjectFinder:
                 yield sample_id, sample_accession
 
     def find_files_in_ena(self, analysis_accession):
+        if analysis_accession in self.prefetched_analyses_data.get('files', {}):
+            yield from self.prefetched_analyses_data['files'][analysis_accession]
+            return
         query = (
             "select distinct asf.analysis_id as analysis_accession, wf.submission_file_id as submission_file_id, "
             "regexp_substr(wf.data_file_path, \'[^/]*$\') as filename,"
@@ -192,6 +249,142 @@ class OracleEnaProjectFinder:
             for analysis_accession, submission_file_id, filename, file_md5, file_type, file_size, status_id in cursor.execute(query):
                 yield analysis_accession, submission_file_id, filename, file_md5, file_type, file_size, status_id
 
+    def find_analysis_accessions_in_ena(self, project_accession):
+        """Accessions of the analyses returned by find_analysis_in_ena, without their XML."""
+        return get_from_snapshot(self.snapshot_store, project_accession, ('analysis_accessions',),
+                                 lambda: self._find_analysis_accessions_in_ena(project_accession))
+
+    def _find_analysis_accessions_in_ena(self, project_accession):
+        query = (
+            'select analysis_id from era.analysis '
+            "where status_id <> 5 and lower(submission_account_id) in ('webin-1008') "
+            "and analysis_type = 'SEQUENCE_VARIATION' "
+            'and (study_id in (select study_id from era.study where project_id = :project_accession) '
+            'or study_id = :project_accession or bioproject_id = :project_accession)'
+        )
+        with closing(self.era_cursor()) as cursor:
+            cursor.arraysize = ERA_ARRAYSIZE
+            return [analysis_id for analysis_id, in cursor.execute(query, {'project_accession': project_accession})]
+
+    def _execute_for_analyses(self, query, analysis_accessions):
+        """
+        Run a query selecting rows for a list of analyses, the query contains {analyses} where the IN list of bind
+        variables goes. The list is split so that each query binds at most ERA_BULK_QUERY_SIZE analyses.
+        """
+        with closing(self.era_cursor()) as cursor:
+            cursor.arraysize = ERA_ARRAYSIZE
+            for i in range(0, len(analysis_accessions), ERA_BULK_QUERY_SIZE):
+                chunk = analysis_accessions[i:i + ERA_BULK_QUERY_SIZE]
+                bind_variables = dict((f'analysis_{j}', analysis_accession)
+                                      for j, analysis_accession in enumerate(chunk))
+                in_list = ', '.join(f':{name}' for name in bind_variables)
+                yield from cursor.execute(query.format(analyses=in_list), bind_variables)
+
+    def find_analyses_data_in_bulk(self, project_accession=None, analysis_accessions=None):
+        """
+        Retrieve the files, samples and submissions of all the analyses of a project, or of the analyses provided,
+        with one query per type of data instead of one per analysis.
+        Returns a dictionary with the list of analysis accessions under 'analyses' and, under 'files', 'samples' and
+        'submissions', dictionaries where the key is the analysis accession and the value is the list of what
+        find_files_in_ena, find_samples_in_ena and find_ena_submission_for_analysis return for that analysis.
+        When both are provided, the analyses are used and their data is kept in the snapshot of the project.
+        """
+        if analysis_accessions is not None:
+            analysis_accessions = list(dict.fromkeys(analysis_accessions))
+        if analysis_accessions is None or self.snapshot_store is None or project_accession is None:
+            return get_from_snapshot(self.snapshot_store, project_accession, ('analyses_data',),
+                                     lambda: self._find_analyses_data_in_bulk(project_accession, analysis_accessions))
+        # The data of the whole project is used when it covers the analyses, otherwise the analyses requested are
+        # added to the ones requested before so that each project has a single entry of selected analyses
+        project_analyses_data = self.snapshot_store.get_fresh_data(project_accession, ('analyses_data',))
+        if project_analyses_data and set(analysis_accessions).issubset(project_analyses_data['analyses']):
+            return self._select_analyses_data(project_analyses_data, analysis_accessions)
+        selected_analyses_data = self.snapshot_store.get_fresh_data(project_accession, ('selected_analyses_data',))
+        if selected_analyses_data and set(analysis_accessions).issubset(selected_analyses_data['analyses']):
+            return self._select_analyses_data(selected_analyses_data, analysis_accessions)
+        selected_analyses = list(dict.fromkeys(
+            (selected_analyses_data['analyses'] if selected_analyses_data else []) + analysis_accessions
+        ))
+        selected_analyses_data = self.snapshot_store.get(
+            project_accession, ('selected_analyses_data',),
+            lambda: self._find_analyses_data_in_bulk(project_accession, selected_analyses), max_age=0
+        )
+        return self._select_analyses_data(selected_analyses_data, analysis_accessions)
+
+    @staticmethod
+    def _select_analyses_data(analyses_data, analysis_accessions):
+        selected_analyses_data = {'analyses': analysis_accessions}
+        for data_type in ['files', 'samples', 'submissions']:
+            selected_analyses_data[data_type] = dict(
+                (analysis_accession, analyses_data[data_type][analysis_accession])
+                for analysis_accession in analysis_accessions
+            )
+        return selected_analyses_data
+
+    def _find_analyses_data_in_bulk(self, project_accession, analysis_accessions):
+        if analysis_accessions is None:
+            analysis_accessions = self.find_analysis_accessions_in_ena(project_accession)
+        analyses_data = {
+            'analyses': analysis_accessions,
+            'files': dict((analysis_accession, []) for analysis_accession in analysis_accessions),
+            'samples': dict((analysis_accession, []) for analysis_accession in analysis_accessions),
+            'submissions': dict((analysis_accession, []) for analysis_accession in analysis_accessions)
+        }
+        if not analysis_accessions:
+            return analyses_data
+
+        files_query = (
+            'select distinct asf.analysis_id, wf.submission_file_id, wf.data_file_path, wf.checksum, '
+            'wf.data_file_format, wf.bytes, ana.status_id '
+            'from era.analysis_submission_file asf '
+            'join era.webin_file wf on asf.analysis_id=wf.data_file_owner_id '
+            'join era.analysis ana on asf.analysis_id=ana.analysis_id '
+            'where asf.analysis_id in ({analyses})'
+        )
+        for (analysis_accession, submission_file_id, data_file_path, file_md5, file_type, file_size,
+             status_id) in self._execute_for_analyses(files_query, analysis_accessions):
+            file_info = (analysis_accession, submission_file_id, self._file_name_from_path(data_file_path), file_md5,
+                         file_type, file_size, status_id)
+            if file_info not in analyses_data['files'][analysis_accession]:
+                analyses_data['files'][analysis_accession].append(file_info)
+
+        samples_query = (
+            'select asa.analysis_id, s.sample_id, s.biosample_id from era.analysis_sample asa '
+            'join era.sample s on asa.sample_id = s.sample_id where asa.analysis_id in ({analyses})'
+        )
+        for analysis_accession, sample_id, sample_accession in self._execute_for_analyses(samples_query,
+                                                                                          analysis_accessions):
+            analyses_data['samples'][analysis_accession].append((sample_id, sample_accession))
+
+        submissions_query = (
+            'select a.analysis_id, sub.submission_id, sub.submission_xml, sub.last_updated '
+            'from era.submission sub '
+            'join era.analysis a on sub.submission_id=a.submission_id '
+            "where a.analysis_id in ({analyses}) and a.submission_id like 'ERA%'"
+        )
+        for analysis_accession, submission_id, submission_xml, last_updated in self._execute_for_analyses(
+                submissions_query, analysis_accessions):
+            alias, hold_date, action = self._parse_actions_and_alias_from_submission_xml(str(submission_xml))
+            analyses_data['submissions'][analysis_accession].append(
+                (submission_id, alias, last_updated, hold_date, action)
+            )
+        return analyses_data
+
+    def prefetch_analyses_data(self, project_accession=None, analysis_accessions=None):
+        """
+        Fetch the data of the analyses in bulk so that find_files_in_ena, find_samples_in_ena and
+        find_ena_submission_for_analysis return it without querying ERA for these analyses.
+        """
+        self.prefetched_analyses_data = self.find_analyses_data_in_bulk(project_accession=project_accession,
+                                                                        analysis_accessions=analysis_accessions)
+
+    @staticmethod
+    def _file_name_from_path(data_file_path):
+        # Same as regexp_substr(data_file_path, '[^/]*$') which returns null rather than an empty string
+        if data_file_path is None:
+            return None
+        return data_file_path.rsplit('/', 1)[-1] or None
+
     @cached_property
     def era_connection(self):
         era_cred = cfg.query('ena', 'ERA')
@@ -2,17 +2,14 @@ import datetime
 import os
 import re
 from functools import cached_property
-from urllib.parse import urlsplit
 
 from ebi_eva_common_pyutils.assembly_utils import is_patch_assembly
 from ebi_eva_common_pyutils.config import cfg
 from ebi_eva_common_pyutils.ena_utils import get_scientific_name_and_common_name
 from ebi_eva_common_pyutils.logger import AppLogger
 from ebi_eva_common_pyutils.ncbi_utils import get_ncbi_assembly_name_from_term
-from ebi_eva_internal_pyutils.config_utils import get_metadata_creds_for_profile
 from ebi_eva_internal_pyutils.metadata_utils import build_taxonomy_code
-from sqlalchemy import select, create_engine, func, update
-from sqlalchemy.engine import URL
+from sqlalchemy import select, func, update, insert
 from sqlalchemy.orm import Session
 from sqlalchemy.sql import text
 
@@ -21,9 +18,12 @@ from eva_submission.evapro.find_from_ena import OracleEnaProjectFinder
 from eva_submission.evapro.table import Project, Taxonomy, LinkedProject, Submission, ProjectEnaSubmission, \
     EvaSubmission, ProjectEvaSubmission, Analysis, AssemblySet, AccessionedAssembly, File, BrowsableFile, \
     Platform, ExperimentType, Sample, SampleInFile, ProjectSampleTemp1, ClusteredVariantUpdate, EvaReferencedSequence
+from eva_submission.metadata_connection import get_metadata_engine
 from eva_submission.sample_utils import get_samples_from_vcf
 
 ena_ftp_file_prefix_path = "/ftp.sra.ebi.ac.uk/vol1"
+# Maximum number of values bound in a single IN clause
+BULK_QUERY_SIZE = 1000
 
 
 def get_ftp_path(filename, analysis_accession_id):
@@ -43,12 +43,14 @@ class EvaProjectLoader(AppLogger):
     The last 2 methods assume the project/analysis and file have been loaded already
     """
 
-    def __init__(self, eload=None):
-        self.ena_project_finder = OracleEnaProjectFinder()
+    def __init__(self, eload=None, snapshot_store=None):
         if eload:
             self.eload_metadata_json_loader = EloadMetadataJsonLoader(eload)
+            # Read the metadata from ENA through the snapshots of the ELOAD unless told otherwise
+            snapshot_store = snapshot_store or self.eload_metadata_json_loader.ena_snapshot_store
         else:
             self.eload_metadata_json_loader = None
+        self.ena_project_finder = OracleEnaProjectFinder(snapshot_store=snapshot_store)
 
     def load_project_from_ena(self, project_accession, eload, analysis_accession_to_load=None,
                               taxonomy_id_for_project=None, load_browsable_files=True):
@@ -110,6 +112,12 @@ class EvaProjectLoader(AppLogger):
         ###
         # LOAD ANALYSIS
         ###
+        # Fetch the submissions, files and samples of all the analyses in a few queries instead of three per analysis
+        if analysis_accession_to_load:
+            self.ena_project_finder.prefetch_analyses_data(project_accession=project_accession,
+                                                           analysis_accessions=[analysis_accession_to_load])
+        else:
+            self.ena_project_finder.prefetch_analyses_data(project_accession=project_accession)
         for analysis_info in self.ena_project_finder.find_analysis_in_ena(project_accession=project_accession):
             (
                 analysis_accession, analysis_title, analysis_alias, analysis_description, analysis_type, center_name,
@@ -219,6 +227,7 @@ class EvaProjectLoader(AppLogger):
             self.error(f'Cannot find file {vcf_file} in EVAPRO for md5 {vcf_file_md5}: Rolling back')
             self.eva_session.rollback()
             return False
+        sample_accession_and_names = []
         for sample_name_in_vcf in sample_names:
             sample_accession = sample_name_2_sample_accession.get(sample_name_in_vcf)
             if not sample_accession and sample_mapping:
@@ -232,13 +241,17 @@ class EvaProjectLoader(AppLogger):
                 self.error(f'Sample {sample_name_in_vcf} found in {vcf_file} does not have BioSample accession: Rolling back')
                 self.eva_session.rollback()
                 return False
-            sample_obj = self.get_sample(sample_accession)
+            sample_accession_and_names.append((sample_accession, sample_name_in_vcf))
+        sample_objs = self.get_samples([sample_accession for sample_accession, _ in sample_accession_and_names])
+        sample_ids_and_names = []
+        for sample_accession, sample_name_in_vcf in sample_accession_and_names:
+            sample_obj = sample_objs.get(sample_accession)
             if not sample_obj:
                 self.error(f'Cannot find sample {sample_accession} ({sample_name_in_vcf}) from {vcf_file} in EVAPRO: Rolling back')
                 self.eva_session.rollback()
                 return False
-            self.insert_sample_in_file(file_id=file_obj.file_id, sample_id=sample_obj.sample_id,
-                                       name_in_file=sample_name_in_vcf)
+            sample_ids_and_names.append((sample_obj.sample_id, sample_name_in_vcf))
+        self.insert_samples_in_files(file_ids=[file_obj.file_id], sample_ids_and_names=sample_ids_and_names)
         self.eva_session.commit()
         return True
 
@@ -251,9 +264,11 @@ class EvaProjectLoader(AppLogger):
             zip(sample_name_2_sample_accession.values(), sample_name_2_sample_accession.keys()))
         self.begin_or_continue_transaction()
         file_objs = self.get_files_for_analysis(analysis_accession)
+        sample_objs = self.get_samples(sample_accessions)
+        sample_ids_and_names = []
         for sample_accession in sample_accessions:
             sample_name = sample_accession_2_sample_name.get(sample_accession)
-            sample_obj = self.get_sample(sample_accession)
+            sample_obj = sample_objs.get(sample_accession)
             if not sample_obj:
                 self.error(f'Cannot find sample {sample_accession} in EVAPRO')
                 self.eva_session.rollback()
@@ -262,10 +277,10 @@ class EvaProjectLoader(AppLogger):
                 self.error(f'Cannot find the name for sample {sample_accession}')
                 self.eva_session.rollback()
                 return False
-            # Associate these samples with all files in the analysis
-            for file_obj in file_objs:
-                self.insert_sample_in_file(file_id=file_obj.file_id, sample_id=sample_obj.sample_id,
-                                           name_in_file=sample_name)
+            sample_ids_and_names.append((sample_obj.sample_id, sample_name))
+        # Associate these samples with all files in the analysis
+        self.insert_samples_in_files(file_ids=[file_obj.file_id for file_obj in file_objs],
+                                     sample_ids_and_names=sample_ids_and_names)
         self.eva_session.commit()
         return True
 
@@ -425,18 +440,7 @@ class EvaProjectLoader(AppLogger):
         self.eva_session.commit()
 
     def _evapro_engine(self):
-        pg_url, pg_user, pg_pass = get_metadata_creds_for_profile(cfg['maven']['environment'],
-                                                                  cfg['maven']['settings_file'])
-        dbtype, host_url, port_and_db = urlsplit(pg_url).path.split(':')
-        port, db = port_and_db.split('/')
-        return create_engine(URL.create(
-            'postgresql+psycopg2',
-            username=pg_user,
-            password=pg_pass,
-            host=host_url.split('/')[-1],
-            database=db,
-            port=int(port)
-        ))
+        return get_metadata_engine(cfg['maven']['environment'], cfg['maven']['settings_file'])
 
     @cached_property
     def eva_session(self):
@@ -723,6 +727,17 @@ class EvaProjectLoader(AppLogger):
             return result.Sample
         return None
 
+    def get_samples(self, biosample_accessions):
+        """Retrieve the samples for all the provided BioSample accessions as a dict keyed by accession."""
+        unique_accessions = list(dict.fromkeys(biosample_accessions))
+        sample_objs = {}
+        for i in range(0, len(unique_accessions), BULK_QUERY_SIZE):
+            query = select(Sample).where(Sample.biosample_accession.in_(unique_accessions[i:i + BULK_QUERY_SIZE]))
+            for sample_obj in self.eva_session.execute(query).scalars():
+                # Keep the first sample like get_sample does when an accession is present more than once
+                sample_objs.setdefault(sample_obj.biosample_accession, sample_obj)
+        return sample_objs
+
     def insert_sample(self, biosample_accession, ena_accession):
         sample_obj = self.get_sample(biosample_accession)
         if not sample_obj:
@@ -744,6 +759,31 @@ class EvaProjectLoader(AppLogger):
             self.info(f'Add SampleInFile {file_id} and {sample_id} to EVAPRO')
         return sample_in_file_obj
 
+    def insert_samples_in_files(self, file_ids, sample_ids_and_names):
+        """
+        Link every sample in sample_ids_and_names, a list of (sample_id, name_in_file), to each of the files.
+        Existing links are left unchanged and the new ones are inserted in a single bulk statement.
+        """
+        if not file_ids or not sample_ids_and_names:
+            return
+        sample_ids = list(dict.fromkeys(sample_id for sample_id, _ in sample_ids_and_names))
+        existing_links = set()
+        for i in range(0, len(sample_ids), BULK_QUERY_SIZE):
+            query = select(SampleInFile.file_id, SampleInFile.sample_id).where(
+                SampleInFile.file_id.in_(file_ids),
+                SampleInFile.sample_id.in_(sample_ids[i:i + BULK_QUERY_SIZE])
+            )
+            existing_links.update(tuple(row) for row in self.eva_session.execute(query))
+        rows = []
+        for file_id in file_ids:
+            for sample_id, name_in_file in sample_ids_and_names:
+                if (file_id, sample_id) not in existing_links:
+                    existing_links.add((file_id, sample_id))
+                    rows.append({'file_id': file_id, 'sample_id': sample_id, 'name_in_file': name_in_file})
+        if rows:
+            self.eva_session.execute(insert(SampleInFile), rows)
+            self.info(f'Add {len(rows)} SampleInFile for {len(file_ids)} file(s) to EVAPRO')
+
     def insert_referenced_sequences(self, sequences):
         sequence_objs = []
         for sequence in sequences:
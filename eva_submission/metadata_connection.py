@@ -0,0 +1,148 @@
+# Copyright 2026 EMBL - European Bioinformatics Institute
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import threading
+import time
+from urllib.parse import urlsplit
+
+from ebi_eva_common_pyutils.config import cfg
+from ebi_eva_common_pyutils.logger import logging_config as log_cfg
+from ebi_eva_internal_pyutils.config_utils import get_metadata_creds_for_profile
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import URL
+
+logger = log_cfg.get_logger(__name__)
+
+DEFAULT_POOL_SIZE = 5
+DEFAULT_POOL_MAX_OVERFLOW = 5
+# Connections older than this are replaced when checked out to avoid using connections closed by the server
+DEFAULT_POOL_RECYCLE = 3600
+
+_engines = {}
+_engines_lock = threading.Lock()
+
+
+class CheckoutStatistics:
+    """Records the number of connections opened and checked out of the pool and the time spent waiting for them."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        self.nb_connections_opened = 0
+        self.nb_checkouts = 0
+        self.total_checkout_time = 0
+        self.max_checkout_time = 0
+
+    def add_connection(self):
+        with self.lock:
+            self.nb_connections_opened += 1
+
+    def add_checkout(self, checkout_time):
+        with self.lock:
+            self.nb_checkouts += 1
+            self.total_checkout_time += checkout_time
+            self.max_checkout_time = max(self.max_checkout_time, checkout_time)
+
+    def summary(self):
+        average = self.total_checkout_time / self.nb_checkouts if self.nb_checkouts else 0
+        return (f'{self.nb_checkouts} metadata connection checkouts using {self.nb_connections_opened} connections: '
+                f'{self.total_checkout_time:.3f}s spent in checkout (average {average:.3f}s, '
+                f'max {self.max_checkout_time:.3f}s)')
+
+
+checkout_statistics = CheckoutStatistics()
+
+
+def _metadata_url(profile, settings_xml_file):
+    pg_url, pg_user, pg_pass = get_metadata_creds_for_profile(profile, settings_xml_file)
+    dbtype, host_url, port_and_db = urlsplit(pg_url).path.split(':')
+    port, db = port_and_db.split('/')
+    return URL.create(
+        'postgresql+psycopg2',
+        username=pg_user,
+        password=pg_pass,
+        host=host_url.split('/')[-1],
+        database=db,
+        port=int(port)
+    )
+
+
+def get_metadata_engine(profile=None, settings_xml_file=None):
+    """
+    Provides the SQLAlchemy engine connected to the metadata database of the maven profile. The engine and its pool of
+    connections are created once per process and shared by all the callers.
+    The size of the pool is set with metadata_pool_size and metadata_pool_max_overflow in the configuration.
+    """
+    profile = profile or cfg['maven']['environment']
+    settings_xml_file = settings_xml_file or cfg['maven']['settings_file']
+    key = (profile, settings_xml_file)
+    with _engines_lock:
+        if key not in _engines:
+            engine = create_engine(
+                _metadata_url(profile, settings_xml_file),
+                pool_size=cfg.get('metadata_pool_size', DEFAULT_POOL_SIZE),
+                max_overflow=cfg.get('metadata_pool_max_overflow', DEFAULT_POOL_MAX_OVERFLOW),
+                pool_recycle=DEFAULT_POOL_RECYCLE,
+                pool_pre_ping=True
+            )
+            event.listen(engine, 'connect', lambda dbapi_connection, connection_record:
+                         checkout_statistics.add_connection())
+            _engines[key] = engine
+        return _engines[key]
+
+
+def dispose_metadata_engines():
+    """Closes all the pooled connections."""
+    with _engines_lock:
+        for engine in _engines.values():
+            engine.dispose()
+        _engines.clear()
+
+
+class PooledConnection:
+    """
+    Connection checked out of the pool that can be used in place of the psycopg2 connection.
+    Used as a context manager, the transaction is committed or rolled back like with psycopg2 and the connection is then
+    returned to the pool.
+    """
+
+    def __init__(self, pool_connection):
+        self._pool_connection = pool_connection
+
+    def __getattr__(self, item):
+        return getattr(self._pool_connection, item)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        try:
+            if exc_type is None:
+                self._pool_connection.commit()
+            else:
+                self._pool_connection.rollback()
+        finally:
+            self._pool_connection.close()
+
+
+def get_metadata_connection_handle(profile, settings_xml_file):
+    """Drop-in replacement for metadata_utils.get_metadata_connection_handle that uses the shared pool."""
+    engine = get_metadata_engine(profile, settings_xml_file)
+    start = time.perf_counter()
+    pool_connection = engine.raw_connection()
+    checkout_time = time.perf_counter() - start
+    checkout_statistics.add_checkout(checkout_time)
+    logger.debug(f'Metadata connection checked out in {checkout_time:.3f}s')
+    return PooledConnection(pool_connection)
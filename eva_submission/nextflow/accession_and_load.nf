@@ -2,7 +2,7 @@
 
 nextflow.enable.dsl=2
 
-include { copy_to_ftp } from './common_processes.nf'
+include { copy_to_ftp; sharded_normalisation } from './common_processes.nf'
 
 
 def helpMessage() {
@@ -21,6 +21,9 @@ def helpMessage() {
             --public_dir                directory for files to be made public
             --logs_dir                  logs directory
             --taxonomy                  taxonomy id
+            --custom_genome_cache_dir   directory where the renamed genomes are cached across submissions (optional)
+            --normalisation_shards      maximum number of shards of sequences normalised in parallel for each VCF (optional)
+            --contig_alias_args         arguments of the contig alias cache passed to the steps (optional)
     """
 }
 
@@ -35,6 +38,9 @@ params.taxonomy = null
 params.load_job_props = null
 params.acc_import_job_props = null
 params.annotation_only = null
+params.custom_genome_cache_dir = null
+params.normalisation_shards = 1
+params.contig_alias_args = ""
 
 // executables
 params.executable = ["bcftools": "bcftools", "tabix": "tabix", "bgzip": "bgzip"]
@@ -106,9 +112,16 @@ workflow {
         .splitCsv(header:true)
         .map{row -> tuple(row.assembly_accession, file(row.vcf_file), file(row.csi_file))}
         .combine(prepare_genome.out.custom_fasta, by: 0)     // Join based on the assembly
-        .map{tuple(it[1].name, it[3], it[1], it[2])}         // vcf_filename, fasta_file, vcf_file, csi_file
-
-    normalise_vcf(assembly_and_vcf_channel)
+        .map{tuple(it[1].name, it[3], it[4], it[1], it[2])}  // vcf_filename, fasta_file, fasta_index, vcf_file, csi_file
+
+    if (params.normalisation_shards > 1) {
+        // vcf_filename, vcf_file, csi_file, fasta_file, fasta_index
+        sharded_normalisation(assembly_and_vcf_channel.map{tuple(it[0], it[3], it[4].toString(), it[1], it[2])})
+        normalised_vcf_tuples = sharded_normalisation.out.vcf_tuples
+    } else {
+        normalise_vcf(assembly_and_vcf_channel)
+        normalised_vcf_tuples = normalise_vcf.out.vcf_tuples
+    }
     all_accession_complete = null
     is_human_study = (params.taxonomy == 9606)
     if ("accession" in params.ingestion_tasks) {
@@ -121,7 +134,7 @@ workflow {
             normalised_vcfs_ch = Channel.fromPath(params.valid_vcfs)
                 .splitCsv(header:true)
                 .map{row -> tuple(file(row.vcf_file).name, file(row.vcf_file), row.assembly_accession, row.aggregation, file(row.fasta), file(row.report))}
-                .combine(normalise_vcf.out.vcf_tuples, by:0)     // Join based on the vcf_filename
+                .combine(normalised_vcf_tuples, by:0)     // Join based on the vcf_filename
                 .map {tuple(it[0], it[6], it[2], it[3], it[4], it[5])}   // vcf_filename, normalised vcf, assembly_accession, aggregation, fasta, report
             accession_vcf(normalised_vcfs_ch)
             qc_accession_vcf(accession_vcf.out.accession_done)
@@ -139,7 +152,7 @@ workflow {
         normalised_vcfs_ch = Channel.fromPath(params.valid_vcfs)
                 .splitCsv(header:true)
                 .map{row -> tuple(file(row.vcf_file).name, file(row.vcf_file), file(row.fasta), row.analysis_accession, row.db_name, row.vep_version, row.vep_cache_version, row.vep_species, row.aggregation, file(row.report))}
-                .combine(normalise_vcf.out.vcf_tuples, by:0)
+                .combine(normalised_vcf_tuples, by:0)
                 .map{tuple(it[0], it[10], it[2], it[3], it[4], it[5], it[6], it[7], it[8], it[9])}   // vcf_filename, normalised vcf, fasta, analysis_accession, db_name, vep_version, vep_cache_version, vep_species, aggregation, assembly_report
         load_variants_vcf(normalised_vcfs_ch)
         // Ensure that all the load are completed before the VEP and calculate statistics starts
@@ -178,14 +191,15 @@ process prepare_genome {
     tuple path(fasta), path(report), val(assembly_accession), path(vcf_files)
 
     output:
-    tuple val(assembly_accession), path("${fasta.getSimpleName()}_custom.fa"), emit: custom_fasta
+    tuple val(assembly_accession), path("${fasta.getSimpleName()}_custom.fa"), path("${fasta.getSimpleName()}_custom.fa.fai"), emit: custom_fasta
 
     script:
+    def genome_cache_arg = params.custom_genome_cache_dir ? "--custom_genome_cache_dir ${params.custom_genome_cache_dir}" : ""
     """
     export PYTHONPATH="$params.executable.python.script_path"
     $params.executable.python.interpreter -m eva_submission.steps.rename_contigs_from_insdc_in_assembly \
     --assembly_accession $assembly_accession --assembly_fasta $fasta --custom_fasta ${fasta.getSimpleName()}_custom.fa \
-    --assembly_report $report   --vcf_files $vcf_files
+    --assembly_report $report   --vcf_files $vcf_files $genome_cache_arg $params.contig_alias_args
     """
 }
 
@@ -197,7 +211,7 @@ process normalise_vcf {
     label 'long_time', 'med_mem'
 
     input:
-    tuple val(vcf_filename), path(fasta), path(vcf_file), path(csi_file)
+    tuple val(vcf_filename), path(fasta), path(fasta_index), path(vcf_file), path(csi_file)
 
     output:
     tuple val(vcf_filename), path("normalised_vcfs/*.gz"), path("normalised_vcfs/*.csi"), emit: vcf_tuples
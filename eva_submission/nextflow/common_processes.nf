@@ -32,4 +32,128 @@ nextflow.enable.dsl=2
         rsync -va * ${params.public_ftp_dir}/${params.project_accession}
         ls -l ${params.public_ftp_dir}/${params.project_accession}/*
         """
-}
\ No newline at end of file
+}
+
+
+/*
+ * Normalise a VCF file in shards of sequences processed in parallel and concatenate the shards.
+ * Takes tuples of output VCF name, VCF file, its index (empty when not known), fasta and fasta index.
+ */
+workflow sharded_normalisation {
+    take:
+    vcf_channel
+
+    main:
+    shard_vcf(vcf_channel)
+    shard_channel = shard_vcf.out.shards.flatMap{ output_vcf, vcf_files, fasta, fasta_index, shard_files ->
+        def shard_list = shard_files instanceof List ? shard_files : [shard_files]
+        // The number of shards lets the parts be merged as soon as all the shards of a VCF are normalised
+        shard_list.collect{ tuple(groupKey(output_vcf, shard_list.size()), vcf_files, fasta, fasta_index, it) }
+    }
+    normalise_vcf_shard(shard_channel)
+    // The shards contain contiguous sequences so their parts are concatenated in the order of the shards
+    parts_channel = normalise_vcf_shard.out.parts.groupTuple(by: 0).map{ output_vcf, shard_numbers, parts, logs ->
+        def ordered_parts = [shard_numbers, parts, logs].transpose().sort{ it[0] }
+        tuple(output_vcf.toString(), ordered_parts.collect{ it[1] }, ordered_parts.collect{ it[2] })
+    }
+    merge_vcf_shards(parts_channel)
+
+    emit:
+    vcf_tuples = merge_vcf_shards.out.vcf_tuples
+    md5 = merge_vcf_shards.out.md5
+    normalisation_log = merge_vcf_shards.out.normalisation_log
+}
+
+
+/*
+ * Create the indexed VCF and split its sequences in shards of contiguous sequences of similar size using the index
+ * statistics. Each shard is a region file of its sequences. A VCF that cannot be indexed, because it is not sorted, has
+ * no index and a single empty shard.
+ */
+process shard_vcf {
+    label 'default_time', 'small_mem'
+
+    input:
+    tuple val(output_vcf), path(vcf_file), val(index_file), path(fasta), path(fasta_index)
+
+    output:
+    tuple val(output_vcf), path("input/${output_vcf}*"), path(fasta), path(fasta_index), path("shards/*.txt"), emit: shards
+
+    script:
+    def index_arg = index_file ? "--index_file ${index_file}" : ""
+    """
+    export PYTHONPATH="$params.executable.python.script_path"
+    mkdir input
+    $params.executable.python.interpreter -m eva_submission.steps.vcf_sharding plan \
+    --vcf_file $vcf_file $index_arg --output_vcf input/$output_vcf --nb_shards $params.normalisation_shards --shards_dir shards
+    """
+}
+
+
+/*
+ * Normalise the sequences of a shard into one sorted part. An empty shard normalises the whole VCF, which does not
+ * need the index.
+ */
+process normalise_vcf_shard {
+    label 'long_time', 'med_mem'
+
+    input:
+    tuple val(output_vcf), path(vcf_files), path(fasta), path(fasta_index), path(shard_file)
+
+    output:
+    tuple val(output_vcf), val(shard_number), path("${shard_name}.vcf.gz"), path("${shard_name}_bcftools_norm.log"), emit: parts
+
+    script:
+    shard_name = shard_file.getBaseName()
+    shard_number = shard_name.tokenize('_')[-1].toInteger()
+    def regions_arg = shard_file.size() > 0 ? "-R $shard_file" : ""
+    // The VCF is staged with its index, when it has one, under the name of the output VCF
+    def vcf_file = output_vcf
+    // The sort command line is part of the header and must be identical in all the parts for them to be concatenated
+    """
+    set -eo pipefail
+    $params.executable.bcftools norm --no-version -cw -f $fasta $regions_arg -O u $vcf_file 2> ${shard_name}_bcftools_norm.log \
+        | $params.executable.bcftools sort -T ./tmp. -O z - > ${shard_name}.vcf.gz
+    """
+}
+
+
+/*
+ * Concatenate the normalised parts in the order of the shards, then index the VCF, compute the md5 of the VCF while it
+ * is written and merge the normalisation logs
+ */
+process merge_vcf_shards {
+    label 'default_time', 'small_mem'
+
+    publishDir "$params.output_dir",
+            enabled: params.output_dir != null,
+            overwrite: false,
+            mode: "copy",
+            saveAs: { fn -> fn.substring(fn.lastIndexOf('/')+1) }
+
+    input:
+    tuple val(output_vcf), path(parts), path(logs)
+
+    output:
+    tuple val(output_vcf), path("normalised_vcfs/${output_vcf}"), path("normalised_vcfs/${output_vcf}.csi"), emit: vcf_tuples
+    path "normalised_vcfs/*.md5", emit: md5
+    path "normalised_vcfs/*.log", emit: normalisation_log
+
+    script:
+    def uncompressed_name = output_vcf.substring(0, output_vcf.length() - 3)
+    // printf is a shell builtin so the ordered list of parts is not limited by the maximum length of a command line
+    """
+    set -eo pipefail
+    export PYTHONPATH="$params.executable.python.script_path"
+    mkdir normalised_vcfs
+    printf '%s\\n' ${parts.join(' ')} > parts.txt
+    printf '%s\\n' ${logs.join(' ')} > logs.txt
+    $params.executable.python.interpreter -m eva_submission.steps.vcf_sharding merge_logs \
+    --log_list logs.txt --output_log normalised_vcfs/${uncompressed_name}_bcftools_norm.log
+    $params.executable.bcftools concat --naive -f parts.txt -O z \
+        | tee normalised_vcfs/$output_vcf \
+        | $params.executable.md5sum | sed 's/ .*/  $output_vcf/' > normalised_vcfs/${output_vcf}.md5
+    $params.executable.bcftools index -c normalised_vcfs/$output_vcf
+    cd normalised_vcfs && $params.executable.md5sum ${output_vcf}.csi > ${output_vcf}.csi.md5
+    """
+}
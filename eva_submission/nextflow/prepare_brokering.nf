@@ -1,6 +1,9 @@
 #!/usr/bin/env nextflow
 
 nextflow.enable.dsl=2
+
+include { sharded_normalisation } from './common_processes.nf'
+
 def helpMessage() {
     log.info"""
     Prepare vcf file ready to be broker to ENA.
@@ -8,11 +11,17 @@ def helpMessage() {
     Inputs:
             --vcf_files_mapping     csv file with the mappings for vcf files, fasta and assembly report
             --output_dir            output_directory where the final will be written
+            --custom_genome_cache_dir   directory where the renamed genomes are cached across submissions (optional)
+            --normalisation_shards  maximum number of shards of sequences normalised in parallel for each VCF (optional)
+            --contig_alias_args         arguments of the contig alias cache passed to the steps (optional)
 
     """
 }
 
 params.vcf_files_mapping = null
+params.custom_genome_cache_dir = null
+params.normalisation_shards = 1
+params.contig_alias_args = ""
 // executables
 params.executable = ["md5sum", "tabix", "bgzip", "bcftools"]
 // help
@@ -32,12 +41,6 @@ if (!params.vcf_files_mapping || !params.output_dir) {
 
 
 workflow {
-    vcf_channel = Channel.fromPath(params.vcf_files_mapping)
-        .splitCsv(header:true)
-        .map{row -> file(row.vcf)}
-    compress_vcf(vcf_channel)
-    csi_index_vcf(compress_vcf.out.compressed_vcf_tuple)
-
     fasta_channel = Channel.fromPath(params.vcf_files_mapping)
         .splitCsv(header:true)
         .map{row -> tuple(file(row.fasta), file(row.report), row.assembly_accession, file(row.vcf))}
@@ -48,57 +51,17 @@ workflow {
         .splitCsv(header:true)
         .map{row -> tuple(row.assembly_accession, file(row.vcf))}
         .combine(prepare_genome.out.custom_fasta, by: 0)         // Join based on the assembly
-        .map{tuple(it[1].name, it[0], it[2])}                    // reorder to get the name of the input file first
-        .combine(compress_vcf.out.compressed_vcf_tuple, by: 0)   // Join VCF based on the name of the input file
-        .combine(csi_index_vcf.out.csi_indexed_vcf_tuple, by: 0) // Join CSI based on the name of the input file
-    normalise_vcf(assembly_and_vcf_channel)
-
-    md5_vcf_and_index(normalise_vcf.out.normalised_vcf, normalise_vcf.out.normalised_vcf_index)
-
-}
-
-
-/*
-* Compress the VCF file
-*/
-process compress_vcf {
-    label 'long_time', 'small_mem'
-
-    input:
-    path vcf_file
-
-    output:
-    tuple val(vcf_file.name), path("output/*.gz"), emit: compressed_vcf_tuple
-
-    """
-    mkdir output
-    if [[ $vcf_file =~ \\.gz\$ ]]
-    then
-        gunzip -c $vcf_file | $params.executable.bgzip -c > output/$vcf_file
-    else
-        $params.executable.bgzip -c $vcf_file > output/${vcf_file}.gz
-    fi
-    """
+    if (params.normalisation_shards > 1) {
+        // output VCF name, input VCF, no index, fasta, fasta index
+        sharded_normalisation(assembly_and_vcf_channel.map{
+            tuple(it[1].name.endsWith('.gz') ? it[1].name : it[1].name + '.gz', it[1], '', it[2], it[3])
+        })
+    } else {
+        normalise_vcf(assembly_and_vcf_channel)
+    }
 }
 
 
-/*
-* Index the compressed VCF file
-*/
-process csi_index_vcf {
-    label 'default_time', 'small_mem'
-
-    input:
-    tuple val(input_vcf), path(compressed_vcf)
-
-    output:
-    tuple val(input_vcf), path("${compressed_vcf}.csi"), emit: csi_indexed_vcf_tuple
-
-    """
-    $params.executable.bcftools index -c $compressed_vcf
-    """
-}
-
 /*
 * Convert the genome to the same naming convention as the VCF
 */
@@ -109,20 +72,22 @@ process prepare_genome {
     tuple path(fasta), path(report), val(assembly_accession), path(vcf_files)
 
     output:
-    tuple val(assembly_accession), path("${fasta.getSimpleName()}_custom.fa"), emit: custom_fasta
+    tuple val(assembly_accession), path("${fasta.getSimpleName()}_custom.fa"), path("${fasta.getSimpleName()}_custom.fa.fai"), emit: custom_fasta
 
     script:
+    def genome_cache_arg = params.custom_genome_cache_dir ? "--custom_genome_cache_dir ${params.custom_genome_cache_dir}" : ""
     """
     export PYTHONPATH="$params.executable.python.script_path"
     $params.executable.python.interpreter -m eva_submission.steps.rename_contigs_from_insdc_in_assembly \
     --assembly_accession $assembly_accession --assembly_fasta $fasta --custom_fasta ${fasta.getSimpleName()}_custom.fa \
-    --assembly_report $report --vcf_files $vcf_files
+    --assembly_report $report --vcf_files $vcf_files $genome_cache_arg $params.contig_alias_args
     """
 }
 
 
 /*
-* Normalise the VCF files
+* Normalise the VCF files, write them compressed with their CSI index and the md5 of both.
+* The input VCF is read once: the md5 of the compressed output is computed while it is written.
 */
 process normalise_vcf {
     label 'long_time', 'med_mem'
@@ -133,43 +98,25 @@ process normalise_vcf {
             saveAs: { fn -> fn.substring(fn.lastIndexOf('/')+1) }
 
     input:
-    tuple val(filename), val(assembly_accession),  path(fasta), path(vcf_file), path(csi_file)
+    tuple val(assembly_accession), path(vcf_file), path(fasta), path(fasta_index)
 
     output:
     path "normalised_vcfs/*.gz", emit: normalised_vcf
     path "normalised_vcfs/*.csi", emit: normalised_vcf_index
+    path "normalised_vcfs/*.md5", emit: md5
     path "normalised_vcfs/*.log", emit: normalisation_log
 
     script:
+    def output_vcf = vcf_file.name.endsWith('.gz') ? vcf_file.name : "${vcf_file.name}.gz"
+    def uncompressed_name = output_vcf.substring(0, output_vcf.length() - 3)
     """
     set -eo pipefail
     mkdir normalised_vcfs
-    $params.executable.bcftools norm --no-version -cw -f $fasta -O u $vcf_file 2> normalised_vcfs/${vcf_file.getBaseName()}_bcftools_norm.log | $params.executable.bcftools sort -T \$PWD/tmp. -O z -o normalised_vcfs/$vcf_file -
-    $params.executable.bcftools index -c normalised_vcfs/$vcf_file
-    """
-}
-
-
-/*
-* md5 the compressed vcf and its index
-*/
-process md5_vcf_and_index {
-    label 'short_time', 'small_mem'
-
-    publishDir "$params.output_dir",
-            overwrite: true,
-            mode: "copy"
-
-    input:
-    path vcf
-    path index
-
-    output:
-    path "${vcf}.md5", emit: vcf_md5
-    path "${index}.md5", emit: index_md5
-
-    """
-    $params.executable.md5sum ${vcf} > ${vcf}.md5
-    $params.executable.md5sum ${index} > ${index}.md5
+    $params.executable.bcftools norm --no-version -cw -f $fasta -O u $vcf_file 2> normalised_vcfs/${uncompressed_name}_bcftools_norm.log \
+        | $params.executable.bcftools sort -T \$PWD/tmp. -O z - \
+        | tee normalised_vcfs/$output_vcf \
+        | $params.executable.md5sum | sed 's/ .*/  $output_vcf/' > normalised_vcfs/${output_vcf}.md5
+    $params.executable.bcftools index -c normalised_vcfs/$output_vcf
+    cd normalised_vcfs && $params.executable.md5sum ${output_vcf}.csi > ${output_vcf}.csi.md5
     """
 }
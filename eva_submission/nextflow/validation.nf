@@ -13,6 +13,7 @@ def helpMessage() {
             --metadata_json                 metadata JSON to be validated with eva-sub-cli
             --nextflow_config               nextflow config to run the workflow with (optional)
             --shallow_validation            option to run shallow validation (validate only the first 10k lines) in eva-sub-cli (optional)
+            --contig_alias_args             arguments of the contig alias cache passed to the steps (optional)
     """
 }
 
@@ -21,6 +22,7 @@ params.output_dir = null
 params.metadata_json = null
 params.nextflow_config = null
 params.shallow_validation = false
+params.contig_alias_args = ""
 // executables
 params.executable = ["bgzip": "bgzip", "eva_sub_cli": "eva_sub_cli", "sub_cli_env": "sub_cli_env"]
 // validation tasks
@@ -107,7 +109,7 @@ process detect_sv {
 
     export PYTHONPATH="$params.executable.python.script_path"
     $params.executable.python.interpreter -m eva_submission.steps.structural_variant_detection \
-    --vcf_file $vcf_file --output_vcf_file_with_sv sv_check/${vcf_file.getBaseName()}_sv_list.vcf \
+    --vcf_file $vcf_file --output_vcf_file_with_sv sv_check/${vcf_file.getBaseName()}_sv_list.vcf --threads ${task.cpus} \
     > sv_check/${vcf_file.getBaseName()}_sv_check.log 2>&1
     $params.executable.bgzip -c sv_check/${vcf_file.getBaseName()}_sv_list.vcf > sv_check/${vcf_file.getBaseName()}_sv_list.vcf.gz
     rm sv_check/${vcf_file.getBaseName()}_sv_list.vcf
@@ -137,6 +139,7 @@ process detect_naming_convention {
 
     export PYTHONPATH="$params.executable.python.script_path"
     $params.executable.python.interpreter -m eva_submission.steps.detect_contigs_naming_convention \
-    --vcf_files $vcf_file --assembly_accession $accession --output_yaml naming_convention_check/${vcf_file.getBaseName()}_naming_convention.yml
+    --vcf_files $vcf_file --assembly_accession $accession --output_yaml naming_convention_check/${vcf_file.getBaseName()}_naming_convention.yml \
+    --threads ${task.cpus} $params.contig_alias_args
     """
 }
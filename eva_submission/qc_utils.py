@@ -1,4 +1,10 @@
-from functools import lru_cache
+import json
+import os
+import re
+import threading
+import time
+from collections import OrderedDict, namedtuple
+from concurrent.futures import Future, wait, FIRST_COMPLETED
 
 from ebi_eva_common_pyutils.logger import logging_config
 
@@ -65,16 +71,83 @@ job_launched_and_completed_text_map = {
 }
 
 
-@lru_cache(maxsize=None)
-def did_job_complete_successfully_from_log(file_path, job_type):
+# Matches the launch and completion events of Spring Batch jobs
+job_event_regex = re.compile(r'Job: \[\w+: \[name=[^\]]*\]\] (?:launched|completed)')
+failed_step_text = 'Encountered an error executing step'
+variants_skipped_text = 'lines in the original VCF were skipped'
+
+# Event text to the job types and events (launched or completed) it represents
+_job_event_text_map = {}
+for _job_type, (_launched_texts, _completed_texts) in job_launched_and_completed_text_map.items():
+    for _text in _launched_texts:
+        _job_event_text_map.setdefault(_text, []).append((_job_type, 'launched'))
+    for _text in _completed_texts:
+        _job_event_text_map.setdefault(_text, []).append((_job_type, 'completed'))
+
+
+def index_log_file(file_path):
+    """
+    Reads a Spring Batch log once and summarises the events used by the QC checks: the final status of each job type,
+    the name of the last failed step and the number of lines skipped by the accessioning.
+    """
+    job_statuses = {}
+    failed_step = None
+    variants_skipped = -1
     with open(file_path, 'r') as f:
-        job_status = 'FAILED'
-        job_launched_str, job_completed_str = job_launched_and_completed_text_map[job_type]
         for line in f:
-            if any(text in line for text in job_launched_str):
-                job_status = ""
-            if any(text in line for text in job_completed_str):
-                job_status = line.split(" ")[-1].replace("[", "").replace("]", "").strip()
+            if 'Job: [' in line:
+                for match in job_event_regex.finditer(line):
+                    for job_type, event in _job_event_text_map.get(match.group(0), []):
+                        if event == 'launched':
+                            job_statuses[job_type] = ''
+                            if job_type == 'accession':
+                                variants_skipped = None
+                        else:
+                            job_statuses[job_type] = line.split(" ")[-1].replace("[", "").replace("]", "").strip()
+            elif failed_step_text in line:
+                failed_step = line[line.index(failed_step_text): line.rindex("in job")].strip().split(" ")[-1]
+            elif variants_skipped_text in line:
+                variants_skipped = line.strip().split(":")[-1].strip().split(" ")[0].strip()
+    return {'job_statuses': job_statuses, 'failed_step': failed_step, 'variants_skipped': variants_skipped}
+
+
+class LogIndex:
+    """
+    Summaries of Spring Batch logs created by index_log_file so that each log is only read once. A summary is created
+    again when the size or modification time of its log changes.
+    When an index_file is provided, the summaries are loaded from it and can be saved to it.
+    """
+
+    def __init__(self, index_file=None, max_entries=1000):
+        self.index_file = index_file
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        if index_file and os.path.isfile(index_file):
+            try:
+                with open(index_file) as open_file:
+                    self.entries.update(json.load(open_file))
+            except (OSError, ValueError):
+                logger.warning(f'Could not read the log index {index_file}')
+
+    def summary(self, file_path):
+        key = os.path.abspath(file_path)
+        stat = os.stat(file_path)
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry and entry['size'] == stat.st_size and entry['mtime_ns'] == stat.st_mtime_ns:
+                self.entries.move_to_end(key)
+                return entry['summary']
+        entry = {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns, 'summary': index_log_file(file_path)}
+        with self.lock:
+            self.entries[key] = entry
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+        return entry['summary']
+
+    def did_job_complete_successfully(self, file_path, job_type):
+        job_status = self.summary(file_path)['job_statuses'].get(job_type, 'FAILED')
         if job_status == 'COMPLETED':
             return True
         elif job_status == 'FAILED':
@@ -83,13 +156,115 @@ def did_job_complete_successfully_from_log(file_path, job_type):
             logger.error(f'Could not determine status of {job_type} job in file {file_path}')
             return False
 
+    def get_failed_job_or_step_name(self, file_path):
+        return self.summary(file_path)['failed_step'] or 'job name could not be retrieved'
+
+    def get_variants_skipped(self, file_path):
+        return self.summary(file_path)['variants_skipped']
+
+    def save(self):
+        if not self.index_file:
+            return
+        try:
+            with self.lock, open(self.index_file, 'w') as open_file:
+                json.dump(self.entries, open_file)
+        except OSError:
+            logger.warning(f'Could not save the log index {self.index_file}')
+
+
+_log_index = LogIndex()
+
+
+def did_job_complete_successfully_from_log(file_path, job_type):
+    return _log_index.did_job_complete_successfully(file_path, job_type)
+
 
 def get_failed_job_or_step_name(file_name):
-    with open(file_name, 'r') as f:
-        job_name = 'job name could not be retrieved'
-        for line in f:
-            if 'Encountered an error executing step' in line:
-                job_name = line[line.index("Encountered an error executing step"): line.rindex("in job")] \
-                    .strip().split(" ")[-1]
+    return _log_index.get_failed_job_or_step_name(file_name)
+
+
+DEFAULT_QC_MAX_WORKERS = 8
+DEFAULT_QC_CHECK_TIMEOUT = 3600
+
+QcCheckResult = namedtuple('QcCheckResult', ['result', 'report', 'duration'])
+
+
+class QcCheckExecutor:
+    """
+    Runs QC checks concurrently, at most max_workers at a time. Each check is a function returning a result and a
+    report, and starts once all the checks it depends on are finished.
+    A check that raises an exception or does not finish within check_timeout seconds gets the failed_result. A check
+    that times out cannot be interrupted: it keeps its thread until it finishes but its result is ignored. The checks
+    run in daemon threads so that the ones that timed out do not prevent the process from exiting.
+    """
+
+    def __init__(self, max_workers=DEFAULT_QC_MAX_WORKERS, check_timeout=DEFAULT_QC_CHECK_TIMEOUT,
+                 failed_result='FAIL'):
+        self.max_workers = max_workers
+        self.check_timeout = check_timeout
+        self.failed_result = failed_result
+        self.checks = OrderedDict()
+
+    def add_check(self, name, check_function, depends_on=()):
+        for dependency in depends_on:
+            if dependency not in self.checks:
+                raise ValueError(f'QC check {name} depends on {dependency} which has not been added before')
+        self.checks[name] = (check_function, tuple(depends_on))
+
+    @staticmethod
+    def _start(name, check_function):
+        """Runs the check in a daemon thread and returns the future of its result."""
+        future = Future()
+
+        def run_check():
+            if not future.set_running_or_notify_cancel():
+                return
+            try:
+                future.set_result(check_function())
+            except BaseException as e:
+                future.set_exception(e)
+
+        threading.Thread(target=run_check, name=f'qc_check_{name}', daemon=True).start()
+        return future
+
+    def _record(self, results, name, result, report, start):
+        results[name] = QcCheckResult(result, report, time.perf_counter() - start)
+        logger.debug(f'QC check {name} finished with {result} in {results[name].duration:.2f}s')
 
-        return job_name
+    def run(self):
+        """Runs all the checks and returns their QcCheckResult in a dict keyed by check name."""
+        results = {}
+        pending = OrderedDict(self.checks)
+        running = {}
+        timed_out = set()
+        while pending or running:
+            # Checks that timed out still use a thread
+            timed_out = {future for future in timed_out if not future.done()}
+            for name, (check_function, depends_on) in list(pending.items()):
+                if len(running) + len(timed_out) >= self.max_workers:
+                    break
+                if all(dependency in results for dependency in depends_on):
+                    del pending[name]
+                    running[self._start(name, check_function)] = (name, time.perf_counter())
+            if not running:
+                # Wait for the checks that timed out to release their threads
+                wait(timed_out, return_when=FIRST_COMPLETED)
+                continue
+            next_timeout = min(start + self.check_timeout for _, start in running.values()) - time.perf_counter()
+            done, _ = wait(running, timeout=max(next_timeout, 0), return_when=FIRST_COMPLETED)
+            for future in done:
+                name, start = running.pop(future)
+                try:
+                    result, report = future.result()
+                except Exception as e:
+                    logger.error(f'QC check {name} failed: {e}')
+                    result, report = self.failed_result, f'Error: {e}'
+                self._record(results, name, result, report, start)
+            for future, (name, start) in list(running.items()):
+                if time.perf_counter() - start >= self.check_timeout:
+                    del running[future]
+                    timed_out.add(future)
+                    logger.error(f'QC check {name} did not finish within {self.check_timeout}s')
+                    self._record(results, name, self.failed_result,
+                                 f'Error: did not finish within {self.check_timeout}s', start)
+        return results
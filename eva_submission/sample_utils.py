@@ -3,6 +3,8 @@ import gzip
 import pysam
 from ebi_eva_common_pyutils.logger import logging_config as log_cfg
 
+from eva_submission.steps.vcf_scanner import load_scan_summary
+
 
 logger = log_cfg.get_logger(__name__)
 
@@ -35,6 +37,9 @@ def get_samples_from_vcf_pysam(vcf_file):
 
 
 def get_samples_from_vcf(vcf_file):
+    vcf_summary = load_scan_summary(vcf_file)
+    if vcf_summary:
+        return vcf_summary['samples']
     try:
         return get_samples_from_vcf_pysam(vcf_file)
     except Exception:
@@ -0,0 +1,138 @@
+# Copyright 2026 EMBL - European Bioinformatics Institute
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import io
+import struct
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+
+# Ref: https://samtools.github.io/hts-specs/SAMv1.pdf (Section 4.1)
+BGZF_HEADER_SIZE = 18
+BGZF_MAGIC = b'\x1f\x8b\x08\x04'
+DEFAULT_CHUNK_SIZE = 16 * 1024 * 1024
+
+
+def _read_block_size(open_file):
+    """Reads the header of the BGZF block at the current position and returns its total size or None at the end."""
+    header = open_file.read(BGZF_HEADER_SIZE)
+    if len(header) < BGZF_HEADER_SIZE:
+        return None
+    if header[:4] != BGZF_MAGIC or header[12:14] != b'BC' or struct.unpack('<H', header[14:16])[0] != 2:
+        raise ValueError(f'Not a BGZF block at offset {open_file.tell() - len(header)} of {open_file.name}')
+    return struct.unpack('<H', header[16:18])[0] + 1
+
+
+def is_bgzf(file_path):
+    try:
+        with open(file_path, 'rb') as open_file:
+            return _read_block_size(open_file) is not None
+    except (OSError, ValueError):
+        return False
+
+
+def bgzf_chunks(file_path, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Splits a BGZF file in (start, end) byte ranges that contain whole blocks and are about chunk_size long.
+    Only the block headers are read.
+    """
+    chunks = []
+    with open(file_path, 'rb') as open_file:
+        chunk_start = block_start = 0
+        while True:
+            open_file.seek(block_start)
+            block_size = _read_block_size(open_file)
+            if block_size is None:
+                break
+            block_start += block_size
+            if block_start - chunk_start >= chunk_size:
+                chunks.append((chunk_start, block_start))
+                chunk_start = block_start
+        if block_start > chunk_start:
+            chunks.append((chunk_start, block_start))
+    return chunks
+
+
+def _decompress_chunk(file_path, start, end):
+    with open(file_path, 'rb') as open_file:
+        open_file.seek(start)
+        data = memoryview(open_file.read(end - start))
+    decompressed = []
+    block_start = 0
+    # Each block is located with the size in its header so the chunk is sliced without being copied, and its deflate
+    # data is decompressed by zlib without holding the GIL
+    while block_start < len(data):
+        extra_length, = struct.unpack_from('<H', data, block_start + 10)
+        block_size, = struct.unpack_from('<H', data, block_start + 16)
+        block_end = block_start + block_size + 1
+        # The deflate data is followed by the CRC32 and the size of the uncompressed data
+        crc, uncompressed_size = struct.unpack_from('<II', data, block_end - 8)
+        block = zlib.decompress(data[block_start + 12 + extra_length:block_end - 8], -zlib.MAX_WBITS,
+                                uncompressed_size or 1)
+        if len(block) != uncompressed_size or zlib.crc32(block) != crc:
+            raise ValueError(f'Corrupted BGZF block at offset {start + block_start} of {file_path}')
+        decompressed.append(block)
+        block_start = block_end
+    return b''.join(decompressed)
+
+
+class BgzfParallelReader:
+    """
+    Iterates over the text lines of a BGZF file, decompressing groups of blocks concurrently and returning the lines in
+    their original order. Only a bounded number of chunks are kept in memory at any time.
+    """
+
+    def __init__(self, file_path, threads, chunk_size=DEFAULT_CHUNK_SIZE, encoding='utf-8'):
+        self.file_path = file_path
+        self.threads = threads
+        self.chunk_size = chunk_size
+        self.encoding = encoding
+        self._executor = None
+        self._pending = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def close(self):
+        for future in self._pending:
+            future.cancel()
+        self._pending = []
+        if self._executor:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+    def _decompressed_chunks(self):
+        self._executor = ThreadPoolExecutor(max_workers=self.threads)
+        for start, end in bgzf_chunks(self.file_path, self.chunk_size):
+            self._pending.append(self._executor.submit(_decompress_chunk, self.file_path, start, end))
+            if len(self._pending) >= self.threads * 2:
+                yield self._pending.pop(0).result()
+        while self._pending:
+            yield self._pending.pop(0).result()
+        self.close()
+
+    def __iter__(self):
+        remainder = b''
+        for data in self._decompressed_chunks():
+            data = remainder + data
+            last_new_line = data.rfind(b'\n')
+            if last_new_line == -1:
+                remainder = data
+                continue
+            remainder = data[last_new_line + 1:]
+            # Same newline translation as the text mode of gzip.open
+            yield from io.StringIO(data[:last_new_line + 1].decode(self.encoding), newline=None)
+        if remainder:
+            yield from io.StringIO(remainder.decode(self.encoding), newline=None)
@@ -0,0 +1,187 @@
+# Copyright 2026 EMBL - European Bioinformatics Institute
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import gzip
+import json
+import os
+import shlex
+import time
+from argparse import ArgumentParser
+
+from ebi_eva_common_pyutils.config import cfg
+from ebi_eva_common_pyutils.contig_alias.contig_alias import ContigAliasClient
+from ebi_eva_common_pyutils.logger import AppLogger
+
+from eva_submission.submission_config import load_config
+
+# Increment when the content of the cached files changes so that older files are fetched again
+CONTIG_ALIAS_CACHE_VERSION = 1
+DEFAULT_TTL_DAYS = 30
+
+
+class ContigAliasCacheMiss(Exception):
+    pass
+
+
+def default_cache_dir():
+    return cfg.query('contig_alias_cache', 'directory') or os.environ.get('EVA_CONTIG_ALIAS_CACHE_DIR') or \
+        os.path.join(os.path.expanduser('~'), '.cache', 'eva_submission', 'contig_alias')
+
+
+def get_contig_alias_cache_params():
+    """
+    Nextflow parameter passing the contig alias cache settings of the submission config to the steps, as the
+    arguments added by add_contig_alias_cache_arguments.
+    """
+    contig_alias_args = []
+    if cfg.query('contig_alias_cache', 'directory'):
+        contig_alias_args.extend(['--contig_alias_cache_dir', cfg.query('contig_alias_cache', 'directory')])
+    # cfg.query cannot be used for the ttl because it returns the default for 0
+    ttl_days = cfg.query('contig_alias_cache', ret_default={}).get('ttl_days')
+    if ttl_days is not None:
+        contig_alias_args.extend(['--contig_alias_cache_ttl_days', str(ttl_days)])
+    if cfg.query('contig_alias_cache', 'offline', ret_default=False):
+        contig_alias_args.append('--contig_alias_offline')
+    return {'contig_alias_args': ' '.join(shlex.quote(arg) for arg in contig_alias_args)}
+
+
+class ContigAliasCache(AppLogger):
+    """
+    Local cache of the contigs of each assembly retrieved from the contig alias, stored in one compressed JSON file per
+    assembly so that it can be shared by concurrent processes.
+    Provides the same assembly_contig_iter as the ContigAliasClient.
+    In offline mode the contig alias is never queried and assemblies missing from the cache raise ContigAliasCacheMiss.
+    The settings not provided are read from the contig_alias_cache section of the submission config and then from the
+    EVA_CONTIG_ALIAS_CACHE_DIR and EVA_CONTIG_ALIAS_OFFLINE environment variables.
+    """
+
+    def __init__(self, cache_dir=None, ttl_days=None, offline=None, contig_alias_client=None):
+        self.cache_dir = cache_dir or default_cache_dir()
+        if ttl_days is None:
+            ttl_days = cfg.query('contig_alias_cache', 'ttl_days', ret_default=DEFAULT_TTL_DAYS)
+        self.ttl = ttl_days * 24 * 3600
+        if offline is None:
+            offline = cfg.query('contig_alias_cache', 'offline',
+                                ret_default=bool(os.environ.get('EVA_CONTIG_ALIAS_OFFLINE')))
+        self.offline = offline
+        self.contig_alias_client = contig_alias_client or ContigAliasClient()
+
+    def _cache_file(self, assembly_accession):
+        return os.path.join(self.cache_dir, f'{assembly_accession}.json.gz')
+
+    def _load(self, assembly_accession):
+        cache_file = self._cache_file(assembly_accession)
+        if not os.path.isfile(cache_file):
+            return None
+        try:
+            with gzip.open(cache_file, 'rt') as open_file:
+                cached = json.load(open_file)
+        except (OSError, ValueError):
+            self.warning(f'Could not read the contig alias cache {cache_file}')
+            return None
+        if cached.get('version') != CONTIG_ALIAS_CACHE_VERSION:
+            return None
+        return cached
+
+    def _is_fresh(self, cached):
+        return time.time() - cached['fetched_at'] < self.ttl
+
+    def store(self, assembly_accession, entities):
+        """Writes the contig entities of an assembly to the cache."""
+        os.makedirs(self.cache_dir, exist_ok=True)
+        cache_file = self._cache_file(assembly_accession)
+        tmp_cache_file = f'{cache_file}.{os.getpid()}.tmp'
+        cached = {
+            'version': CONTIG_ALIAS_CACHE_VERSION,
+            'assembly_accession': assembly_accession,
+            'fetched_at': time.time(),
+            'entities': entities
+        }
+        with gzip.open(tmp_cache_file, 'wt') as open_file:
+            json.dump(cached, open_file)
+        os.replace(tmp_cache_file, cache_file)
+        return cached
+
+    def _fetch(self, assembly_accession):
+        self.info(f'Retrieve the contigs of {assembly_accession} from the contig alias')
+        entities = list(self.contig_alias_client.assembly_contig_iter(assembly_accession))
+        return self.store(assembly_accession, entities)
+
+    def get_entities(self, assembly_accession, refresh=False):
+        cached = self._load(assembly_accession)
+        if cached and not refresh and (self.offline or self._is_fresh(cached)):
+            return cached['entities']
+        if self.offline:
+            raise ContigAliasCacheMiss(f'{assembly_accession} is not in the contig alias cache {self.cache_dir}')
+        try:
+            return self._fetch(assembly_accession)['entities']
+        except Exception:
+            if cached:
+                self.warning(f'Could not refresh {assembly_accession} from the contig alias: using the cached version')
+                return cached['entities']
+            raise
+
+    def assembly_contig_iter(self, assembly_accession):
+        """Generator that provides the contigs in the assembly requested."""
+        for entity in self.get_entities(assembly_accession):
+            yield entity
+
+    def invalidate(self, assembly_accession):
+        cache_file = self._cache_file(assembly_accession)
+        if os.path.exists(cache_file):
+            os.remove(cache_file)
+
+    def warm_up(self, assembly_accessions, refresh=False):
+        """Populates the cache for the provided assemblies."""
+        for assembly_accession in assembly_accessions:
+            self.get_entities(assembly_accession, refresh=refresh)
+
+
+def add_contig_alias_cache_arguments(argparse):
+    """Adds the arguments overriding the contig alias cache settings to the parser of a step."""
+    argparse.add_argument('--contig_alias_cache_dir', type=str, default=None,
+                          help='Directory where the contig alias cache is stored')
+    argparse.add_argument('--contig_alias_cache_ttl_days', type=int, default=None,
+                          help='Number of days after which an assembly in the contig alias cache is retrieved again')
+    argparse.add_argument('--contig_alias_offline', action='store_true', default=None,
+                          help='Only use the contig alias cache and never query the contig alias')
+
+
+def contig_alias_cache_from_args(args):
+    return ContigAliasCache(cache_dir=args.contig_alias_cache_dir, ttl_days=args.contig_alias_cache_ttl_days,
+                            offline=args.contig_alias_offline)
+
+
+def main():
+    argparse = ArgumentParser(description='Populate the local cache of the contig alias for a set of assemblies')
+    argparse.add_argument('--assembly_accessions', required=True, type=str, nargs='+',
+                          help='The assembly accessions to retrieve from the contig alias')
+    argparse.add_argument('--cache_dir', type=str, default=None,
+                          help='Directory where the cache is stored. Default to contig_alias_cache.directory in the '
+                               'submission config, $EVA_CONTIG_ALIAS_CACHE_DIR or ~/.cache/eva_submission/contig_alias')
+    argparse.add_argument('--ttl_days', type=int, default=None,
+                          help='Number of days after which a cached assembly is retrieved again. Default to '
+                               f'contig_alias_cache.ttl_days in the submission config or {DEFAULT_TTL_DAYS}')
+    argparse.add_argument('--refresh', action='store_true', default=False,
+                          help='Retrieve the assemblies even if they are already in the cache')
+    argparse.add_argument('--config', type=str, required=False,
+                          help='Path to the configuration file providing the contig alias cache settings')
+    args = argparse.parse_args()
+    if args.config:
+        load_config(args.config)
+    ContigAliasCache(cache_dir=args.cache_dir, ttl_days=args.ttl_days).warm_up(args.assembly_accessions,
+                                                                              refresh=args.refresh)
+
+
+if __name__ == "__main__":
+    main()
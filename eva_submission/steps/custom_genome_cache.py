@@ -0,0 +1,145 @@
+# Copyright 2026 EMBL - European Bioinformatics Institute
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import hashlib
+import json
+import os
+import shutil
+from datetime import datetime
+
+import yaml
+from ebi_eva_common_pyutils.logger import AppLogger
+
+from eva_submission.steps.fasta_renaming import get_fasta_index, rename_fasta, FaiRecord
+
+CHECKSUM_BLOCK_SIZE = 16 * 1024 * 1024
+# Increment when the content of the fasta info files changes so that older files are computed again
+FASTA_INFO_VERSION = 1
+FASTA_INFO_SUFFIX = '.fasta_info.json'
+
+
+def fasta_checksum(fasta_file):
+    """MD5 of the fasta file."""
+    md5 = hashlib.md5()
+    with open(fasta_file, 'rb') as open_file:
+        for block in iter(lambda: open_file.read(CHECKSUM_BLOCK_SIZE), b''):
+            md5.update(block)
+    return md5.hexdigest()
+
+
+def _link(source, destination):
+    if os.path.lexists(destination):
+        os.remove(destination)
+    os.symlink(source, destination)
+
+
+class CustomGenomeCache(AppLogger):
+    """
+    Stores the renamed ("custom") genomes with their fai index, keyed by a hash of the assembly accession, the checksum
+    of the original fasta and the contig names mapping, so that the same renamed genome is only created once across
+    submissions. The index and checksum of the original fasta files are also kept in the cache, never next to them.
+    """
+
+    def __init__(self, cache_dir):
+        self.cache_dir = cache_dir
+
+    @staticmethod
+    def cache_key(assembly_accession, checksum, renamed_contigs):
+        key_hash = hashlib.sha256()
+        key_hash.update(f'{assembly_accession}\n{checksum}\n'.encode())
+        for original_name, new_name in renamed_contigs:
+            key_hash.update(f'{original_name}\t{new_name}\n'.encode())
+        return key_hash.hexdigest()
+
+    def _entry_dir(self, assembly_accession, key):
+        return os.path.join(self.cache_dir, assembly_accession, key)
+
+    def _fasta_info_file(self, fasta_path):
+        return os.path.join(self.cache_dir, 'fasta_info',
+                            hashlib.sha256(fasta_path.encode()).hexdigest() + FASTA_INFO_SUFFIX)
+
+    def get_fasta_info(self, assembly_fasta):
+        """
+        Fai records and checksum of the fasta file, stored in the cache with the path, size and modification time of
+        the file it resolves to so that they are only computed again when the fasta changes.
+        Raises ValueError when the fasta cannot be indexed.
+        """
+        fasta_path = os.path.realpath(assembly_fasta)
+        fasta_stat = os.stat(fasta_path)
+        signature = {'version': FASTA_INFO_VERSION, 'path': fasta_path, 'size': fasta_stat.st_size,
+                     'mtime': fasta_stat.st_mtime_ns}
+        fasta_info_file = self._fasta_info_file(fasta_path)
+        if os.path.isfile(fasta_info_file):
+            try:
+                with open(fasta_info_file) as open_file:
+                    fasta_info = json.load(open_file)
+                if fasta_info['signature'] == signature:
+                    return [FaiRecord(*record) for record in fasta_info['records']], fasta_info['checksum']
+            except (ValueError, KeyError, TypeError) as e:
+                self.warning(f'Could not read {fasta_info_file}: {e}')
+        records = get_fasta_index(assembly_fasta)
+        checksum = fasta_checksum(fasta_path)
+        tmp_file = f'{fasta_info_file}.{os.getpid()}.tmp'
+        try:
+            os.makedirs(os.path.dirname(fasta_info_file), exist_ok=True)
+            with open(tmp_file, 'w') as open_file:
+                json.dump({'signature': signature, 'records': records, 'checksum': checksum}, open_file)
+            os.replace(tmp_file, fasta_info_file)
+        except OSError as e:
+            self.warning(f'Could not write {fasta_info_file}: {e}')
+            if os.path.exists(tmp_file):
+                os.remove(tmp_file)
+        return records, checksum
+
+    def create_custom_genome(self, assembly_accession, assembly_fasta, output_fasta, rename_function):
+        """
+        Creates output_fasta, its .fai and rename table as links to the cached renamed genome, which is created first
+        if it is not in the cache. Genomes where no contig is renamed are not cached as they are only a link, neither
+        are the ones that cannot be indexed.
+        """
+        try:
+            records, checksum = self.get_fasta_info(assembly_fasta)
+        except ValueError as e:
+            self.warning(f'{e}: the custom genome is not cached')
+            rename_fasta(assembly_fasta, output_fasta, rename_function)
+            return
+        renamed_contigs = [(record.name, rename_function(record.name)) for record in records]
+        if all(original_name == new_name for original_name, new_name in renamed_contigs):
+            rename_fasta(assembly_fasta, output_fasta, rename_function, records=records)
+            return
+
+        key = self.cache_key(assembly_accession, checksum, renamed_contigs)
+        entry_dir = self._entry_dir(assembly_accession, key)
+        cached_fasta = os.path.join(entry_dir, f'{assembly_accession}_custom.fa')
+        if os.path.isdir(entry_dir):
+            self.info(f'Use the cached custom genome {cached_fasta}')
+        else:
+            self.info(f'Create the custom genome {cached_fasta}')
+            tmp_entry_dir = f'{entry_dir}.{os.getpid()}.tmp'
+            os.makedirs(tmp_entry_dir)
+            try:
+                rename_fasta(assembly_fasta, os.path.join(tmp_entry_dir, os.path.basename(cached_fasta)),
+                             dict(renamed_contigs).get, records=records)
+                with open(os.path.join(tmp_entry_dir, 'metadata.yml'), 'w') as open_file:
+                    yaml.safe_dump({'assembly_accession': assembly_accession, 'assembly_fasta': assembly_fasta,
+                                    'created': datetime.now().isoformat()}, open_file)
+                os.rename(tmp_entry_dir, entry_dir)
+            except OSError:
+                # Another process completed the same entry first
+                if not os.path.isdir(entry_dir):
+                    raise
+            finally:
+                shutil.rmtree(tmp_entry_dir, ignore_errors=True)
+
+        for suffix in ['', '.fai', '.rename_table.tsv']:
+            _link(cached_fasta + suffix, output_fasta + suffix)
@@ -11,16 +11,18 @@
 # WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
 # See the License for the specific language governing permissions and
 # limitations under the License.
-import gzip
 import os.path
 from argparse import ArgumentParser
 from collections import defaultdict
 
 import yaml
 from cached_property import cached_property
-from ebi_eva_common_pyutils.contig_alias.contig_alias import ContigAliasClient
 from ebi_eva_common_pyutils.logger import AppLogger
 
+from eva_submission.steps.contig_alias_cache import ContigAliasCache, add_contig_alias_cache_arguments, \
+    contig_alias_cache_from_args
+from eva_submission.steps.vcf_scanner import get_vcf_contigs
+
 # Order in which the naming convention will be kept if multiple are equivalent
 naming_convention_priority = {
     'enaSequenceName': 1,
@@ -35,21 +37,16 @@ class ContigsNamimgConventionChecker(AppLogger):
     """
     This check names of contigs in VCF and report back the naming convention
     """
-    def __init__(self, assembly_accession):
+    def __init__(self, assembly_accession, write_scan_summary=False, threads=1, contig_alias_cache=None):
         self.assembly_accession = assembly_accession
-        self.contig_alias = ContigAliasClient()
+        self.contig_alias = contig_alias_cache or ContigAliasCache()
+        self.write_scan_summary = write_scan_summary
+        self.threads = threads
 
     def naming_convention_map_for_vcf(self, input_vcf):
         """Provides a set of contigs names present in the VCF file for each compatible naming convention"""
         naming_convention_map = defaultdict(set)
-        if input_vcf.endswith('.gz'):
-            vcf_in = gzip.open(input_vcf, mode="rt")
-        else:
-            vcf_in = open(input_vcf, mode="r")
-        for line in vcf_in:
-            if line.startswith("#"):
-                continue
-            contig_name = line.split('\t')[0]
+        for contig_name in get_vcf_contigs(input_vcf, write_summary=self.write_scan_summary, threads=self.threads):
             naming_convention_map[self.get_contig_convention(contig_name)].add(contig_name)
         return dict((nc, list(sorted(set_contig))) for nc, set_contig in naming_convention_map.items())
 
@@ -100,9 +97,14 @@ def main():
                           help='Path to one or several VCF files')
     argparse.add_argument('--output_yaml', required=True, type=str,
                           help='Path to output_file where the results will be added.')
+    argparse.add_argument('--threads', type=int, default=1,
+                          help='Number of threads used to decompress BGZF files')
+    add_contig_alias_cache_arguments(argparse)
 
     args = argparse.parse_args()
-    naming_convention = ContigsNamimgConventionChecker(assembly_accession=args.assembly_accession)
+    naming_convention = ContigsNamimgConventionChecker(assembly_accession=args.assembly_accession,
+                                                       write_scan_summary=True, threads=args.threads,
+                                                       contig_alias_cache=contig_alias_cache_from_args(args))
     naming_convention.write_convention_map_to_yaml(args.vcf_files, args.output_yaml)
 
 
@@ -0,0 +1,321 @@
+# Copyright 2026 EMBL - European Bioinformatics Institute
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import os
+from collections import namedtuple
+
+from ebi_eva_common_pyutils.logger import logging_config as log_cfg
+
+logger = log_cfg.get_logger(__name__)
+
+BLOCK_SIZE = 16 * 1024 * 1024
+
+# Ref: https://www.htslib.org/doc/faidx.html
+FaiRecord = namedtuple('FaiRecord', ['name', 'length', 'offset', 'linebases', 'linewidth'])
+
+
+def read_fai(fai_file):
+    records = []
+    with open(fai_file) as open_file:
+        for line in open_file:
+            sp_line = line.rstrip('\n').split('\t')
+            records.append(FaiRecord(sp_line[0], *[int(value) for value in sp_line[1:5]]))
+    return records
+
+
+def write_fai(records, fai_file):
+    with open(fai_file, 'w') as open_file:
+        for record in records:
+            open_file.write('\t'.join(str(value) for value in record) + '\n')
+
+
+class _FastaIndexer:
+    """Builds the fai records of a fasta file from blocks of bytes without splitting the sequences in lines."""
+
+    def __init__(self):
+        self.records = []
+        # Names of the sequences whose lines do not all have the same length, which cannot be indexed
+        self.uneven_sequences = []
+        self.current = None
+        self.in_header = False
+        self.header = b''
+        self.at_line_start = True
+
+    @staticmethod
+    def _has_even_lines(current):
+        """
+        All the lines of the sequence have the length of the first one except the last, which can be shorter.
+        The line endings at the end of each full line were already checked while reading the sequence.
+        """
+        if current['linebases'] == 0:
+            return current['nb_bytes'] == 0
+        line_ending = current['linewidth'] - current['linebases']
+        if current['uneven'] or line_ending not in (1, 2):
+            return False
+        nb_full_lines, last_line_bytes = divmod(current['nb_bytes'], current['linewidth'])
+        nb_line_endings = nb_full_lines
+        if last_line_bytes and current['last_bytes'].endswith(b'\n'):
+            nb_line_endings += 1
+            if line_ending == 2 and current['last_bytes'] != b'\r\n':
+                return False
+        nb_carriage_returns = nb_line_endings if line_ending == 2 else 0
+        return current['nb_line_feeds'] == nb_line_endings and current['nb_carriage_returns'] == nb_carriage_returns
+
+    def _finish_record(self):
+        if self.current:
+            if not self.current['first_line_done']:
+                self.current['linewidth'] = self.current['linebases'] + 1
+            if not self._has_even_lines(self.current):
+                self.uneven_sequences.append(self.current['name'])
+            self.records.append(FaiRecord(
+                self.current['name'], self.current['length'], self.current['offset'],
+                self.current['linebases'], self.current['linewidth']
+            ))
+        self.current = None
+
+    def _check_line_endings(self, sequence, position):
+        """Checks that the full lines end where expected in sequence, position being its offset in the file."""
+        current = self.current
+        linewidth = current['linewidth']
+        # Index in sequence of the first line feed expected at offset + k * linewidth - 1
+        first_line_feed = (current['offset'] + linewidth - 1 - position) % linewidth
+        line_feeds = sequence[first_line_feed::linewidth]
+        if line_feeds.count(b'\n') != len(line_feeds):
+            current['uneven'] = True
+
+    def _add_sequence(self, sequence, position):
+        current = self.current
+        nb_line_feeds = sequence.count(b'\n')
+        nb_carriage_returns = sequence.count(b'\r')
+        current['length'] += len(sequence) - nb_line_feeds - nb_carriage_returns
+        if not current['first_line_done']:
+            end_of_line = sequence.find(b'\n')
+            line_part = sequence if end_of_line == -1 else sequence[:end_of_line]
+            nb_carriage_return = line_part.count(b'\r')
+            current['linebases'] += len(line_part) - nb_carriage_return
+            current['linewidth'] += len(line_part)
+            if end_of_line != -1:
+                current['linewidth'] += 1
+                current['first_line_done'] = True
+        if current['first_line_done'] and not current['uneven']:
+            self._check_line_endings(sequence, position)
+        current['nb_bytes'] += len(sequence)
+        current['nb_line_feeds'] += nb_line_feeds
+        current['nb_carriage_returns'] += nb_carriage_returns
+        current['last_bytes'] = (current['last_bytes'] + sequence)[-2:]
+
+    def add_block(self, block, block_offset):
+        i = 0
+        block_length = len(block)
+        while i < block_length:
+            if self.in_header:
+                end_of_line = block.find(b'\n', i)
+                if end_of_line == -1:
+                    self.header += block[i:]
+                    break
+                self.header += block[i:end_of_line]
+                header = self.header.decode().strip()
+                self.current = {'name': header.split()[0] if header else '', 'length': 0,
+                                'offset': block_offset + end_of_line + 1, 'linebases': 0, 'linewidth': 0,
+                                'first_line_done': False, 'uneven': False, 'nb_bytes': 0, 'nb_line_feeds': 0,
+                                'nb_carriage_returns': 0, 'last_bytes': b''}
+                self.in_header = False
+                self.at_line_start = True
+                i = end_of_line + 1
+                continue
+            if self.at_line_start and block[i:i + 1] == b'>':
+                self._finish_record()
+                self.in_header = True
+                self.header = b''
+                i += 1
+                continue
+            next_header = block.find(b'\n>', i)
+            end = next_header + 1 if next_header != -1 else block_length
+            sequence = block[i:end]
+            if self.current:
+                self._add_sequence(sequence, block_offset + i)
+            elif sequence.strip():
+                # Content before the first header is not part of any sequence
+                self.uneven_sequences.append('')
+            self.at_line_start = sequence.endswith(b'\n')
+            i = end
+
+    def finish(self):
+        self._finish_record()
+        return self.records
+
+
+def index_fasta(fasta_file):
+    """
+    Creates the fai records of a fasta file reading it in large blocks.
+    Like samtools faidx, raises a ValueError when the lines of a sequence do not all have the same length.
+    """
+    indexer = _FastaIndexer()
+    block_offset = 0
+    with open(fasta_file, 'rb') as open_file:
+        while True:
+            block = open_file.read(BLOCK_SIZE)
+            if not block:
+                break
+            indexer.add_block(block, block_offset)
+            block_offset += len(block)
+    records = indexer.finish()
+    if indexer.uneven_sequences:
+        raise ValueError(f'Different line lengths in sequence {indexer.uneven_sequences[0]} of {fasta_file}')
+    return records
+
+
+def get_fasta_index(fasta_file):
+    """
+    Provides the fai records of the fasta file from its existing .fai when it is up to date, otherwise by indexing it.
+    The .fai is looked for next to the link and next to the file it points to, as Nextflow stages the inputs as links.
+    The index created is not saved next to the fasta file, which can be in a shared directory.
+    """
+    fasta_mtime = os.path.getmtime(fasta_file)
+    for fai_file in dict.fromkeys([fasta_file + '.fai', os.path.realpath(fasta_file) + '.fai']):
+        if os.path.isfile(fai_file) and os.path.getmtime(fai_file) >= fasta_mtime:
+            return read_fai(fai_file)
+    return index_fasta(fasta_file)
+
+
+def _sequence_bytes(record):
+    """Number of bytes used by the sequence lines of a record including the line endings."""
+    if record.linebases == 0:
+        return 0
+    nb_full_lines, remainder = divmod(record.length, record.linebases)
+    nb_bytes = nb_full_lines * record.linewidth
+    if remainder:
+        nb_bytes += remainder + record.linewidth - record.linebases
+    return nb_bytes
+
+
+def _copy_range(input_fd, output_fd, offset, count):
+    """Copies count bytes from offset in the input to the current position of the output, in the kernel if possible."""
+    try:
+        while count > 0:
+            sent = os.sendfile(output_fd, input_fd, offset, min(count, 0x7ffff000))
+            if sent == 0:
+                break
+            offset += sent
+            count -= sent
+    except (OSError, AttributeError):
+        os.lseek(input_fd, offset, os.SEEK_SET)
+        while count > 0:
+            data = os.read(input_fd, min(count, BLOCK_SIZE))
+            if not data:
+                break
+            os.write(output_fd, data)
+            count -= len(data)
+
+
+def write_rename_table(renamed_records, rename_table):
+    with open(rename_table, 'w') as open_file:
+        for original_name, new_name in renamed_records:
+            open_file.write(f'{original_name}\t{new_name}\n')
+
+
+def _header_name(header_line):
+    header = header_line[1:].decode().strip()
+    return header.split()[0] if header else ''
+
+
+def _rename_fasta_lines(input_fasta, output_fasta, rename_function):
+    """
+    Writes the renamed copy of the fasta file line by line, which works whatever the length of the lines. The sequences
+    are wrapped again at the length of their first line so that the output can be indexed.
+    """
+    renamed_records = []
+    line_width = None
+    pending = bytearray()
+
+    def write_pending(open_output, flush=False):
+        nb_full_lines = len(pending) // line_width if line_width else 0
+        if nb_full_lines:
+            open_output.write(b''.join(
+                bytes(pending[i * line_width:(i + 1) * line_width]) + b'\n' for i in range(nb_full_lines)
+            ))
+            del pending[:nb_full_lines * line_width]
+        if flush and pending:
+            open_output.write(bytes(pending) + b'\n')
+            pending.clear()
+
+    with open(input_fasta, 'rb') as open_input, open(output_fasta, 'wb') as open_output:
+        for line in open_input:
+            if line.startswith(b'>'):
+                write_pending(open_output, flush=True)
+                original_name = _header_name(line)
+                new_name = rename_function(original_name)
+                renamed_records.append((original_name, new_name))
+                open_output.write(f'>{new_name}\n'.encode())
+                line_width = None
+                continue
+            bases = line.rstrip(b'\r\n')
+            if not bases:
+                continue
+            if line_width is None:
+                line_width = len(bases)
+            pending += bases
+            write_pending(open_output)
+        write_pending(open_output, flush=True)
+    return renamed_records
+
+
+def rename_fasta(input_fasta, output_fasta, rename_function, records=None):
+    """
+    Writes a copy of the fasta file where the name of each sequence is replaced by rename_function(name), together with
+    its .fai index and a table of the original and new names.
+    The sequences are copied as raw bytes and only the header lines are rewritten. When no name changes, the output is
+    a symbolic link to the input. Fasta files with lines of different lengths cannot be indexed: they are renamed line
+    by line with their sequences wrapped again and the output is indexed.
+    The fai records of the input are read with get_fasta_index unless they are provided.
+    """
+    for output_file in (output_fasta, output_fasta + '.fai'):
+        if os.path.lexists(output_file):
+            os.remove(output_file)
+    try:
+        if records is None:
+            records = get_fasta_index(input_fasta)
+    except ValueError as e:
+        logger.warning(f'{e}: rename the sequences line by line and wrap them again')
+        renamed_records = _rename_fasta_lines(input_fasta, output_fasta, rename_function)
+        write_rename_table(renamed_records, output_fasta + '.rename_table.tsv')
+        write_fai(index_fasta(output_fasta), output_fasta + '.fai')
+        return
+
+    renamed_records = [(record.name, rename_function(record.name)) for record in records]
+    write_rename_table(renamed_records, output_fasta + '.rename_table.tsv')
+
+    if all(original_name == new_name for original_name, new_name in renamed_records):
+        logger.info(f'No sequence renamed in {input_fasta}: link it to {output_fasta}')
+        os.symlink(os.path.realpath(input_fasta), output_fasta)
+        write_fai(records, output_fasta + '.fai')
+        return
+
+    input_size = os.path.getsize(input_fasta)
+    output_records = []
+    output_position = 0
+    input_fd = os.open(input_fasta, os.O_RDONLY)
+    output_fd = os.open(output_fasta, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+    try:
+        for record, (_, new_name) in zip(records, renamed_records):
+            header = f'>{new_name}\n'.encode()
+            os.write(output_fd, header)
+            output_position += len(header)
+            nb_bytes = min(_sequence_bytes(record), input_size - record.offset)
+            _copy_range(input_fd, output_fd, record.offset, nb_bytes)
+            output_records.append(record._replace(name=new_name, offset=output_position))
+            output_position += nb_bytes
+    finally:
+        os.close(input_fd)
+        os.close(output_fd)
+    write_fai(output_records, output_fasta + '.fai')
@@ -11,62 +11,44 @@
 # WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
 # See the License for the specific language governing permissions and
 # limitations under the License.
-import gzip
-import re
 from argparse import ArgumentParser
 from csv import DictReader, excel_tab
 
 from cached_property import cached_property
-from ebi_eva_common_pyutils.contig_alias.contig_alias import ContigAliasClient
 from ebi_eva_common_pyutils.logger import AppLogger
 
+from eva_submission.steps.contig_alias_cache import ContigAliasCache, add_contig_alias_cache_arguments, \
+    contig_alias_cache_from_args
+from eva_submission.steps.custom_genome_cache import CustomGenomeCache
+from eva_submission.steps.fasta_renaming import rename_fasta
+from eva_submission.steps.vcf_scanner import get_vcf_summary, get_vcf_contigs
+
 
 class RenameContigsInAssembly(AppLogger):
     """
     This class renames sequences based on the one provided in a set of VCFs
     """
-    def __init__(self, assembly_accession, assembly_fasta_path, assembly_report_path, input_vcfs, get_contig_from_vcf):
+    def __init__(self, assembly_accession, assembly_fasta_path, assembly_report_path, input_vcfs, get_contig_from_vcf,
+                 contig_alias_cache=None):
         self.input_vcfs = input_vcfs
         self.assembly_accession = assembly_accession
         self.assembly_fasta_path = assembly_fasta_path
         self.assembly_report_path = assembly_report_path
         self.get_contig_from_vcf = get_contig_from_vcf
-        self.contig_alias_client = ContigAliasClient()
+        self.contig_alias_client = contig_alias_cache or ContigAliasCache()
 
     def _contigs_found_in_vcf_data(self):
-        """Provides the contigs present in the VCF data lines"""
+        """Provides the contigs present in the VCF data lines, from the VCF index when available"""
         contigs = set()
         for input_vcf in self.input_vcfs:
-            if input_vcf.endswith('.gz'):
-                vcf_in = gzip.open(input_vcf, mode="rt")
-            else:
-                vcf_in = open(input_vcf, mode="r")
-            for line in vcf_in:
-                if line.startswith("#"):
-                    continue
-                contigs.add(line.split('\t')[0])
+            contigs.update(get_vcf_contigs(input_vcf))
         return contigs
 
     def _contigs_found_in_vcf_header(self):
         """Provides the contigs present in the VCF header lines"""
         contigs = set()
         for input_vcf in self.input_vcfs:
-            if input_vcf.endswith('.gz'):
-                vcf_in = gzip.open(input_vcf, mode="rt")
-            else:
-                vcf_in = open(input_vcf, mode="r")
-            for line in vcf_in:
-                if line.startswith("##contig=<ID="):
-                    match_results = re.match("##contig=<(.+)>", line)
-                    if match_results:
-                        for key_value  in match_results.group(1).split(','):
-                            key, value = key_value.split('=', 1)
-
-                            if key == 'ID':
-                                contigs.add(value)
-                                break
-                elif line.startswith("#CHROM"):
-                    break
+            contigs.update(get_vcf_summary(input_vcf, observer_names=['header_contigs'])['header_contigs'])
         return contigs
 
     @cached_property
@@ -135,20 +117,26 @@ class RenameContigsInAssembly(AppLogger):
                     contig_alias_map[refseq_acc] = contig
         return contig_alias_map
 
-    def rewrite_changing_names(self, output_fasta):
-        """Create a new fasta file with contig names use in the VCF."""
-        with open(self.assembly_fasta_path) as open_input, open(output_fasta, 'w') as open_output:
-            for line in open_input:
-                if line.startswith('>'):
-                    contig_name = line.split()[0][1:]
-                    assembly_report_name = self.assembly_report_map.get(contig_name)
-                    contig_alias_name = self.contig_alias_map.get(contig_name)
-                    if assembly_report_name:
-                        contig_name = assembly_report_name
-                    elif contig_alias_name:
-                        contig_name = contig_alias_name
-                    line = '>' + contig_name + '\n'
-                open_output.write(line)
+    def _contig_name_in_vcf(self, contig_name):
+        assembly_report_name = self.assembly_report_map.get(contig_name)
+        contig_alias_name = self.contig_alias_map.get(contig_name)
+        if assembly_report_name:
+            return assembly_report_name
+        elif contig_alias_name:
+            return contig_alias_name
+        return contig_name
+
+    def rewrite_changing_names(self, output_fasta, custom_genome_cache_dir=None):
+        """
+        Create a new fasta file with contig names use in the VCF, along with its fai index.
+        If a cache directory is provided the new fasta is a link to the cached genome renamed the same way.
+        """
+        if custom_genome_cache_dir:
+            CustomGenomeCache(custom_genome_cache_dir).create_custom_genome(
+                self.assembly_accession, self.assembly_fasta_path, output_fasta, self._contig_name_in_vcf
+            )
+        else:
+            rename_fasta(self.assembly_fasta_path, output_fasta, self._contig_name_in_vcf)
 
 
 def main():
@@ -166,12 +154,15 @@ def main():
                           help='Path to one or several VCF files')
     argparse.add_argument('--get_contig_from_vcf', nargs='+', choices=['header', 'data'], default=['header'],
                           help='Set which part of the VCF will be used to retrieve the contig names')
+    argparse.add_argument('--custom_genome_cache_dir', type=str, default=None,
+                          help='Directory where the renamed genomes are cached to be reused across submissions')
+    add_contig_alias_cache_arguments(argparse)
     args = argparse.parse_args()
     RenameContigsInAssembly(
         assembly_accession=args.assembly_accession, assembly_fasta_path=args.assembly_fasta,
         assembly_report_path=args.assembly_report, input_vcfs=args.vcf_files,
-        get_contig_from_vcf=args.get_contig_from_vcf
-    ).rewrite_changing_names(args.custom_fasta)
+        get_contig_from_vcf=args.get_contig_from_vcf, contig_alias_cache=contig_alias_cache_from_args(args)
+    ).rewrite_changing_names(args.custom_fasta, custom_genome_cache_dir=args.custom_genome_cache_dir)
 
 
 if __name__ == "__main__":
@@ -1,39 +1,32 @@
 #!/usr/bin/env python
-import re
-import gzip
+import logging
 from argparse import ArgumentParser
 
+from ebi_eva_common_pyutils.logger import logging_config as log_cfg
 
-def detect_structural_variant(vcf_file, output_vcf):
-    # Ref: https://samtools.github.io/hts-specs/VCFv4.3.pdf (Pages: 6, 16)
-    symbolic_allele_pattern = r"^<(DEL|INS|DUP|INV|CNV|BND)"
-    # Ref: https://samtools.github.io/hts-specs/VCFv4.3.pdf (Page: 17)
-    complex_rearrangements_breakend_pattern = r"^[ATCGNatgcn]+\[.+:.+\[$|^[ATCGNatgcn]+\].+:.+\]$|^\].+:.+\][ATCGNatgcn]+$|^\[.+:.+\[[ATCGNatgcn]+$"
-    # Ref: https://samtools.github.io/hts-specs/VCFv4.3.pdf (Page: 18)
-    complex_rearrangements_special_breakend_pattern = r"^[ATGCNatgcn]+<[0-9A-Za-z!#$%&+./:;?@^_|~-][0-9A-Za-z!#$%&*+./:;=?@^_|~-]*>$"
-    # Ref: https://samtools.github.io/hts-specs/VCFv4.3.pdf (Page: 22)
-    single_breakend_pattern = r"^\.[ATGCNatgcn]+|[ATGCNatgcn]+\.$"
-    sv_regex = re.compile(f'{symbolic_allele_pattern}|{complex_rearrangements_breakend_pattern}|'
-                          f'{complex_rearrangements_special_breakend_pattern}|{single_breakend_pattern}')
-    nb_sv = 0
-    if vcf_file.endswith('.gz'):
-        ctx = gzip.open(vcf_file, mode="rt")
-    else:
-        ctx = open(vcf_file, mode="r")
-    with ctx as open_input, open(output_vcf, 'w') as open_output:
-        for line in open_input:
-            if line.startswith("#"):
-                open_output.write(line)
-                continue
-            sp_line = line.split('\t')
-            alt_allele_column = sp_line[4]
-            alternate_alleles = alt_allele_column.split(",")
-            for alternate_allele in alternate_alleles:
-                if re.search(sv_regex, alternate_allele):
-                    open_output.write(line)
-                    nb_sv += 1
-                    break
-    print(f'{nb_sv} lines containing structural variants')
+from eva_submission.steps.vcf_scanner import VcfScanner, StructuralVariantObserver, default_observers, \
+    write_scan_summary
+
+logger = log_cfg.get_logger(__name__)
+
+
+def detect_structural_variant(vcf_file, output_vcf, write_scan_summary_file=False, threads=1):
+    with open(output_vcf, 'w') as open_output:
+        # The other default observers come for free during the same pass and populate the sidecar summary
+        observers = [
+            observer_class() for name, observer_class in default_observers.items()
+            if name != StructuralVariantObserver.name
+        ]
+        observers.append(StructuralVariantObserver(open_output))
+        results = VcfScanner(vcf_file, observers, threads).scan()
+    sv_results = results[StructuralVariantObserver.name]
+    # The total must be the first line of the output as it is parsed by the validation
+    print(f'{sv_results["nb_lines"]} lines containing structural variants')
+    for sv_class, count in sorted(sv_results['per_class'].items()):
+        logger.info(f'{count} lines containing structural variants of class {sv_class}')
+    if write_scan_summary_file:
+        write_scan_summary(vcf_file, results)
+    return sv_results
 
 
 def main():
@@ -44,9 +37,15 @@ def main():
                           help='Path to VCF where the detection of SV should be performed')
     argparse.add_argument('--output_vcf_file_with_sv', required=True, type=str,
                           help='Path to VCF where the detected SVs will be output')
+    argparse.add_argument('--threads', type=int, default=1,
+                          help='Number of threads used to decompress BGZF files')
 
     args = argparse.parse_args()
-    detect_structural_variant(vcf_file=args.vcf_file, output_vcf=args.output_vcf_file_with_sv)
+    log_cfg.add_stdout_handler()
+    if args.debug:
+        log_cfg.set_log_level(logging.DEBUG)
+    detect_structural_variant(vcf_file=args.vcf_file, output_vcf=args.output_vcf_file_with_sv,
+                              write_scan_summary_file=True, threads=args.threads)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,73 @@
+# Copyright 2026 EMBL - European Bioinformatics Institute
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import re
+from collections import Counter
+
+# Ref: https://samtools.github.io/hts-specs/VCFv4.3.pdf (Pages: 6, 16)
+symbolic_allele_pattern = r"^<(DEL|INS|DUP|INV|CNV|BND)"
+# Ref: https://samtools.github.io/hts-specs/VCFv4.3.pdf (Page: 17)
+complex_rearrangements_breakend_pattern = r"^[ATCGNatgcn]+\[.+:.+\[$|^[ATCGNatgcn]+\].+:.+\]$|^\].+:.+\][ATCGNatgcn]+$|^\[.+:.+\[[ATCGNatgcn]+$"
+# Ref: https://samtools.github.io/hts-specs/VCFv4.3.pdf (Page: 18)
+complex_rearrangements_special_breakend_pattern = r"^[ATGCNatgcn]+<[0-9A-Za-z!#$%&+./:;?@^_|~-][0-9A-Za-z!#$%&*+./:;=?@^_|~-]*>$"
+# Ref: https://samtools.github.io/hts-specs/VCFv4.3.pdf (Page: 22)
+single_breakend_pattern = r"^\.[ATGCNatgcn]+|[ATGCNatgcn]+\.$"
+
+symbolic_allele_regex = re.compile(symbolic_allele_pattern)
+# Structural variant classes other than the symbolic alleles, which are reported by their type (DEL, INS, ...)
+sv_class_regexes = [
+    ('breakend', re.compile(complex_rearrangements_breakend_pattern)),
+    ('special_breakend', re.compile(complex_rearrangements_special_breakend_pattern)),
+    ('single_breakend', re.compile(single_breakend_pattern)),
+]
+
+# Only lines with one of <, [, ] or . in the ALT column can contain a structural variant.
+# Matches these lines in a block of data lines in a single pass and captures their ALT column.
+candidate_line_regex = re.compile(r'^(?:[^\t\n]*\t){4}([^\t\n]*[<\[\].][^\t\n]*)(?:\t[^\n]*)?(?:\n|$)', re.MULTILINE)
+
+
+def classify_alternate_allele(alternate_allele):
+    """Returns the class of structural variant of an alternate allele or None if it is not a structural variant."""
+    match = symbolic_allele_regex.search(alternate_allele)
+    if match:
+        return match.group(1)
+    for sv_class, regex in sv_class_regexes:
+        if regex.search(alternate_allele):
+            return sv_class
+    return None
+
+
+class StructuralVariantEngine:
+    """
+    Detects the VCF lines containing structural variants in blocks of data lines.
+    The full patterns are only evaluated on the lines selected by a cheap check of the ALT column so that blocks without
+    structural variants are processed at close to the speed of reading them.
+    A line is counted once, in the class of its first alternate allele that is a structural variant.
+    """
+
+    def __init__(self):
+        self.nb_sv = 0
+        self.counts_per_class = Counter()
+
+    def detect_in_block(self, block):
+        """Returns the lines of the block of data lines that contain a structural variant."""
+        sv_lines = []
+        for match in candidate_line_regex.finditer(block):
+            for alternate_allele in match.group(1).split(','):
+                sv_class = classify_alternate_allele(alternate_allele)
+                if sv_class:
+                    sv_lines.append(match.group(0))
+                    self.nb_sv += 1
+                    self.counts_per_class[sv_class] += 1
+                    break
+        return sv_lines
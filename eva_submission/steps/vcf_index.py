@@ -0,0 +1,140 @@
+# Copyright 2026 EMBL - European Bioinformatics Institute
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import gzip
+import os
+import struct
+from collections import namedtuple
+
+from ebi_eva_common_pyutils.logger import logging_config as log_cfg
+
+logger = log_cfg.get_logger(__name__)
+
+# Ref: https://samtools.github.io/hts-specs/tabix.pdf and https://samtools.github.io/hts-specs/CSIv1.pdf
+TBI_MAGIC = b'TBI\x01'
+CSI_MAGIC = b'CSI\x01'
+INDEX_EXTENSIONS = ['.csi', '.tbi']
+
+
+def find_vcf_index(vcf_file):
+    """
+    Returns the path of the CSI or TBI index of a compressed VCF or None if there is none or it is older than the VCF.
+    The index is searched next to the provided path and next to the file it links to.
+    """
+    if not vcf_file.endswith('.gz'):
+        return None
+    for vcf_path in dict.fromkeys([vcf_file, os.path.realpath(vcf_file)]):
+        for extension in INDEX_EXTENSIONS:
+            index_file = vcf_path + extension
+            if os.path.isfile(index_file):
+                if os.path.getmtime(index_file) < os.path.getmtime(vcf_file):
+                    logger.warning(f'Index {index_file} is older than {vcf_file} and will not be used')
+                    continue
+                return index_file
+    return None
+
+
+def _read_int32(open_index, nb_values=1):
+    return struct.unpack(f'<{nb_values}i', open_index.read(4 * nb_values))
+
+
+def _parse_sequence_names(names_block):
+    return [name.decode() for name in names_block.split(b'\x00') if name]
+
+
+def get_contigs_from_index(vcf_file):
+    """Provides the contigs that have records in the VCF file from its index or None if no usable index exists."""
+    index_file = find_vcf_index(vcf_file)
+    if not index_file:
+        return None
+    try:
+        # Indexes created while writing the VCF (bcftools --write-index) list all the contigs of the header
+        return [reference.name for reference in read_index_references(index_file) if reference.has_records]
+    except (OSError, ValueError, struct.error) as e:
+        logger.warning(f'Could not read the sequence names from {index_file}: {e}')
+        return None
+
+
+def _read_uint64(open_index, nb_values=1):
+    return struct.unpack(f'<{nb_values}Q', open_index.read(8 * nb_values))
+
+
+class IndexReference(namedtuple('IndexReference', ['name', 'nb_bins', 'nb_records', 'compressed_bytes'])):
+    """
+    Content of the index for one sequence. nb_records comes from the pseudo-bin and is None when the index does not
+    contain it.
+    """
+
+    @property
+    def has_records(self):
+        if self.nb_records is not None:
+            return self.nb_records > 0
+        return self.nb_bins > 0
+
+
+def _read_reference(open_index, name, pseudo_bin, csi):
+    """Reads the bins of one reference."""
+    nb_records = None
+    compressed_bytes = 0
+    n_bin, = _read_int32(open_index)
+    for _ in range(n_bin):
+        bin_number, = struct.unpack('<I', open_index.read(4))
+        if csi:
+            open_index.read(8)  # loffset
+        n_chunk, = _read_int32(open_index)
+        chunks = _read_uint64(open_index, 2 * n_chunk)
+        if bin_number == pseudo_bin:
+            # The second chunk contains the numbers of mapped and unmapped records
+            nb_records = chunks[2]
+        else:
+            compressed_bytes += sum((chunks[i + 1] >> 16) - (chunks[i] >> 16) for i in range(0, len(chunks), 2))
+    if not csi:
+        n_intv, = _read_int32(open_index)
+        open_index.read(8 * n_intv)
+    return IndexReference(name, n_bin, nb_records, compressed_bytes)
+
+
+def read_index_references(index_file):
+    """Reads the content of a tabix or CSI index for each sequence as a list of IndexReference in the index order."""
+    with gzip.open(index_file, 'rb') as open_index:
+        magic = open_index.read(4)
+        if magic == TBI_MAGIC:
+            n_ref, _, _, _, _, _, _, l_nm = _read_int32(open_index, 8)
+            names = _parse_sequence_names(open_index.read(l_nm))
+            pseudo_bin = 37450
+            csi = False
+        elif magic == CSI_MAGIC:
+            min_shift, depth, l_aux = _read_int32(open_index, 3)
+            if l_aux < 28:
+                raise ValueError(f'{index_file} does not contain the sequence names')
+            l_nm = _read_int32(open_index, 7)[6]
+            names = _parse_sequence_names(open_index.read(l_nm))
+            open_index.read(l_aux - 28 - l_nm)
+            n_ref, = _read_int32(open_index)
+            pseudo_bin = ((1 << ((depth + 1) * 3)) - 1) // 7 + 1
+            csi = True
+        else:
+            raise ValueError(f'{index_file} is not a tabix or CSI index')
+        return [_read_reference(open_index, name, pseudo_bin, csi) for name in names[:n_ref]]
+
+
+def read_index_statistics(index_file):
+    """
+    Reads the amount of data per sequence in a tabix or CSI index as a list of (sequence name, weight) in the order of
+    the index. The weight is the number of records when the index contains it, otherwise the compressed size of the
+    sequence.
+    """
+    return [
+        (reference.name, reference.nb_records if reference.nb_records is not None else reference.compressed_bytes)
+        for reference in read_index_references(index_file)
+    ]
@@ -0,0 +1,335 @@
+# Copyright 2026 EMBL - European Bioinformatics Institute
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import gzip
+import os
+import re
+from argparse import ArgumentParser
+
+import yaml
+from ebi_eva_common_pyutils.logger import AppLogger, logging_config as log_cfg
+
+from eva_submission.steps.bgzf_reader import BgzfParallelReader, is_bgzf
+from eva_submission.steps.structural_variant_engine import StructuralVariantEngine
+from eva_submission.steps.vcf_index import get_contigs_from_index
+
+logger = log_cfg.get_logger(__name__)
+
+# Increment when the content of the summary changes so that older sidecar summaries are ignored
+SCAN_SUMMARY_VERSION = 2
+SCAN_SUMMARY_SUFFIX = '.scan_summary.yml'
+
+
+def open_vcf(vcf_file, threads=1):
+    """Opens a VCF file for reading text lines. BGZF files are decompressed in parallel when threads > 1."""
+    if vcf_file.endswith('.gz'):
+        if threads > 1 and is_bgzf(vcf_file):
+            return BgzfParallelReader(vcf_file, threads)
+        return gzip.open(vcf_file, mode="rt")
+    return open(vcf_file, mode="r")
+
+
+class VcfObserver:
+    """
+    Receives the lines of a VCF from the VcfScanner and accumulates one result stored under the observer's name.
+    Data lines are provided split on the first 9 tabs so that the sample columns are never split.
+    """
+    name = None
+
+    @property
+    def done(self):
+        """True when the observer does not need to see any more lines."""
+        return False
+
+    def observe_header(self, line):
+        pass
+
+    def observe_data(self, line, sp_line):
+        pass
+
+    def finish(self):
+        """Called once after the last line has been observed."""
+        pass
+
+    def result(self):
+        raise NotImplementedError
+
+
+class ContigsObserver(VcfObserver):
+    """Collects the contig names found in the data lines."""
+    name = 'contigs'
+
+    def __init__(self):
+        self.contigs = set()
+
+    def observe_data(self, line, sp_line):
+        self.contigs.add(sp_line[0])
+
+    def result(self):
+        return sorted(self.contigs)
+
+
+class HeaderContigsObserver(VcfObserver):
+    """Collects the contig names declared in the ##contig lines of the header."""
+    name = 'header_contigs'
+
+    def __init__(self):
+        self.contigs = set()
+        self.header_finished = False
+
+    @property
+    def done(self):
+        return self.header_finished
+
+    def observe_header(self, line):
+        if line.startswith("##contig=<ID="):
+            match_results = re.match("##contig=<(.+)>", line)
+            if match_results:
+                for key_value in match_results.group(1).split(','):
+                    key, value = key_value.split('=', 1)
+                    if key == 'ID':
+                        self.contigs.add(value)
+                        break
+        elif line.startswith("#CHROM"):
+            self.header_finished = True
+
+    def result(self):
+        return sorted(self.contigs)
+
+
+class SamplesObserver(VcfObserver):
+    """Collects the sample names from the #CHROM line."""
+    name = 'samples'
+
+    def __init__(self):
+        self.samples = None
+
+    @property
+    def done(self):
+        return self.samples is not None
+
+    def observe_header(self, line):
+        if line.startswith('#CHROM'):
+            self.samples = line.strip().split('\t')[9:]
+
+    def result(self):
+        return self.samples or []
+
+
+class AggregationObserver(VcfObserver):
+    """
+    Checks the first data lines for the signals used to detect the genotype aggregation: GT in the FORMAT column and
+    AF or AC and AN in the INFO column.
+    """
+    name = 'aggregation'
+
+    def __init__(self, max_line_check=10):
+        self.max_line_check = max_line_check
+        self.nb_line_checked = 0
+        self.gt_in_format = True
+        self.af_in_info = True
+
+    @property
+    def done(self):
+        return self.nb_line_checked >= self.max_line_check
+
+    def observe_data(self, line, sp_line):
+        info_keys = set(key_value.split('=', 1)[0] for key_value in sp_line[7].split(';'))
+        self.gt_in_format = self.gt_in_format and len(sp_line) > 8 and 'GT' in sp_line[8].strip().split(':')
+        self.af_in_info = self.af_in_info and ('AF' in info_keys or ('AC' in info_keys and 'AN' in info_keys))
+        self.nb_line_checked += 1
+
+    def result(self):
+        return {'gt_in_format': self.gt_in_format, 'af_in_info': self.af_in_info,
+                'nb_line_checked': self.nb_line_checked}
+
+
+class RecordCountObserver(VcfObserver):
+    """Counts the data lines."""
+    name = 'nb_records'
+
+    def __init__(self):
+        self.nb_records = 0
+
+    def observe_data(self, line, sp_line):
+        self.nb_records += 1
+
+    def result(self):
+        return self.nb_records
+
+
+class StructuralVariantObserver(VcfObserver):
+    """
+    Counts the lines containing a structural variant per class and optionally writes the header and these lines out.
+    The data lines are processed in blocks by the StructuralVariantEngine.
+    """
+    name = 'structural_variants'
+
+    def __init__(self, open_output=None, block_size=10000):
+        self.open_output = open_output
+        self.block_size = block_size
+        self.engine = StructuralVariantEngine()
+        self.block = []
+
+    def observe_header(self, line):
+        if self.open_output:
+            self.open_output.write(line)
+
+    def observe_data(self, line, sp_line):
+        self.block.append(line)
+        if len(self.block) >= self.block_size:
+            self._process_block()
+
+    def _process_block(self):
+        sv_lines = self.engine.detect_in_block(''.join(self.block))
+        if self.open_output:
+            self.open_output.writelines(sv_lines)
+        self.block = []
+
+    def finish(self):
+        if self.block:
+            self._process_block()
+
+    def result(self):
+        return {'nb_lines': self.engine.nb_sv, 'per_class': dict(self.engine.counts_per_class)}
+
+
+# Observers that make up the sidecar summary
+default_observers = {
+    observer.name: observer
+    for observer in [ContigsObserver, HeaderContigsObserver, SamplesObserver, AggregationObserver,
+                     RecordCountObserver, StructuralVariantObserver]
+}
+
+
+class VcfScanner(AppLogger):
+    """
+    Reads a VCF file once and feeds each line to a set of observers.
+    The scan stops as soon as all the observers are done.
+    """
+
+    def __init__(self, vcf_file, observers, threads=1):
+        self.vcf_file = vcf_file
+        self.observers = observers
+        self.threads = threads
+
+    def scan(self):
+        header_observers = list(self.observers)
+        data_observers = []
+        with open_vcf(self.vcf_file, self.threads) as vcf_in:
+            for line in vcf_in:
+                if line.startswith('#'):
+                    for observer in header_observers:
+                        observer.observe_header(line)
+                    continue
+                if header_observers:
+                    # First data line: only keep the observers that still need to see lines
+                    data_observers = [observer for observer in header_observers if not observer.done]
+                    header_observers = []
+                if not data_observers:
+                    break
+                sp_line = line.split('\t', 9)
+                for observer in data_observers:
+                    observer.observe_data(line, sp_line)
+                if any(observer.done for observer in data_observers):
+                    data_observers = [observer for observer in data_observers if not observer.done]
+        for observer in self.observers:
+            observer.finish()
+        return dict((observer.name, observer.result()) for observer in self.observers)
+
+
+def scan_summary_path(vcf_file):
+    """The sidecar summary is stored next to the real VCF file so that it is shared by all the steps using it."""
+    return os.path.realpath(vcf_file) + SCAN_SUMMARY_SUFFIX
+
+
+def _file_signature(vcf_file):
+    file_stat = os.stat(vcf_file)
+    return {'size': file_stat.st_size, 'mtime_ns': file_stat.st_mtime_ns}
+
+
+def load_scan_summary(vcf_file):
+    """Returns the sidecar summary of the VCF file or None if it does not exist or is out of date."""
+    summary_file = scan_summary_path(vcf_file)
+    if not os.path.isfile(summary_file):
+        return None
+    try:
+        with open(summary_file) as open_summary:
+            summary = yaml.safe_load(open_summary)
+    except yaml.YAMLError:
+        logger.warning(f'Could not parse the scan summary {summary_file}')
+        return None
+    if not summary or summary.get('version') != SCAN_SUMMARY_VERSION or \
+            summary.get('file_signature') != _file_signature(vcf_file):
+        return None
+    return summary.get('results')
+
+
+def write_scan_summary(vcf_file, results):
+    summary_file = scan_summary_path(vcf_file)
+    summary = {
+        'version': SCAN_SUMMARY_VERSION,
+        'vcf_file': os.path.realpath(vcf_file),
+        'file_signature': _file_signature(vcf_file),
+        'results': results
+    }
+    tmp_summary_file = f'{summary_file}.{os.getpid()}.tmp'
+    try:
+        with open(tmp_summary_file, 'w') as open_summary:
+            yaml.safe_dump(summary, open_summary)
+        os.replace(tmp_summary_file, summary_file)
+    except OSError as e:
+        logger.warning(f'Could not write the scan summary {summary_file}: {e}')
+
+
+def get_vcf_summary(vcf_file, observer_names=None, write_summary=False, threads=1):
+    """
+    Provides the results of the requested observers (all the default observers if not specified) for one VCF file.
+    The results come from the sidecar summary when it is up to date, otherwise the file is scanned.
+    Only the scans run with all the default observers can be written to the sidecar summary.
+    """
+    observer_names = observer_names or list(default_observers)
+    summary = load_scan_summary(vcf_file)
+    if summary and all(name in summary for name in observer_names):
+        return dict((name, summary[name]) for name in observer_names)
+    results = VcfScanner(vcf_file, [default_observers[name]() for name in observer_names], threads).scan()
+    if write_summary and set(observer_names) == set(default_observers):
+        write_scan_summary(vcf_file, results)
+    return results
+
+
+def get_vcf_contigs(vcf_file, write_summary=False, threads=1):
+    """
+    Provides the contigs that have records in the VCF file. They are read from the CSI/TBI index when one is available
+    and only otherwise from the sidecar summary or by scanning the data lines.
+    """
+    contigs = get_contigs_from_index(vcf_file)
+    if contigs is not None:
+        return sorted(set(contigs))
+    observer_names = None if write_summary else [ContigsObserver.name]
+    return get_vcf_summary(vcf_file, observer_names, write_summary, threads)[ContigsObserver.name]
+
+
+def main():
+    argparse = ArgumentParser(description='Scan VCF files once and write a sidecar summary reused by the other steps')
+    argparse.add_argument('--vcf_files', required=True, type=str, nargs='+',
+                          help='Path to one or several VCF files')
+    argparse.add_argument('--threads', type=int, default=1,
+                          help='Number of threads used to decompress BGZF files')
+    args = argparse.parse_args()
+    for vcf_file in args.vcf_files:
+        get_vcf_summary(vcf_file, write_summary=True, threads=args.threads)
+
+
+if __name__ == "__main__":
+    main()
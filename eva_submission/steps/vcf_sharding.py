@@ -0,0 +1,167 @@
+# Copyright 2026 EMBL - European Bioinformatics Institute
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import gzip
+import logging
+import os
+import shutil
+from argparse import ArgumentParser
+
+import pysam
+from ebi_eva_common_pyutils.logger import logging_config as log_cfg
+
+from eva_submission.steps.bgzf_reader import is_bgzf
+from eva_submission.steps.vcf_index import find_vcf_index, read_index_references
+
+logger = log_cfg.get_logger(__name__)
+
+NORM_TOTALS_PREFIX = 'Lines   total/split/realigned/skipped:'
+MAX_POSITION = 2147483647
+
+
+def prepare_indexed_vcf(vcf_file, output_vcf, index_file=None):
+    """
+    Provides output_vcf as a BGZF copy of vcf_file with an index. BGZF inputs are linked with their index, found next
+    to them when not provided, and only indexed when they do not have one.
+    Returns the path of the index or None when the VCF cannot be indexed because it is not sorted.
+    """
+    if is_bgzf(vcf_file):
+        os.symlink(os.path.realpath(vcf_file), output_vcf)
+        index_file = index_file or find_vcf_index(vcf_file)
+        if index_file:
+            output_index = output_vcf + os.path.splitext(index_file)[1]
+            os.symlink(os.path.realpath(index_file), output_index)
+            return output_index
+        # The link is replaced by a copy so that the index is not written next to the input
+        os.remove(output_vcf)
+        shutil.copyfile(vcf_file, output_vcf)
+    else:
+        logger.info(f'Compress {vcf_file} to {output_vcf}')
+        open_function = gzip.open if vcf_file.endswith('.gz') else open
+        with open_function(vcf_file, 'rb') as open_input, pysam.BGZFile(output_vcf, 'wb') as open_output:
+            shutil.copyfileobj(open_input, open_output)
+    try:
+        pysam.tabix_index(output_vcf, preset='vcf', csi=True, force=True)
+    except OSError as e:
+        logger.warning(f'Could not index {output_vcf}, it will be normalised in a single shard: {e}')
+        if os.path.exists(output_vcf + '.csi'):
+            os.remove(output_vcf + '.csi')
+        return None
+    return output_vcf + '.csi'
+
+
+def plan_shards(index_file, nb_shards):
+    """
+    Splits the sequences of an indexed VCF in at most nb_shards shards of contiguous sequences of similar size using
+    the number of records of each sequence from the index. Each shard is a list of (position in the index, sequence
+    name) so that concatenating the shards in order keeps the order of the sequences.
+    Returns an empty list when no sequence contains records.
+    """
+    statistics = []
+    for position, reference in enumerate(read_index_references(index_file)):
+        # Only the pseudo-bin tells that a sequence has no record: the compressed size used without it is 0 when all
+        # the records of the sequence are in a single BGZF block
+        if reference.has_records:
+            weight = reference.nb_records if reference.nb_records is not None else reference.compressed_bytes
+            statistics.append((position, reference.name, max(weight, 1)))
+    if len(statistics) <= nb_shards:
+        shards = [[(position, name)] for position, name, _ in statistics]
+        shard_weights = [weight for _, _, weight in statistics]
+    else:
+        total_weight = sum(weight for _, _, weight in statistics)
+        shards = [[] for _ in range(nb_shards)]
+        shard_weights = [0] * nb_shards
+        cumulative_weight = 0
+        for position, name, weight in statistics:
+            # Each sequence goes to the shard containing the middle of its records in the whole VCF
+            shard_number = min(int((cumulative_weight + weight / 2) * nb_shards / total_weight), nb_shards - 1)
+            shards[shard_number].append((position, name))
+            shard_weights[shard_number] += weight
+            cumulative_weight += weight
+        shards, shard_weights = zip(*[(shard, weight) for shard, weight in zip(shards, shard_weights) if shard])
+    for shard, weight in zip(shards, shard_weights):
+        logger.info(f'Shard of {len(shard)} sequences with a weight of {weight}')
+    return list(shards)
+
+
+def write_shards(shards, output_dir):
+    """
+    Writes one region file per shard containing its sequences in the order of the index. A single empty shard is
+    written when there is no shard, which means the whole VCF is normalised at once.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    shard_files = []
+    for shard_number, shard in enumerate(shards or [[]]):
+        shard_file = os.path.join(output_dir, f'shard_{shard_number}.txt')
+        with open(shard_file, 'w') as open_file:
+            for _, name in shard:
+                open_file.write(f'{name}\t1\t{MAX_POSITION}\n')
+        shard_files.append(shard_file)
+    return shard_files
+
+
+def merge_norm_logs(log_files, output_log):
+    """
+    Merges the logs of bcftools norm from each shard into a single log containing the sum of the line counts so that
+    it can be parsed like the log of the whole VCF.
+    """
+    totals = [0, 0, 0, 0]
+    with open(output_log, 'w') as open_output:
+        for log_file in log_files:
+            with open(log_file) as open_file:
+                for line in open_file:
+                    if line.startswith(NORM_TOTALS_PREFIX):
+                        counts = line.strip().split()[-1].split('/')
+                        totals = [total + int(count) for total, count in zip(totals, counts)]
+                    else:
+                        open_output.write(line)
+        open_output.write(f'{NORM_TOTALS_PREFIX}\t{"/".join(str(total) for total in totals)}\n')
+    return totals
+
+
+def main():
+    argparse = ArgumentParser(description='Split a VCF file in shards of sequences normalised in parallel and merge the '
+                                          'normalisation logs of the shards')
+    argparse.add_argument('--debug', action='store_true', default=False,
+                          help='Set the script to output logging information at debug level')
+    subparsers = argparse.add_subparsers(dest='command', required=True)
+    plan_parser = subparsers.add_parser('plan', help='Create the indexed VCF and the files listing the sequences '
+                                                     'of each shard')
+    plan_parser.add_argument('--vcf_file', required=True, help='VCF file to split in shards')
+    plan_parser.add_argument('--index_file', help='CSI or TBI index of the VCF file when it is not next to it')
+    plan_parser.add_argument('--output_vcf', required=True, help='BGZF compressed and indexed VCF to create')
+    plan_parser.add_argument('--nb_shards', required=True, type=int, help='Maximum number of shards')
+    plan_parser.add_argument('--shards_dir', required=True, help='Directory where the shard files are written')
+    merge_parser = subparsers.add_parser('merge_logs', help='Merge the bcftools norm logs of the shards')
+    log_group = merge_parser.add_mutually_exclusive_group(required=True)
+    log_group.add_argument('--log_files', nargs='+', help='bcftools norm logs of the shards')
+    log_group.add_argument('--log_list', help='File listing the bcftools norm logs of the shards, one per line')
+    merge_parser.add_argument('--output_log', required=True, help='Merged log')
+
+    args = argparse.parse_args()
+    log_cfg.add_stdout_handler()
+    if args.debug:
+        log_cfg.set_log_level(logging.DEBUG)
+    if args.command == 'plan':
+        index_file = prepare_indexed_vcf(args.vcf_file, args.output_vcf, args.index_file)
+        write_shards(plan_shards(index_file, args.nb_shards) if index_file else [], args.shards_dir)
+    else:
+        log_files = args.log_files
+        if args.log_list:
+            with open(args.log_list) as open_file:
+                log_files = [line.strip() for line in open_file if line.strip()]
+        merge_norm_logs(log_files, args.output_log)
+
+
+if __name__ == "__main__":
+    main()
@@ -24,13 +24,14 @@ import yaml
 from ebi_eva_common_pyutils import command_utils
 from ebi_eva_common_pyutils.config import cfg
 from ebi_eva_common_pyutils.logger import AppLogger
-from ebi_eva_internal_pyutils.metadata_utils import get_metadata_connection_handle, resolve_variant_warehouse_db_name
+from ebi_eva_internal_pyutils.metadata_utils import resolve_variant_warehouse_db_name
 from ebi_eva_internal_pyutils.spring_properties import SpringPropertiesGenerator
 from sqlalchemy import select
 
 from eva_submission import NEXTFLOW_DIR
 from eva_submission.eload_utils import get_nextflow_config_flag, open_gzip_if_required
 from eva_submission.evapro.populate_evapro import EvaProjectLoader
+from eva_submission.metadata_connection import get_metadata_connection_handle
 from eva_submission.evapro.table import Analysis, File, Project, ProjectEvaSubmission, Taxonomy
 
 DEPRECATE_ACCESSION = 'deprecate_variants'
@@ -119,7 +119,8 @@ class FtpDepositBox(AppLogger):
             name, ext =  os.path.splitext(os.path.basename(metadata_file))
             if ext == '.xlsx':
                 json_file = os.path.join(os.path.dirname(metadata_file), f'.{name}.json')
-                convert_spreadsheet_to_json(metadata_file, json_file)
+                # The JSON is temporary and no cache is left in the FTP box of the submitter
+                convert_spreadsheet_to_json(metadata_file, json_file, use_cache=False)
                 file_to_delete = json_file
             else:
                 json_file = metadata_file
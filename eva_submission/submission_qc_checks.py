@@ -7,18 +7,20 @@ from pathlib import Path
 
 import requests
 from ebi_eva_common_pyutils.config import cfg
-from ebi_eva_internal_pyutils.metadata_utils import get_metadata_connection_handle
 from ebi_eva_internal_pyutils.pg_utils import get_all_results_for_query
 
-from eva_submission.qc_utils import did_job_complete_successfully_from_log, get_failed_job_or_step_name, \
-    job_launched_and_completed_text_map
+from eva_submission.qc_utils import LogIndex, QcCheckExecutor, DEFAULT_QC_MAX_WORKERS, DEFAULT_QC_CHECK_TIMEOUT
 from requests import HTTPError
 from retry import retry
 
 from eva_submission.eload_submission import Eload
+from eva_submission.metadata_connection import get_metadata_connection_handle
 from eva_submission.submission_config import EloadConfig
 
 
+LOG_INDEX_FILE = '.qc_log_index.json'
+
+
 def rreplace(s, old, new, occurrence=1):
     li = s.rsplit(old, occurrence)
     return new.join(li)
@@ -45,6 +47,7 @@ class EloadQC(Eload):
             self.path_to_logs_dir = os.path.join(path_to_data_dir, '00_logs')
         if not os.path.isdir(self.path_to_logs_dir):
             raise ValueError(f'Cannot locate the log directory for ELOAD {self.eload}')
+        self.log_index = LogIndex(os.path.join(self.path_to_logs_dir, LOG_INDEX_FILE))
         self.taxonomy = self.eload_cfg.query('submission', 'taxonomy_id')
         self.analyses = self.eload_cfg.query('brokering', 'analyses', ret_default={})
 
@@ -117,16 +120,7 @@ class EloadQC(Eload):
         return ftp.nlst()
 
     def _check_if_variants_were_skipped_in_log(self, file_path):
-        with open(file_path, 'r') as f:
-            variants_skipped = -1
-            job_launched_str, _ = job_launched_and_completed_text_map['accession']
-            for line in f:
-                if any(text in line for text in job_launched_str):
-                    variants_skipped = None
-                if 'lines in the original VCF were skipped' in line:
-                    variants_skipped = line.strip().split(":")[-1].strip().split(" ")[0].strip()
-
-            return variants_skipped
+        return self.log_index.get_variants_skipped(file_path)
 
     def _check_multiple_logs(self, search_unit, log_patterns, job_types):
         """
@@ -155,8 +149,8 @@ class EloadQC(Eload):
         report_text = ""
         if log_files:
             # check if job completed successfully
-            if not did_job_complete_successfully_from_log(log_files[0], job_type):
-                report_text += f"{job_type} failed job/step : {get_failed_job_or_step_name(log_files[0])}"
+            if not self.log_index.did_job_complete_successfully(log_files[0], job_type):
+                report_text += f"{job_type} failed job/step : {self.log_index.get_failed_job_or_step_name(log_files[0])}"
                 job_passed = False
             else:
                 job_passed = True
@@ -274,9 +268,9 @@ class EloadQC(Eload):
             accessioning_log_files = glob.glob(f"{self.path_to_logs_dir}/accessioning.*{file}*.log")
             if accessioning_log_files:
                 # check if accessioning job completed successfully
-                if not did_job_complete_successfully_from_log(accessioning_log_files[0], 'accession'):
+                if not self.log_index.did_job_complete_successfully(accessioning_log_files[0], 'accession'):
                     failed_files[
-                        file] = f"failed job/step : {get_failed_job_or_step_name(accessioning_log_files[0])}"
+                        file] = f"failed job/step : {self.log_index.get_failed_job_or_step_name(accessioning_log_files[0])}"
             else:
                 failed_files[file] = f"Accessioning Error : No accessioning file found for {file}"
 
@@ -521,27 +515,52 @@ class EloadQC(Eload):
 
         return result, '\n            '.join(report_lines)
 
-    def run_qc_checks_for_submission(self):
-        """Collect information from different qc methods format and write the report."""
-        browsable_files_result, browsable_files_report = self.check_if_browsable_files_entered_correctly_in_db()
-
-        accessioning_job_result, accessioning_job_report = self.check_if_accessioning_completed_successfully()
-        variants_skipped_result, variants_skipped_report = self.check_if_variants_were_skipped_while_accessioning()
-
-        variant_load_result, variant_load_report = self.check_if_variant_load_completed_successfully()
-        annotation_result, annotation_report = self.check_if_vep_completed_successfully()
-        variant_statistic_result, variant_statistic_report = self.check_if_variant_statistic_completed_successfully()
-        study_statistic_result, study_statistic_report = self.check_if_study_statistic_completed_successfully()
-        acc_import_result, acc_import_report = self.check_if_acc_load_completed_successfully()
-
-        clustering_check_result, clustering_check_report = self.clustering_check_report()
-        remapping_check_result, remapping_check_report = self.remapping_check_report()
-        backpropagation_check_result, backpropagation_check_report = self.backpropagation_check_report()
-        ftp_check_result, ftp_check_report = self.check_all_browsable_files_are_available_in_ftp()
-
-        study_check_result, study_check_report = self.check_if_study_appears()
-
-        study_metadata_check_result, study_metadata_check_report = self.check_if_study_appears_in_metadata()
+    def run_qc_checks_for_submission(self, max_workers=None, check_timeout=None):
+        """
+        Collect information from different qc methods format and write the report.
+        The checks run concurrently using max_workers threads and each check fails if it does not finish within
+        check_timeout seconds.
+        """
+        executor = QcCheckExecutor(
+            max_workers=max_workers or cfg.get('qc_max_workers', DEFAULT_QC_MAX_WORKERS),
+            check_timeout=check_timeout or cfg.get('qc_check_timeout', DEFAULT_QC_CHECK_TIMEOUT),
+            failed_result=EloadQC.FAIL
+        )
+        executor.add_check('browsable_files', self.check_if_browsable_files_entered_correctly_in_db)
+        executor.add_check('accessioning', self.check_if_accessioning_completed_successfully)
+        # Reuse the accessioning logs indexed by the accessioning check
+        executor.add_check('variants_skipped_accessioning', self.check_if_variants_were_skipped_while_accessioning,
+                           depends_on=['accessioning'])
+        executor.add_check('variant_load', self.check_if_variant_load_completed_successfully)
+        executor.add_check('annotation', self.check_if_vep_completed_successfully)
+        executor.add_check('variant_stats', self.check_if_variant_statistic_completed_successfully)
+        executor.add_check('study_stats', self.check_if_study_statistic_completed_successfully)
+        executor.add_check('accession_import', self.check_if_acc_load_completed_successfully)
+        executor.add_check('clustering', self.clustering_check_report)
+        executor.add_check('remapping', self.remapping_check_report)
+        executor.add_check('back-propogation', self.backpropagation_check_report)
+        executor.add_check('ftp', self.check_all_browsable_files_are_available_in_ftp)
+        executor.add_check('study_webservice', self.check_if_study_appears)
+        executor.add_check('study_metadata', self.check_if_study_appears_in_metadata)
+        check_results = executor.run()
+
+        browsable_files_result, browsable_files_report, _ = check_results['browsable_files']
+        accessioning_job_result, accessioning_job_report, _ = check_results['accessioning']
+        variants_skipped_result, variants_skipped_report, _ = check_results['variants_skipped_accessioning']
+        variant_load_result, variant_load_report, _ = check_results['variant_load']
+        annotation_result, annotation_report, _ = check_results['annotation']
+        variant_statistic_result, variant_statistic_report, _ = check_results['variant_stats']
+        study_statistic_result, study_statistic_report, _ = check_results['study_stats']
+        acc_import_result, acc_import_report, _ = check_results['accession_import']
+        clustering_check_result, clustering_check_report, _ = check_results['clustering']
+        remapping_check_result, remapping_check_report, _ = check_results['remapping']
+        backpropagation_check_result, backpropagation_check_report, _ = check_results['back-propogation']
+        ftp_check_result, ftp_check_report, _ = check_results['ftp']
+        study_check_result, study_check_report, _ = check_results['study_webservice']
+        study_metadata_check_result, study_metadata_check_report, _ = check_results['study_metadata']
+        durations_report = '\n            '.join(
+            f'{name}: {check_results[name].duration:.2f}s' for name in executor.checks
+        )
 
         result_summary = {
             'browsable_files': browsable_files_result,
@@ -560,6 +579,7 @@ class EloadQC(Eload):
             'study_metadata': study_metadata_check_result,
         }
         self.eload_cfg.set(EloadQC.config_section, value=result_summary)
+        self.log_index.save()
 
         report = f"""
         QC Result Summary:
@@ -625,6 +645,9 @@ class EloadQC(Eload):
         Study metadata check:
             {study_metadata_check_report}
         ----------------------------------
+        QC check durations:
+            {durations_report}
+        ----------------------------------
         """
 
         print(report)
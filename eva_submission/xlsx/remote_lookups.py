@@ -0,0 +1,103 @@
+# Copyright 2026 EMBL - European Bioinformatics Institute
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+from concurrent.futures import ThreadPoolExecutor, wait
+
+from ebi_eva_common_pyutils.config import cfg
+from ebi_eva_common_pyutils.logger import AppLogger
+
+from eva_submission.biosample_submission.concurrent_submission import RateLimiter
+
+# NCBI E-utilities accept 3 requests per second without API key and 10 with one
+NCBI_REQUESTS_PER_SECOND = 3
+NCBI_REQUESTS_PER_SECOND_WITH_API_KEY = 10
+# An assembly lookup sends an esearch and an esummary request
+NCBI_REQUESTS_PER_LOOKUP = 2
+DEFAULT_ENA_REQUESTS_PER_SECOND = 10
+
+
+class LookupService:
+    """Number of lookups run at the same time on a remote service and the rate at which they can start."""
+
+    def __init__(self, nb_workers, requests_per_second=0):
+        self.nb_workers = nb_workers
+        self.rate_limiter = RateLimiter(requests_per_second)
+
+
+def default_lookup_services(biosamples_workers):
+    api_key = cfg.get('eutils_api_key')
+    ncbi_requests_per_second = NCBI_REQUESTS_PER_SECOND_WITH_API_KEY if api_key else NCBI_REQUESTS_PER_SECOND
+    return {
+        'ncbi': LookupService(2, ncbi_requests_per_second / NCBI_REQUESTS_PER_LOOKUP),
+        'ena': LookupService(4, DEFAULT_ENA_REQUESTS_PER_SECOND),
+        # The sample cache applies the BioSamples rate limit
+        'biosamples': LookupService(biosamples_workers)
+    }
+
+
+class RemoteLookups(AppLogger):
+    """
+    Remote lookups collected before being run so that each is only run once. The lookups of each service run
+    concurrently with the ones of the other services, each service with its own number of workers and rate limit.
+    The result of each lookup, or the exception it raised, is kept to be used by the checks.
+    """
+
+    def __init__(self, services):
+        self.services = services
+        self.pending = {}
+        self.results = {}
+        self.errors = {}
+
+    def add(self, service, key, function, *args, **kwargs):
+        """Register the lookup function(*args, **kwargs) under key unless a lookup with the same key exists."""
+        lookup_key = (service, key)
+        if lookup_key not in self.pending and lookup_key not in self.results and lookup_key not in self.errors:
+            self.pending[lookup_key] = (function, args, kwargs)
+
+    def _run_lookup(self, service, function, args, kwargs):
+        self.services[service].rate_limiter.acquire()
+        return function(*args, **kwargs)
+
+    def run(self):
+        """Run all the pending lookups and wait for them to complete."""
+        if not self.pending:
+            return
+        pending, self.pending = self.pending, {}
+        self.info(f'Run {len(pending)} remote lookups')
+        executors = dict(
+            (service, ThreadPoolExecutor(max_workers=self.services[service].nb_workers))
+            for service in set(service for service, _ in pending)
+        )
+        try:
+            futures = dict(
+                (executors[service].submit(self._run_lookup, service, function, args, kwargs), (service, key))
+                for (service, key), (function, args, kwargs) in pending.items()
+            )
+            wait(futures)
+        finally:
+            for executor in executors.values():
+                executor.shutdown()
+        for future, lookup_key in futures.items():
+            if future.exception() is None:
+                self.results[lookup_key] = future.result()
+            else:
+                self.errors[lookup_key] = future.exception()
+
+    def get(self, service, key):
+        """Result of a lookup, running the pending lookups first if needed. Raises the error raised by the lookup."""
+        lookup_key = (service, key)
+        if lookup_key in self.pending:
+            self.run()
+        if lookup_key in self.errors:
+            raise self.errors[lookup_key]
+        return self.results[lookup_key]
@@ -0,0 +1,155 @@
+# Copyright 2026 EMBL - European Bioinformatics Institute
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""
+Caches stored next to a metadata spreadsheet so that it is not parsed again with openpyxl when the same command is
+re-run. There is one file per spreadsheet and per cache, keyed by the checksum of the spreadsheet and of the
+configuration used to parse it, which is overwritten when the spreadsheet changes. The caches are stored as JSON so
+that reading them cannot run code.
+"""
+import datetime
+import glob
+import hashlib
+import json
+import os
+import shutil
+
+import eva_sub_cli
+from ebi_eva_common_pyutils.logger import logging_config as log_cfg
+
+logger = log_cfg.get_logger(__name__)
+
+# Increment when the content of the caches changes so that older entries are ignored
+CACHE_FORMAT_VERSION = 1
+CHECKSUM_BLOCK_SIZE = 16 * 1024 * 1024
+JSON_CACHE_SUFFIX = '.eva_sub_cli.json'
+PARSED_SHEETS_SUFFIX = '.parsed_sheets.json'
+# Types of the cell values that are not JSON types, encoded as {type tag: ISO format}
+_CELL_TYPES = {
+    '__datetime__': (datetime.datetime, datetime.datetime.fromisoformat),
+    '__date__': (datetime.date, datetime.date.fromisoformat),
+    '__time__': (datetime.time, datetime.time.fromisoformat),
+}
+
+
+def file_checksum(file_path):
+    sha256 = hashlib.sha256()
+    with open(file_path, 'rb') as open_file:
+        for block in iter(lambda: open_file.read(CHECKSUM_BLOCK_SIZE), b''):
+            sha256.update(block)
+    return sha256.hexdigest()
+
+
+def _replace_atomically(cache_file, write_function):
+    tmp_file = f'{cache_file}.{os.getpid()}.tmp'
+    try:
+        write_function(tmp_file)
+        os.replace(tmp_file, cache_file)
+    except (OSError, TypeError) as e:
+        logger.warning(f'Could not write the cache {cache_file}: {e}')
+        if os.path.exists(tmp_file):
+            os.remove(tmp_file)
+
+
+def spreadsheet_json_cache_key(metadata_xlsx, xls_parser):
+    """
+    Key of the eva-sub-cli JSON converted from the spreadsheet. It changes with the spreadsheet, the conversion
+    configurations (spreadsheet2json_conf*.yaml), the parser class or the version of eva-sub-cli.
+    """
+    key_hash = hashlib.sha256()
+    key_hash.update(f'{CACHE_FORMAT_VERSION}\n{eva_sub_cli.__version__}\n'
+                    f'{xls_parser.__module__}.{xls_parser.__qualname__}\n{file_checksum(metadata_xlsx)}\n'.encode())
+    for conf_file in sorted(glob.glob(os.path.join(eva_sub_cli.ETC_DIR, 'spreadsheet2json_conf*.yaml'))):
+        key_hash.update(f'{os.path.basename(conf_file)}\t{file_checksum(conf_file)}\n'.encode())
+    return key_hash.hexdigest()
+
+
+def spreadsheet_json_cache_path(metadata_xlsx):
+    return os.path.realpath(metadata_xlsx) + JSON_CACHE_SUFFIX
+
+
+def copy_cached_spreadsheet_json(metadata_xlsx, cache_key, metadata_json_file_path):
+    """
+    Copies the cached JSON to metadata_json_file_path and returns True if it exists for this cache key, returns False
+    otherwise. The first line of the cache file is the cache key, followed by the JSON.
+    """
+    cache_file = spreadsheet_json_cache_path(metadata_xlsx)
+    if not os.path.isfile(cache_file):
+        return False
+    with open(cache_file) as open_cache:
+        if open_cache.readline().rstrip('\n') != cache_key:
+            return False
+        with open(metadata_json_file_path, 'w') as open_output:
+            shutil.copyfileobj(open_cache, open_output)
+    return True
+
+
+def cache_spreadsheet_json(metadata_xlsx, cache_key, metadata_json_file_path):
+    def write_cache(tmp_file):
+        with open(metadata_json_file_path) as open_json, open(tmp_file, 'w') as open_cache:
+            open_cache.write(cache_key + '\n')
+            shutil.copyfileobj(open_json, open_cache)
+    _replace_atomically(spreadsheet_json_cache_path(metadata_xlsx), write_cache)
+
+
+def _encode_cell(value):
+    for type_tag, (cell_type, _) in _CELL_TYPES.items():
+        # datetime is checked before date which it extends
+        if isinstance(value, cell_type):
+            return {type_tag: value.isoformat()}
+    if isinstance(value, datetime.timedelta):
+        return {'__timedelta__': value.total_seconds()}
+    raise TypeError(f'Cannot store a cell value of type {type(value).__name__}')
+
+
+def _decode_cell(json_object):
+    if len(json_object) == 1:
+        type_tag, value = next(iter(json_object.items()))
+        if type_tag in _CELL_TYPES:
+            return _CELL_TYPES[type_tag][1](value)
+        if type_tag == '__timedelta__':
+            return datetime.timedelta(seconds=value)
+    return json_object
+
+
+def parsed_sheets_signature(metadata_file, conf_file):
+    return {'version': CACHE_FORMAT_VERSION, 'checksum': file_checksum(metadata_file),
+            'conf_checksum': file_checksum(conf_file)}
+
+
+def parsed_sheets_cache_path(metadata_file):
+    return os.path.realpath(metadata_file) + PARSED_SHEETS_SUFFIX
+
+
+def load_parsed_sheets(metadata_file, signature):
+    """Returns the rows of each worksheet already parsed or None if the cache does not exist or is out of date."""
+    cache_file = parsed_sheets_cache_path(metadata_file)
+    if not os.path.isfile(cache_file):
+        return None
+    try:
+        with open(cache_file) as open_file:
+            # The signature is on the first line so that the rows of another version are not decoded
+            if json.loads(open_file.readline()) != signature:
+                return None
+            return json.load(open_file, object_hook=_decode_cell)
+    except ValueError as e:
+        logger.warning(f'Could not load the parsed sheets from {cache_file}: {e}')
+        return None
+
+
+def save_parsed_sheets(metadata_file, signature, sheets):
+    def write_json(tmp_file):
+        with open(tmp_file, 'w') as open_file:
+            open_file.write(json.dumps(signature) + '\n')
+            json.dump(sheets, open_file, default=_encode_cell)
+    _replace_atomically(parsed_sheets_cache_path(metadata_file), write_json)
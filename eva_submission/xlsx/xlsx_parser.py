@@ -32,6 +32,8 @@ REQUIRED_HEADERS_KEY_NAME = 'required'
 OPTIONAL_HEADERS_KEY_NAME = 'optional'
 HEADERS_KEY_ROW = 'header_row'
 CAST_KEY_NAME = 'cast'
+# Functions applied to the non-empty values of the headers listed in the cast section
+CAST_FUNCTIONS = {'string': str}
 
 
 class XlsxBaseParser(AppLogger):
@@ -91,10 +93,10 @@ class XlsxBaseParser(AppLogger):
             if title not in sheet_titles:
                 continue
 
-            # Check number of rows
+            # Check number of rows, unknown when the file was streamed without its dimension
             worksheet = self.workbook[title]
             header_row = self.xls_conf[title].get(HEADERS_KEY_ROW, 1)
-            if worksheet.max_row < header_row + 1:
+            if worksheet.max_row is not None and worksheet.max_row < header_row + 1:
                 continue
             # Check required headers are present
             self.headers[title] = [cell.value if cell.value is None else cell.value.strip()
@@ -157,62 +159,92 @@ class XlsxReader(XlsxBaseParser):
         :type conf_filename: basestring
         """
         super().__init__(xls_filename, conf_filename, read_only=True)
+        self.compiled_columns = {}
+        self.row_iterators = {}
 
     def __iter__(self):
         return self
 
+    def __next__(self):
+        return self.next()
+
     def base_row_offset(self, worksheet):
         return self.xls_conf[worksheet].get(HEADERS_KEY_ROW, 1)
 
-    def next(self):
+    def _compile_columns(self, worksheet):
         """
-        Retrieve next data row
-        :return: A hash containing all the REQUIRED and OPTIONAL fields as keys
-                and the corresponding data as values
-        :rtype: dict
+        Resolve once per worksheet the column index and the cast function of each configured header
+        :return: list of (header, column index or None when the header is absent, cast function or None)
+        :rtype: list
         """
-        worksheet = self.active_worksheet
-        if worksheet is None:
-            self.warning('No worksheet is specified!')
-            raise StopIteration
-
+        if worksheet not in self.compiled_columns:
+            required_headers = self.xls_conf[worksheet].get(REQUIRED_HEADERS_KEY_NAME, [])
+            optional_headers = self.xls_conf[worksheet].get(OPTIONAL_HEADERS_KEY_NAME, [])
+            casts = self.xls_conf[worksheet].get(CAST_KEY_NAME, {})
+            headers = self.headers[worksheet]
+            self.compiled_columns[worksheet] = [
+                (header, headers.index(header) if header in headers else None, CAST_FUNCTIONS.get(casts.get(header)))
+                for header in required_headers + optional_headers
+            ]
+        return self.compiled_columns[worksheet]
+
+    def _read_rows(self, worksheet):
+        """
+        Generator converting the data rows of the worksheet that contain at least one value, starting after the last
+        row already returned.
+        """
+        columns = self._compile_columns(worksheet)
         if worksheet not in self.row_offset:
             self.row_offset[worksheet] = self.base_row_offset(worksheet)
-        self.row_offset[worksheet] += 1
-
-        required_headers = self.xls_conf[worksheet].get(REQUIRED_HEADERS_KEY_NAME, [])
-        optional_headers = self.xls_conf[worksheet].get(OPTIONAL_HEADERS_KEY_NAME, [])
-
-        for row in self.workbook[worksheet].iter_rows(min_row=self.row_offset[worksheet]):
-            num_cells = 0
-            for cell in row:
-                num_cells += 1
+        first_row = self.row_offset[worksheet] + 1
 
+        for row_num, row in enumerate(self.workbook[worksheet].iter_rows(min_row=first_row, values_only=True),
+                                      start=first_row):
+            self.row_offset[worksheet] = row_num
+            # Rows can be shorter than the header when their last cells are empty
+            num_cells = len(row)
             data = {}
             has_notnull = False
-            for header in required_headers+optional_headers:
-                header_index = num_cells
-                if header in self.headers[worksheet]:
-                    header_index = self.headers[worksheet].index(header)
-                if header_index >= num_cells:
+            for header, header_index, cast in columns:
+                if header_index is None or header_index >= num_cells:
                     data[header] = None
                     continue
-
-                cell = row[header_index]
-                if cell.value is not None:
+                value = row[header_index]
+                if value is not None:
                     has_notnull = True
-                data[header] = self.trim_value(self.cast_value(
-                    cell.value, self.xls_conf[worksheet].get(CAST_KEY_NAME, {}).get(header)
-                ))
+                    if cast:
+                        value = cast(value)
+                    if isinstance(value, str):
+                        value = value.strip()
+                data[header] = value
 
             if has_notnull:
-                data['row_num'] = self.row_offset[worksheet]
-                return data
+                data['row_num'] = row_num
+                yield data
 
-            # no data on this row, continue to next
-            self.row_offset[worksheet] += 1
+    def iter_rows(self):
+        """
+        Lazily iterate over the data rows of the active worksheet that have not been returned yet.
+        :return: iterator of hash containing all the REQUIRED and OPTIONAL fields as keys
+                and the corresponding data as values
+        :rtype: iterator
+        """
+        worksheet = self.active_worksheet
+        if worksheet is None:
+            self.warning('No worksheet is specified!')
+            return iter(())
+        if worksheet not in self.row_iterators:
+            self.row_iterators[worksheet] = self._read_rows(worksheet)
+        return self.row_iterators[worksheet]
 
-        raise StopIteration
+    def next(self):
+        """
+        Retrieve next data row
+        :return: A hash containing all the REQUIRED and OPTIONAL fields as keys
+                and the corresponding data as values
+        :rtype: dict
+        """
+        return next(self.iter_rows())
 
     def get_rows(self):
         """
@@ -221,50 +253,10 @@ class XlsxReader(XlsxBaseParser):
                 and the corresponding data as values
         :rtype: list
         """
-        worksheet = self.active_worksheet
-        if worksheet is None:
+        if self.active_worksheet is None:
             self.warning('No worksheet is specified!')
             return None
-
-        if worksheet not in self.row_offset:
-            self.row_offset[worksheet] = self.base_row_offset(worksheet)
-        self.row_offset[worksheet] += 1
-
-        required_headers = self.xls_conf[worksheet].get(REQUIRED_HEADERS_KEY_NAME, [])
-        optional_headers = self.xls_conf[worksheet].get(OPTIONAL_HEADERS_KEY_NAME, [])
-
-        rows = []
-
-        for row in self.workbook[worksheet].iter_rows(min_row=self.row_offset[worksheet]):
-            num_cells = 0
-            for cell in row:
-                num_cells += 1
-
-            data = {}
-            has_notnull = False
-            for header in required_headers+optional_headers:
-                header_index = num_cells
-                if header in self.headers[worksheet]:
-                    header_index = self.headers[worksheet].index(header)
-                if header_index >= num_cells:
-                    data[header] = None
-                    continue
-
-                cell = row[header_index]
-                if cell.value is not None:
-                    has_notnull = True
-                data[header] = self.trim_value(self.cast_value(
-                    cell.value, self.xls_conf[worksheet].get(CAST_KEY_NAME, {}).get(header)
-                ))
-
-            if has_notnull:
-                data['row_num'] = self.row_offset[worksheet]
-                rows.append(data)
-
-            # no data on this row, continue to next
-            self.row_offset[worksheet] += 1
-
-        return rows
+        return list(self.iter_rows())
 
 
 class XlsxWriter(XlsxBaseParser):
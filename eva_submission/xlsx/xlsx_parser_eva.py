@@ -14,32 +14,54 @@
 
 import os
 from collections import defaultdict
+from copy import deepcopy
 
 from cached_property import cached_property
 from ebi_eva_common_pyutils.logger import AppLogger
 
 from eva_submission import ETC_DIR
+from eva_submission.xlsx.xlsx_cache import parsed_sheets_signature, load_parsed_sheets, save_parsed_sheets
 from eva_submission.xlsx.xlsx_parser import XlsxReader, XlsxWriter
 
 
 class EvaXlsxReader(AppLogger):
 
-    def __init__(self, metadata_file):
-        conf = os.path.join(ETC_DIR, 'eva_project_conf.yaml')
-        self.reader = XlsxReader(metadata_file, conf)
-        self.metadata_file=metadata_file
+    def __init__(self, metadata_file, cache_parsed_sheets=False):
+        """
+        :param metadata_file: EVA metadata spreadsheet
+        :param cache_parsed_sheets: store the parsed worksheets next to the spreadsheet and load them from there when
+                                    the spreadsheet has not changed instead of opening the workbook.
+        """
+        self.conf = os.path.join(ETC_DIR, 'eva_project_conf.yaml')
+        self.metadata_file = metadata_file
+        self.cache_parsed_sheets = cache_parsed_sheets
+        self.parsed_sheets = {}
+        if cache_parsed_sheets:
+            self.signature = parsed_sheets_signature(metadata_file, self.conf)
+            self.parsed_sheets = load_parsed_sheets(metadata_file, self.signature) or {}
+        if not self.parsed_sheets:
+            # Open the workbook straight away to report invalid spreadsheets
+            self.reader
+
+    @cached_property
+    def reader(self):
+        return XlsxReader(self.metadata_file, self.conf)
 
     def _get_all_rows(self, active_sheet):
-        self.reader.active_worksheet = active_sheet
-        return self.reader.get_rows()
+        if active_sheet not in self.parsed_sheets:
+            self.reader.active_worksheet = active_sheet
+            self.parsed_sheets[active_sheet] = self.reader.get_rows()
+            if self.cache_parsed_sheets:
+                save_parsed_sheets(self.metadata_file, self.signature, self.parsed_sheets)
+        # Callers can modify the rows without changing the parsed sheets
+        return deepcopy(self.parsed_sheets[active_sheet])
 
     @cached_property
     def project(self):
-        self.reader.active_worksheet = 'Project'
-        try:
-            return self.reader.next()
-        except StopIteration:
-            self.error('No project was found in the spreadsheet %s', self.metadata_file)
+        projects = self._get_all_rows('Project')
+        if projects:
+            return projects[0]
+        self.error('No project was found in the spreadsheet %s', self.metadata_file)
 
     @cached_property
     def submitters(self):
@@ -5,7 +5,6 @@ from collections import Counter
 import yaml
 from cerberus import Validator
 from ebi_eva_common_pyutils.assembly_utils import retrieve_genbank_assembly_accessions_from_ncbi
-from ebi_eva_common_pyutils.biosamples_communicators import WebinHALCommunicator
 from ebi_eva_common_pyutils.config import cfg
 from ebi_eva_common_pyutils.logger import AppLogger
 from ebi_eva_common_pyutils.reference import NCBIAssembly
@@ -13,7 +12,9 @@ from ebi_eva_common_pyutils.taxonomy.taxonomy import get_scientific_name_from_ta
 from requests import HTTPError
 
 from eva_submission import ETC_DIR
+from eva_submission.biosample_submission.sample_cache import get_sample_cache
 from eva_submission.eload_utils import cast_list, check_existing_project_in_ena, check_project_format
+from eva_submission.xlsx.remote_lookups import RemoteLookups, default_lookup_services
 from eva_submission.xlsx.xlsx_parser_eva import EvaXlsxReader, EvaXlsxWriter
 
 # Values coming from https://www.ebi.ac.uk/ena/browser/view/ERC000011
@@ -24,7 +25,7 @@ not_provided_check_list = ['not provided', 'not collected', 'restricted access',
 
 class EvaXlsxValidator(AppLogger):
 
-    def __init__(self, metadata_file):
+    def __init__(self, metadata_file, sample_cache=None):
         self.metadata_file = metadata_file
         self.reader = EvaXlsxReader(metadata_file)
         self.metadata = {}
@@ -32,10 +33,8 @@ class EvaXlsxValidator(AppLogger):
             self.metadata[worksheet] = self.reader._get_all_rows(worksheet)
 
         self.error_list = []
-        self.communicator = WebinHALCommunicator(
-            cfg.query('biosamples', 'webin_url'), cfg.query('biosamples', 'bsd_url'),
-            cfg.query('biosamples', 'webin_username'), cfg.query('biosamples', 'webin_password')
-        )
+        self.sample_cache = sample_cache or get_sample_cache()
+        self.remote_lookups = RemoteLookups(default_lookup_services(self.sample_cache.nb_workers))
 
 
     def validate(self):
@@ -105,16 +104,57 @@ class EvaXlsxValidator(AppLogger):
         Validation of the data that involve checking its meaning
         This function adds error statements to the errors attribute
         """
+        # Collect all the remote lookups first so that they run concurrently
+        self._add_reference_lookups()
+        self._add_taxonomy_lookups()
+        self._add_biosamples_lookups()
+        self._add_project_lookups()
+        self.remote_lookups.run()
+
         self.check_reference_genome()
         self.check_taxonomy_scientific_name()
         self.check_biosamples_accessions()
         self.check_project_accessions()
 
-    def check_reference_genome(self):
-        """Check if the references can be retrieved"""
+    def _add_reference_lookups(self):
         references = set([row['Reference'] for row in self.metadata['Analysis'] if row['Reference']])
         for reference in references:
-            accessions = retrieve_genbank_assembly_accessions_from_ncbi(reference, api_key=cfg.get('eutils_api_key'))
+            self.remote_lookups.add('ncbi', ('assembly', reference), retrieve_genbank_assembly_accessions_from_ncbi,
+                                    reference, api_key=cfg.get('eutils_api_key'))
+        return references
+
+    def _add_taxonomy_lookups(self):
+        taxid_and_species_list = set([(row['Tax Id'], row['Scientific Name']) for row in self.metadata['Sample'] if row['Tax Id']])
+        for taxid, _ in taxid_and_species_list:
+            self.remote_lookups.add('ncbi', ('taxonomy', taxid), self._get_scientific_name, taxid)
+        return taxid_and_species_list
+
+    @staticmethod
+    def _get_scientific_name(taxid):
+        return get_scientific_name_from_taxonomy(int(taxid), api_key=cfg.get('eutils_api_key'))
+
+    def _add_biosamples_lookups(self):
+        for row in self.metadata['Sample']:
+            if row.get('Sample Accession'):
+                sample_accession = row.get('Sample Accession').strip()
+                self.remote_lookups.add('biosamples', sample_accession, self.sample_cache.get_sample, sample_accession)
+
+    def _add_project_lookups(self):
+        for project_row in self.metadata['Project']:
+            project_accessions = []
+            for column_name in ['Parent Project(s)', 'Child Project(s)', 'Peer Project(s)']:
+                if project_row.get(column_name):
+                    project_accessions.extend(project_row[column_name].split(','))
+            if project_row.get('Project Alias'):
+                project_accessions.append(project_row.get('Project Alias'))
+            for project_acc in project_accessions:
+                if check_project_format(project_acc):
+                    self.remote_lookups.add('ena', str(project_acc), check_existing_project_in_ena, str(project_acc))
+
+    def check_reference_genome(self):
+        """Check if the references can be retrieved"""
+        for reference in self._add_reference_lookups():
+            accessions = self.remote_lookups.get('ncbi', ('assembly', reference))
             # if the searched term is an actual genome GCA accession:
             if NCBIAssembly.is_assembly_accession_format(reference) and reference in accessions:
                 accessions = {reference}
@@ -126,10 +166,9 @@ class EvaXlsxValidator(AppLogger):
     def check_taxonomy_scientific_name(self):
         """Check taxonomy scientific name pair"""
         correct_taxid_sc_name = {}
-        taxid_and_species_list = set([(row['Tax Id'], row['Scientific Name']) for row in self.metadata['Sample'] if row['Tax Id']])
-        for taxid, species in taxid_and_species_list:
+        for taxid, species in self._add_taxonomy_lookups():
             try:
-                scientific_name = get_scientific_name_from_taxonomy(int(taxid))
+                scientific_name = self.remote_lookups.get('ncbi', ('taxonomy', taxid))
                 if species != scientific_name:
                     if species.lower() == scientific_name.lower():
                         correct_taxid_sc_name[taxid] = scientific_name
@@ -148,19 +187,22 @@ class EvaXlsxValidator(AppLogger):
 
     def check_biosamples_accessions(self):
         """Check that BioSample accessions exist and are public"""
+        self._add_biosamples_lookups()
         for row in self.metadata['Sample']:
             if row.get('Sample Accession'):
                 sample_accession = row.get('Sample Accession').strip()
                 try:
-                    sample_data = self.communicator.follows_link('samples', join_url=sample_accession)
+                    sample_data = self.remote_lookups.get('biosamples', sample_accession)
                     self._validate_existing_biosample(sample_data, row.get('row_num'), sample_accession)
                 except ValueError:
                     self.error_list.append(
                         f'In Sample, row {row.get("row_num")} BioSamples accession {sample_accession} '
                         f'does not exist or is private')
+        self.sample_cache.save()
 
     def check_project_accessions(self):
         """Check that ENA project accessions exists and are public"""
+        self._add_project_lookups()
         for project_row in self.metadata['Project']:
             for column_name in ['Parent Project(s)', 'Child Project(s)', 'Peer Project(s)']:
                 if project_row.get(column_name):
@@ -169,14 +211,14 @@ class EvaXlsxValidator(AppLogger):
                             self.error_list.append(
                                 f'In Project, row {project_row.get("row_num")}, {column_name}: {project_acc} is not a valid project accession')
                             continue
-                        if not check_existing_project_in_ena(str(project_acc)):
+                        if not self.remote_lookups.get('ena', str(project_acc)):
                             self.error_list.append(
                                 f'In Project, row {project_row.get("row_num")}, {column_name}: {project_acc} does not exist or is private')
 
             column_name = 'Project Alias'
             if project_row.get(column_name):
                 project_acc = project_row.get(column_name)
-                if check_project_format(project_acc) and not check_existing_project_in_ena(str(project_acc)):
+                if check_project_format(project_acc) and not self.remote_lookups.get('ena', str(project_acc)):
                     self.error_list.append(
                         f'In Project, row {project_row.get("row_num")}, {column_name}: {project_acc} does not exist or is private')
 
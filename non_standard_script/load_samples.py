@@ -24,15 +24,13 @@ from copy import copy
 from functools import cached_property, lru_cache
 from itertools import zip_longest
 
-from ebi_eva_common_pyutils.biosamples_communicators import WebinHALCommunicator
 from ebi_eva_common_pyutils.common_utils import pretty_print
-from ebi_eva_common_pyutils.config import cfg
 from ebi_eva_common_pyutils.logger import logging_config as log_cfg
 from ebi_eva_internal_pyutils.pg_utils import get_all_results_for_query
 
 from eva_submission.eload_backlog import EloadBacklog, list_to_sql_in_list
 from eva_submission.eload_utils import detect_vcf_aggregation, download_file
-from eva_submission.evapro.find_from_ena import OracleEnaProjectFinder, ApiEnaProjectFinder
+from eva_submission.evapro.find_from_ena import ApiEnaProjectFinder
 from eva_submission.evapro.populate_evapro import EvaProjectLoader
 from eva_submission.sample_utils import get_samples_from_vcf
 from eva_submission.submission_config import load_config
@@ -81,9 +79,10 @@ class HistoricalProjectSampleLoader(EloadBacklog):
         super().__init__(eload_number=eload, project_accession=project_accession)
         self.mapping_file = mapping_file
         self.possible_mapping_file = possible_mapping_file
-        self.ena_project_finder = OracleEnaProjectFinder()
-        self.api_ena_finder = ApiEnaProjectFinder()
-        self.eva_project_loader = EvaProjectLoader()
+        self.api_ena_finder = ApiEnaProjectFinder(snapshot_store=self.ena_snapshot_store)
+        self.eva_project_loader = EvaProjectLoader(snapshot_store=self.ena_snapshot_store)
+        # Shared with the project loader so that both use the samples prefetched from ENA
+        self.ena_project_finder = self.eva_project_loader.ena_project_finder
         self.downloaded_files_path = os.path.join(self.eload_dir, '.load_samples_downloaded_files')
 
     @cached_property
@@ -112,6 +111,8 @@ class HistoricalProjectSampleLoader(EloadBacklog):
         if self.possible_mapping_file:
             output_mapping = open(self.possible_mapping_file, 'w')
 
+        self.ena_project_finder.prefetch_analyses_data(project_accession=self.project_accession,
+                                                       analysis_accessions=self.analysis_accessions)
         sample_from_ena_per_analysis = {
             analysis_accession: {
                 biosample: ena_sample
@@ -214,6 +215,8 @@ class HistoricalProjectSampleLoader(EloadBacklog):
 
     def load_samples(self):
         result = True
+        self.ena_project_finder.prefetch_analyses_data(project_accession=self.project_accession,
+                                                       analysis_accessions=self.analysis_accessions)
         for analysis_accession in self.analysis_accessions:
             # Add the sample that exists for this analysis
             self.eva_project_loader.begin_or_continue_transaction()
@@ -261,13 +264,15 @@ class HistoricalProjectSampleLoader(EloadBacklog):
         # Check the XML first
         if self.analysis_accessions:
             for analysis_accession in self.analysis_accessions:
-                tmp = self.api_ena_finder.find_samples_from_analysis_xml(analysis_accession)
+                tmp = self.api_ena_finder.find_samples_from_analysis_xml(analysis_accession,
+                                                                         project_accession=self.project_accession)
                 if tmp.get(analysis_accession):
                     sample_accessions_per_analysis.update(tmp)
         # If it does not yield anything then check the filereport
         if not sample_accessions_per_analysis:
             if self.project_accession:
-                sample_accessions_per_analysis = self.api_ena_finder.find_samples_from_analysis(self.project_accession)
+                sample_accessions_per_analysis = self.api_ena_finder.find_samples_from_analysis(
+                    self.project_accession, project_accession=self.project_accession)
         # reverse the dictionary where sample name become the key and sample accession the value
         for analysis_accession in sample_accessions_per_analysis:
             sample_name_2_accessions_per_analysis[analysis_accession] = {
@@ -389,16 +394,10 @@ class HistoricalProjectSampleLoader(EloadBacklog):
                         os.remove(f)
             os.remove(self.downloaded_files_path)
 
-    @lru_cache(maxsize=2000)
     def get_existing_biosamples(self, biosample_accession):
 
         try:
-            communicator = WebinHALCommunicator(
-                cfg.query('biosamples', 'webin_url'), cfg.query('biosamples', 'bsd_url'),
-                cfg.query('biosamples', 'webin_username'), cfg.query('biosamples', 'webin_password')
-            )
-            sample_json = communicator.follows_link('samples', join_url=biosample_accession)
-            return sample_json
+            return self._get_sample_cache().get_sample(biosample_accession)
         except Exception as e:
             self.error(f'Error retrieving Biosample {biosample_accession}')
             self._logger.exception(e)
@@ -408,6 +407,10 @@ class HistoricalProjectSampleLoader(EloadBacklog):
         mapping = []
         remaining_name_in_VCF = []
         remaining_name_in_sample_accessions = []
+        self._get_sample_cache().prefetch([
+            self.sample_name_2_accession.get(name_in_ENA) for name_in_ENA in unmatched_names_in_ENA
+            if self.sample_name_2_accession.get(name_in_ENA)
+        ])
         for name_in_vcf in unmatched_names_in_VCF:
             found = False
             potential_matches_for_name = []
@@ -19,7 +19,8 @@ from argparse import ArgumentParser
 
 from ebi_eva_common_pyutils.logger import logging_config as log_cfg
 
-from eva_submission.eload_status import EloadStatus
+from eva_submission.eload_status import EloadStatus, EloadStatusBatch, DEFAULT_NB_THREADS
+from eva_submission.metadata_connection import checkout_statistics
 from eva_submission.submission_config import load_config
 
 logger = log_cfg.get_logger(__name__)
@@ -27,7 +28,13 @@ logger = log_cfg.get_logger(__name__)
 
 def main():
     argparse = ArgumentParser(description='Provide a submission status for any ELOAD based on what has been accessioned and loaded.')
-    argparse.add_argument('--eload', required=True, type=int, help='The ELOAD number for this submission')
+    eload_group = argparse.add_mutually_exclusive_group(required=True)
+    eload_group.add_argument('--eload', type=int, help='The ELOAD number for this submission')
+    eload_group.add_argument('--eloads', type=int, nargs='+', help='The ELOAD numbers of the submissions')
+    eload_group.add_argument('--eload_range', type=int, nargs=2, metavar=('FIRST', 'LAST'),
+                             help='The first and last ELOAD numbers of a range of submissions')
+    argparse.add_argument('--threads', type=int, default=DEFAULT_NB_THREADS,
+                          help='Number of ELOADs checked concurrently when reporting on several ELOADs')
     argparse.add_argument('--debug', action='store_true', default=False,
                           help='Set the script to output logging information at debug level')
 
@@ -40,8 +47,13 @@ def main():
     # Load the config_file from default location
     load_config()
 
-    eload = EloadStatus(args.eload)
-    eload.status()
+    if args.eload:
+        eload = EloadStatus(args.eload)
+        eload.status()
+    else:
+        eload_numbers = args.eloads or range(args.eload_range[0], args.eload_range[1] + 1)
+        EloadStatusBatch(eload_numbers, nb_threads=args.threads).status()
+    logger.debug(checkout_statistics.summary())
 
 
 if __name__ == "__main__":
@@ -5,6 +5,7 @@ from argparse import ArgumentParser
 from ebi_eva_common_pyutils.logger import logging_config as log_cfg
 from sqlalchemy import select
 
+from eva_submission.eload_submission import Eload
 from eva_submission.submission_config import load_config
 from eva_submission.evapro.populate_evapro import EvaProjectLoader
 from eva_submission.evapro.table import Project
@@ -37,6 +38,11 @@ def update_file_sizes_and_add_missing_submissions_for_project(loader, project_ac
     project = project_result.Project
 
     loader.begin_or_continue_transaction()
+    # Fetch the files and submissions of all the analyses in a few queries instead of two per analysis
+    finder.prefetch_analyses_data(
+        project_accession=project_accession,
+        analysis_accessions=[analysis_obj.analysis_accession for analysis_obj in project.analyses]
+    )
     for analysis_obj in project.analyses:
         for analysis_acc, submission_file_id, filename, file_md5, file_type, file_size, status_id \
                 in finder.find_files_in_ena(analysis_obj.analysis_accession):
@@ -86,6 +92,10 @@ def main():
     )
     argparse.add_argument('--project_accession', required=True, type=str,
                           help='Project accession (e.g. PRJEB12345)')
+    argparse.add_argument('--eload', type=int, required=False,
+                          help='ELOAD number whose snapshots of the ENA metadata are used and updated')
+    argparse.add_argument('--snapshot_max_age', type=int, required=False,
+                          help='Query ENA again for metadata in the snapshots older than this number of seconds')
     argparse.add_argument('--debug', action='store_true', default=False,
                           help='Set logging to debug level')
     args = argparse.parse_args()
@@ -96,7 +106,12 @@ def main():
 
     load_config()
 
-    loader = EvaProjectLoader()
+    snapshot_store = None
+    if args.eload:
+        snapshot_store = Eload(args.eload).ena_snapshot_store
+        if args.snapshot_max_age is not None:
+            snapshot_store.max_age = args.snapshot_max_age
+    loader = EvaProjectLoader(snapshot_store=snapshot_store)
     file_updated, file_skipped, file_not_found, file_mismatch, submission_linked, submission_skipped = update_file_sizes_and_add_missing_submissions_for_project(loader, args.project_accession)
     logger.info(f'Done. File Updated: {file_updated}, File Skipped (already correct): {file_skipped}, '
                 f'File Not found in EVAPRO: {file_not_found}, File Mismatching MD5 in EVAPRO: {file_mismatch}, '
@@ -0,0 +1,126 @@
+# Copyright 2026 EMBL - European Bioinformatics Institute
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""
+Compares the time and peak memory of writing the ENA submission documents from a synthetic EVA JSON, one element at a
+time or by building the whole document in memory first.
+Run from the root of the repository with:
+    PYTHONPATH=. python tests/benchmarks/benchmark_ena_converters.py --nb_analyses 200 --nb_samples 1000
+"""
+import filecmp
+import json
+import os
+import tempfile
+import time
+import tracemalloc
+from argparse import ArgumentParser
+from unittest.mock import patch
+from xml.etree.ElementTree import Element
+
+from eva_submission.ENA_submission.json_to_ENA_json import EnaJsonConverter
+from eva_submission.ENA_submission.json_to_ENA_xml import EnaJson2XmlConverter
+
+
+def create_eva_json(json_file, nb_analyses, nb_samples, nb_files):
+    """Writes an EVA JSON where each analysis has nb_files files and all the analyses share nb_samples samples."""
+    analysis_aliases = [f'VD{i}' for i in range(nb_analyses)]
+    eva_json = {
+        'submitterDetails': [{'firstName': 'John', 'lastName': 'Doe', 'email': 'john@example.com'}],
+        'project': {
+            'title': 'Synthetic project', 'description': 'Synthetic project & <description>', 'centre': 'EBI',
+            'taxId': 9606, 'links': ['PUBMED:123456', 'https://www.ebi.ac.uk|EBI']
+        },
+        'analysis': [
+            {'analysisTitle': f'Analysis {alias}', 'analysisAlias': alias,
+             'description': f'Analysis {alias} of "samples"',
+             'experimentType': 'Whole genome sequencing', 'referenceGenome': 'GCA_000001405.27',
+             'referenceFasta': 'GCA_000001405.27_fasta.fa', 'platform': 'BGISEQ-500', 'software': ['bcftools']}
+            for alias in analysis_aliases
+        ],
+        'sample': [
+            {'analysisAlias': analysis_aliases, 'sampleInVCF': f'sample{i}', 'bioSampleAccession': f'SAMEA{i:08}'}
+            for i in range(nb_samples)
+        ],
+        'files': [
+            {'analysisAlias': alias, 'fileName': f'{alias}_chr{i}.vcf.gz', 'md5': f'{i:032}'}
+            for alias in analysis_aliases for i in range(nb_files)
+        ]
+    }
+    with open(json_file, 'w') as open_file:
+        json.dump(eva_json, open_file)
+
+
+def write_xml_in_memory(converter):
+    root = Element('WEBIN')
+    root.append(converter._create_submission_single_xml('ADD', converter.eva_json_data.get('project', {})))
+    root.append(converter._create_project_xml())
+    root.append(converter._create_analysis_xml())
+    converter.write_xml_to_file(root, converter.single_submission_file)
+    return converter.single_submission_file
+
+
+def write_json_in_memory(converter):
+    ena_json_data = {
+        'submission': converter._create_ena_submission_json_obj(converter.eva_json_data['project'],
+                                                                converter.submission_id),
+        'analyses': converter._create_ena_analysis_json_obj(),
+        'projects': [converter._create_ena_project_json_obj(converter.eva_json_data['project'])]
+    }
+    converter.write_to_json(ena_json_data, converter.output_ena_json_file)
+    return converter.output_ena_json_file
+
+
+def measure(converter_class, json_file, output_dir, name, write_function):
+    """Time of a first run and peak memory of a second one, traced with tracemalloc which slows allocations down."""
+    # The input JSON is loaded before the measures in both cases
+    converter = converter_class('Submission-12345', json_file, output_dir, name)
+    start = time.perf_counter()
+    write_function(converter)
+    elapsed = time.perf_counter() - start
+
+    converter = converter_class('Submission-12345', json_file, output_dir, name)
+    tracemalloc.start()
+    output_file = write_function(converter)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return output_file, elapsed, peak
+
+
+def main():
+    argparse = ArgumentParser(description='Benchmark the creation of the ENA submission documents')
+    argparse.add_argument('--nb_analyses', type=int, default=200, help='Number of analyses in the EVA JSON')
+    argparse.add_argument('--nb_samples', type=int, default=1000, help='Number of samples in each analysis')
+    argparse.add_argument('--nb_files', type=int, default=25, help='Number of files in each analysis')
+    args = argparse.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir, \
+            patch('eva_submission.ENA_submission.json_to_ENA_json.get_scientific_name_from_ensembl',
+                  return_value='Homo sapiens'), \
+            patch('eva_submission.ENA_submission.json_to_ENA_xml.get_scientific_name_from_ensembl',
+                  return_value='Homo sapiens'):
+        json_file = os.path.join(tmp_dir, 'eva_metadata.json')
+        create_eva_json(json_file, args.nb_analyses, args.nb_samples, args.nb_files)
+        for converter_class, in_memory_function in ((EnaJson2XmlConverter, write_xml_in_memory),
+                                                    (EnaJsonConverter, write_json_in_memory)):
+            in_memory_file, in_memory_time, in_memory_peak = measure(
+                converter_class, json_file, tmp_dir, 'in_memory', in_memory_function)
+            streamed_file, streamed_time, streamed_peak = measure(
+                converter_class, json_file, tmp_dir, 'streamed', lambda c: c.create_single_submission_file())
+            assert filecmp.cmp(in_memory_file, streamed_file, shallow=False), f'{streamed_file} differs'
+            print(f'{converter_class.__name__} ({os.path.getsize(streamed_file) / 2 ** 20:.0f} MiB): '
+                  f'in memory {in_memory_time:.1f}s {in_memory_peak / 2 ** 20:.0f} MiB peak, '
+                  f'streamed {streamed_time:.1f}s {streamed_peak / 2 ** 20:.0f} MiB peak')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,71 @@
+# Copyright 2026 EMBL - European Bioinformatics Institute
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""
+Measures the time taken to parse the Sample worksheet of a synthetic metadata spreadsheet.
+Run from the root of the repository with:
+    PYTHONPATH=. python tests/benchmarks/benchmark_xlsx_reader.py --nb_rows 100000
+"""
+import os
+import tempfile
+import time
+from argparse import ArgumentParser
+
+import yaml
+from openpyxl import Workbook
+
+from eva_submission import ETC_DIR
+from eva_submission.xlsx.xlsx_parser_eva import EvaXlsxReader
+
+
+def create_sample_sheet(xlsx_file, nb_rows, nb_extra_columns):
+    """Writes a metadata spreadsheet with a Sample worksheet containing all the configured headers."""
+    with open(os.path.join(ETC_DIR, 'eva_project_conf.yaml')) as open_file:
+        sample_conf = yaml.safe_load(open_file)['Sample']
+    headers = sample_conf.get('optional', []) + [f'Extra column {i}' for i in range(nb_extra_columns)]
+    # Not in write only mode which stores the strings in the cells instead of the shared strings like Excel does
+    workbook = Workbook()
+    worksheet = workbook.active
+    worksheet.title = 'Sample'
+    worksheet.append(['Sample sheet'])
+    worksheet.append([])
+    worksheet.append(headers)
+    for row_num in range(nb_rows):
+        worksheet.append([f' {header} {row_num} ' if i % 3 else row_num for i, header in enumerate(headers)])
+    workbook.save(xlsx_file)
+    return len(headers)
+
+
+def main():
+    argparse = ArgumentParser(description='Benchmark the parsing of the samples from a synthetic spreadsheet')
+    argparse.add_argument('--nb_rows', type=int, default=100000, help='Number of samples in the spreadsheet')
+    argparse.add_argument('--nb_extra_columns', type=int, default=15,
+                          help='Number of columns added to the configured ones')
+    argparse.add_argument('--xlsx_file', help='Spreadsheet to create, removed at the end when not provided')
+    args = argparse.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        xlsx_file = args.xlsx_file or os.path.join(tmp_dir, 'synthetic_metadata.xlsx')
+        start = time.perf_counter()
+        nb_columns = create_sample_sheet(xlsx_file, args.nb_rows, args.nb_extra_columns)
+        print(f'Created {args.nb_rows} rows x {nb_columns} columns in {time.perf_counter() - start:.1f}s')
+
+        start = time.perf_counter()
+        samples = EvaXlsxReader(xlsx_file).samples
+        elapsed = time.perf_counter() - start
+        assert len(samples) == args.nb_rows
+        print(f'Parsed {len(samples)} samples in {elapsed:.1f}s ({len(samples) / elapsed:.0f} rows/s)')
+
+
+if __name__ == '__main__':
+    main()
@@ -13,6 +13,16 @@ while [[ $# -gt 0 ]]; do
       shift # argument
       shift # value
       ;;
+    -R)
+      regions_file="$2"
+      shift # argument
+      shift # value
+      ;;
+    -f)
+      file_list="$2"
+      shift # argument
+      shift # value
+      ;;
     *)
       OTHER_ARGS+=("$1") # save other arg
       shift # argument
@@ -22,20 +32,48 @@ done
 
 >&2 echo "${OTHER_ARGS[*]}"
 
+# Write the standard input to the output file when it is specified, otherwise to the standard output
+function write_output {
+    if [ ! -z $filename ]; then
+      cat > $filename
+    else
+      cat
+    fi
+}
+
 if [[ $command == "merge" ]]; then
     if [ -z $filename ]; then
       filename=${OTHER_ARGS: -1}
     fi
     printf "> Files merged:\n"
 elif [[ $command == "sort" ]]; then
-    # Only create the output if it is specified
-    if [ ! -z $filename ]; then
+    # Records are passed through when read from the standard input
+    if [[ ${OTHER_ARGS[-1]} == "-" ]]; then
+      write_output
+    elif [ ! -z $filename ]; then
       touch $filename
     fi
 elif [[ $command == "norm" ]]; then
-    if [ ! -z $filename ]; then
-      touch $filename
+    # Records are passed through, only keeping the sequences of the regions file when it is specified
+    vcf_file=${OTHER_ARGS[-1]}
+    if [ ! -z $regions_file ]; then
+      gzip -dcf $vcf_file | awk -F'\t' -v regions=$regions_file \
+        'BEGIN{while ((getline line < regions) > 0) {split(line, fields, "\t"); keep[fields[1]]=1}}
+         /^#/ || ($1 in keep)' | write_output
+    else
+      gzip -dcf $vcf_file | write_output
     fi
+elif [[ $command == "concat" ]]; then
+    # The header of the first file is kept
+    first=1
+    while read -r part; do
+      if [[ $first == 1 ]]; then
+        gzip -dcf $part
+        first=0
+      else
+        gzip -dcf $part | grep -v '^#' || true
+      fi
+    done < $file_list | write_output
 else
     if [ -z $filename ]; then
       filename=${OTHER_ARGS[1]}
@@ -2,5 +2,10 @@
 
 echo "md5sum $*"
 
+if [[ $# -eq 0 ]]; then
+    # Consume the standard input like the md5 of a stream
+    cat > /dev/null
+fi
+
 filename=$3
 touch ${filename}.md5
@@ -17,7 +17,18 @@ ls output/not_compressed.vcf.gz.csi
 ls output/not_compressed.vcf.gz.md5
 ls output/not_compressed.vcf.gz.csi.md5
 
+printf "\e[32m===== PREPARE BROKERING PIPELINE WITH SHARDED NORMALISATION =====\e[0m\n"
+nextflow run "${SOURCE_DIR}/prepare_brokering.nf" -params-file test_prepare_brokering_config.yaml \
+  --normalisation_shards 2 --output_dir output_sharded
+
+# The sharded normalisation outputs the same records as the normalisation of the whole VCF
+for f in test1.vcf.gz test2.vcf.gz not_compressed.vcf.gz; do
+  ls output_sharded/${f}.csi output_sharded/${f}.md5
+  [ $(gzip -dcf output_sharded/${f} | grep -vc '^#') -gt 0 ]
+  diff <(gzip -dcf output/${f} | grep -v '^#' | sort) <(gzip -dcf output_sharded/${f} | grep -v '^#' | sort)
+done
+
 # clean up
 rm -rf work .nextflow*
-rm -r output
+rm -r output output_sharded
 cd ${cwd}
@@ -1,10 +1,15 @@
 import datetime
 import os
+import shutil
 from unittest import TestCase
+from unittest.mock import patch
+
+from openpyxl import Workbook
 
 from eva_submission import ROOT_DIR
+from eva_submission.xlsx.xlsx_cache import parsed_sheets_cache_path, save_parsed_sheets, load_parsed_sheets
 from eva_submission.xlsx.xlsx_parser import XlsxReader
-from eva_submission.xlsx.xlsx_parser_eva import EvaXlsxReader
+from eva_submission.xlsx.xlsx_parser_eva import EvaXlsxReader, EvaXlsxWriter
 
 
 class TestEvaXlsxReader(TestCase):
@@ -17,6 +22,65 @@ class TestEvaXlsxReader(TestCase):
         assert len(rows) == 1
         assert rows[0]['Analysis Title'] == 'Greatest analysis ever'
 
+    def test_cache_parsed_sheets(self):
+        metadata_copy = os.path.join(ROOT_DIR, 'tests', 'resources', 'metadata_copy.xlsx')
+        shutil.copyfile(self.metadata_file, metadata_copy)
+        cache_file = parsed_sheets_cache_path(metadata_copy)
+        try:
+            reader = EvaXlsxReader(metadata_copy, cache_parsed_sheets=True)
+            samples = reader.samples
+            project = reader.project
+            assert os.path.isfile(cache_file)
+
+            # The workbook is not opened when the sheets are in the cache
+            with patch('eva_submission.xlsx.xlsx_parser_eva.XlsxReader') as m_reader:
+                reader = EvaXlsxReader(metadata_copy, cache_parsed_sheets=True)
+                assert reader.samples == samples
+                assert reader.project == project
+            m_reader.assert_not_called()
+
+            # The cache is not used once the spreadsheet changed
+            writer = EvaXlsxWriter(metadata_copy)
+            writer.set_project(dict(project, **{'Project Title': 'Updated project'}))
+            writer.save()
+            reader = EvaXlsxReader(metadata_copy, cache_parsed_sheets=True)
+            assert reader.project['Project Title'] == 'Updated project'
+        finally:
+            for f in [metadata_copy, cache_file]:
+                if os.path.exists(f):
+                    os.remove(f)
+
+    def test_get_all_rows_returns_copies(self):
+        reader = EvaXlsxReader(self.metadata_file)
+        rows = reader._get_all_rows('Analysis')
+        rows[0]['Analysis Title'] = 'Modified'
+        rows.append({})
+        assert reader._get_all_rows('Analysis') == EvaXlsxReader(self.metadata_file)._get_all_rows('Analysis')
+        assert reader._get_all_rows('Analysis')[0]['Analysis Title'] == 'Greatest analysis ever'
+
+    def test_parsed_sheets_cache_format(self):
+        metadata_copy = os.path.join(ROOT_DIR, 'tests', 'resources', 'metadata_copy.xlsx')
+        shutil.copyfile(self.metadata_file, metadata_copy)
+        cache_file = parsed_sheets_cache_path(metadata_copy)
+        signature = {'version': 1, 'checksum': 'a', 'conf_checksum': 'b'}
+        sheets = {'Sample': [{'row_num': 2, 'Collection date': datetime.datetime(2021, 3, 4, 5, 6),
+                              'Date': datetime.date(2021, 3, 4), 'Time': datetime.time(5, 6), 'Name': 'S1'}]}
+        try:
+            save_parsed_sheets(metadata_copy, signature, sheets)
+            assert load_parsed_sheets(metadata_copy, signature) == sheets
+            # The rows are not decoded when the signature does not match
+            with patch('eva_submission.xlsx.xlsx_cache._decode_cell') as m_decode_cell:
+                assert load_parsed_sheets(metadata_copy, dict(signature, checksum='c')) is None
+            m_decode_cell.assert_not_called()
+            # A corrupted cache is ignored
+            with open(cache_file, 'w') as open_file:
+                open_file.write('not json')
+            assert load_parsed_sheets(metadata_copy, signature) is None
+        finally:
+            for f in [metadata_copy, cache_file]:
+                if os.path.exists(f):
+                    os.remove(f)
+
 
 class TestXlsxReader(TestCase):
 
@@ -79,5 +143,50 @@ class TestXlsxReader(TestCase):
             'row_num': 4
         }
 
+    def test_iter_rows(self):
+        self.xls_reader.active_worksheet = 'Sample'
+        rows = self.xls_reader.iter_rows()
+        assert next(rows)['row_num'] == 4
+        # The other methods continue after the rows already returned
+        assert self.xls_reader.next()['row_num'] == 5
+        remaining_rows = self.xls_reader.get_rows()
+        assert len(remaining_rows) == 98
+        assert remaining_rows[0]['Sample Name'] == 'S3'
+        assert self.xls_reader.get_rows() == []
+        with self.assertRaises(StopIteration):
+            self.xls_reader.next()
+
+
+class TestXlsxReaderConversion(TestCase):
 
+    resources_folder = os.path.join(os.path.dirname(__file__), 'resources')
+    eva_xls_reader_conf = os.path.join(resources_folder, 'test_metadata_fields.yaml')
 
+    def setUp(self):
+        self.xlsx_file = os.path.join(self.resources_folder, 'synthetic_sample_sheet.xlsx')
+        workbook = Workbook()
+        worksheet = workbook.active
+        worksheet.title = 'Sample'
+        worksheet.append(['Sample sheet'])
+        worksheet.append([])
+        worksheet.append(['Sample Name', 'Unused', ' Title ', 'Sample ID', 'Analysis Alias'])
+        worksheet.append([101, 'ignored', ' Sample 1 ', 2, 'GAE'])
+        worksheet.append([])
+        # Last cells are empty
+        worksheet.append([None, 'ignored', 'Sample 2'])
+        # Only a column that is not configured is filled
+        worksheet.append([None, 'ignored'])
+        workbook.save(self.xlsx_file)
+
+    def tearDown(self):
+        os.remove(self.xlsx_file)
+
+    def test_get_rows(self):
+        xls_reader = XlsxReader(self.xlsx_file, self.eva_xls_reader_conf)
+        xls_reader.active_worksheet = 'Sample'
+        assert xls_reader.get_rows() == [
+            {'Analysis Alias': 'GAE', 'Sample ID': 2, 'Sample Accession': None, 'Sampleset Accession': None,
+             'Sample Name': '101', 'Title': 'Sample 1', 'collection_date': None, 'row_num': 4},
+            {'Analysis Alias': None, 'Sample ID': None, 'Sample Accession': None, 'Sampleset Accession': None,
+             'Sample Name': None, 'Title': 'Sample 2', 'collection_date': None, 'row_num': 6}
+        ]
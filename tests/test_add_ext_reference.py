@@ -0,0 +1,22 @@
+from unittest import TestCase
+from unittest.mock import patch, MagicMock
+
+from bin.add_ext_reference import get_biosamples_per_project
+
+
+class TestAddExtReference(TestCase):
+
+    def test_get_biosamples_per_project(self):
+        conn = MagicMock()
+        cursor = conn.__enter__.return_value.cursor.return_value.__enter__.return_value
+        cursor.fetchall.return_value = [('PRJEB1', 'SAMEA1'), ('PRJEB1', 'SAMEA2'), ('PRJEB2', 'SAMEA3')]
+        project_accessions = ['PRJEB1', "PRJEB2' or '1'='1"]
+        with patch('bin.add_ext_reference.get_metadata_connection_handle', return_value=conn), \
+                patch('bin.add_ext_reference.cfg', {'maven': {'environment': 'test', 'settings_file': 'settings'}}):
+            samples_per_project = get_biosamples_per_project(project_accessions)
+
+        assert samples_per_project == {'PRJEB1': ['SAMEA1', 'SAMEA2'], 'PRJEB2': ['SAMEA3']}
+        query, parameters = cursor.execute.call_args[0]
+        # The project accessions are not part of the query
+        assert 'PRJEB' not in query
+        assert parameters == (project_accessions,)
@@ -0,0 +1,63 @@
+import gzip
+import os
+from unittest import TestCase
+
+import pysam
+
+from eva_submission.steps.bgzf_reader import BgzfParallelReader, bgzf_chunks, is_bgzf
+from eva_submission.steps.vcf_scanner import get_vcf_summary
+
+
+class TestBgzfParallelReader(TestCase):
+    resources = os.path.join(os.path.dirname(__file__), 'resources')
+
+    def setUp(self) -> None:
+        self.vcf_file = os.path.join(self.resources, 'vcf_files', 'large_file.vcf')
+        self.bgzf_file = self.vcf_file + '.gz'
+        with open(os.path.join(self.resources, 'vcf_files', 'file_structural_variants.vcf')) as open_input:
+            lines = open_input.readlines()
+        header = [line for line in lines if line.startswith('#')]
+        records = [line for line in lines if not line.startswith('#')]
+        with open(self.vcf_file, 'w') as open_output:
+            open_output.writelines(header)
+            for i in range(5000):
+                open_output.writelines(records)
+        pysam.tabix_compress(self.vcf_file, self.bgzf_file, force=True)
+
+    def tearDown(self) -> None:
+        for file_path in [self.vcf_file, self.bgzf_file]:
+            if os.path.exists(file_path):
+                os.remove(file_path)
+
+    def test_is_bgzf(self):
+        assert is_bgzf(self.bgzf_file)
+        assert not is_bgzf(self.vcf_file)
+        assert not is_bgzf(os.path.join(self.resources, 'vcf_files', 'file_no_aggregation.vcf.gz'))
+
+    def test_bgzf_chunks(self):
+        chunks = bgzf_chunks(self.bgzf_file, chunk_size=10000)
+        assert len(chunks) > 1
+        assert chunks[0][0] == 0
+        assert chunks[-1][1] == os.path.getsize(self.bgzf_file)
+        assert all(previous[1] == current[0] for previous, current in zip(chunks, chunks[1:]))
+
+    def test_read_in_order(self):
+        with gzip.open(self.bgzf_file, 'rt') as open_file:
+            expected_lines = open_file.readlines()
+        with BgzfParallelReader(self.bgzf_file, threads=4, chunk_size=10000) as reader:
+            assert list(reader) == expected_lines
+
+    def test_scan_with_threads(self):
+        assert get_vcf_summary(self.bgzf_file, threads=4) == get_vcf_summary(self.bgzf_file)
+        assert get_vcf_summary(self.bgzf_file, threads=4)['structural_variants']['nb_lines'] == 5000
+
+    def test_corrupted_block(self):
+        with open(self.bgzf_file, 'r+b') as open_file:
+            # Change the CRC32 of the first block
+            open_file.seek(bgzf_chunks(self.bgzf_file, chunk_size=1)[0][1] - 8)
+            crc = open_file.read(1)
+            open_file.seek(-1, os.SEEK_CUR)
+            open_file.write(bytes([crc[0] ^ 0xff]))
+        with self.assertRaises(ValueError):
+            with BgzfParallelReader(self.bgzf_file, threads=2, chunk_size=10000) as reader:
+                list(reader)
@@ -1,6 +1,8 @@
 import copy
 import os
+import time
 from copy import deepcopy
+from functools import partial
 from unittest import TestCase
 from unittest.mock import patch
 
@@ -13,6 +15,8 @@ from eva_submission import ROOT_DIR
 from eva_submission.biosample_submission import biosamples_submitters
 from eva_submission.biosample_submission.biosamples_submitters import BioSamplesSubmitter, SampleMetadataSubmitter, \
     SampleReferenceSubmitter, SampleJSONSubmitter, get_biosample_characteristics
+from eva_submission.biosample_submission.concurrent_submission import RateLimiter, RateLimitedCommunicator
+from eva_submission.biosample_submission.sample_cache import BioSamplesSampleCache
 
 
 class BSDTestCase(TestCase):
@@ -305,6 +309,58 @@ class TestSampleReferenceSubmitter(BSDTestCase):
                 ({'name': 'FakeSample2', 'accession': 'SAME002', 'domain': 'self.ExampleDomain', 'externalReferences': [{'url': 'https://www.ebi.ac.uk/eva/?eva-study=PRJEB001'}]}, 'FakeSample2', 'SAME002')
             ]
 
+    def test_retrieve_biosamples_with_cache(self):
+        sample_accessions = ['SAME001', 'SAME002']
+        project_accession = 'PRJEB001'
+        sample_1 = {"name": "FakeSample1", "accession": "SAME001", "domain": "self.ExampleDomain", "_links": {}, 'externalReferences': [{'url': 'test_url', 'duo': None}]}
+        sample_2 = {"name": "FakeSample2", "accession": "SAME002", "domain": "self.ExampleDomain", "_links": {}}
+        samples = {'SAME001?curationdomain=': sample_1, 'SAME002?curationdomain=': sample_2}
+        with patch.object(BioSamplesSampleCache, '_request_sample',
+                          side_effect=lambda key, etag=None: (samples[key], None)) as m_request_sample:
+            self.submitter = SampleReferenceSubmitter(sample_accessions, project_accession,
+                                                      sample_cache=BioSamplesSampleCache(communicator=None))
+            assert list(self.submitter._convert_metadata()) == [
+                ({'name': 'FakeSample1', 'accession': 'SAME001', 'domain': 'self.ExampleDomain', 'externalReferences': [{'url': 'test_url'}, {'url': 'https://www.ebi.ac.uk/eva/?eva-study=PRJEB001'}]}, 'FakeSample1', 'SAME001'),
+                ({'name': 'FakeSample2', 'accession': 'SAME002', 'domain': 'self.ExampleDomain', 'externalReferences': [{'url': 'https://www.ebi.ac.uk/eva/?eva-study=PRJEB001'}]}, 'FakeSample2', 'SAME002')
+            ]
+        # Each sample is requested once by the prefetch
+        assert m_request_sample.call_count == 2
+
+    def test_add_reference_to_samples(self):
+        eva_study_url = 'https://www.ebi.ac.uk/eva/?eva-study=PRJEB001'
+        samples = {
+            'SAME001': {'name': 'FakeSample1', 'accession': 'SAME001', 'characteristics': {},
+                        'externalReferences': [{'url': 'test_url', 'duo': None}]},
+            'SAME002': {'name': 'FakeSample2', 'accession': 'SAME002', 'characteristics': {},
+                        'externalReferences': [{'url': eva_study_url}]},
+            'SAME003': {'name': 'FakeSample3', 'accession': 'SAME003', 'characteristics': {}},
+        }
+        checkpoints = []
+        submitter = SampleReferenceSubmitter(['SAME001', 'SAME002', 'SAME003', 'SAME004'], 'PRJEB001')
+        with patch.object(BioSamplesSubmitter, '_get_existing_sample',
+                          side_effect=lambda accession, include_curation=False: deepcopy(samples[accession])) as m_get, \
+                patch.object(HALCommunicator, 'follows_link') as m_follows_link:
+            linked_accessions = submitter.add_reference_to_samples(
+                linked_accessions=['SAME004'], checkpoint=lambda accessions: checkpoints.append(list(accessions)),
+                checkpoint_interval=2
+            )
+        # SAME004 is already linked and SAME002 already has the reference
+        assert sorted(linked_accessions) == ['SAME001', 'SAME002', 'SAME003', 'SAME004']
+        assert sorted(call.args[0] for call in m_get.call_args_list) == ['SAME001', 'SAME002', 'SAME003']
+        assert all(call.kwargs == {'include_curation': True} for call in m_get.call_args_list)
+        assert m_follows_link.call_count == 2
+        m_follows_link.assert_any_call('samples', method='POST', join_url='SAME001/curationlinks', json={
+            'sample': 'SAME001',
+            'curation': {
+                'attributesPre': [], 'attributesPost': [],
+                'externalReferencesPre': [{'url': 'test_url'}],
+                'externalReferencesPost': [{'url': 'test_url'}, {'url': eva_study_url}],
+                'relationshipsPre': [], 'relationshipsPost': []
+            }
+        })
+        # Checkpoints every 2 samples and at the end
+        assert [len(checkpoint) for checkpoint in checkpoints] == [2, 4, 4]
+
 
 class TestSampleMetadataOverrider(BSDTestCase):
     samples = {
@@ -490,3 +546,105 @@ class TestSampleJSONSubmitter(BSDTestCase):
         bio_sample_object = {'bioSampleObject': { "characteristics": { 'taxId':  [{'text': '1'}, {'text': '2'}, {'text': '3'}] } } }
         assert get_biosample_characteristics(bio_sample_object, 'taxId') == ['1', '2', '3']
 
+
+
+class TestConcurrentSampleSubmission(BSDTestCase):
+
+    def setUp(self) -> None:
+        self.metadata_file = os.path.join(ROOT_DIR, 'tests', 'resources', 'brokering', 'metadata_sheet2.xlsx')
+        self.journal_file = os.path.join(self.resources_folder, 'biosamples_submission_journal.jsonl')
+        self.submitted_names = []
+
+    def tearDown(self):
+        super().tearDown()
+        if os.path.exists(self.journal_file):
+            os.remove(self.journal_file)
+
+    def _sample_submitter(self, nb_workers):
+        with patch.object(biosamples_submitters, 'get_biosamples_rate_limiter',
+                          return_value=RateLimiter(requests_per_second=0)):
+            sample_submitter = SampleMetadataSubmitter(self.metadata_file)
+        sample_submitter.nb_workers = nb_workers
+        return sample_submitter
+
+    def _fake_follows_link(self, key, method='GET', join_url=None, json=None, fail_on=None):
+        if join_url == 'validate':
+            return None
+        if json.get('name') == fail_on:
+            raise ValueError(f'Cannot submit {fail_on}')
+        self.submitted_names.append(json.get('name'))
+        return dict(json, accession='SAMEA' + json.get('name'))
+
+    def test_submit_to_bioSamples_resumes_from_journal(self):
+        expected = dict((f'S{i}', f'SAMEAS{i}') for i in range(1, 101))
+        sample_submitter = self._sample_submitter(nb_workers=1)
+        with patch.object(HALCommunicator, 'follows_link',
+                          side_effect=partial(self._fake_follows_link, fail_on='S50')):
+            with self.assertRaises(ValueError):
+                sample_submitter.submit_to_bioSamples(journal_file=self.journal_file)
+        # Submission stops shortly after the first error and every submitted sample is in the journal
+        first_submitted = set(self.submitted_names)
+        assert {f'S{i}' for i in range(1, 50)} <= first_submitted
+        assert len(first_submitted) < 60
+        with open(self.journal_file) as open_file:
+            assert len(open_file.readlines()) == len(first_submitted)
+
+        self.submitted_names = []
+        sample_submitter = self._sample_submitter(nb_workers=4)
+        with patch.object(HALCommunicator, 'follows_link', side_effect=self._fake_follows_link):
+            sample_name_to_accession = sample_submitter.submit_to_bioSamples(journal_file=self.journal_file)
+        assert set(self.submitted_names) == set(expected) - first_submitted
+        assert len(self.submitted_names) == 100 - len(first_submitted)
+        assert sample_name_to_accession == expected
+        assert list(sample_name_to_accession) == list(expected)
+
+    def test_submit_to_bioSamples_force_ignores_journal(self):
+        sample_submitter = self._sample_submitter(nb_workers=4)
+        with patch.object(HALCommunicator, 'follows_link', side_effect=self._fake_follows_link):
+            sample_submitter.submit_to_bioSamples(journal_file=self.journal_file)
+        assert len(self.submitted_names) == 100
+
+        # All the samples are in the journal so none is submitted again
+        self.submitted_names = []
+        with patch.object(HALCommunicator, 'follows_link', side_effect=self._fake_follows_link):
+            sample_submitter.submit_to_bioSamples(journal_file=self.journal_file)
+        assert self.submitted_names == []
+
+        with patch.object(HALCommunicator, 'follows_link', side_effect=self._fake_follows_link):
+            sample_name_to_accession = sample_submitter.submit_to_bioSamples(journal_file=self.journal_file,
+                                                                             force=True)
+        assert len(self.submitted_names) == 100
+        assert len(sample_name_to_accession) == 100
+        # The journal is started again with the new submission
+        with open(self.journal_file) as open_file:
+            assert len(open_file.readlines()) == 100
+
+    def test_submit_to_bioSamples_concurrently(self):
+        sample_submitter = self._sample_submitter(nb_workers=8)
+        with patch.object(HALCommunicator, 'follows_link', side_effect=self._fake_follows_link):
+            sample_name_to_accession = sample_submitter.submit_to_bioSamples()
+        assert len(self.submitted_names) == 100
+        assert list(sample_name_to_accession.items()) == [(f'S{i}', f'SAMEAS{i}') for i in range(1, 101)]
+        assert not os.path.exists(self.journal_file)
+
+
+class TestRateLimiter(TestCase):
+
+    def test_acquire(self):
+        rate_limiter = RateLimiter(requests_per_second=100, burst=5)
+        start = time.monotonic()
+        for _ in range(25):
+            rate_limiter.acquire()
+        # The 5 first requests use the burst and the 20 others are spread over 0.2 second
+        assert 0.15 < time.monotonic() - start < 1
+
+    def test_rate_limited_communicator(self):
+        communicator = WebinHALCommunicator('auth_url', 'bsd_url', 'user', 'password')
+        rate_limiter = RateLimiter()
+        limited_communicator = RateLimitedCommunicator(communicator, rate_limiter)
+        with patch.object(HALCommunicator, 'follows_link', return_value={}) as m_follows_link, \
+                patch.object(rate_limiter, 'acquire') as m_acquire:
+            limited_communicator.follows_link('samples', join_url='SAME001')
+        m_follows_link.assert_called_once_with('samples', join_url='SAME001')
+        m_acquire.assert_called_once_with()
+        assert limited_communicator.communicator_attributes == communicator.communicator_attributes
@@ -0,0 +1,124 @@
+import os
+import shlex
+import shutil
+from argparse import ArgumentParser
+from unittest import TestCase
+from unittest.mock import patch
+
+import pytest
+from ebi_eva_common_pyutils.config import cfg
+
+from eva_submission.steps.contig_alias_cache import ContigAliasCache, ContigAliasCacheMiss, \
+    get_contig_alias_cache_params, add_contig_alias_cache_arguments, contig_alias_cache_from_args
+from eva_submission.steps.detect_contigs_naming_convention import ContigsNamimgConventionChecker
+
+
+class LocalContigAliasClient:
+    """Stand-in for the contig alias that serves entities from memory"""
+
+    def __init__(self, assemblies):
+        self.assemblies = assemblies
+        self.nb_calls = 0
+
+    def assembly_contig_iter(self, assembly_accession):
+        self.nb_calls += 1
+        return iter(self.assemblies[assembly_accession])
+
+
+class TestContigAliasCache(TestCase):
+    resources = os.path.join(os.path.dirname(__file__), 'resources')
+    entities = [
+        {'insdcAccession': 'CU329670.1', 'refseq': 'NC_003424.3', 'enaSequenceName': 'I', 'genbankSequenceName': 'I'},
+        {'insdcAccession': 'CU329671.1', 'refseq': 'NC_003423.3', 'enaSequenceName': 'II', 'genbankSequenceName': 'II'},
+        {'insdcAccession': 'CU329672.1', 'refseq': 'NC_003421.2', 'enaSequenceName': 'III', 'genbankSequenceName': 'III'},
+        {'insdcAccession': 'X54421.1', 'refseq': 'NC_001326.1', 'enaSequenceName': 'MT', 'genbankSequenceName': 'MT'},
+    ]
+
+    def setUp(self) -> None:
+        self.cache_dir = os.path.join(self.resources, 'tmp_contig_alias_cache')
+        self.client = LocalContigAliasClient({'GCA_000002945.2': self.entities})
+        self.cache = ContigAliasCache(cache_dir=self.cache_dir, contig_alias_client=self.client, offline=False)
+
+    def tearDown(self) -> None:
+        shutil.rmtree(self.cache_dir, ignore_errors=True)
+
+    def test_assembly_contig_iter(self):
+        assert list(self.cache.assembly_contig_iter('GCA_000002945.2')) == self.entities
+        assert list(self.cache.assembly_contig_iter('GCA_000002945.2')) == self.entities
+        assert self.client.nb_calls == 1
+        assert os.path.isfile(os.path.join(self.cache_dir, 'GCA_000002945.2.json.gz'))
+
+    def test_expired_entry(self):
+        self.cache.warm_up(['GCA_000002945.2'])
+        expired_cache = ContigAliasCache(cache_dir=self.cache_dir, contig_alias_client=self.client, ttl_days=0)
+        expired_cache.get_entities('GCA_000002945.2')
+        assert self.client.nb_calls == 2
+
+    def test_version_change(self):
+        self.cache.warm_up(['GCA_000002945.2'])
+        with patch('eva_submission.steps.contig_alias_cache.CONTIG_ALIAS_CACHE_VERSION', 2):
+            self.cache.get_entities('GCA_000002945.2')
+        assert self.client.nb_calls == 2
+
+    def test_stale_entry_used_when_contig_alias_fails(self):
+        self.cache.warm_up(['GCA_000002945.2'])
+        expired_cache = ContigAliasCache(cache_dir=self.cache_dir, contig_alias_client=self.client, ttl_days=0)
+        self.client.assemblies = {}
+        assert expired_cache.get_entities('GCA_000002945.2') == self.entities
+
+    def test_offline(self):
+        offline_cache = ContigAliasCache(cache_dir=self.cache_dir, contig_alias_client=self.client, offline=True)
+        with pytest.raises(ContigAliasCacheMiss):
+            offline_cache.get_entities('GCA_000002945.2')
+        offline_cache.store('GCA_000002945.2', self.entities)
+        assert offline_cache.get_entities('GCA_000002945.2') == self.entities
+        assert self.client.nb_calls == 0
+
+    def test_naming_convention_from_cache(self):
+        self.cache.store('GCA_000002945.2', self.entities)
+        with patch.dict(os.environ, {'EVA_CONTIG_ALIAS_CACHE_DIR': self.cache_dir, 'EVA_CONTIG_ALIAS_OFFLINE': '1'}):
+            checker = ContigsNamimgConventionChecker('GCA_000002945.2')
+        input_vcf = os.path.join(self.resources, 'vcf_files', 'vcf_file_ASM294v2.vcf')
+        assert checker.naming_convention_map_for_vcf(input_vcf) == {
+            'enaSequenceName': ['I', 'II', 'III', 'MT'], 'Not found': ['MTR']
+        }
+
+    def test_settings_from_config(self):
+        config = {'contig_alias_cache': {'directory': self.cache_dir, 'ttl_days': 2, 'offline': True}}
+        with patch.dict(os.environ, {'EVA_CONTIG_ALIAS_CACHE_DIR': 'env_dir'}), \
+                patch.object(cfg, 'content', config):
+            cache = ContigAliasCache(contig_alias_client=self.client)
+            assert get_contig_alias_cache_params() == {
+                'contig_alias_args': f'--contig_alias_cache_dir {self.cache_dir} --contig_alias_cache_ttl_days 2 '
+                                     f'--contig_alias_offline'
+            }
+        assert (cache.cache_dir, cache.ttl, cache.offline) == (self.cache_dir, 2 * 24 * 3600, True)
+
+        # The environment variables and defaults are used when the config does not set them
+        with patch.dict(os.environ, {'EVA_CONTIG_ALIAS_CACHE_DIR': 'env_dir', 'EVA_CONTIG_ALIAS_OFFLINE': ''}), \
+                patch.object(cfg, 'content', {}):
+            cache = ContigAliasCache(contig_alias_client=self.client)
+            assert get_contig_alias_cache_params() == {'contig_alias_args': ''}
+        assert (cache.cache_dir, cache.ttl, cache.offline) == ('env_dir', 30 * 24 * 3600, False)
+
+    def test_params_parsed_by_steps(self):
+        argparse = ArgumentParser()
+        add_contig_alias_cache_arguments(argparse)
+        config = {'contig_alias_cache': {'directory': 'cache dir', 'ttl_days': 0}}
+        with patch.object(cfg, 'content', config):
+            contig_alias_args = get_contig_alias_cache_params()['contig_alias_args']
+        args = argparse.parse_args(shlex.split(contig_alias_args))
+        assert (args.contig_alias_cache_dir, args.contig_alias_cache_ttl_days, args.contig_alias_offline) == \
+            ('cache dir', 0, None)
+
+    def test_settings_from_arguments(self):
+        argparse = ArgumentParser()
+        add_contig_alias_cache_arguments(argparse)
+        config = {'contig_alias_cache': {'directory': 'config_dir', 'ttl_days': 2}}
+        with patch.object(cfg, 'content', config):
+            args = argparse.parse_args(['--contig_alias_cache_dir', self.cache_dir, '--contig_alias_cache_ttl_days', '0',
+                                        '--contig_alias_offline'])
+            cache = contig_alias_cache_from_args(args)
+            assert (cache.cache_dir, cache.ttl, cache.offline) == (self.cache_dir, 0, True)
+            cache = contig_alias_cache_from_args(argparse.parse_args([]))
+            assert (cache.cache_dir, cache.ttl) == ('config_dir', 2 * 24 * 3600)
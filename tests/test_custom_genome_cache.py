@@ -0,0 +1,79 @@
+import os
+import shutil
+from unittest import TestCase
+from unittest.mock import patch
+
+from eva_submission.steps import custom_genome_cache
+from eva_submission.steps.custom_genome_cache import CustomGenomeCache, fasta_checksum
+from eva_submission.steps.fasta_renaming import read_fai, index_fasta
+
+
+class TestCustomGenomeCache(TestCase):
+    resources = os.path.join(os.path.dirname(__file__), 'resources')
+
+    def setUp(self) -> None:
+        self.tmp_dir = os.path.join(self.resources, 'tmp_custom_genome_cache')
+        self.cache_dir = os.path.join(self.tmp_dir, 'cache')
+        os.makedirs(self.tmp_dir, exist_ok=True)
+        self.fasta = os.path.join(self.tmp_dir, 'GCA_000002945.2.fa')
+        shutil.copy(os.path.join(self.resources, 'GCA_000002945.2', 'GCA_000002945.2.fa'), self.fasta)
+        self.cache = CustomGenomeCache(self.cache_dir)
+        self.rename_map = {'CU329670.1': 'I', 'CU329671.1': 'II'}
+
+    def tearDown(self) -> None:
+        shutil.rmtree(self.tmp_dir)
+
+    def _create(self, output_name, rename_map):
+        output_fasta = os.path.join(self.tmp_dir, output_name)
+        self.cache.create_custom_genome('GCA_000002945.2', self.fasta, output_fasta,
+                                        lambda name: rename_map.get(name, name))
+        return output_fasta
+
+    def test_fasta_info(self):
+        with patch.object(custom_genome_cache, 'fasta_checksum', wraps=fasta_checksum) as mock_checksum:
+            records, checksum = self.cache.get_fasta_info(self.fasta)
+        mock_checksum.assert_called_once()
+        assert records == index_fasta(self.fasta)
+        # Nothing is written next to the fasta
+        assert sorted(os.listdir(self.tmp_dir)) == ['GCA_000002945.2.fa', 'cache']
+
+        # The fasta staged as a link is not indexed or read again
+        staged_fasta = os.path.join(self.tmp_dir, 'work', 'GCA_000002945.2.fa')
+        os.makedirs(os.path.dirname(staged_fasta))
+        os.symlink(self.fasta, staged_fasta)
+        with patch.object(custom_genome_cache, 'fasta_checksum') as mock_checksum, \
+                patch.object(custom_genome_cache, 'get_fasta_index') as mock_index:
+            assert self.cache.get_fasta_info(staged_fasta) == (records, checksum)
+        mock_checksum.assert_not_called()
+        mock_index.assert_not_called()
+
+        # They are computed again when the fasta changes
+        with open(self.fasta) as open_file:
+            content = open_file.read().rstrip('\n')
+        with open(self.fasta, 'w') as open_file:
+            open_file.write(content + '\n>extra\nACGT\n')
+        records, new_checksum = self.cache.get_fasta_info(staged_fasta)
+        assert new_checksum != checksum
+        assert records[-1].name == 'extra'
+
+    def test_create_custom_genome_once(self):
+        with patch.object(custom_genome_cache, 'rename_fasta', wraps=custom_genome_cache.rename_fasta) as mock_rename:
+            custom_fasta_1 = self._create('ELOAD_1_custom.fa', self.rename_map)
+            custom_fasta_2 = self._create('ELOAD_2_custom.fa', self.rename_map)
+        mock_rename.assert_called_once()
+        assert os.path.realpath(custom_fasta_1) == os.path.realpath(custom_fasta_2)
+        assert os.path.realpath(custom_fasta_1).startswith(os.path.realpath(self.cache_dir))
+        assert [record.name for record in read_fai(custom_fasta_2 + '.fai')][:3] == ['I', 'II', 'CU329672.1']
+        with open(custom_fasta_2) as open_file:
+            assert open_file.readline() == '>I\n'
+
+    def test_different_rename_map(self):
+        custom_fasta_1 = self._create('ELOAD_1_custom.fa', self.rename_map)
+        custom_fasta_2 = self._create('ELOAD_2_custom.fa', {'CU329670.1': 'chr1'})
+        assert os.path.realpath(custom_fasta_1) != os.path.realpath(custom_fasta_2)
+        assert len(os.listdir(os.path.join(self.cache_dir, 'GCA_000002945.2'))) == 2
+
+    def test_no_rename_not_cached(self):
+        custom_fasta = self._create('ELOAD_1_custom.fa', {})
+        assert os.path.realpath(custom_fasta) == os.path.realpath(self.fasta)
+        assert not os.path.exists(os.path.join(self.cache_dir, 'GCA_000002945.2'))
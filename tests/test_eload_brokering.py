@@ -1,18 +1,21 @@
+import asyncio
 import glob
 import json
 import os
 import shutil
+import time
 from unittest import TestCase
 from unittest.mock import patch, PropertyMock, Mock
 
 from ebi_eva_common_pyutils.config import cfg
 
 from eva_submission import NEXTFLOW_DIR
-from eva_submission.ENA_submission.upload_to_ENA import ENAUploader
-from eva_submission.biosample_submission.biosamples_submitters import SampleMetadataSubmitter
-from eva_submission.eload_brokering import EloadBrokering
+from eva_submission.ENA_submission.upload_to_ENA import ENAUploader, ENAUploaderAsync
+from eva_submission.biosample_submission.biosamples_submitters import SampleMetadataSubmitter, SampleReferenceSubmitter
+from eva_submission.eload_brokering import EloadBrokering, broker_eloads
 from eva_submission.eload_submission import Eload
 from eva_submission.submission_config import load_config, EloadConfig
+from eva_submission.xlsx.xlsx_cache import PARSED_SHEETS_SUFFIX
 from eva_submission.xlsx.xlsx_parser_eva import EvaXlsxReader
 from tests.test_eload_preparation import touch
 
@@ -36,6 +39,8 @@ class TestEloadBrokering(TestCase):
         eloads = glob.glob(os.path.join(self.resources_folder, 'eloads', 'ELOAD_3'))
         for eload in eloads:
             shutil.rmtree(eload)
+        for parsed_sheets in glob.glob(os.path.join(self.resources_folder, '*' + PARSED_SHEETS_SUFFIX)):
+            os.remove(parsed_sheets)
 
     def test_upload_to_bioSamples(self):
         self.eload.eload_cfg.set('validation', 'valid', 'metadata_spreadsheet',
@@ -46,11 +51,35 @@ class TestEloadBrokering(TestCase):
                 patch.object(EloadBrokering, 'now', new_callable=PropertyMock(return_value='a_date')):
             self.eload.upload_to_bioSamples()
 
-        assert mock_submit.call_count == 1
+        mock_submit.assert_called_once_with(journal_file=os.path.join(
+            self.eload._get_dir('biosamples'), 'biosamples_submission_journal.jsonl'
+        ), force=False)
         assert self.eload.eload_cfg.query('brokering', 'Biosamples', 'pass')
         assert self.eload.eload_cfg.query('brokering', 'Biosamples', 'Samples') == samples
         assert self.eload.eload_cfg.query('brokering', 'Biosamples', 'date') == 'a_date'
 
+    def test_upload_to_bioSamples_clears_journal(self):
+        self.eload.eload_cfg.set('validation', 'valid', 'metadata_spreadsheet',
+                                 value=os.path.join(self.resources_folder, 'metadata.xlsx'))
+        journal_file = os.path.join(self.eload._get_dir('biosamples'), 'biosamples_submission_journal.jsonl')
+        os.makedirs(os.path.dirname(journal_file), exist_ok=True)
+
+        # The journal is kept while the submission is incomplete
+        with open(journal_file, 'w') as open_file:
+            open_file.write('{"key": "k1", "name": "S1", "accession": 1, "action": "created"}\n')
+        with patch.object(SampleMetadataSubmitter, 'submit_to_bioSamples', return_value={'S1': 1}):
+            with self.assertRaises(ValueError):
+                self.eload.upload_to_bioSamples()
+        assert os.path.exists(journal_file)
+
+        # and removed once all the samples are submitted
+        samples = {f'S{i}': i for i in range(1, 101)}
+        with patch.object(SampleMetadataSubmitter, 'submit_to_bioSamples', return_value=samples) as mock_submit:
+            self.eload.upload_to_bioSamples(force=True)
+        mock_submit.assert_called_once_with(journal_file=journal_file, force=True)
+        assert self.eload.eload_cfg.query('brokering', 'Biosamples', 'pass')
+        assert not os.path.exists(journal_file)
+
     def test_upload_to_bioSamples_incomplete(self):
         self.eload.eload_cfg.set('validation', 'valid', 'metadata_spreadsheet',
                                  value=os.path.join(self.resources_folder, 'metadata.xlsx'))
@@ -82,6 +111,24 @@ class TestEloadBrokering(TestCase):
         self.eload.eload_cfg.set('brokering', 'Biosamples', 'pass', value=True)
         self.eload.upload_to_bioSamples()
 
+    def test_update_biosamples_with_study_resume(self):
+        self.eload.eload_cfg.set('brokering', 'Biosamples', 'Samples', value={'S1': 'SAME001', 'S2': 'SAME002'})
+        self.eload.eload_cfg.set('brokering', 'ena', 'PROJECT', value='PRJEB001')
+        self.eload.eload_cfg.set('brokering', 'Biosamples', 'backlinks_checkpoint', 'PRJEB001', value=['SAME001'])
+
+        def add_reference_to_samples(linked_accessions, checkpoint):
+            # The checkpoint is saved in the config file straight away
+            checkpoint(linked_accessions + ['SAME002'])
+            with open(self.eload.config_path) as open_file:
+                assert 'SAME002' in open_file.read()
+
+        with patch.object(SampleReferenceSubmitter, 'add_reference_to_samples',
+                          side_effect=add_reference_to_samples) as m_add_reference:
+            self.eload.update_biosamples_with_study()
+        assert m_add_reference.call_args.args[0] == ['SAME001']
+        assert self.eload.eload_cfg.query('brokering', 'Biosamples', 'backlinks') == 'PRJEB001'
+        assert self.eload.eload_cfg.query('brokering', 'Biosamples', 'backlinks_checkpoint') is None
+
     def test_broker_to_ena_xml(self):
         self.eload.eload_cfg.set('validation', 'valid', 'metadata_spreadsheet',
                                  value=os.path.join(self.resources_folder, 'metadata.xlsx'))
@@ -110,6 +157,38 @@ class TestEloadBrokering(TestCase):
               patch('eva_submission.ENA_submission.json_to_ENA_json.check_existing_project_in_ena', return_value=True):
             self.eload.broker_to_ena(async_upload=True)
 
+    def test_broker_to_ena_async_resume_waiting_for_receipt(self):
+        self.eload.eload_cfg.set('validation', 'valid', 'metadata_json',
+                                 value=os.path.join(self.resources_folder, 'brokering', 'eva_metadata_existing_project.json'))
+        self.eload.eload_cfg.set('brokering', 'analyses', value={'AA1': {'vcf_files': {}}})
+        json_data = {'submissionId': 'ERA123456', '_links': {'poll': {'href': 'https://example.com/link'}}}
+        response = Mock(status_code=200, json=Mock(return_value=json_data))
+        with patch.object(ENAUploader, 'upload_vcf_files_to_ena_ftp') as mock_ftp,\
+                patch.object(ENAUploader, '_post_metadata_file_to_ena', return_value=response) as mock_post,\
+                patch('eva_submission.ENA_submission.json_to_ENA_json.check_existing_project_in_ena', return_value=True):
+            ena_uploader = self.eload.submit_to_ena(async_upload=True)
+            assert ena_uploader.is_waiting_for_receipt
+            assert mock_ftp.call_count == 1
+            assert mock_post.call_count == 1
+            # The poll link is saved so that a new process can resume waiting for the receipt
+            pending_receipt = self.eload.eload_cfg.query('brokering', 'ena', 'pending_receipt')
+            assert pending_receipt['submissionId'] == 'ERA123456'
+            assert pending_receipt['poll-links'] == 'https://example.com/link'
+            hold_date = pending_receipt['hold_date']
+
+            receipt = Mock(status_code=200, text=json.dumps({
+                'submission': {'accession': 'ERA123456'}, 'messages': {'info': []}
+            }))
+            with patch.object(ENAUploaderAsync, '_get_poll_response', return_value=receipt):
+                self.eload.broker_to_ena(async_upload=True)
+            # No new submission
+            assert mock_ftp.call_count == 1
+            assert mock_post.call_count == 1
+        assert self.eload.eload_cfg.query('brokering', 'ena', 'SUBMISSION') == 'ERA123456'
+        assert self.eload.eload_cfg.query('brokering', 'ena', 'hold_date') == hold_date
+        assert self.eload.eload_cfg.query('brokering', 'ena', 'pass')
+        assert self.eload.eload_cfg.query('brokering', 'ena', 'pending_receipt') is None
+
     def test_run_brokering_prep_workflow(self):
         self.eload.eload_cfg.set('validation', 'valid', 'analyses', value={
             'analysis_alias1': {
@@ -410,3 +489,28 @@ The EVA can be cited directly using the associated literature:
 Cezard T, Cunningham F, Hunt SE, Koylass B, Kumar N, Saunders G, Shen A, Silva AF, Tsukanov K, Venkataraman S, Flicek P, Parkinson H, Keane TM. The European Variation Archive: a FAIR resource of genomic variation for all species. Nucleic Acids Res. 2021 Oct 28:gkab960. doi: 10.1093/nar/gkab960. PMID: 34718739.
 '''
         assert self.eload._archival_confirmation_text() == expected_text
+
+
+class TestBrokerEloads(TestCase):
+
+    def test_broker_eloads_wait_concurrently(self):
+        async def wait_for_receipt(poller):
+            await asyncio.sleep(0.3)
+
+        async def fail_to_get_receipt(poller):
+            raise TimeoutError('No receipt')
+
+        brokerings = []
+        for eload, monitor_results_async in [(1, wait_for_receipt), (2, wait_for_receipt), (3, fail_to_get_receipt)]:
+            ena_uploader = Mock(is_waiting_for_receipt=True, monitor_results_async=monitor_results_async)
+            brokerings.append(Mock(eload=f'ELOAD_{eload}', start_brokering=Mock(return_value=ena_uploader)))
+        start = time.monotonic()
+        with self.assertRaises(TimeoutError):
+            broker_eloads(brokerings, brokering_tasks_to_force=[], async_upload=True)
+        assert time.monotonic() - start < 0.6
+        for brokering in brokerings[:2]:
+            brokering.finish_brokering.assert_called_once_with(
+                brokering.start_brokering.return_value, brokering_tasks_to_force=[], dry_ena_upload=False
+            )
+        # The brokering without receipt is left to be resumed
+        brokerings[2].finish_brokering.assert_not_called()
@@ -171,6 +171,22 @@ class TestEloadIngestion(TestCase):
             m_load_project.assert_called_once()
             self.assertEqual(m_load_samples.call_count, 2)
 
+    def test_load_from_ena_refreshes_snapshots(self):
+        with self._patch_metadata_handle(), \
+                self._patch_metadata_engine(), \
+                patch.object(EvaProjectLoader, 'refresh_study_browser'), \
+                patch('eva_submission.eload_ingestion.check_project_exists_in_evapro'), \
+                patch.object(EvaProjectLoader, 'load_project_from_ena'), \
+                patch.object(EvaProjectLoader, 'load_samples_from_vcf_file'), \
+                patch.object(EvaProjectLoader, 'update_project_samples_temp1'), \
+                patch.object(self.eload.ena_snapshot_store, 'invalidate') as m_invalidate:
+            self.eload.load_from_ena()
+            m_invalidate.assert_called_once_with(self.eload.project_accession)
+            m_invalidate.reset_mock()
+            self.eload.refresh_ena_metadata = False
+            self.eload.load_from_ena()
+            m_invalidate.assert_not_called()
+
     def test_load_from_ena_script_fails(self):
         with self._patch_metadata_handle(), \
                 patch('eva_submission.eload_ingestion.check_project_exists_in_evapro'), \
@@ -0,0 +1,81 @@
+import csv
+import gzip
+import io
+import os
+import subprocess
+from unittest import TestCase
+from unittest.mock import patch, MagicMock
+
+from eva_submission.eload_status import EloadStatusBatch
+from eva_submission.submission_config import load_config
+
+
+class TestEloadStatusBatch(TestCase):
+    top_dir = os.path.dirname(os.path.dirname(__file__))
+    resources_folder = os.path.join(os.path.dirname(__file__), 'resources')
+
+    def setUp(self):
+        load_config(os.path.join(self.resources_folder, 'submission_config.yml'))
+        os.chdir(self.top_dir)
+        self.accessioning_report = os.path.join(self.resources_folder, 'test_status.accessioned.vcf.gz')
+        with gzip.open(self.accessioning_report, 'wt') as open_file:
+            open_file.write('#CHROM\tPOS\tID\tREF\tALT\n')
+            open_file.write('1\t100\tss1000\tA\tT\n')
+            open_file.write('1\t200\tss1001\tC\tG\n')
+        self.queries = []
+
+    def tearDown(self):
+        os.remove(self.accessioning_report)
+
+    def _results_for_query(self, conn, query):
+        self.queries.append(query)
+        if 'project_eva_submission' in query:
+            return [(5, 'PRJEB55555')]
+        if 'project_analysis' in query:
+            return [
+                ('PRJEB11111', 'ERZ2499196', 'GCA_000001.1', 9796, 'file1.vcf.gz'),
+                ('PRJEB11111', 'ERZ2499196', 'GCA_000001.1', 9796, 'file2.vcf.gz'),
+                ('PRJEB55555', 'ERZ5555555', 'GCA_000009.1', 9606, 'file3.vcf.gz'),
+            ]
+        if 'project_taxonomy' in query:
+            return [('PRJEB11111', 9796), ('PRJEB55555', 9606)]
+        if 'supported_assembly_tracker' in query:
+            return [(9796, 'GCA_000002.1')]
+        raise ValueError(query)
+
+    def test_status(self):
+        mongo_conn = MagicMock()
+        mongo_conn.__getitem__.return_value.__getitem__.return_value.find.side_effect = \
+            lambda filters: [{'accession': accession, 'rs': 1} for accession in filters.get('accession', {}).get('$in', [])]
+        mongo_conn.__getitem__.return_value.__getitem__.return_value.find_one.return_value = None
+        output = io.StringIO()
+        with patch('eva_submission.eload_status.get_metadata_connection_handle'), \
+                patch('eva_submission.eload_status.get_all_results_for_query', side_effect=self._results_for_query), \
+                patch('eva_submission.eload_status.get_mongo_connection_handle', return_value=mongo_conn), \
+                patch('eva_submission.eload_status.resolve_variant_warehouse_db_name', return_value='eva_db') as m_db_name, \
+                patch('eva_submission.eload_status.ELOADRetrieval.retrieve_eloads_and_projects',
+                      side_effect=subprocess.CalledProcessError(1, 'retrieve')), \
+                patch('eva_submission.eload_status.EloadStatus.get_accession_reports_for_study',
+                      return_value=[self.accessioning_report]):
+            EloadStatusBatch([101, 5], nb_threads=2).status(output)
+
+        # One query of each kind for the whole batch
+        assert len(self.queries) == 4
+        assert "eload_id in (5)" in self.queries[0]
+        assert "project_accession in ('PRJEB11111', 'PRJEB55555')" in self.queries[1]
+        # The database name is only resolved once per assembly and taxonomy
+        assert m_db_name.call_count == 2
+
+        rows = sorted(csv.DictReader(io.StringIO(output.getvalue()), delimiter='\t'), key=lambda row: row['eload'])
+        assert [(row['eload'], row['project'], row['analysis']) for row in rows] == [
+            ('ELOAD_101', 'PRJEB11111', 'ERZ2499196'),
+            ('ELOAD_5', 'PRJEB55555', 'ERZ5555555')
+        ]
+        assert rows[0]['target_assembly'] == 'GCA_000002.1'
+        assert rows[0]['accessioning_status'] == 'Done'
+        assert rows[0]['remapping_status'] == 'Done'
+        assert rows[0]['clustering_status'] == 'Done'
+        assert rows[0]['variant_load_status'] == 'Pending'
+        # No accessioning for human
+        assert rows[1]['taxonomy'] == '9606'
+        assert rows[1]['accessioning_status'] == 'Not found'
@@ -1,14 +1,19 @@
+import json
 import os
 import shutil
 from datetime import datetime
 from unittest import TestCase
 from unittest.mock import patch, Mock
 
+import eva_sub_cli
+from eva_sub_cli.executables.xlsx2json import XlsxParser
 from lxml import etree
 
 from eva_submission.eload_utils import check_existing_project_in_ena, detect_vcf_aggregation, \
-    check_project_exists_in_evapro, create_assembly_report_from_fasta, get_hold_date_from_ena
+    check_project_exists_in_evapro, create_assembly_report_from_fasta, get_hold_date_from_ena, \
+    convert_spreadsheet_to_json
 from eva_submission.submission_config import load_config
+from eva_submission.xlsx.xlsx_cache import JSON_CACHE_SUFFIX
 
 
 class TestEloadUtils(TestCase):
@@ -107,4 +112,58 @@ class TestEloadUtils(TestCase):
         with patch('eva_submission.eload_utils.requests.post', return_value=Mock(status_code=200, text=expected_receipt_xml_public)),\
                 patch('eva_submission.eload_utils.download_xml_from_ena', return_value=expected_project_xml_public_as_ET):
             hold_date = get_hold_date_from_ena(project_accession='PRJEB13088', project_alias='Anopheles 16 genomes project - Anopheles epiroticus variant calls')
-            assert hold_date == datetime.strptime('2016-03-17', '%Y-%m-%d')
\ No newline at end of file
+            assert hold_date == datetime.strptime('2016-03-17', '%Y-%m-%d')
+
+
+class TestConvertSpreadsheetToJson(TestCase):
+    resources_folder = os.path.join(os.path.dirname(__file__), 'resources')
+
+    def setUp(self):
+        self.output_dir = os.path.join(self.resources_folder, 'spreadsheet_json_cache')
+        os.makedirs(self.output_dir, exist_ok=True)
+        self.metadata_xlsx = shutil.copy(os.path.join(eva_sub_cli.ETC_DIR, 'EVA_Submission_Example.xlsx'),
+                                         self.output_dir)
+        self.metadata_json = os.path.join(self.output_dir, 'metadata.json')
+
+    def tearDown(self):
+        shutil.rmtree(self.output_dir)
+
+    def test_convert_spreadsheet_to_json_from_cache(self):
+        convert_spreadsheet_to_json(self.metadata_xlsx, self.metadata_json)
+        with open(self.metadata_json) as open_file:
+            converted_json = json.load(open_file)
+        assert converted_json['project']['title'] == 'Investigation of human genetic variants'
+        os.remove(self.metadata_json)
+
+        with patch('eva_submission.eload_utils.metadata_xlsx_version') as m_version:
+            convert_spreadsheet_to_json(self.metadata_xlsx, self.metadata_json)
+        m_version.assert_not_called()
+        with open(self.metadata_json) as open_file:
+            assert json.load(open_file) == converted_json
+
+    def test_convert_spreadsheet_to_json_other_parser(self):
+        class OtherParser(XlsxParser):
+            pass
+
+        convert_spreadsheet_to_json(self.metadata_xlsx, self.metadata_json)
+        with patch.object(OtherParser, 'json') as m_json:
+            convert_spreadsheet_to_json(self.metadata_xlsx, self.metadata_json, xls_parser=OtherParser)
+        m_json.assert_called_once_with(self.metadata_json)
+
+    def test_convert_spreadsheet_to_json_single_cache_file(self):
+        convert_spreadsheet_to_json(self.metadata_xlsx, self.metadata_json)
+        assert sorted(os.listdir(self.output_dir)) == [
+            'EVA_Submission_Example.xlsx', 'EVA_Submission_Example.xlsx' + JSON_CACHE_SUFFIX, 'metadata.json'
+        ]
+        # A new version of the spreadsheet replaces the cached JSON
+        with patch('eva_submission.eload_utils.spreadsheet_json_cache_key', return_value='another_key'):
+            convert_spreadsheet_to_json(self.metadata_xlsx, self.metadata_json)
+        assert sorted(os.listdir(self.output_dir)) == [
+            'EVA_Submission_Example.xlsx', 'EVA_Submission_Example.xlsx' + JSON_CACHE_SUFFIX, 'metadata.json'
+        ]
+        with open(self.metadata_xlsx + JSON_CACHE_SUFFIX) as open_file:
+            assert open_file.readline() == 'another_key\n'
+
+    def test_convert_spreadsheet_to_json_without_cache(self):
+        convert_spreadsheet_to_json(self.metadata_xlsx, self.metadata_json, use_cache=False)
+        assert sorted(os.listdir(self.output_dir)) == ['EVA_Submission_Example.xlsx', 'metadata.json']
@@ -194,6 +194,32 @@ class TestEVAJsonToENAJsonConverter(TestCase):
             assert 'submission' in ena_json_data
             assert ena_json_data['submission']['alias'] == 'PRJEB00001_Submission-12345'
 
+    def test_ena_json_file_identical_to_json_dump(self):
+        expected_file = os.path.join(self.brokering_folder, 'To_Json_Converter_Test.expected.json')
+        for existing_project in (None, 'PRJEB00001'):
+            self.converter = EnaJsonConverter('Submission-12345', self.metadata_file, self.brokering_folder,
+                                              'To_Json_Converter_Test')
+            # Override the cached property
+            self.converter.existing_project = existing_project
+            self.converter.eva_json_data['project']['description'] = 'Ünïcode & <escaped> "text"\nwith new lines'
+            with patch('eva_submission.ENA_submission.json_to_ENA_json.get_scientific_name_from_ensembl',
+                       return_value='Homo sapiens'):
+                output_ena_json = self.converter.create_single_submission_file()
+                ena_json_data = {
+                    'submission': self.converter._create_ena_submission_json_obj(
+                        self.converter.eva_json_data['project'], 'Submission-12345'),
+                    'analyses': self.converter._create_ena_analysis_json_obj()
+                }
+                if existing_project is None:
+                    ena_json_data['projects'] = [
+                        self.converter._create_ena_project_json_obj(self.converter.eva_json_data['project'])]
+                self.converter.write_to_json(ena_json_data, expected_file)
+            try:
+                with open(output_ena_json) as open_file, open(expected_file) as expected_open_file:
+                    assert open_file.read() == expected_open_file.read()
+            finally:
+                self._delete_file(expected_file)
+
     def assert_json_equal(self, json1, json2):
         assert json.dumps(json1, sort_keys=True) == json.dumps(json2, sort_keys=True), \
             f"JSON objects are not equal.\nExpected: {json.dumps(json1, sort_keys=True)}\nGot:      {json.dumps(json2, sort_keys=True)}"
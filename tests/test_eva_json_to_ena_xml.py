@@ -338,3 +338,42 @@ class TestEVAJsonToENAXmlConverter(TestCase):
     def _print_xml(self, root):
         ET.indent(root, space="\t", level=0)
         print(ET.tostring(root, encoding='utf8').decode("utf-8"))
+
+    def test_single_submission_file_identical_to_in_memory_document(self):
+        expected_file = os.path.join(self.brokering_folder, 'To_Xml_Converter_Test.expected.xml')
+        for existing_project in (None, 'PRJEB00001'):
+            self.converter = EnaJson2XmlConverter('Submission-12345', self.metadata_file, self.brokering_folder,
+                                                  'To_Xml_Converter_Test')
+            # Override the cached property
+            self.converter.existing_project = existing_project
+            # Characters escaped or normalised when the document is pretty printed
+            self.converter.eva_json_data['project']['description'] = 'Ünïcode & <escaped> "text"\r\nwith new lines'
+            self.converter.eva_json_data['analysis'][0]['centre'] = 'Centre & "Co" \t\n'
+            with patch('eva_submission.ENA_submission.json_to_ENA_xml.get_scientific_name_from_ensembl',
+                       return_value='Homo sapiens'):
+                submission_file = self.converter.create_single_submission_file()
+                root = ET.Element('WEBIN')
+                project_data = self.converter.eva_json_data['project']
+                root.append(self.converter._create_submission_single_xml('ADD', project_data))
+                if existing_project is None:
+                    root.append(self.converter._create_project_xml())
+                root.append(self.converter._create_analysis_xml())
+                self.converter.write_xml_to_file(root, expected_file)
+            try:
+                with open(submission_file, 'rb') as open_file, open(expected_file, 'rb') as expected_open_file:
+                    assert open_file.read() == expected_open_file.read()
+            finally:
+                self._delete_file(submission_file)
+                self._delete_file(expected_file)
+
+    def test_single_submission_file_without_analysis(self):
+        self.converter.existing_project = 'PRJEB00001'
+        self.converter.eva_json_data['analysis'] = []
+        submission_file = self.converter.create_single_submission_file()
+        try:
+            with open(submission_file) as open_file:
+                root = ET.fromstring(open_file.read())
+            assert [child.tag for child in root] == ['SUBMISSION_SET', 'ANALYSIS_SET']
+            assert len(root.find('ANALYSIS_SET')) == 0
+        finally:
+            self._delete_file(submission_file)
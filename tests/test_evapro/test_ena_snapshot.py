@@ -0,0 +1,103 @@
+import datetime
+import os
+import shutil
+from unittest import TestCase
+from unittest.mock import Mock, patch
+
+from ebi_eva_common_pyutils.config import cfg
+
+from eva_submission.evapro.ena_snapshot import EnaMetadataSnapshotStore, get_ena_snapshot_store, snapshot_hash, \
+    get_from_snapshot
+
+
+class TestEnaMetadataSnapshotStore(TestCase):
+    resources_folder = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'resources')
+
+    def setUp(self) -> None:
+        self.snapshot_dir = os.path.join(self.resources_folder, 'ena_snapshots')
+        self.analyses = [('ERZ000001', 'title', datetime.datetime(2025, 1, 1), {'Illumina HiSeq 2500'},
+                          {'files': {'ERZ000001': [('ERF000001', datetime.date(2025, 1, 2))]}})]
+
+    def tearDown(self) -> None:
+        if os.path.exists(self.snapshot_dir):
+            shutil.rmtree(self.snapshot_dir)
+
+    def test_get(self):
+        store = EnaMetadataSnapshotStore(self.snapshot_dir, max_age=3600)
+        fetch = Mock(return_value=self.analyses)
+        assert store.get('PRJEB00001', ('analyses',), fetch) == self.analyses
+        assert store.get('PRJEB00001', ('analyses',), fetch) == self.analyses
+        fetch.assert_called_once()
+        entry = store.get_entry('PRJEB00001', ('analyses',))
+        assert entry['hash'] == snapshot_hash(self.analyses)
+        # Other projects and keys are fetched separately
+        store.get('PRJEB00002', ('analyses',), fetch)
+        store.get('PRJEB00001', ('parent_projects',), fetch)
+        assert fetch.call_count == 3
+
+        # Another process reads the snapshot from the file with the original types
+        fetch = Mock(return_value=[])
+        store = EnaMetadataSnapshotStore(self.snapshot_dir, max_age=3600)
+        assert store.get('PRJEB00001', ('analyses',), fetch) == self.analyses
+        fetch.assert_not_called()
+        assert os.path.isfile(os.path.join(self.snapshot_dir, 'PRJEB00001.snapshot.json'))
+
+    def test_refresh_older_entries(self):
+        store = EnaMetadataSnapshotStore(self.snapshot_dir, max_age=3600)
+        fetch = Mock(return_value=self.analyses)
+        with patch('eva_submission.evapro.ena_snapshot.time.time', return_value=1000):
+            store.get('PRJEB00001', ('analyses',), fetch)
+        with patch('eva_submission.evapro.ena_snapshot.time.time', return_value=4000):
+            store.get('PRJEB00001', ('analyses',), fetch)
+            # Refresh entries fetched more than 10 seconds ago
+            store.get('PRJEB00001', ('analyses',), fetch, max_age=10)
+        assert fetch.call_count == 2
+        assert store.get_entry('PRJEB00001', ('analyses',))['fetched'] == 4000
+
+    def test_invalidate(self):
+        store = EnaMetadataSnapshotStore(self.snapshot_dir, max_age=3600)
+        fetch = Mock(return_value=self.analyses)
+        store.get('PRJEB00001', ('analyses',), fetch)
+        store.get('PRJEB00001', ('parent_projects',), fetch)
+        store.invalidate('PRJEB00001', ('analyses',))
+        assert store.get_entry('PRJEB00001', ('analyses',)) is None
+        assert store.get_entry('PRJEB00001', ('parent_projects',)) is not None
+        store.invalidate('PRJEB00001')
+        assert EnaMetadataSnapshotStore(self.snapshot_dir).get_entry('PRJEB00001', ('parent_projects',)) is None
+
+    def test_invalidate_without_snapshot(self):
+        EnaMetadataSnapshotStore(self.snapshot_dir).invalidate('PRJEB00001')
+        assert not os.path.exists(self.snapshot_dir)
+
+    def test_ignore_invalid_snapshot(self):
+        os.makedirs(self.snapshot_dir)
+        store = EnaMetadataSnapshotStore(self.snapshot_dir, max_age=3600)
+        for content in ['not json', '{"version": 1, "entries": {}}']:
+            with open(store.snapshot_file('PRJEB00001'), 'w') as open_file:
+                open_file.write(content)
+            store = EnaMetadataSnapshotStore(self.snapshot_dir, max_age=3600)
+            assert store.get_entry('PRJEB00001', ('analyses',)) is None
+
+    def test_max_age_from_config(self):
+        with patch.dict(cfg.content, {'ena': {'snapshot_max_age': 0}}):
+            store = EnaMetadataSnapshotStore(self.snapshot_dir)
+        assert store.max_age == 0
+        fetch = Mock(return_value=self.analyses)
+        store.get('PRJEB00001', ('analyses',), fetch)
+        store.get('PRJEB00001', ('analyses',), fetch)
+        assert fetch.call_count == 2
+        assert store.get_fresh_data('PRJEB00001', ('analyses',)) is None
+        assert store.get_fresh_data('PRJEB00001', ('analyses',), max_age=3600) == self.analyses
+
+    def test_snapshot_hash(self):
+        assert snapshot_hash({'a': {'x', 'y', 'z'}, 'b': 1}) == snapshot_hash({'b': 1, 'a': {'z', 'y', 'x'}})
+        assert snapshot_hash(self.analyses) != snapshot_hash(self.analyses[:0])
+
+    def test_get_from_snapshot(self):
+        fetch = Mock(return_value=self.analyses)
+        assert get_from_snapshot(None, 'PRJEB00001', ('analyses',), fetch) == self.analyses
+        store = get_ena_snapshot_store(self.snapshot_dir)
+        assert store is get_ena_snapshot_store(self.snapshot_dir)
+        get_from_snapshot(store, None, ('analyses',), fetch)
+        assert fetch.call_count == 2
+        assert not os.path.exists(self.snapshot_dir)
@@ -1,9 +1,14 @@
 import datetime
 import os.path
+import re
+import sqlite3
+import tempfile
 import unittest
+from unittest.mock import patch
 
 import pytest
 
+from eva_submission.evapro.ena_snapshot import EnaMetadataSnapshotStore
 from eva_submission.evapro.find_from_ena import ApiEnaProjectFinder
 from eva_submission.evapro.populate_evapro import OracleEnaProjectFinder
 from eva_submission.submission_config import load_config
@@ -157,6 +162,168 @@ class TestEnaProjectFinder(unittest.TestCase):
         assert results == expected_files
 
 
+class ContextCursor(sqlite3.Cursor):
+    """SQLite cursor usable in a with statement like the oracledb cursor."""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+
+class TestOracleEnaProjectFinderInBulk(unittest.TestCase):
+    """Runs the ERA queries against an in-memory SQLite database attached as era with the tables used."""
+
+    submission_xml = (
+        '<SUBMISSION_SET><SUBMISSION alias="{alias}"><ACTIONS>'
+        '<ACTION><ADD schema="analysis" source="{alias}.Analysis.xml"/></ACTION>'
+        '<ACTION><HOLD HoldUntilDate="2025-04-01"/></ACTION>'
+        '</ACTIONS></SUBMISSION></SUBMISSION_SET>'
+    )
+
+    def setUp(self):
+        self.connection = sqlite3.connect(':memory:', detect_types=sqlite3.PARSE_DECLTYPES)
+        self.connection.execute("attach database ':memory:' as era")
+        self.connection.create_function('regexp_substr', 2, lambda string, pattern: re.search(pattern, string).group(0))
+        self.queries = []
+        self.connection.set_trace_callback(self.queries.append)
+        self.connection.executescript("""
+            create table era.study (study_id text, project_id text, submission_id text);
+            create table era.analysis (analysis_id text, study_id text, bioproject_id text, submission_id text,
+                status_id integer, submission_account_id text, analysis_type text);
+            create table era.submission (submission_id text, submission_xml text, last_updated timestamp);
+            create table era.sample (sample_id text, biosample_id text);
+            create table era.analysis_sample (analysis_id text, sample_id text);
+            create table era.analysis_submission_file (analysis_id text);
+            create table era.webin_file (data_file_owner_id text, submission_file_id text, data_file_path text,
+                checksum text, data_file_format text, bytes integer);
+        """)
+        self.connection.executemany('insert into era.study values (?, ?, ?)', [
+            ('ERP000001', 'PRJEB00001', 'ERA000001'), ('ERP000002', 'PRJEB00002', 'ERA000002')
+        ])
+        self.connection.executemany('insert into era.analysis values (?, ?, ?, ?, ?, ?, ?)', [
+            ('ERZ000001', 'ERP000001', None, 'ERA000001', 4, 'Webin-1008', 'SEQUENCE_VARIATION'),
+            ('ERZ000002', 'ERP000001', None, 'ERA000003', 4, 'Webin-1008', 'SEQUENCE_VARIATION'),
+            ('ERZ000003', None, 'PRJEB00001', 'ERA000003', 2, 'Webin-1008', 'SEQUENCE_VARIATION'),
+            # Suppressed, from another account, not a variant analysis or in another project
+            ('ERZ000004', 'ERP000001', None, 'ERA000001', 5, 'Webin-1008', 'SEQUENCE_VARIATION'),
+            ('ERZ000005', 'ERP000001', None, 'ERA000001', 4, 'Webin-1', 'SEQUENCE_VARIATION'),
+            ('ERZ000006', 'ERP000001', None, 'ERA000001', 4, 'Webin-1008', 'PROCESSED_READS'),
+            ('ERZ000007', 'ERP000002', None, 'ERA000002', 4, 'Webin-1008', 'SEQUENCE_VARIATION'),
+        ])
+        self.connection.executemany('insert into era.submission values (?, ?, ?)', [
+            (submission_id, self.submission_xml.format(alias=alias), datetime.datetime(2025, 1, 1))
+            for submission_id, alias in (('ERA000001', 'ELOAD_1'), ('ERA000002', 'ELOAD_2'), ('ERA000003', 'ELOAD_3'))
+        ])
+        self.connection.executemany('insert into era.sample values (?, ?)', [
+            (f'ERS00000{i}', f'SAMEA00000{i}') for i in range(1, 5)
+        ])
+        self.connection.executemany('insert into era.analysis_sample values (?, ?)', [
+            ('ERZ000001', 'ERS000001'), ('ERZ000001', 'ERS000002'), ('ERZ000002', 'ERS000003'),
+            ('ERZ000007', 'ERS000004')
+        ])
+        self.connection.executemany('insert into era.analysis_submission_file values (?)', [
+            ('ERZ000001',), ('ERZ000001',), ('ERZ000002',), ('ERZ000007',)
+        ])
+        self.connection.executemany('insert into era.webin_file values (?, ?, ?, ?, ?, ?)', [
+            ('ERZ000001', 'ERF000001', 'path/to/ERZ000001/file1.vcf.gz', 'md5_1', 'VCF', 1000),
+            ('ERZ000001', 'ERF000002', 'path/to/ERZ000001/file1.vcf.gz.tbi', 'md5_2', 'TABIX', 10),
+            ('ERZ000002', 'ERF000003', 'file2.vcf.gz', 'md5_3', 'VCF', 2000),
+            ('ERZ000007', 'ERF000004', 'path/file7.vcf.gz', 'md5_4', 'VCF', 3000),
+        ])
+        self.finder = OracleEnaProjectFinder()
+        self.finder.era_connection = self.connection
+        self.finder.era_cursor = lambda: self.connection.cursor(factory=ContextCursor)
+
+    def tearDown(self):
+        self.connection.close()
+
+    def find_analyses_data_one_by_one(self, analysis_accessions):
+        return {
+            'analyses': analysis_accessions,
+            'files': dict((analysis, list(self.finder.find_files_in_ena(analysis))) for analysis in analysis_accessions),
+            'samples': dict((analysis, list(self.finder.find_samples_in_ena(analysis)))
+                            for analysis in analysis_accessions),
+            'submissions': dict((analysis, list(self.finder.find_ena_submission_for_analysis(analysis)))
+                                for analysis in analysis_accessions)
+        }
+
+    def test_find_analysis_accessions_in_ena(self):
+        assert self.finder.find_analysis_accessions_in_ena('PRJEB00001') == ['ERZ000001', 'ERZ000002', 'ERZ000003']
+        assert self.finder.find_analysis_accessions_in_ena('PRJEB00003') == []
+
+    def test_find_analyses_data_in_bulk_for_project(self):
+        self.queries.clear()
+        analyses_data = self.finder.find_analyses_data_in_bulk(project_accession='PRJEB00001')
+        # One query for the analyses and one for each type of data
+        assert len(self.queries) == 4
+        assert analyses_data['files']['ERZ000001'] == [
+            ('ERZ000001', 'ERF000001', 'file1.vcf.gz', 'md5_1', 'VCF', 1000, 4),
+            ('ERZ000001', 'ERF000002', 'file1.vcf.gz.tbi', 'md5_2', 'TABIX', 10, 4)
+        ]
+        assert analyses_data['samples'] == {
+            'ERZ000001': [('ERS000001', 'SAMEA000001'), ('ERS000002', 'SAMEA000002')],
+            'ERZ000002': [('ERS000003', 'SAMEA000003')],
+            'ERZ000003': []
+        }
+        assert analyses_data['submissions']['ERZ000002'] == [
+            ('ERA000003', 'ELOAD_3', datetime.datetime(2025, 1, 1), '2025-04-01',
+             {'type': 'ADD', 'schema': 'analysis', 'source': 'ELOAD_3.Analysis.xml'})
+        ]
+        assert analyses_data == self.find_analyses_data_one_by_one(['ERZ000001', 'ERZ000002', 'ERZ000003'])
+
+    def test_find_analyses_data_in_bulk_for_analyses(self):
+        analysis_accessions = ['ERZ000001', 'ERZ000007', 'ERZ000002', 'ERZ000001']
+        expected_analyses_data = self.find_analyses_data_one_by_one(['ERZ000001', 'ERZ000007', 'ERZ000002'])
+        with patch('eva_submission.evapro.find_from_ena.ERA_BULK_QUERY_SIZE', 2):
+            self.queries.clear()
+            analyses_data = self.finder.find_analyses_data_in_bulk(analysis_accessions=analysis_accessions)
+        # Two queries of up to two analyses for each type of data
+        assert len(self.queries) == 6
+        assert analyses_data == expected_analyses_data
+        assert self.finder.find_analyses_data_in_bulk(analysis_accessions=[]) == {
+            'analyses': [], 'files': {}, 'samples': {}, 'submissions': {}
+        }
+
+    def test_prefetch_analyses_data(self):
+        expected_analyses_data = self.find_analyses_data_one_by_one(['ERZ000001', 'ERZ000002', 'ERZ000003'])
+        self.finder.prefetch_analyses_data(project_accession='PRJEB00001')
+        self.queries.clear()
+        assert self.find_analyses_data_one_by_one(['ERZ000001', 'ERZ000002', 'ERZ000003']) == expected_analyses_data
+        assert self.queries == []
+        # Analyses that were not prefetched are still queried
+        assert list(self.finder.find_samples_in_ena('ERZ000007')) == [('ERS000004', 'SAMEA000004')]
+        assert len(self.queries) == 1
+
+    def test_read_from_snapshot(self):
+        with tempfile.TemporaryDirectory() as snapshot_dir:
+            self.finder.snapshot_store = EnaMetadataSnapshotStore(snapshot_dir, max_age=3600)
+            analyses_data = self.finder.find_analyses_data_in_bulk(project_accession='PRJEB00001')
+            # The next run reads the project from the snapshot without querying ERA
+            finder = OracleEnaProjectFinder(snapshot_store=EnaMetadataSnapshotStore(snapshot_dir, max_age=3600))
+            finder.era_cursor = self.finder.era_cursor
+            self.queries.clear()
+            assert finder.find_analyses_data_in_bulk(project_accession='PRJEB00001') == analyses_data
+            assert finder.find_analysis_accessions_in_ena('PRJEB00001') == analyses_data['analyses']
+            assert self.queries == []
+            # Analyses of the project are read from the data of the whole project
+            selected_analyses_data = finder.find_analyses_data_in_bulk(project_accession='PRJEB00001',
+                                                                       analysis_accessions=['ERZ000001'])
+            assert selected_analyses_data == finder._select_analyses_data(analyses_data, ['ERZ000001'])
+            assert self.queries == []
+            # Other analyses are added to the single entry of selected analyses of the project
+            finder.find_analyses_data_in_bulk(project_accession='PRJEB00001', analysis_accessions=['ERZ000007'])
+            assert len(self.queries) == 3
+            finder.find_analyses_data_in_bulk(project_accession='PRJEB00001', analysis_accessions=['ERZ000008'])
+            assert len(self.queries) == 6
+            finder.find_analyses_data_in_bulk(project_accession='PRJEB00001', analysis_accessions=['ERZ000007'])
+            assert len(self.queries) == 6
+            entries = finder.snapshot_store._load('PRJEB00001')
+            assert sorted(entries) == [('analyses_data',), ('analysis_accessions',), ('selected_analyses_data',)]
+            assert entries[('selected_analyses_data',)]['data']['analyses'] == ['ERZ000007', 'ERZ000008']
+
+
 class TestApiEnaProjectFinder(unittest.TestCase):
 
     def test_find_samples_from_analysis(self):
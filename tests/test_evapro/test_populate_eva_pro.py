@@ -327,6 +327,53 @@ class TestEvaProjectLoader(TestCase):
                                 sample_in_file.file.filename))
             assert results == expected_results
 
+    def test_load_samples_from_vcf_file_missing_sample(self):
+        sample_name_2_sample_accession = {'NA00001': 'SAME000001', 'NA00002': 'SAME000002', 'NA00003': 'SAME000003'}
+        vcf_file = os.path.join(self.resources_dir, 'vcf_files', 'file_structural_variants.vcf')
+        engine = create_engine("sqlite+pysqlite:///:memory:", future=True)
+        with self.patch_evapro_engine(engine):
+            self.loader.begin_or_continue_transaction()
+            self.loader.insert_file('prj000001', 1, 1, os.path.basename(vcf_file), 'md5sum', 'vcf', 10, 'path/to/ftp')
+            # SAME000003 is not in the database
+            self.loader.insert_sample('SAME000001', 'SAME000001')
+            self.loader.insert_sample('SAME000002', 'SAME000002')
+            self.loader.eva_session.commit()
+
+            assert not self.loader.load_samples_from_vcf_file(sample_name_2_sample_accession, vcf_file, 'md5sum')
+            assert self.loader.eva_session.execute(select(SampleInFile)).fetchall() == []
+
+    def test_insert_samples_in_files(self):
+        engine = create_engine("sqlite+pysqlite:///:memory:", future=True)
+        with self.patch_evapro_engine(engine):
+            self.loader.begin_or_continue_transaction()
+            file_ids = [
+                self.loader.insert_file('prj000001', 1, 1, f'file{i}.vcf', f'md5sum{i}', 'vcf', 10, 'path/to/ftp').file_id
+                for i in range(2)
+            ]
+            biosample_accessions = [f'SAME{i:06}' for i in range(2500)]
+            for biosample_accession in biosample_accessions:
+                self.loader.insert_sample(biosample_accession, biosample_accession)
+            self.loader.eva_session.commit()
+
+            sample_objs = self.loader.get_samples(biosample_accessions + ['SAME_MISSING'])
+            assert len(sample_objs) == 2500
+            assert sample_objs['SAME000042'].biosample_accession == 'SAME000042'
+
+            # An existing link is not modified
+            self.loader.insert_sample_in_file(file_id=file_ids[0], sample_id=sample_objs['SAME000000'].sample_id,
+                                              name_in_file='existing_name')
+            self.loader.insert_samples_in_files(
+                file_ids=file_ids,
+                sample_ids_and_names=[(sample_objs[acc].sample_id, f'name_{acc}') for acc in biosample_accessions]
+            )
+            self.loader.eva_session.commit()
+            sample_in_files = [result.SampleInFile for result in self.loader.eva_session.execute(select(SampleInFile))]
+            assert len(sample_in_files) == 5000
+            names = {(sif.file_id, sif.sample.biosample_accession): sif.name_in_file for sif in sample_in_files}
+            assert names[(file_ids[0], 'SAME000000')] == 'existing_name'
+            assert names[(file_ids[1], 'SAME000000')] == 'name_SAME000000'
+            assert names[(file_ids[1], 'SAME002499')] == 'name_SAME002499'
+
     def _load_project_analysis_files_samples(
             self, project_accession='prj000001',  analysis_accession='erz000001',
             vcf_files=['vcf_file1.vcf', 'vcf_file2.vcf'],  vcf_file_md5=['md5sum1', 'md5sum2'],
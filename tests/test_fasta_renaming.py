@@ -0,0 +1,136 @@
+import os
+import shutil
+from unittest import TestCase
+from unittest.mock import patch
+
+import pysam
+
+from eva_submission.steps import fasta_renaming
+from eva_submission.steps.fasta_renaming import index_fasta, rename_fasta, read_fai, FaiRecord, get_fasta_index
+
+
+class TestFastaRenaming(TestCase):
+    resources = os.path.join(os.path.dirname(__file__), 'resources')
+
+    def setUp(self) -> None:
+        self.tmp_dir = os.path.join(self.resources, 'tmp_fasta_renaming')
+        os.makedirs(self.tmp_dir, exist_ok=True)
+        self.fasta = os.path.join(self.tmp_dir, 'GCA_000002945.2.fa')
+        shutil.copy(os.path.join(self.resources, 'GCA_000002945.2', 'GCA_000002945.2.fa'), self.fasta)
+        self.custom_fasta = os.path.join(self.tmp_dir, 'GCA_000002945.2_custom.fa')
+        self.rename_map = {'CU329670.1': 'I', 'CU329671.1': 'II', 'X54421.1': 'MT'}
+
+    def tearDown(self) -> None:
+        shutil.rmtree(self.tmp_dir)
+
+    def _write_fasta(self, content):
+        with open(self.fasta, 'w') as open_file:
+            open_file.write(content)
+
+    def _samtools_fai(self, fasta):
+        pysam.faidx(fasta)
+        records = read_fai(fasta + '.fai')
+        os.remove(fasta + '.fai')
+        return records
+
+    def test_index_fasta(self):
+        expected_records = self._samtools_fai(self.fasta)
+        assert index_fasta(self.fasta) == expected_records
+
+    def test_index_fasta_small_blocks(self):
+        self._write_fasta('>chr1 description\nACGTACGT\nACGTACGT\nACG\n>chr2\nAAAAAAAA\nCC\n>chr3\nGGGG\n')
+        expected_records = self._samtools_fai(self.fasta)
+        for block_size in [1, 2, 3, 7, 1000]:
+            with patch.object(fasta_renaming, 'BLOCK_SIZE', block_size):
+                assert index_fasta(self.fasta) == expected_records
+
+    def test_index_fasta_uneven_lines(self):
+        uneven_fastas = [
+            '>c1\nACGTACGT\nACG\nACGTACGT\n>c2\nAAAA\n',
+            '>c1\nACGT\nACGTACGT\n>c2\nAAAA\n',
+            '>c1\nACGTACGT\nACGTACGTA\n>c2\nAAAA\n',
+            '>c1\nACGTACGT\n\nACGTACGT\n>c2\nAAAA\n',
+            '>c1\r\nACGTACGT\r\nACGTACGT\nAC\r\n',
+        ]
+        for content in uneven_fastas:
+            self._write_fasta(content)
+            with self.assertRaises(pysam.utils.SamtoolsError):
+                self._samtools_fai(self.fasta)
+            for block_size in [1, 3, 7, 1000]:
+                with patch.object(fasta_renaming, 'BLOCK_SIZE', block_size), self.assertRaises(ValueError):
+                    index_fasta(self.fasta)
+
+    def test_index_fasta_even_lines(self):
+        even_fastas = [
+            '>c1\nACGTACGT\nACGTACGT\n>c2\nAAAA',
+            '>c1\r\nACGTACGT\r\nACGTACGT\r\nAC\r\n>c2\r\nAAAA\r\n',
+            '>c1\nACGTACGT\nACGTACG\n>c2\nA\n',
+        ]
+        for content in even_fastas:
+            self._write_fasta(content)
+            expected_records = self._samtools_fai(self.fasta)
+            for block_size in [1, 3, 7, 1000]:
+                with patch.object(fasta_renaming, 'BLOCK_SIZE', block_size):
+                    assert index_fasta(self.fasta) == expected_records
+
+    def test_rename_fasta(self):
+        rename_fasta(self.fasta, self.custom_fasta, lambda name: self.rename_map.get(name, name))
+        assert not os.path.islink(self.custom_fasta)
+        with open(self.fasta) as open_input, open(self.custom_fasta) as open_output:
+            expected_lines = [
+                '>' + self.rename_map.get(line.split()[0][1:], line.split()[0][1:]) + '\n'
+                if line.startswith('>') else line
+                for line in open_input
+            ]
+            assert open_output.readlines() == expected_lines
+        # The index is created along the fasta and is the same as the one samtools would create
+        records = read_fai(self.custom_fasta + '.fai')
+        os.remove(self.custom_fasta + '.fai')
+        assert records == self._samtools_fai(self.custom_fasta)
+        assert [record.name for record in records] == ['I', 'II', 'CU329672.1', 'MT', 'AB325691.1', 'FP565355.1']
+        with open(self.custom_fasta + '.rename_table.tsv') as open_file:
+            assert open_file.readline() == 'CU329670.1\tI\n'
+
+    def test_rename_fasta_uneven_lines(self):
+        self._write_fasta('>c1 description\nACGTACGT\nACG\nACGTACGT\n>c2\nAAAA\nAA\n')
+        with open(self.custom_fasta + '.fai', 'w') as open_file:
+            open_file.write('stale index\n')
+        rename_fasta(self.fasta, self.custom_fasta, lambda name: name.replace('c', 'chr'))
+        with open(self.custom_fasta) as open_file:
+            assert open_file.read() == '>chr1\nACGTACGT\nACGACGTA\nCGT\n>chr2\nAAAA\nAA\n'
+        # The sequences are wrapped again so that the output has the index samtools would create
+        records = read_fai(self.custom_fasta + '.fai')
+        os.remove(self.custom_fasta + '.fai')
+        assert records == self._samtools_fai(self.custom_fasta)
+        with open(self.custom_fasta + '.rename_table.tsv') as open_file:
+            assert open_file.read() == 'c1\tchr1\nc2\tchr2\n'
+
+    def test_rename_fasta_does_not_index_input(self):
+        rename_fasta(self.fasta, self.custom_fasta, lambda name: self.rename_map.get(name, name))
+        assert not os.path.exists(self.fasta + '.fai')
+
+    def test_rename_fasta_identity(self):
+        rename_fasta(self.fasta, self.custom_fasta, lambda name: name)
+        assert os.path.islink(self.custom_fasta)
+        assert os.path.realpath(self.custom_fasta) == os.path.realpath(self.fasta)
+        assert read_fai(self.custom_fasta + '.fai') == index_fasta(self.fasta)
+
+    def test_rename_fasta_uses_existing_index(self):
+        self._write_fasta('>chr1\nACGTACGT\nACGT\n>chr2\nAAAA\n')
+        pysam.faidx(self.fasta)
+        with patch.object(fasta_renaming, 'index_fasta') as mock_index:
+            rename_fasta(self.fasta, self.custom_fasta, lambda name: name.replace('chr', ''))
+        mock_index.assert_not_called()
+        with open(self.custom_fasta) as open_file:
+            assert open_file.read() == '>1\nACGTACGT\nACGT\n>2\nAAAA\n'
+        assert read_fai(self.custom_fasta + '.fai') == [FaiRecord('1', 12, 3, 8, 9), FaiRecord('2', 4, 20, 4, 5)]
+
+    def test_get_fasta_index_through_link(self):
+        self._write_fasta('>chr1\nACGTACGT\nACGT\n>chr2\nAAAA\n')
+        pysam.faidx(self.fasta)
+        # Nextflow stages the fasta as a link without its index
+        staged_fasta = os.path.join(self.tmp_dir, 'staged.fa')
+        os.symlink(self.fasta, staged_fasta)
+        with patch.object(fasta_renaming, 'index_fasta') as mock_index:
+            assert get_fasta_index(staged_fasta) == read_fai(self.fasta + '.fai')
+        mock_index.assert_not_called()
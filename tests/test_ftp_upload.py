@@ -0,0 +1,152 @@
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import threading
+from unittest import TestCase
+from unittest.mock import patch
+
+import pytest
+
+from eva_submission.ENA_submission.ftp_upload import FtpUploader, ChecksumMismatchError, UploadJournal
+
+pyftpdlib_servers = pytest.importorskip('pyftpdlib.servers')
+from pyftpdlib.authorizers import DummyAuthorizer
+from pyftpdlib.handlers import FTPHandler
+
+
+class TestFtpUploader(TestCase):
+
+    def setUp(self) -> None:
+        # pyftpdlib changes the working directory of the process to run CWD, concurrent sessions can leave it in the
+        # server directory so it is restored before the server directory is deleted
+        self.cwd = os.getcwd()
+        self.upload_dir = tempfile.mkdtemp(prefix='ftp_upload_')
+        self.local_dir = os.path.join(self.upload_dir, 'local')
+        self.server_dir = os.path.join(self.upload_dir, 'server')
+        os.makedirs(self.local_dir)
+        os.makedirs(self.server_dir)
+        self.journal_file = os.path.join(self.upload_dir, 'journal.json')
+
+        authorizer = DummyAuthorizer()
+        authorizer.add_user('user', 'password', self.server_dir, perm='elradfmwMT')
+        handler = type('TestFTPHandler', (FTPHandler,), {'authorizer': authorizer})
+        self.server = pyftpdlib_servers.ThreadedFTPServer(('127.0.0.1', 0), handler)
+        self.port = self.server.socket.getsockname()[1]
+        self.server_thread = threading.Thread(target=self.server.serve_forever, kwargs={'timeout': 0.1})
+        self.server_thread.start()
+
+        self.files = []
+        for i in range(4):
+            file_path = os.path.join(self.local_dir, f'file{i}.vcf.gz')
+            content = os.urandom(100000 + i)
+            with open(file_path, 'wb') as open_file:
+                open_file.write(content)
+            with open(file_path + '.md5', 'w') as open_file:
+                open_file.write(f'{hashlib.md5(content).hexdigest()}  {os.path.basename(file_path)}\n')
+            self.files.append(file_path)
+
+    def tearDown(self) -> None:
+        self.server.close_all()
+        self.server_thread.join()
+        os.chdir(self.cwd)
+        shutil.rmtree(self.upload_dir)
+
+    def _uploader(self):
+        return FtpUploader('127.0.0.1', self.port, 'user', 'password', 'ELOAD_1', nb_sessions=2,
+                           journal_file=self.journal_file, use_tls=False, retry_delay=0)
+
+    def _assert_uploaded(self, file_path):
+        with open(file_path, 'rb') as local_file, \
+                open(os.path.join(self.server_dir, 'ELOAD_1', os.path.basename(file_path)), 'rb') as remote_file:
+            assert local_file.read() == remote_file.read()
+
+    def test_upload_files(self):
+        self._uploader().upload_files(self.files)
+        for file_path in self.files:
+            self._assert_uploaded(file_path)
+        with open(self.journal_file) as open_file:
+            journal = json.load(open_file)
+        assert all(journal[file_path]['status'] == 'complete' for file_path in self.files)
+        assert journal[self.files[0]]['md5'] == hashlib.md5(open(self.files[0], 'rb').read()).hexdigest()
+
+        # Completed files are skipped after checking their size on the server
+        uploader = self._uploader()
+        with patch.object(FtpUploader, 'info') as m_info, patch('ftplib.FTP.storbinary') as m_storbinary:
+            uploader.upload_files(self.files)
+        m_storbinary.assert_not_called()
+        m_info.assert_any_call('file0.vcf.gz was already uploaded and has the same size on the FTP. Skip upload.')
+
+    def test_completed_file_missing_on_server(self):
+        self._uploader().upload_files(self.files)
+        os.remove(os.path.join(self.server_dir, 'ELOAD_1', 'file2.vcf.gz'))
+        uploader = self._uploader()
+        with patch.object(FtpUploader, 'warning') as m_warning:
+            uploader.upload_files(self.files)
+        m_warning.assert_called_once_with('file2.vcf.gz was already uploaded but has None bytes on the FTP instead of '
+                                          '100002. Upload it again.')
+        self._assert_uploaded(self.files[2])
+
+    def _write_partial_remote_file(self, file_path, nb_bytes):
+        os.makedirs(os.path.join(self.server_dir, 'ELOAD_1'), exist_ok=True)
+        with open(file_path, 'rb') as local_file, \
+                open(os.path.join(self.server_dir, 'ELOAD_1', os.path.basename(file_path)), 'wb') as remote_file:
+            remote_file.write(local_file.read(nb_bytes))
+
+    def test_resume_partial_upload(self):
+        # The upload of this file was interrupted
+        UploadJournal(self.journal_file).record(self.files[0], 'started', offset=0)
+        self._write_partial_remote_file(self.files[0], 30000)
+        self._uploader().upload_files(self.files[:1])
+        self._assert_uploaded(self.files[0])
+        with open(self.journal_file) as open_file:
+            journal = json.load(open_file)
+        assert journal[self.files[0]]['offset'] == 30000
+        assert journal[self.files[0]]['bytes_sent'] == 70000
+
+    def test_no_resume_of_regenerated_file(self):
+        UploadJournal(self.journal_file).record(self.files[0], 'started', offset=0)
+        self._write_partial_remote_file(self.files[0], 30000)
+        # The local file is created again with a different content after the interrupted upload
+        with open(self.files[0], 'wb') as open_file:
+            open_file.write(os.urandom(120000))
+        os.remove(self.files[0] + '.md5')
+        self._uploader().upload_files(self.files[:1])
+        self._assert_uploaded(self.files[0])
+        with open(self.journal_file) as open_file:
+            journal = json.load(open_file)
+        assert journal[self.files[0]]['offset'] == 0
+        assert journal[self.files[0]]['bytes_sent'] == 120000
+
+    def test_no_resume_without_journal(self):
+        # A smaller file on the server that is not known from the journal is replaced
+        self._write_partial_remote_file(self.files[0], 30000)
+        self._uploader().upload_files(self.files[:1])
+        self._assert_uploaded(self.files[0])
+        with open(self.journal_file) as open_file:
+            assert json.load(open_file)[self.files[0]]['offset'] == 0
+
+    def test_checksum_mismatch(self):
+        with open(self.files[1] + '.md5', 'w') as open_file:
+            open_file.write(f'{"0" * 32}  file1.vcf.gz\n')
+        with self.assertRaises(ChecksumMismatchError):
+            self._uploader().upload_files(self.files)
+        with open(self.journal_file) as open_file:
+            journal = json.load(open_file)
+        assert journal[self.files[1]]['status'] == 'failed'
+        assert journal[self.files[0]]['status'] == 'complete'
+
+        # The file that failed has the same size on the server but is sent and verified again
+        with self.assertRaises(ChecksumMismatchError):
+            self._uploader().upload_files(self.files[1:2])
+        with open(self.files[1], 'rb') as open_file:
+            checksum = hashlib.md5(open_file.read()).hexdigest()
+        with open(self.files[1] + '.md5', 'w') as open_file:
+            open_file.write(f'{checksum}  file1.vcf.gz\n')
+        with patch.object(FtpUploader, 'warning') as m_warning:
+            self._uploader().upload_files(self.files[1:2])
+        m_warning.assert_called_once_with('file1.vcf.gz has the same size on the FTP but its upload did not complete. '
+                                          'Upload it again.')
+        with open(self.journal_file) as open_file:
+            assert json.load(open_file)[self.files[1]]['status'] == 'complete'
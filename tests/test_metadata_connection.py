@@ -0,0 +1,55 @@
+import os
+from unittest import TestCase
+from unittest.mock import patch
+
+from eva_submission.metadata_connection import get_metadata_engine, get_metadata_connection_handle, \
+    dispose_metadata_engines, checkout_statistics
+
+
+def execute(conn, query):
+    cursor = conn.cursor()
+    cursor.execute(query)
+    return cursor.fetchall()
+
+
+class TestMetadataConnection(TestCase):
+    resources = os.path.join(os.path.dirname(__file__), 'resources')
+
+    def setUp(self) -> None:
+        self.db_file = os.path.join(self.resources, 'metadata_connection_test.sqlite')
+        self.patch_url = patch('eva_submission.metadata_connection._metadata_url',
+                               return_value=f'sqlite:///{self.db_file}')
+        self.patch_url.start()
+        checkout_statistics.reset()
+
+    def tearDown(self) -> None:
+        dispose_metadata_engines()
+        self.patch_url.stop()
+        if os.path.exists(self.db_file):
+            os.remove(self.db_file)
+
+    def test_shared_engine(self):
+        engine = get_metadata_engine('profile', 'settings.xml')
+        assert get_metadata_engine('profile', 'settings.xml') is engine
+        assert get_metadata_engine('other_profile', 'settings.xml') is not engine
+
+    def test_connections_are_reused(self):
+        with get_metadata_connection_handle('profile', 'settings.xml') as conn:
+            execute(conn, 'create table project (project_accession text)')
+        for i in range(10):
+            with get_metadata_connection_handle('profile', 'settings.xml') as conn:
+                execute(conn, f"insert into project values ('PRJEB{i}')")
+        with get_metadata_connection_handle('profile', 'settings.xml') as conn:
+            assert len(execute(conn, 'select * from project')) == 10
+        assert checkout_statistics.nb_checkouts == 12
+        assert checkout_statistics.nb_connections_opened == 1
+
+    def test_rollback_on_error(self):
+        with get_metadata_connection_handle('profile', 'settings.xml') as conn:
+            execute(conn, 'create table project (project_accession text)')
+        with self.assertRaises(ValueError):
+            with get_metadata_connection_handle('profile', 'settings.xml') as conn:
+                execute(conn, "insert into project values ('PRJEB1')")
+                raise ValueError()
+        with get_metadata_connection_handle('profile', 'settings.xml') as conn:
+            assert execute(conn, 'select * from project') == []
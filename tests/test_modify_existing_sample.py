@@ -1,3 +1,4 @@
+import glob
 import json
 import os
 from unittest import TestCase
@@ -5,6 +6,7 @@ from unittest import TestCase
 from bin.modify_existing_sample import XlsxExistingSampleParser
 from eva_submission.biosample_submission.biosamples_submitters import SampleJSONSubmitter
 from eva_submission.eload_utils import convert_spreadsheet_to_json
+from eva_submission.xlsx.xlsx_cache import JSON_CACHE_SUFFIX
 
 
 class TestModifyExistingSample(TestCase):
@@ -18,6 +20,8 @@ class TestModifyExistingSample(TestCase):
     def tearDown(self):
         if os.path.exists(self.metadata_json_file_path):
             os.remove(self.metadata_json_file_path)
+        for cached_json in glob.glob(self.metadata_xlsx + JSON_CACHE_SUFFIX):
+            os.remove(cached_json)
 
     def test_convert_all_fields_in_bioSamples(self):
         convert_spreadsheet_to_json(self.metadata_xlsx, self.metadata_json_file_path, xls_parser=XlsxExistingSampleParser)
@@ -0,0 +1,120 @@
+import json
+import os
+import shutil
+import subprocess
+import sys
+import threading
+import time
+from unittest import TestCase
+
+from eva_submission.qc_utils import LogIndex, index_log_file, QcCheckExecutor
+
+
+class TestLogIndex(TestCase):
+    resources_folder = os.path.join(os.path.dirname(__file__), 'resources')
+
+    def setUp(self):
+        self.logs_dir = os.path.join(self.resources_folder, 'eloads', 'ELOAD_103', '00_logs')
+        self.log_file = os.path.join(self.resources_folder, 'copy_accessioning.test1.vcf.gz.log')
+        shutil.copy(os.path.join(self.logs_dir, 'accessioning.test1.vcf.gz.log'), self.log_file)
+        self.index_file = os.path.join(self.resources_folder, 'copy_log_index.json')
+
+    def tearDown(self):
+        for file_path in [self.log_file, self.index_file]:
+            if os.path.exists(file_path):
+                os.remove(file_path)
+
+    def test_index_log_file(self):
+        summary = index_log_file(os.path.join(self.logs_dir, 'accessioning.test1.vcf.gz.log'))
+        assert summary == {'job_statuses': {'accession': 'COMPLETED'}, 'failed_step': None, 'variants_skipped': None}
+
+    def test_log_index(self):
+        log_index = LogIndex(self.index_file)
+        assert log_index.did_job_complete_successfully(self.log_file, 'accession')
+        assert not log_index.did_job_complete_successfully(self.log_file, 'variant_load')
+        assert log_index.get_variants_skipped(self.log_file) is None
+        assert log_index.get_failed_job_or_step_name(self.log_file) == 'job name could not be retrieved'
+        log_index.save()
+        with open(self.index_file) as open_file:
+            assert list(json.load(open_file)) == [os.path.abspath(self.log_file)]
+
+        # A resumed job appends to the log, which invalidates its summary
+        with open(self.log_file, 'a') as open_file:
+            open_file.write(
+                '2023-04-15 22:13:07.101  INFO 2638664 --- [main] o.s.b.c.l.support.SimpleJobLauncher      : '
+                'Job: [SimpleJob: [name=SUBSNP_ACCESSION_JOB]] launched with the following parameters: []\n'
+                '2023-04-15 22:13:08.101 ERROR 2638664 --- [main] o.s.batch.core.step.AbstractStep         : '
+                'Encountered an error executing step SUBSNP_ACCESSION_STEP in job SUBSNP_ACCESSION_JOB\n'
+                '2023-04-15 22:13:09.101  INFO 2638664 --- [main] o.s.b.c.l.support.SimpleJobLauncher      : '
+                'Job: [SimpleJob: [name=SUBSNP_ACCESSION_JOB]] completed with the following parameters: [] and '
+                'the following status: [FAILED]\n'
+            )
+        reloaded_log_index = LogIndex(self.index_file)
+        assert not reloaded_log_index.did_job_complete_successfully(self.log_file, 'accession')
+        assert reloaded_log_index.get_failed_job_or_step_name(self.log_file) == 'SUBSNP_ACCESSION_STEP'
+
+    def test_max_entries(self):
+        log_index = LogIndex(max_entries=2)
+        for log_file in sorted(os.listdir(self.logs_dir))[:3]:
+            log_index.summary(os.path.join(self.logs_dir, log_file))
+        assert len(log_index.entries) == 2
+
+
+class TestQcCheckExecutor(TestCase):
+
+    def test_run(self):
+        finished = []
+        release = threading.Event()
+
+        def check(name, duration=0.0):
+            def run_check():
+                time.sleep(duration)
+                finished.append(name)
+                return 'PASS', f'{name} report'
+            return run_check
+
+        def failing_check():
+            raise ValueError('Service is down')
+
+        def slow_check():
+            release.wait(10)
+            return 'PASS', 'slow report'
+
+        executor = QcCheckExecutor(max_workers=4, check_timeout=1)
+        executor.add_check('first', check('first', 0.5))
+        executor.add_check('second', check('second', 0.5))
+        executor.add_check('after_first', check('after_first'), depends_on=['first'])
+        executor.add_check('failing', failing_check)
+        executor.add_check('slow', slow_check)
+        start = time.perf_counter()
+        results = executor.run()
+        release.set()
+
+        # Independent checks run concurrently and the slow check is abandoned after its timeout
+        assert time.perf_counter() - start < 2
+        assert finished.index('first') < finished.index('after_first')
+        assert results['first'].result == 'PASS'
+        assert results['first'].report == 'first report'
+        assert results['first'].duration >= 0.5
+        assert results['failing'] == ('FAIL', 'Error: Service is down', results['failing'].duration)
+        assert results['slow'].result == 'FAIL'
+        assert results['slow'].report == 'Error: did not finish within 1s'
+
+    def test_timed_out_check_does_not_block_exit(self):
+        script = (
+            'import time\n'
+            'from eva_submission.qc_utils import QcCheckExecutor\n'
+            'executor = QcCheckExecutor(check_timeout=0.5)\n'
+            'executor.add_check("stuck", lambda: time.sleep(60))\n'
+            'print(executor.run()["stuck"].result)\n'
+        )
+        start = time.perf_counter()
+        process = subprocess.run([sys.executable, '-c', script], capture_output=True, text=True, timeout=30,
+                                 cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+        assert process.stdout.strip() == 'FAIL'
+        assert time.perf_counter() - start < 20
+
+    def test_unknown_dependency(self):
+        executor = QcCheckExecutor()
+        with self.assertRaises(ValueError):
+            executor.add_check('check', lambda: ('PASS', ''), depends_on=['missing'])
@@ -0,0 +1,52 @@
+import time
+from unittest import TestCase
+from unittest.mock import Mock
+
+from eva_submission.ENA_submission.receipt_poller import EnaReceiptPoller, parse_retry_after
+
+
+def poll_responses(*status_codes, headers=None):
+    responses = iter([Mock(status_code=status_code, headers=headers or {}) for status_code in status_codes])
+    return lambda: next(responses)
+
+
+class TestEnaReceiptPoller(TestCase):
+
+    def test_parse_retry_after(self):
+        assert parse_retry_after('120') == 120
+        assert parse_retry_after('Wed, 21 Oct 2015 07:28:00 GMT') == 0
+        assert parse_retry_after('not a date') is None
+        assert parse_retry_after(None) is None
+
+    def test_next_wait(self):
+        poller = EnaReceiptPoller(initial_wait=5, max_wait=30, backoff_factor=2, jitter=0)
+        response = Mock(headers={})
+        assert [poller.next_wait(nb_polls, response) for nb_polls in range(4)] == [5, 10, 20, 30]
+        assert poller.next_wait(0, Mock(headers={'Retry-After': '60'})) == 60
+        poller = EnaReceiptPoller(initial_wait=10, jitter=0.2)
+        assert all(8 <= poller.next_wait(0, response) <= 12 for _ in range(100))
+
+    def test_next_wait_short_retry_after(self):
+        poller = EnaReceiptPoller(initial_wait=5, jitter=0)
+        assert poller.next_wait(0, Mock(headers={'Retry-After': '0'})) == 5
+        assert poller.next_wait(3, Mock(headers={'Retry-After': '2'})) == 5
+        assert poller.next_wait(0, Mock(headers={'Retry-After': 'Wed, 21 Oct 2015 07:28:00 GMT'})) == 5
+
+    def test_wait_for_receipts_concurrently(self):
+        poller = EnaReceiptPoller(initial_wait=0.2, jitter=0)
+        start = time.monotonic()
+        results = poller.wait_for_receipts([
+            (f'https://example.com/link{i}', poll_responses(202, 202, 200)) for i in range(5)
+        ])
+        # Each submission waits 0.2 + 0.4 seconds and the waits overlap
+        assert time.monotonic() - start < 1.5
+        assert [result.status_code for result in results] == [200] * 5
+
+    def test_wait_for_receipt_timeout(self):
+        poller = EnaReceiptPoller(timeout=0.3, initial_wait=0.1, jitter=0)
+        results = poller.wait_for_receipts([
+            ('https://example.com/link1', poll_responses(*[202] * 10)),
+            ('https://example.com/link2', poll_responses(202, 200, headers={'Retry-After': '0'}))
+        ])
+        assert isinstance(results[0], TimeoutError)
+        assert results[1].status_code == 200
@@ -0,0 +1,57 @@
+import threading
+from unittest import TestCase
+from unittest.mock import Mock
+
+from eva_submission.xlsx.remote_lookups import RemoteLookups, LookupService
+
+
+class TestRemoteLookups(TestCase):
+
+    def setUp(self) -> None:
+        self.services = {'ncbi': LookupService(1), 'ena': LookupService(2)}
+
+    def test_lookups_are_deduplicated(self):
+        lookups = RemoteLookups(self.services)
+        function = Mock(side_effect=lambda accession: accession.lower())
+        for accession in ['GCA_1', 'GCA_2', 'GCA_1']:
+            lookups.add('ncbi', accession, function, accession)
+        lookups.run()
+        assert lookups.get('ncbi', 'GCA_1') == 'gca_1'
+        assert lookups.get('ncbi', 'GCA_2') == 'gca_2'
+        assert function.call_count == 2
+
+        # Lookups already run are not run again
+        lookups.add('ncbi', 'GCA_1', function, 'GCA_1')
+        lookups.run()
+        assert function.call_count == 2
+
+    def test_errors_are_raised_by_get(self):
+        lookups = RemoteLookups(self.services)
+        lookups.add('ena', 'PRJEB1', Mock(side_effect=ValueError('PRJEB1 is private')))
+        lookups.add('ena', 'PRJEB2', Mock(return_value=True))
+        lookups.run()
+        with self.assertRaises(ValueError):
+            lookups.get('ena', 'PRJEB1')
+        assert lookups.get('ena', 'PRJEB2') is True
+
+    def test_get_runs_pending_lookups(self):
+        lookups = RemoteLookups(self.services)
+        lookups.add('ena', 'PRJEB1', Mock(return_value=True))
+        assert lookups.get('ena', 'PRJEB1') is True
+
+    def test_services_run_concurrently(self):
+        # The NCBI lookup only completes once the ENA lookup started, which requires the services to run concurrently
+        ena_started = threading.Event()
+
+        def ncbi_lookup():
+            return ena_started.wait(timeout=5)
+
+        def ena_lookup():
+            ena_started.set()
+            return True
+
+        lookups = RemoteLookups(self.services)
+        lookups.add('ncbi', 'GCA_1', ncbi_lookup)
+        lookups.add('ena', 'PRJEB1', ena_lookup)
+        lookups.run()
+        assert lookups.get('ncbi', 'GCA_1') is True
@@ -0,0 +1,117 @@
+import json
+import os
+from unittest import TestCase
+from unittest.mock import patch, Mock
+
+from ebi_eva_common_pyutils.config import cfg
+
+from eva_submission.biosample_submission.biosamples_submitters import SampleReferenceSubmitter
+from eva_submission.biosample_submission.sample_cache import BioSamplesSampleCache, get_sample_cache
+
+
+class TestBioSamplesSampleCache(TestCase):
+    resources_folder = os.path.join(os.path.dirname(__file__), 'resources')
+
+    def setUp(self) -> None:
+        self.cache_file = os.path.join(self.resources_folder, 'biosamples_sample_cache.json')
+        self.communicator = Mock(token='token', bsd_url='https://bsd.example.com/biosamples')
+        self.samples = {
+            'SAME001': {'accession': 'SAME001', 'name': 'S1'},
+            'SAME002': {'accession': 'SAME002', 'name': 'S2'},
+        }
+
+    def tearDown(self) -> None:
+        if os.path.exists(self.cache_file):
+            os.remove(self.cache_file)
+
+    def _get(self, url, headers):
+        accession = url.split('/')[-1].split('?')[0]
+        if accession not in self.samples:
+            return Mock(status_code=404)
+        etag = f'"{accession}-v1"'
+        if headers.get('If-None-Match') == etag:
+            return Mock(status_code=304)
+        return Mock(status_code=200, json=Mock(return_value=self.samples[accession]), headers={'ETag': etag})
+
+    def test_get_sample(self):
+        cache = BioSamplesSampleCache(self.communicator)
+        with patch('eva_submission.biosample_submission.sample_cache.requests.get', side_effect=self._get) as m_get:
+            sample = cache.get_sample('SAME001')
+            # Callers can modify the sample without changing the cache
+            sample['name'] = 'modified'
+            assert cache.get_sample('SAME001') == {'accession': 'SAME001', 'name': 'S1'}
+            assert cache.get_sample('SAME001', include_curation=False) == {'accession': 'SAME001', 'name': 'S1'}
+        assert [call.args[0] for call in m_get.call_args_list] == [
+            'https://bsd.example.com/biosamples/samples/SAME001',
+            'https://bsd.example.com/biosamples/samples/SAME001?curationdomain='
+        ]
+        assert m_get.call_args_list[0].kwargs['headers']['Authorization'] == 'Bearer token'
+
+    def test_get_missing_sample(self):
+        cache = BioSamplesSampleCache(self.communicator)
+        with patch('eva_submission.biosample_submission.sample_cache.requests.get', side_effect=self._get) as m_get:
+            for _ in range(2):
+                with self.assertRaises(ValueError):
+                    cache.get_sample('SAME003')
+        m_get.assert_called_once()
+
+    def test_get_sample_client_error(self):
+        cache = BioSamplesSampleCache(self.communicator)
+        with patch('eva_submission.biosample_submission.sample_cache.requests.get',
+                   return_value=Mock(status_code=401)):
+            # Raised as a ValueError like the samples that do not exist so that the callers report it
+            with self.assertRaises(ValueError):
+                cache.get_sample('SAME001')
+
+    def test_revalidate_expired_samples(self):
+        cache = BioSamplesSampleCache(self.communicator, ttl=0)
+        with patch('eva_submission.biosample_submission.sample_cache.requests.get', side_effect=self._get) as m_get:
+            cache.get_sample('SAME001')
+            assert cache.get_sample('SAME001') == {'accession': 'SAME001', 'name': 'S1'}
+        assert m_get.call_count == 2
+        assert m_get.call_args_list[1].kwargs['headers']['If-None-Match'] == '"SAME001-v1"'
+
+    def test_invalidate(self):
+        cache = BioSamplesSampleCache(self.communicator)
+        with patch('eva_submission.biosample_submission.sample_cache.requests.get', side_effect=self._get) as m_get:
+            cache.get_sample('SAME001')
+            cache.invalidate('SAME001')
+            cache.get_sample('SAME001')
+        assert m_get.call_count == 2
+        assert 'If-None-Match' not in m_get.call_args_list[1].kwargs['headers']
+
+    def test_prefetch_and_persist(self):
+        cache = BioSamplesSampleCache(self.communicator, cache_file=self.cache_file, nb_workers=2)
+        with patch('eva_submission.biosample_submission.sample_cache.requests.get', side_effect=self._get) as m_get:
+            cache.prefetch(['SAME001', 'SAME002', 'SAME003', 'SAME001'])
+        assert m_get.call_count == 3
+        with open(self.cache_file) as open_file:
+            assert sorted(json.load(open_file)) == ['SAME001', 'SAME002']
+
+        # Another process loads the samples from the file
+        cache = BioSamplesSampleCache(self.communicator, cache_file=self.cache_file)
+        with patch('eva_submission.biosample_submission.sample_cache.requests.get', side_effect=self._get) as m_get:
+            assert cache.get_sample('SAME002') == {'accession': 'SAME002', 'name': 'S2'}
+        m_get.assert_not_called()
+
+    def test_get_sample_cache(self):
+        assert get_sample_cache(self.cache_file) is get_sample_cache(self.cache_file)
+        assert get_sample_cache(self.cache_file) is not get_sample_cache()
+
+    def test_disable_sample_cache(self):
+        with patch.dict(cfg.content, {'biosamples': {'sample_cache_ttl': 0, 'bsd_url': 'https://bsd.example.com/ttl0'}}):
+            cache = get_sample_cache()
+        assert cache.ttl == 0
+        cache.communicator = self.communicator
+        with patch('eva_submission.biosample_submission.sample_cache.requests.get', side_effect=self._get) as m_get:
+            cache.prefetch(['SAME001', 'SAME002'])
+            m_get.assert_not_called()
+            cache.get_sample('SAME001')
+            cache.get_sample('SAME001')
+        assert m_get.call_count == 2
+
+    def test_shared_rate_limiter(self):
+        cache = get_sample_cache()
+        with patch('eva_submission.biosample_submission.biosamples_submitters.WebinHALCommunicator'):
+            submitter = SampleReferenceSubmitter(['SAME001'], 'PRJEB001', sample_cache=cache)
+        assert submitter.rate_limiter is cache.rate_limiter
@@ -0,0 +1,65 @@
+import io
+import json
+from unittest import TestCase
+from xml.etree.ElementTree import Element, ElementTree
+
+from eva_submission.ENA_submission.streaming_writer import PrettyXmlWriter, write_json_object
+from eva_submission.ENA_submission.xlsx_to_ENA_xml import add_element, prettify
+
+
+class TestPrettyXmlWriter(TestCase):
+
+    def _create_element(self, name):
+        element = Element(name, alias='a & b <"c">', title='line1\nline2\ttab\r')
+        add_element(element, 'EMPTY')
+        add_element(element, 'TEXT', element_text='Ünïcode & <escaped> "text" \r\n with new lines\rand more')
+        parent = add_element(element, 'PARENT', accession='PRJEB00001')
+        add_element(parent, 'CHILD', element_text='child')
+        add_element(parent, 'CHILD', element_text='   ')
+        mixed = add_element(element, 'MIXED', element_text='text before the children')
+        add_element(mixed, 'CHILD', refname='ref')
+        empty_text = add_element(element, 'EMPTY_TEXT')
+        empty_text.text = ''
+        return element
+
+    def test_identical_to_prettify(self):
+        root = Element('WEBIN')
+        root.attrib['xmlns:xsi'] = 'http://www.w3.org/2001/XMLSchema-instance'
+        container = add_element(root, 'ANALYSIS_SET')
+        for name in ('ANALYSIS', 'ANALYSIS'):
+            container.append(self._create_element(name))
+        add_element(root, 'EMPTY_SET')
+
+        output = io.BytesIO()
+        writer = PrettyXmlWriter(output)
+        writer.start('WEBIN', {'xmlns:xsi': 'http://www.w3.org/2001/XMLSchema-instance'})
+        writer.start('ANALYSIS_SET')
+        for name in ('ANALYSIS', 'ANALYSIS'):
+            writer.write_element(self._create_element(name))
+        writer.end()
+        writer.start('EMPTY_SET')
+        writer.end()
+        writer.end()
+        assert output.getvalue() == prettify(ElementTree(root))
+
+
+class TestWriteJsonObject(TestCase):
+
+    def test_identical_to_json_dump(self):
+        analyses = [
+            {'alias': 'analysis 1', 'files': [{'fileName': 'ü.vcf.gz', 'checksum': 'a"b\n'}], 'empty': {}},
+            {'alias': 'analysis 2', 'samples': [], 'attributes': [[1, 2.5, None, True]]}
+        ]
+        fields = [('submission', {'alias': 'Submission-12345', 'actions': [{'type': 'ADD'}]}),
+                  ('analyses', iter(analyses)), ('empty_analyses', iter([])), ('projects', [])]
+        output = io.StringIO()
+        write_json_object(output, fields)
+        expected = io.StringIO()
+        json.dump({'submission': fields[0][1], 'analyses': analyses, 'empty_analyses': [], 'projects': []},
+                  expected, indent=4)
+        assert output.getvalue() == expected.getvalue()
+
+    def test_empty_object(self):
+        output = io.StringIO()
+        write_json_object(output, [])
+        assert output.getvalue() == json.dumps({}, indent=4)
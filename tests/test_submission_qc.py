@@ -1,11 +1,13 @@
+import glob
 import os
+import re
 from unittest import TestCase, mock
 from unittest.mock import patch
 
 from requests import HTTPError
 
 from eva_submission.submission_config import load_config
-from eva_submission.submission_qc_checks import EloadQC
+from eva_submission.submission_qc_checks import EloadQC, LOG_INDEX_FILE
 
 
 class TestSubmissionQC(TestCase):
@@ -17,9 +19,35 @@ class TestSubmissionQC(TestCase):
         load_config(config_file)
         os.chdir(self.top_dir)
 
+    def tearDown(self):
+        for log_index in glob.glob(os.path.join(self.resources_folder, 'eloads', '*', '00_logs', LOG_INDEX_FILE)):
+            os.remove(log_index)
+
     def _patch_metadata_handle(self):
         return patch('eva_submission.submission_qc_checks.get_metadata_connection_handle', autospec=True)
 
+    @staticmethod
+    def _route_queries(browsable_files, species_names):
+        """The checks run concurrently so the results are provided based on the query rather than the call order."""
+        species_names = list(species_names)
+
+        def get_all_results_for_query(pg_conn, query):
+            if 'browsable_file' in query:
+                return browsable_files
+            return species_names.pop(0)
+        return get_all_results_for_query
+
+    def _route_requests(self, study_json, study_list_json):
+        def get(url):
+            if 'meta/studies/list' in url:
+                return self._mock_response(json_data=study_list_json)
+            return self._mock_response(json_data=study_json)
+        return get
+
+    @staticmethod
+    def _normalise_durations(report):
+        return re.sub(r': \d+\.\d{2}s$', ': 0.00s', report, flags=re.MULTILINE)
+
     def _mock_response(self, status=200, content="CONTENT", json_data=None, raise_for_status=None):
         mock_resp = mock.Mock()
         mock_resp.raise_for_status = mock.Mock()
@@ -42,7 +70,8 @@ class TestSubmissionQC(TestCase):
                 patch('eva_submission.submission_qc_checks.FTP.nlst') as m_ftp_nlst, \
                 patch('eva_submission.submission_qc_checks.requests.get') as m_get, \
                 patch('eva_submission.submission_qc_checks.get_all_results_for_query') as m_get_browsable_files:
-            m_get_browsable_files.side_effect = [[['test3.vcf.gz'], ['test1.vcf.gz']], [[['Homo Sapiens']]]]
+            m_get_browsable_files.side_effect = self._route_queries([['test3.vcf.gz'], ['test1.vcf.gz']],
+                                                                    [[[['Homo Sapiens']]]])
             m_get.side_effect = [self._mock_response(status=500, raise_for_status=HTTPError("service is down")),
                                  self._mock_response(status=500, raise_for_status=HTTPError("service is down")),
                                  self._mock_response(status=500, raise_for_status=HTTPError("service is down")),
@@ -50,7 +79,8 @@ class TestSubmissionQC(TestCase):
                                  self._mock_response(status=500, raise_for_status=HTTPError("service is down")),
                                  self._mock_response(status=500, raise_for_status=HTTPError("service is down"))]
             m_ftp_nlst.return_value = []
-            self.assertEqual(self.expected_report_of_eload_101(), self.eload.run_qc_checks_for_submission())
+            self.assertEqual(self.expected_report_of_eload_101(),
+                             self._normalise_durations(self.eload.run_qc_checks_for_submission()))
             self.assertIn(EloadQC.config_section, self.eload.eload_cfg)
 
     def test_submission_qc_checks_failed_2(self):
@@ -62,14 +92,16 @@ class TestSubmissionQC(TestCase):
                 patch('eva_submission.submission_qc_checks.FTP.nlst') as m_ftp_nlst, \
                 patch('eva_submission.submission_qc_checks.requests.get') as m_get, \
                 patch('eva_submission.submission_qc_checks.get_all_results_for_query') as m_get_browsable_files:
-            m_get_browsable_files.side_effect = [[['test1.vcf.gz'], ['test2.vcf.gz']], [[['Homo Sapiens']]]]
-            m_get.side_effect = [self._mock_response(
-                json_data={"response": [{"numResults": 1, "numTotalResults": 1, "result": [{"id": "PRJEB99999"}]}]}),
-                                 self._mock_response(json_data={"response": [
-                                     {"numResults": 1, "numTotalResults": 1, "result": [{"studyId": "PRJEB99999"}]}]})]
+            m_get_browsable_files.side_effect = self._route_queries([['test1.vcf.gz'], ['test2.vcf.gz']],
+                                                                    [[[['Homo Sapiens']]]])
+            m_get.side_effect = self._route_requests(
+                {"response": [{"numResults": 1, "numTotalResults": 1, "result": [{"id": "PRJEB99999"}]}]},
+                {"response": [{"numResults": 1, "numTotalResults": 1, "result": [{"studyId": "PRJEB99999"}]}]}
+            )
             m_ftp_nlst.return_value = ['test1.vcf.gz.csi', 'test1.vcf.csi', 'test1.accessioned.vcf.gz.csi',
                                        'test1.accessioned.vcf.csi']
-            self.assertEqual(self.expected_report_of_eload_102(), self.eload.run_qc_checks_for_submission())
+            self.assertEqual(self.expected_report_of_eload_102(),
+                             self._normalise_durations(self.eload.run_qc_checks_for_submission()))
             self.assertIn(EloadQC.config_section, self.eload.eload_cfg)
 
     def test_submission_qc_checks_passed(self):
@@ -81,23 +113,21 @@ class TestSubmissionQC(TestCase):
                 patch('eva_submission.submission_qc_checks.FTP.nlst') as m_ftp_nlst, \
                 patch('eva_submission.submission_qc_checks.requests.get') as m_get, \
                 patch('eva_submission.submission_qc_checks.get_all_results_for_query') as m_get_all_results_for_query:
-            m_get_all_results_for_query.side_effect = [[['test1.vcf.gz'], ['test2.vcf.gz']], [['ecaballus_30']], [['ecaballus_30']]]
+            m_get_all_results_for_query.side_effect = self._route_queries([['test1.vcf.gz'], ['test2.vcf.gz']],
+                                                                          [[['ecaballus_30']], [['ecaballus_30']]])
             json_with_id = {
                 "response": [{"numResults": 1, "numTotalResults": 1, "result": [{"id": "PRJEB33333"}]}]
             }
             json_with_project_id = {
                 "response": [{"numResults": 1, "numTotalResults": 1, "result": [{"studyId": "PRJEB33333"}]}]
             }
-            m_get.side_effect = [
-                self._mock_response(json_data=json_with_id),
-                self._mock_response(json_data=json_with_project_id),
-                self._mock_response(json_data=json_with_project_id)
-            ]
+            m_get.side_effect = self._route_requests(json_with_id, json_with_project_id)
             m_ftp_nlst.return_value = ['test1.vcf.gz', 'test1.vcf.gz.csi', 'test1.vcf.csi', 'test1.accessioned.vcf.gz',
                                        'test1.accessioned.vcf.gz.csi', 'test1.accessioned.vcf.csi', 'test2.vcf.gz',
                                        'test2.vcf.gz.csi', 'test2.vcf.csi', 'test2.accessioned.vcf.gz',
                                        'test2.accessioned.vcf.gz.csi', 'test2.accessioned.vcf.csi']
-            self.assertEqual(self.expected_report_of_eload_103(), self.eload.run_qc_checks_for_submission())
+            self.assertEqual(self.expected_report_of_eload_103(),
+                             self._normalise_durations(self.eload.run_qc_checks_for_submission()))
             self.assertIn(EloadQC.config_section, self.eload.eload_cfg)
 
     def test_submission_qc_checks_missing_files(self):
@@ -109,18 +139,16 @@ class TestSubmissionQC(TestCase):
                 patch('eva_submission.submission_qc_checks.FTP.nlst') as m_ftp_nlst, \
                 patch('eva_submission.submission_qc_checks.requests.get') as m_get, \
                 patch('eva_submission.submission_qc_checks.get_all_results_for_query') as m_get_browsable_files:
-            m_get_browsable_files.side_effect = [[['test1.vcf.gz'], ['test2.vcf.gz']], [[['Homo Sapiens']]]]
-            m_get.side_effect = [
-                self._mock_response(json_data={
-                    "response": [{"numResults": 1, "numTotalResults": 1, "result": [{"id": "PRJEB44444"}]}]
-                }),
-                self._mock_response(json_data={
-                    "response": [{"numResults": 1, "numTotalResults": 1, "result": [{"studyId": "PRJEB44444"}]}]
-                })
-            ]
+            m_get_browsable_files.side_effect = self._route_queries([['test1.vcf.gz'], ['test2.vcf.gz']],
+                                                                    [[[['Homo Sapiens']]]])
+            m_get.side_effect = self._route_requests(
+                {"response": [{"numResults": 1, "numTotalResults": 1, "result": [{"id": "PRJEB44444"}]}]},
+                {"response": [{"numResults": 1, "numTotalResults": 1, "result": [{"studyId": "PRJEB44444"}]}]}
+            )
             m_ftp_nlst.return_value = ['test1.vcf.gz', 'test1.vcf.gz.csi', 'test1.vcf.csi', 'test1.accessioned.vcf.gz',
                                        'test1.accessioned.vcf.gz.csi', 'test1.accessioned.vcf.csi']
-            self.assertEqual(self.expected_report_of_eload_104(), self.eload.run_qc_checks_for_submission())
+            self.assertEqual(self.expected_report_of_eload_104(),
+                             self._normalise_durations(self.eload.run_qc_checks_for_submission()))
             self.assertIn(EloadQC.config_section, self.eload.eload_cfg)
 
     def test_check_if_variant_load_completed_successfully(self):
@@ -215,6 +243,22 @@ class TestSubmissionQC(TestCase):
             Success: FAIL
                 missing assemblies: ["['Homo Sapiens'](GCA_000001000.1)"]
         ----------------------------------
+        QC check durations:
+            browsable_files: 0.00s
+            accessioning: 0.00s
+            variants_skipped_accessioning: 0.00s
+            variant_load: 0.00s
+            annotation: 0.00s
+            variant_stats: 0.00s
+            study_stats: 0.00s
+            accession_import: 0.00s
+            clustering: 0.00s
+            remapping: 0.00s
+            back-propogation: 0.00s
+            ftp: 0.00s
+            study_webservice: 0.00s
+            study_metadata: 0.00s
+        ----------------------------------
         """
 
     def expected_report_of_eload_102(self):
@@ -303,6 +347,22 @@ class TestSubmissionQC(TestCase):
             Success: FAIL
                 missing assemblies: ["['Homo Sapiens'](GCA_000001000.1)"]
         ----------------------------------
+        QC check durations:
+            browsable_files: 0.00s
+            accessioning: 0.00s
+            variants_skipped_accessioning: 0.00s
+            variant_load: 0.00s
+            annotation: 0.00s
+            variant_stats: 0.00s
+            study_stats: 0.00s
+            accession_import: 0.00s
+            clustering: 0.00s
+            remapping: 0.00s
+            back-propogation: 0.00s
+            ftp: 0.00s
+            study_webservice: 0.00s
+            study_metadata: 0.00s
+        ----------------------------------
         """
 
     def expected_report_of_eload_103(self):
@@ -381,6 +441,22 @@ class TestSubmissionQC(TestCase):
             Success: PASS
                 missing assemblies: None
         ----------------------------------
+        QC check durations:
+            browsable_files: 0.00s
+            accessioning: 0.00s
+            variants_skipped_accessioning: 0.00s
+            variant_load: 0.00s
+            annotation: 0.00s
+            variant_stats: 0.00s
+            study_stats: 0.00s
+            accession_import: 0.00s
+            clustering: 0.00s
+            remapping: 0.00s
+            back-propogation: 0.00s
+            ftp: 0.00s
+            study_webservice: 0.00s
+            study_metadata: 0.00s
+        ----------------------------------
         """
 
     def expected_report_of_eload_104(self):
@@ -465,4 +541,20 @@ class TestSubmissionQC(TestCase):
             Success: PASS
                 missing assemblies: None
         ----------------------------------
+        QC check durations:
+            browsable_files: 0.00s
+            accessioning: 0.00s
+            variants_skipped_accessioning: 0.00s
+            variant_load: 0.00s
+            annotation: 0.00s
+            variant_stats: 0.00s
+            study_stats: 0.00s
+            accession_import: 0.00s
+            clustering: 0.00s
+            remapping: 0.00s
+            back-propogation: 0.00s
+            ftp: 0.00s
+            study_webservice: 0.00s
+            study_metadata: 0.00s
+        ----------------------------------
         """
\ No newline at end of file
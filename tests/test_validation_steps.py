@@ -4,6 +4,7 @@ from unittest.mock import patch
 
 from eva_submission import ROOT_DIR
 from eva_submission.steps.structural_variant_detection import detect_structural_variant
+from eva_submission.steps.structural_variant_engine import StructuralVariantEngine
 
 
 class TestValidationSteps(TestCase):
@@ -12,7 +13,8 @@ class TestValidationSteps(TestCase):
     output_vcf = os.path.join(resources_folder, 'vcf_files', 'output_structural_variants.vcf')
 
     def tearDown(self) -> None:
-        os.remove(self.output_vcf)
+        if os.path.exists(self.output_vcf):
+            os.remove(self.output_vcf)
 
     def test_detect_structural_variant(self):
 
@@ -22,3 +24,26 @@ class TestValidationSteps(TestCase):
         mprint.assert_called_once_with('1 lines containing structural variants')
         assert os.path.exists(self.output_vcf)
 
+
+    def test_detect_structural_variant_per_class(self):
+        sv_results = detect_structural_variant(self.vcf_file, self.output_vcf)
+        assert sv_results == {'nb_lines': 1, 'per_class': {'DEL': 1}}
+        with open(self.output_vcf) as open_file:
+            data_lines = [line for line in open_file if not line.startswith('#')]
+        assert len(data_lines) == 1
+        assert data_lines[0].split('\t')[4] == 'G,<DEL:ME>'
+
+    def test_structural_variant_engine(self):
+        block = (
+            '1\t100\t.\tA\tG\t.\tPASS\t.\n'
+            '1\t200\t.\tA\t<INV>\t.\tPASS\tSVTYPE=INV\n'
+            '1\t300\t.\tG\tG]17:198982]\t.\tPASS\tSVTYPE=BND\n'
+            '1\t400\t.\tT\tT.\t.\tPASS\t.\n'
+            '1\t500\t.\tT\t.\t.\tPASS\tAF=0.5\n'
+            '1\t600\t.\tC\tC<ctg1>\t.\tPASS\t.'
+        )
+        engine = StructuralVariantEngine()
+        sv_lines = engine.detect_in_block(block)
+        assert [line.split('\t')[1] for line in sv_lines] == ['200', '300', '400', '600']
+        assert sv_lines[0] == '1\t200\t.\tA\t<INV>\t.\tPASS\tSVTYPE=INV\n'
+        assert engine.counts_per_class == {'INV': 1, 'breakend': 1, 'single_breakend': 1, 'special_breakend': 1}
@@ -0,0 +1,99 @@
+import gzip
+import os
+import shutil
+import struct
+from unittest import TestCase
+
+import pysam
+
+from eva_submission.steps.vcf_index import find_vcf_index, get_contigs_from_index, \
+    read_index_statistics, read_index_references, IndexReference
+from eva_submission.steps.vcf_scanner import get_vcf_contigs
+
+
+def write_csi(index_file, sequences, pseudo_bin=True, min_shift=14, depth=5):
+    """
+    Writes a CSI index of a VCF where sequences is a list of (name, number of records, compressed bytes). Sequences
+    with None compressed bytes have no bin, like the contigs only present in the header in the index of bcftools.
+    """
+    names = b''.join(name.encode() + b'\x00' for name, _, _ in sequences)
+    # format, col_seq, col_beg, col_end, meta, skip, l_nm
+    aux = struct.pack('<7i', 2, 1, 2, 0, ord('#'), 0, len(names)) + names
+    content = [b'CSI\x01', struct.pack('<3i', min_shift, depth, len(aux)), aux, struct.pack('<i', len(sequences))]
+    offset = 0
+    for name, nb_records, compressed_bytes in sequences:
+        bins = []
+        if compressed_bytes is not None:
+            # One bin at the first position of the sequence containing one chunk
+            chunk = (offset << 16, (offset + compressed_bytes) << 16)
+            bins.append(struct.pack('<IQi2Q', ((1 << (depth * 3)) - 1) // 7, chunk[0], 1, *chunk))
+            if pseudo_bin:
+                bins.append(struct.pack('<IQi4Q', ((1 << ((depth + 1) * 3)) - 1) // 7 + 1, 0, 2, *chunk,
+                                        nb_records, 0))
+            offset += compressed_bytes
+        content.append(struct.pack('<i', len(bins)) + b''.join(bins))
+    with gzip.open(index_file, 'wb') as open_index:
+        open_index.write(b''.join(content))
+
+
+class TestVcfIndex(TestCase):
+    resources = os.path.join(os.path.dirname(__file__), 'resources')
+
+    def setUp(self) -> None:
+        self.tmp_dir = os.path.join(self.resources, 'tmp_vcf_index')
+        os.makedirs(self.tmp_dir, exist_ok=True)
+        self.vcf_file = os.path.join(self.tmp_dir, 'vcf_file_ASM294v2.vcf.gz')
+        pysam.tabix_compress(os.path.join(self.resources, 'vcf_files', 'vcf_file_ASM294v2.vcf'), self.vcf_file)
+
+    def tearDown(self) -> None:
+        shutil.rmtree(self.tmp_dir)
+
+    def test_contigs_from_tbi(self):
+        assert get_contigs_from_index(self.vcf_file) is None
+        pysam.tabix_index(self.vcf_file, preset='vcf')
+        assert find_vcf_index(self.vcf_file) == self.vcf_file + '.tbi'
+        assert [reference.name for reference in read_index_references(self.vcf_file + '.tbi')] == ['I', 'II', 'III', 'MT', 'MTR']
+
+    def test_contigs_from_csi(self):
+        pysam.tabix_index(self.vcf_file, preset='vcf', csi=True)
+        assert find_vcf_index(self.vcf_file) == self.vcf_file + '.csi'
+        assert get_contigs_from_index(self.vcf_file) == ['I', 'II', 'III', 'MT', 'MTR']
+
+    def test_contigs_from_index_with_header_contigs(self):
+        # The contigs of the header without records are in the index but have no bin
+        sequences = [('I', 1, 30), ('II', 1, 30), ('III', 1, 30), ('MT', 1, 30), ('MTR', 1, 30), ('chr=1', 0, None)]
+        write_csi(self.vcf_file + '.csi', sequences)
+        assert [reference.name for reference in read_index_references(self.vcf_file + '.csi')] == \
+            ['I', 'II', 'III', 'MT', 'MTR', 'chr=1']
+        assert get_contigs_from_index(self.vcf_file) == ['I', 'II', 'III', 'MT', 'MTR']
+        assert get_vcf_contigs(self.vcf_file) == ['I', 'II', 'III', 'MT', 'MTR']
+        # Older indexes do not have the pseudo-bin with the number of records
+        write_csi(self.vcf_file + '.csi', sequences, pseudo_bin=False)
+        assert read_index_references(self.vcf_file + '.csi')[4:] == [IndexReference('MTR', 1, None, 30),
+                                                                     IndexReference('chr=1', 0, None, 0)]
+        assert get_contigs_from_index(self.vcf_file) == ['I', 'II', 'III', 'MT', 'MTR']
+
+    def test_contigs_from_index_through_link(self):
+        pysam.tabix_index(self.vcf_file, preset='vcf', csi=True)
+        linked_vcf = os.path.join(self.tmp_dir, 'linked.vcf.gz')
+        os.symlink(self.vcf_file, linked_vcf)
+        assert get_contigs_from_index(linked_vcf) == ['I', 'II', 'III', 'MT', 'MTR']
+
+    def test_get_vcf_contigs(self):
+        # Without index the data lines are scanned
+        expected_contigs = get_vcf_contigs(self.vcf_file)
+        pysam.tabix_index(self.vcf_file, preset='vcf', csi=True)
+        # Empty the data so that only the index can provide the contigs
+        with open(self.vcf_file + '.csi', 'rb') as open_index:
+            index_content = open_index.read()
+        with open(self.vcf_file, 'wb'):
+            pass
+        with open(self.vcf_file + '.csi', 'wb') as open_index:
+            open_index.write(index_content)
+        assert get_vcf_contigs(self.vcf_file) == expected_contigs == ['I', 'II', 'III', 'MT', 'MTR']
+
+    def test_read_index_statistics(self):
+        pysam.tabix_index(self.vcf_file, preset='vcf', csi=True)
+        assert read_index_statistics(self.vcf_file + '.csi') == [('I', 1), ('II', 1), ('III', 1), ('MT', 1), ('MTR', 1)]
+        pysam.tabix_index(self.vcf_file, preset='vcf', force=True)
+        assert read_index_statistics(self.vcf_file + '.tbi') == [('I', 1), ('II', 1), ('III', 1), ('MT', 1), ('MTR', 1)]
@@ -0,0 +1,69 @@
+import os
+import shutil
+from unittest import TestCase
+
+from eva_submission.eload_utils import detect_vcf_aggregation
+from eva_submission.sample_utils import get_samples_from_vcf
+from eva_submission.steps.vcf_scanner import VcfScanner, ContigsObserver, SamplesObserver, get_vcf_summary, \
+    load_scan_summary, scan_summary_path, write_scan_summary, HeaderContigsObserver
+
+
+class TestVcfScanner(TestCase):
+    resources = os.path.join(os.path.dirname(__file__), 'resources')
+
+    def setUp(self) -> None:
+        self.input_vcf = os.path.join(self.resources, 'vcf_files', 'vcf_file_ASM294v2.vcf')
+        self.copy_vcf = os.path.join(self.resources, 'vcf_files', 'copy_file_structural_variants.vcf')
+        shutil.copy(os.path.join(self.resources, 'vcf_files', 'file_structural_variants.vcf'), self.copy_vcf)
+
+    def tearDown(self) -> None:
+        for file_path in [self.copy_vcf, scan_summary_path(self.copy_vcf)]:
+            if os.path.exists(file_path):
+                os.remove(file_path)
+
+    def test_scan(self):
+        results = VcfScanner(self.input_vcf, [ContigsObserver(), HeaderContigsObserver(), SamplesObserver()]).scan()
+        assert results == {
+            'contigs': ['I', 'II', 'III', 'MT', 'MTR'],
+            'header_contigs': ['I', 'II', 'III', 'MT', 'MTR', 'chr=1'],
+            'samples': ['S1']
+        }
+
+    def test_get_vcf_summary(self):
+        results = get_vcf_summary(self.copy_vcf)
+        assert results['contigs'] == ['20']
+        assert results['samples'] == ['NA00001', 'NA00002', 'NA00003']
+        assert results['nb_records'] == 5
+        assert results['structural_variants'] == {'nb_lines': 1, 'per_class': {'DEL': 1}}
+        assert results['aggregation'] == {'gt_in_format': False, 'af_in_info': False, 'nb_line_checked': 5}
+        # Nothing written unless requested
+        assert load_scan_summary(self.copy_vcf) is None
+
+    def test_sidecar_summary(self):
+        get_vcf_summary(self.copy_vcf, write_summary=True)
+        assert os.path.isfile(scan_summary_path(self.copy_vcf))
+        summary = load_scan_summary(self.copy_vcf)
+        assert summary['nb_records'] == 5
+
+        # The sidecar is used instead of the file
+        summary['samples'] = ['S1']
+        write_scan_summary(self.copy_vcf, summary)
+        assert get_samples_from_vcf(self.copy_vcf) == ['S1']
+        assert get_vcf_summary(self.copy_vcf, observer_names=['samples']) == {'samples': ['S1']}
+
+        # Modifying the VCF invalidates the sidecar
+        with open(self.copy_vcf, 'a') as open_file:
+            open_file.write('20\t1234568\t.\tG\tA\t50\tPASS\tNS=3\tGT\t0/1\t0/0\t1/1\n')
+        assert load_scan_summary(self.copy_vcf) is None
+        assert get_samples_from_vcf(self.copy_vcf) == ['NA00001', 'NA00002', 'NA00003']
+
+    def test_detect_vcf_aggregation_from_summary(self):
+        vcf_file = os.path.join(self.resources, 'vcf_files', 'file_no_aggregation.vcf')
+        copy_vcf = os.path.join(self.resources, 'vcf_files', 'copy_file_no_aggregation.vcf')
+        shutil.copy(vcf_file, copy_vcf)
+        try:
+            get_vcf_summary(copy_vcf, write_summary=True)
+            assert detect_vcf_aggregation(copy_vcf) == detect_vcf_aggregation(vcf_file) == 'none'
+        finally:
+            os.remove(copy_vcf)
+            os.remove(scan_summary_path(copy_vcf))
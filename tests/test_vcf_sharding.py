@@ -0,0 +1,100 @@
+import gzip
+import os
+import shutil
+from unittest import TestCase
+
+from eva_submission.steps.vcf_index import read_index_statistics, read_index_references
+from eva_submission.steps.vcf_sharding import prepare_indexed_vcf, plan_shards, write_shards, merge_norm_logs
+from tests.test_vcf_index import write_csi
+
+
+class TestVcfSharding(TestCase):
+    resources = os.path.join(os.path.dirname(__file__), 'resources')
+
+    def setUp(self) -> None:
+        self.tmp_dir = os.path.join(self.resources, 'tmp_vcf_sharding')
+        os.makedirs(self.tmp_dir, exist_ok=True)
+        # Sequences with 50, 40, 30, 20 and 10 records
+        self.nb_records = {'chr1': 50, 'chr2': 40, 'chr3': 30, 'chr4': 20, 'chr5': 10}
+        self.vcf_file = os.path.join(self.tmp_dir, 'input.vcf.gz')
+        with gzip.open(self.vcf_file, 'wt') as open_file:
+            open_file.write('##fileformat=VCFv4.2\n')
+            for contig in self.nb_records:
+                open_file.write(f'##contig=<ID={contig}>\n')
+            open_file.write('#CHROM\tPOS\tID\tREF\tALT\tQUAL\tFILTER\tINFO\n')
+            for contig, nb_records in self.nb_records.items():
+                for position in range(1, nb_records + 1):
+                    open_file.write(f'{contig}\t{position * 100}\t.\tA\tT\t.\t.\t.\n')
+
+    def tearDown(self) -> None:
+        shutil.rmtree(self.tmp_dir)
+
+    def test_prepare_indexed_vcf(self):
+        # The input is gzipped but not BGZF compressed
+        output_vcf = os.path.join(self.tmp_dir, 'output.vcf.gz')
+        index_file = prepare_indexed_vcf(self.vcf_file, output_vcf)
+        assert index_file == output_vcf + '.csi'
+        assert read_index_statistics(index_file) == list(self.nb_records.items())
+
+        # A BGZF input with its index is linked
+        linked_vcf = os.path.join(self.tmp_dir, 'linked.vcf.gz')
+        assert prepare_indexed_vcf(output_vcf, linked_vcf) == linked_vcf + '.csi'
+        assert os.path.islink(linked_vcf) and os.path.islink(linked_vcf + '.csi')
+
+    def test_prepare_unsorted_vcf(self):
+        unsorted_vcf = os.path.join(self.tmp_dir, 'unsorted.vcf')
+        with gzip.open(self.vcf_file, 'rt') as open_input, open(unsorted_vcf, 'w') as open_output:
+            lines = open_input.readlines()
+            open_output.writelines(lines[:-2] + [lines[-1], lines[-2]])
+        output_vcf = os.path.join(self.tmp_dir, 'output.vcf.gz')
+        assert prepare_indexed_vcf(unsorted_vcf, output_vcf) is None
+        # No partial index is left
+        assert sorted(os.listdir(self.tmp_dir)) == ['input.vcf.gz', 'output.vcf.gz', 'unsorted.vcf']
+        with gzip.open(output_vcf, 'rt') as open_file:
+            assert open_file.readlines() == lines[:-2] + [lines[-1], lines[-2]]
+
+    def test_plan_shards(self):
+        index_file = prepare_indexed_vcf(self.vcf_file, os.path.join(self.tmp_dir, 'output.vcf.gz'))
+        shards = plan_shards(index_file, 2)
+        # Shards contain contiguous sequences
+        assert shards == [[(0, 'chr1'), (1, 'chr2')], [(2, 'chr3'), (3, 'chr4'), (4, 'chr5')]]
+        # No more shards than sequences
+        assert plan_shards(index_file, 10) == [[(position, f'chr{position + 1}')] for position in range(5)]
+
+        shard_files = write_shards(shards, os.path.join(self.tmp_dir, 'shards'))
+        assert [os.path.basename(shard_file) for shard_file in shard_files] == ['shard_0.txt', 'shard_1.txt']
+        with open(shard_files[1]) as open_file:
+            assert open_file.read() == 'chr3\t1\t2147483647\nchr4\t1\t2147483647\nchr5\t1\t2147483647\n'
+        # An empty shard normalises the whole VCF
+        shard_files = write_shards([], os.path.join(self.tmp_dir, 'empty_shards'))
+        assert len(shard_files) == 1 and os.path.getsize(shard_files[0]) == 0
+
+    def test_plan_shards_without_pseudo_bin(self):
+        index_file = os.path.join(self.tmp_dir, 'no_pseudo_bin.vcf.gz.csi')
+        # chr2 has all its records in a single BGZF block so its compressed size is 0, chr3 is only in the header
+        write_csi(index_file, [('chr1', 0, 300), ('chr2', 0, 0), ('chr3', 0, None), ('chr4', 0, 100)],
+                  pseudo_bin=False)
+        assert [reference.compressed_bytes for reference in read_index_references(index_file)] == [300, 0, 0, 100]
+        assert plan_shards(index_file, 10) == [[(0, 'chr1')], [(1, 'chr2')], [(3, 'chr4')]]
+        assert plan_shards(index_file, 2) == [[(0, 'chr1')], [(1, 'chr2'), (3, 'chr4')]]
+
+        # With the pseudo-bin, the sequences without records are dropped
+        write_csi(index_file, [('chr1', 10, 300), ('chr2', 0, 50), ('chr3', 5, 0), ('chr4', 0, None)])
+        assert plan_shards(index_file, 10) == [[(0, 'chr1')], [(2, 'chr3')]]
+
+    def test_merge_norm_logs(self):
+        log_files = []
+        for i, totals in enumerate(['2/0/1/0', '5/1/0/2']):
+            log_file = os.path.join(self.tmp_dir, f'{i:06d}_bcftools_norm.log')
+            with open(log_file, 'w') as open_file:
+                open_file.write(f'NON_ACGTN_ALT\tchr{i}\t100\n')
+                open_file.write(f'Lines   total/split/realigned/skipped:\t{totals}\n')
+            log_files.append(log_file)
+        merged_log = os.path.join(self.tmp_dir, 'merged_bcftools_norm.log')
+        assert merge_norm_logs(log_files, merged_log) == [7, 1, 1, 2]
+        with open(merged_log) as open_file:
+            assert open_file.readlines() == [
+                'NON_ACGTN_ALT\tchr0\t100\n',
+                'NON_ACGTN_ALT\tchr1\t100\n',
+                'Lines   total/split/realigned/skipped:\t7/1/1/2\n'
+            ]
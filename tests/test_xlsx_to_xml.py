@@ -242,6 +242,31 @@ class TestEnaXlsConverter(TestCase):
         submission_file = self.converter.create_single_submission_file()
         assert os.path.exists(submission_file)
 
+    def _create_single_submission_file_in_memory(self, output_file):
+        root = ET.Element('WEBIN')
+        root.append(self.converter._create_submission_single_xml('ADD', self.converter.reader.project))
+        if not self.converter.is_existing_project:
+            root.append(self.converter._create_project_xml())
+        root.append(self.converter._create_analysis_xml())
+        self.converter.write_xml_to_file(root, output_file)
+
+    def test_single_submission_file_identical_to_in_memory_document(self):
+        expected_file = os.path.join(self.brokering_folder, 'TEST1.expected.xml')
+        for existing_project in (None, 'PRJEB00001'):
+            with patch('eva_submission.ENA_submission.xlsx_to_ENA_xml.get_scientific_name_from_ensembl',
+                       return_value='Homo sapiens'), \
+                    patch.object(EnaXlsxConverter, 'existing_project',
+                                 new_callable=PropertyMock(return_value=existing_project)):
+                self.converter = EnaXlsxConverter('TEST1', self.metadata_file, self.brokering_folder, 'TEST1')
+                submission_file = self.converter.create_single_submission_file()
+                self._create_single_submission_file_in_memory(expected_file)
+            try:
+                with open(submission_file, 'rb') as open_file, open(expected_file, 'rb') as expected_open_file:
+                    assert open_file.read() == expected_open_file.read()
+            finally:
+                self._delete_file(submission_file)
+                self._delete_file(expected_file)
+
     def test_create_submission_files_for_existing_project(self):
         # When the project already exist not PROJECT XML will be generated
         with patch.object(EnaXlsxConverter, 'existing_project', new_callable=PropertyMock(return_value='PRJEB00001')):
@@ -2,7 +2,7 @@ import datetime
 import os
 import shutil
 from unittest import TestCase
-from unittest.mock import patch
+from unittest.mock import patch, Mock
 
 from eva_submission import ROOT_DIR
 from eva_submission.xlsx.xlsx_parser_eva import EvaXlsxReader
@@ -119,3 +119,25 @@ class TestEvaXlsValidator(TestCase):
             'In Project, row 2, Child Project(s): PRJEB00001 does not exist or is private',
             'In Project, row 2, Child Project(s): ASMXX00001 is not a valid project accession'
         ]
+
+    def test_semantic_validation_lookups_run_once(self):
+        # All the samples have the same taxonomy, all the analyses the same reference
+        sample_cache = Mock(nb_workers=2)
+        sample_cache.get_sample.side_effect = ValueError('private')
+        validator = EvaXlsxValidator(os.path.join(ROOT_DIR, 'tests', 'resources', 'brokering', 'metadata_sheet_fail.xlsx'),
+                                     sample_cache=sample_cache)
+        with patch_retrieve_genbank_assembly_accessions_from_ncbi() as m_assembly, \
+                patch('eva_submission.xlsx.xlsx_validation.get_scientific_name_from_taxonomy',
+                      return_value='Homo sapiens') as m_sci_name, \
+                patch('eva_submission.xlsx.xlsx_validation.check_existing_project_in_ena',
+                      side_effect=lambda accession: accession != 'PRJEB00001') as m_project:
+            validator.semantic_validation()
+        m_assembly.assert_called_once()
+        m_sci_name.assert_called_once()
+        sample_cache.get_sample.assert_called_once_with('SAME000001')
+        assert m_project.call_count == len(set(call.args[0] for call in m_project.call_args_list))
+        assert validator.error_list == [
+            'In Sample, row 103 BioSamples accession SAME000001 does not exist or is private',
+            'In Project, row 2, Child Project(s): PRJEB00001 does not exist or is private',
+            'In Project, row 2, Child Project(s): ASMXX00001 is not a valid project accession'
+        ]